@@ -10,6 +10,7 @@ This module defines epistemic neural networks that can model posterior distribut
     and perform bayesian updates via deep learning
 """
 
+import math
 from abc import ABC, abstractmethod
 from typing import List, Optional
 
@@ -136,5 +137,173 @@ class Ensemble(EpistemicNeuralNetwork):
         if not persistent:
             self._resample_epistemic_index()
 
+    def forward_all(self, x: Tensor) -> Tensor:
+        """
+        Input:
+            x: Feature vector of state action pairs, shape (..., input_dim)
+        Output:
+            outputs of all ensemble members, shape (ensemble_size, ..., output_dim)
+        """
+        return torch.stack([model(x) for model in self.models])
+
+    def _resample_epistemic_index(self) -> None:
+        self.z = torch.randint(0, self.ensemble_size, (1,))
+
+
+class EnsembleLinear(nn.Module):
+    """
+    The linear layers of all members of an ensemble, with weights stacked into
+    parameters of shape (ensemble_size, in_features, out_features), so that all
+    members are evaluated with a single batched matrix multiplication.
+    Each member is initialized like `nn.Linear`.
+    Args:
+        ensemble_size: int. Number of members.
+        in_features: int. Input dimension.
+        out_features: int. Output dimension.
+    """
+
+    def __init__(self, ensemble_size: int, in_features: int, out_features: int) -> None:
+        super(EnsembleLinear, self).__init__()
+        self.ensemble_size = ensemble_size
+        self.in_features = in_features
+        self.out_features = out_features
+        self.weight = nn.Parameter(
+            torch.empty(ensemble_size, in_features, out_features)
+        )
+        self.bias = nn.Parameter(torch.empty(ensemble_size, 1, out_features))
+        self.reset_parameters()
+
+    def reset_parameters(self) -> None:
+        # the bound of the default initialization of `nn.Linear`
+        bound = 1 / math.sqrt(self.in_features) if self.in_features > 0 else 0
+        nn.init.uniform_(self.weight, -bound, bound)
+        nn.init.uniform_(self.bias, -bound, bound)
+
+    def forward(self, x: Tensor, member: Optional[int] = None) -> Tensor:
+        """
+        Input:
+            x: shape (batch_size, in_features), shared by all members, or
+                (ensemble_size, batch_size, in_features), one batch per member.
+            member: Optional. Only evaluates this member, on x of shape
+                (batch_size, in_features).
+        Output:
+            shape (ensemble_size, batch_size, out_features), or
+                (batch_size, out_features) for a single member.
+        """
+        if member is not None:
+            return torch.addmm(self.bias[member], x, self.weight[member])
+        if x.ndim == 2:
+            x = x.expand(self.ensemble_size, -1, -1)
+        return torch.baddbmm(self.bias, x, self.weight)
+
+
+class FusedMLP(nn.Module):
+    """
+    The MLPs (with ReLU hidden activations) of all members of an ensemble, made of
+    `EnsembleLinear` layers.
+    Args:
+        ensemble_size: int. Number of members.
+        input_dim: int. Input feature dimension.
+        hidden_dims: List[int]. Hidden layer dimensions.
+        output_dim: int. Output dimension.
+    """
+
+    def __init__(
+        self,
+        ensemble_size: int,
+        input_dim: int,
+        hidden_dims: Optional[List[int]],
+        output_dim: int = 1,
+    ) -> None:
+        super(FusedMLP, self).__init__()
+        dims = [input_dim] + (hidden_dims or []) + [output_dim]
+        self.layers = nn.ModuleList(
+            [
+                EnsembleLinear(ensemble_size, dims[i], dims[i + 1])
+                for i in range(len(dims) - 1)
+            ]
+        )
+
+    def forward(self, x: Tensor, member: Optional[int] = None) -> Tensor:
+        """
+        See `EnsembleLinear.forward`.
+        """
+        for i, layer in enumerate(self.layers):
+            if i > 0:
+                x = torch.relu(x)
+            x = layer(x, member=member)
+        return x
+
+
+class FusedEnsemble(EpistemicNeuralNetwork):
+    """
+    An ensemble of MLPs with prior (see `MLPWithPrior`) whose members are evaluated
+    together: the weights of all members are stacked, so that evaluating (and
+    training) the whole ensemble takes one batched matrix multiplication per layer
+    instead of one forward pass per member.
+    Args:
+        input_dim: int. Input feature dimension.
+        hidden_dims: List[int]. Hidden layer dimensions.
+        output_dim: int. Output dimension.
+        ensemble_size: int. Number of particles in the ensemble
+                            to construct posterior.
+        prior_scale: float. prior regularization scale.
+    """
+
+    def __init__(
+        self,
+        input_dim: int,
+        hidden_dims: Optional[List[int]],
+        output_dim: int = 1,
+        ensemble_size: int = 10,
+        prior_scale: float = 1.0,
+    ) -> None:
+        super(FusedEnsemble, self).__init__(input_dim, hidden_dims, output_dim)
+        self.ensemble_size = ensemble_size
+        self.base_net = FusedMLP(ensemble_size, input_dim, hidden_dims, output_dim)
+        self.prior_net: nn.Module = FusedMLP(
+            ensemble_size, input_dim, hidden_dims, output_dim
+        ).requires_grad_(False)
+        self.scale = prior_scale
+
+        self._resample_epistemic_index()
+
+    def _fused_forward(self, x: Tensor, member: Optional[int]) -> Tensor:
+        with torch.no_grad():
+            prior = self.scale * self.prior_net(x, member=member)
+        return self.base_net(x, member=member) + prior
+
+    def forward(
+        self, x: Tensor, z: Optional[Tensor] = None, persistent: bool = False
+    ) -> Tensor:
+        """
+        Input:
+            x: Feature vector of state action pairs
+            z: Single integer tensor. Ensemble epistemic index
+        Output:
+            posterior samples corresponding to z
+        """
+        if z is not None:
+            assert z.flatten().shape[0] == 1
+            ensemble_index = int(z.item())
+            assert ensemble_index >= 0 and ensemble_index < self.ensemble_size
+        else:
+            ensemble_index = int(self.z.item())
+
+        leading_shape = x.shape[:-1]
+        output = self._fused_forward(x.reshape(-1, x.shape[-1]), ensemble_index)
+        return output.view(*leading_shape, -1)
+
+    def forward_all(self, x: Tensor) -> Tensor:
+        """
+        Input:
+            x: Feature vector of state action pairs, shape (..., input_dim)
+        Output:
+            outputs of all ensemble members, shape (ensemble_size, ..., output_dim)
+        """
+        leading_shape = x.shape[:-1]
+        output = self._fused_forward(x.reshape(-1, x.shape[-1]), None)
+        return output.view(self.ensemble_size, *leading_shape, -1)
+
     def _resample_epistemic_index(self) -> None:
         self.z = torch.randint(0, self.ensemble_size, (1,))
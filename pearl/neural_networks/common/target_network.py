@@ -0,0 +1,149 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import torch
+import torch.nn as nn
+from torch.autograd.graph import increment_version
+
+
+class _FlatParameters:
+    """
+    Parameters whose data are views into a single contiguous buffer.
+    """
+
+    def __init__(self, parameters: List[nn.Parameter]) -> None:
+        self.parameters = parameters
+        self.buffer: torch.Tensor = torch.cat([p.data.reshape(-1) for p in parameters])
+        offset = 0
+        for p in parameters:
+            p.data = self.buffer[offset : offset + p.numel()].view_as(p)
+            offset += p.numel()
+        self._data_ptrs: List[int] = [p.data_ptr() for p in parameters]
+
+    def is_valid(self) -> bool:
+        # moving a module to another device, loading a module onto another storage or
+        # copying it replaces the data of its parameters, which are then not views
+        # into the buffer anymore
+        return all(
+            p.data_ptr() == data_ptr
+            for p, data_ptr in zip(self.parameters, self._data_ptrs)
+        )
+
+
+class TargetNetworkUpdater:
+    """
+    Updates a target network towards a source network with
+        target = (1 - tau) * target + tau * source,
+    either on every call to `update` or, with `step`, every `update_every_x_steps`
+    steps. A `tau` of 1 makes hard copies of the source network.
+
+    The parameters of both networks are kept in one contiguous buffer per dtype and
+    device, so that an update is a single in-place `lerp_` (or `copy_`) kernel rather
+    than a few kernels and temporaries per parameter.
+    Their `data` are views into the buffers, so the networks (and the optimizer of
+    the source network) are used exactly as before. Buffers are rebuilt whenever
+    the data of a parameter is replaced, e.g. when a network is moved to a device.
+
+    Parameters the target network shares with the source network are not updated.
+    """
+
+    def __init__(
+        self,
+        target_network: nn.Module,
+        source_network: nn.Module,
+        tau: float = 1.0,
+        update_every_x_steps: int = 1,
+    ) -> None:
+        """
+        Args:
+            target_network (nn.Module): the network to update.
+            source_network (nn.Module): the network to update it towards, with the same
+                architecture.
+            tau (float, optional): the default soft update coefficient. Defaults to 1,
+                i.e. hard copies.
+            update_every_x_steps (int, optional): number of calls to `step` per update.
+        """
+        self._target_network = target_network
+        self._source_network = source_network
+        self._tau = tau
+        self._update_every_x_steps = update_every_x_steps
+        self._steps = 0
+        # (target, source) flat parameters per dtype and device, built lazily
+        self._flat_parameters: Optional[
+            List[Tuple[_FlatParameters, _FlatParameters]]
+        ] = None
+
+    @property
+    def tau(self) -> float:
+        return self._tau
+
+    def step(self) -> bool:
+        """
+        Counts a step, and updates the target network every `update_every_x_steps`
+        steps. Returns whether the target network was updated.
+        """
+        self._steps += 1
+        if self._steps % self._update_every_x_steps != 0:
+            return False
+        self.update()
+        return True
+
+    @torch.no_grad()
+    def update(self, tau: Optional[float] = None) -> None:
+        """
+        Updates the target network with `tau`, or with the default tau if None.
+        """
+        tau = self._tau if tau is None else tau
+        for target, source in self._get_flat_parameters():
+            if tau == 1.0:
+                target.buffer.copy_(source.buffer)
+            else:
+                target.buffer.lerp_(source.buffer, tau)
+            # the parameters were modified through the buffer, which their version
+            # counters (used by autograd and by version-keyed caches) do not track
+            increment_version(target.parameters)
+
+    def _get_flat_parameters(
+        self,
+    ) -> List[Tuple[_FlatParameters, _FlatParameters]]:
+        if self._flat_parameters is not None and all(
+            target.is_valid() and source.is_valid()
+            for target, source in self._flat_parameters
+        ):
+            return self._flat_parameters
+
+        groups: Dict[Tuple[torch.dtype, torch.device], List[Tuple[Any, Any]]] = {}
+        for target_param, source_param in zip(
+            self._target_network.parameters(), self._source_network.parameters()
+        ):
+            if target_param is source_param:
+                continue
+            assert (
+                target_param.shape == source_param.shape
+                and target_param.dtype == source_param.dtype
+                and target_param.device == source_param.device
+            ), "target and source networks must have matching parameters"
+            groups.setdefault((target_param.dtype, target_param.device), []).append(
+                (target_param, source_param)
+            )
+        self._flat_parameters = [
+            (
+                _FlatParameters([target_param for target_param, _ in pairs]),
+                _FlatParameters([source_param for _, source_param in pairs]),
+            )
+            for pairs in groups.values()
+        ]
+        return self._flat_parameters
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the buffers are views of the parameters of the networks, and would be
+        # duplicated when copying or pickling
+        state = self.__dict__.copy()
+        state["_flat_parameters"] = None
+        return state
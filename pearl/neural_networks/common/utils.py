@@ -163,6 +163,11 @@ def update_target_network(
     target_network: nn.Module, source_network: nn.Module, tau: float
 ) -> None:
     # Q_target = (1 - tao) * Q_target + tao*Q
+    # A one-shot update, which leaves the parameters of both networks where they
+    # are. Owners updating the same networks at every step keep a
+    # `TargetNetworkUpdater` instead.
+    target_params = []
+    source_params = []
     for target_param, source_param in zip(
         target_network.parameters(), source_network.parameters()
     ):
@@ -170,8 +175,13 @@ def update_target_network(
             # skip soft-updating when the target network shares the parameter with
             # the network being train.
             continue
-        new_param = tau * source_param.data + (1.0 - tau) * target_param.data
-        target_param.data.copy_(new_param)
+        target_params.append(target_param.data)
+        source_params.append(source_param.data)
+    if len(target_params) == 0:
+        return
+    # a single fused (multi-tensor) update of all parameters, rather than a few
+    # kernels per parameter
+    torch._foreach_lerp_(target_params, source_params, tau)
 
 
 def ensemble_forward(
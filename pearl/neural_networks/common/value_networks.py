@@ -10,12 +10,17 @@ This module defines several types of value neural networks.
 """
 
 
+import weakref
 from abc import ABC
-from typing import Any, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import torch
 import torch.nn as nn
-from pearl.neural_networks.common.epistemic_neural_networks import Ensemble
+import torch.nn.functional as F
+from pearl.neural_networks.common.epistemic_neural_networks import (
+    Ensemble,
+    FusedEnsemble,
+)
 
 from pearl.neural_networks.sequential_decision_making.q_value_network import (
     DistributionalQValueNetwork,
@@ -353,6 +358,122 @@ class QuantileQValueNetwork(DistributionalQValueNetwork):
         return self._action_dim
 
 
+class _ActionFeatureCache:
+    """
+    Caches features computed from a set of actions shared by many calls, such as
+    the actions of a fixed action space, together with the versions of the actions
+    tensor and of the parameters the features were computed with. Features are
+    recomputed whenever either of them is modified in place (e.g. by an optimizer
+    step), and are only cached when gradients are disabled.
+
+    The cache is dropped when its module is copied or pickled.
+    """
+
+    def __init__(self) -> None:
+        self._clear()
+
+    def _clear(self) -> None:
+        self._actions_ref: Optional[weakref.ref] = None
+        self._versions: Tuple[int, ...] = ()
+        self._features: Optional[Tensor] = None
+
+    def get(
+        self,
+        actions: Tensor,
+        parameters: Iterable[Tensor],
+        compute_features: Callable[[Tensor], Tensor],
+    ) -> Tensor:
+        if torch.is_grad_enabled() or actions.dim() != 2:
+            # only sets of actions shared by all states are cached
+            return compute_features(actions)
+        versions = (actions._version,) + tuple(p._version for p in parameters)
+        actions_ref = self._actions_ref
+        if (
+            self._features is not None
+            and actions_ref is not None
+            and actions_ref() is actions
+            and self._versions == versions
+        ):
+            return self._features
+        features = compute_features(actions)
+        self._actions_ref = weakref.ref(actions)
+        self._versions = versions
+        self._features = features
+        return features
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._clear()
+
+
+def _split_first_linear_layer(mlp: nn.Module) -> Optional[nn.Linear]:
+    """
+    Returns the first layer of an `mlp_block` if it is linear and may be applied
+    to its inputs in parts, and None otherwise.
+    """
+    if not isinstance(mlp, nn.Sequential) or len(mlp) == 0:
+        return None
+    first_block = mlp[0]
+    if not isinstance(first_block, nn.Sequential) or not isinstance(
+        first_block[0], nn.Linear
+    ):
+        return None
+    if any(isinstance(m, nn.modules.batchnorm._BatchNorm) for m in mlp.modules()):
+        # batch normalization expects a single batch dimension
+        return None
+    return first_block[0]
+
+
+def _forward_after_first_linear_layer(mlp: nn.Sequential, hidden: Tensor) -> Tensor:
+    for layer in mlp[0][1:]:
+        hidden = layer(hidden)
+    for block in mlp[1:]:
+        hidden = block(hidden)
+    return hidden
+
+
+def _project_actions(
+    first_layer: nn.Linear, state_features_dim: int
+) -> Callable[[Tensor], Tensor]:
+    """
+    The part of the first layer of an mlp taking [state features, action features]
+    which only depends on the action features, including the bias.
+    """
+    return lambda action_features: F.linear(
+        # like the concatenation it replaces, promotes e.g. integer one-hot actions
+        action_features.to(first_layer.weight.dtype),
+        first_layer.weight[:, state_features_dim:],
+        first_layer.bias,
+    )
+
+
+def _score_state_action_pairs(
+    mlp: nn.Module,
+    state_features: Tensor,
+    projected_action_features: Tensor,
+    first_layer: nn.Linear,
+) -> Tensor:
+    """
+    Applies an `mlp_block` taking [state features, action features] to every pair
+    of the state features of a batch (batch_size x d_s) and of projected action
+    features (see `_project_actions`), either shared by all states
+    (number_of_actions x hidden_dim) or per state
+    (batch_size x number_of_actions x hidden_dim), without concatenating them:
+    the first linear layer is applied once per state and once per action, and only
+    the following layers are applied per pair.
+
+    Returns:
+        the outputs of the mlp, of shape (batch_size x number_of_actions x output_dim).
+    """
+    projected_state_features = F.linear(
+        state_features, first_layer.weight[:, : state_features.shape[-1]]
+    )  # (batch_size x hidden_dim)
+    hidden = projected_state_features.unsqueeze(1) + projected_action_features
+    return _forward_after_first_linear_layer(mlp, hidden)
+
+
 class DuelingQValueNetwork(QValueNetwork):
     """
     Dueling architecture consists of state architecture, value architecture,
@@ -400,6 +521,7 @@ class DuelingQValueNetwork(QValueNetwork):
             else advantage_hidden_dims,
             output_dim=output_dim,  # output_dim=1
         )
+        self._action_feature_cache = _ActionFeatureCache()
 
     @property
     def state_dim(self) -> int:
@@ -488,6 +610,40 @@ class DuelingQValueNetwork(QValueNetwork):
             )  # shape: (batch_size)
         return state_action_values
 
+    def get_q_values_for_all_actions(
+        self,
+        state_batch: Tensor,
+        actions: Tensor,
+    ) -> Tensor:
+        """
+        Computes state features and values once per state, and the part of the
+        first advantage layer depending on actions once per action (cached for
+        action sets shared across calls), so that only the remaining advantage
+        layers are applied to every (state, action) pair.
+        """
+        first_layer = _split_first_linear_layer(self.advantage_arch._model)
+        if state_batch.dim() != 2 or first_layer is None:
+            return super(DuelingQValueNetwork, self).get_q_values_for_all_actions(
+                state_batch, actions
+            )
+        batch_size = state_batch.shape[0]
+        number_of_actions = actions.shape[-2]
+        state_features = self.state_arch(state_batch)  # (batch_size x hidden_dim)
+        state_value = self.value_arch(state_features).unsqueeze(1)
+        # (batch_size x 1 x 1)
+        projected_actions = self._action_feature_cache.get(
+            actions,
+            [first_layer.weight, first_layer.bias],
+            _project_actions(first_layer, state_features.shape[-1]),
+        )
+        advantage = _score_state_action_pairs(
+            self.advantage_arch._model, state_features, projected_actions, first_layer
+        )  # (batch_size x number_of_actions x 1)
+        advantage_mean = torch.mean(advantage, dim=-2, keepdim=True)
+        return (state_value + advantage - advantage_mean).view(
+            batch_size, number_of_actions
+        )
+
 
 """
 One can make VanillaValueNetwork to be a special case of TwoTowerQValueNetwork by initializing
@@ -537,6 +693,7 @@ class TwoTowerNetwork(QValueNetwork):
             output_dim=output_dim,
         )
         self._interaction_features.xavier_init()
+        self._action_feature_cache = _ActionFeatureCache()
 
     def forward(self, state_action: Tensor) -> Tensor:
         state = state_action[..., : self._state_input_dim]
@@ -559,6 +716,45 @@ class TwoTowerNetwork(QValueNetwork):
         x = torch.cat([state_batch_features, action_batch_features], dim=-1)
         return self._interaction_features.forward(x).view(-1)  # (batch_size)
 
+    def get_q_values_for_all_actions(
+        self,
+        state_batch: Tensor,
+        actions: Tensor,
+    ) -> Tensor:
+        """
+        Computes state features once per state and action features once per action
+        (cached for action sets shared across calls, such as a fixed action space),
+        so that only the interaction layers are applied to every (state, action)
+        pair. The first interaction layer is itself split into a state part and an
+        action part, which are added instead of concatenating features.
+        """
+        first_layer = _split_first_linear_layer(self._interaction_features._model)
+        if state_batch.dim() != 2 or first_layer is None:
+            return super(TwoTowerNetwork, self).get_q_values_for_all_actions(
+                state_batch, actions
+            )
+        batch_size = state_batch.shape[0]
+        number_of_actions = actions.shape[-2]
+        state_features = self._state_features.forward(state_batch)
+        project_actions = _project_actions(first_layer, state_features.shape[-1])
+
+        def compute_projected_actions(actions: Tensor) -> Tensor:
+            return project_actions(
+                self._action_features.forward(actions.to(torch.get_default_dtype()))
+            )
+
+        projected_actions = self._action_feature_cache.get(
+            actions,
+            [*self._action_features.parameters(), first_layer.weight, first_layer.bias],
+            compute_projected_actions,
+        )
+        return _score_state_action_pairs(
+            self._interaction_features._model,
+            state_features,
+            projected_actions,
+            first_layer,
+        ).view(batch_size, number_of_actions)
+
     @property
     def state_dim(self) -> int:
         return self._state_input_dim
@@ -605,7 +801,8 @@ class TwoTowerQValueNetwork(TwoTowerNetwork):
 
 
 class EnsembleQValueNetwork(QValueNetwork):
-    r"""A Q-value network that uses the `Ensemble` model."""
+    r"""A Q-value network that uses the `Ensemble` model, or the `FusedEnsemble`
+    model (which evaluates all members at once) if `fused` is True."""
 
     def __init__(
         self,
@@ -615,11 +812,13 @@ class EnsembleQValueNetwork(QValueNetwork):
         output_dim: int,
         ensemble_size: int,
         prior_scale: float = 1.0,
+        fused: bool = False,
     ) -> None:
         super(EnsembleQValueNetwork, self).__init__()
         self._state_dim = state_dim
         self._action_dim = action_dim
-        self._model = Ensemble(
+        ensemble_type = FusedEnsemble if fused else Ensemble
+        self._model: Union[Ensemble, FusedEnsemble] = ensemble_type(
             input_dim=state_dim + action_dim,
             hidden_dims=hidden_dims,
             output_dim=output_dim,
@@ -651,6 +850,16 @@ class EnsembleQValueNetwork(QValueNetwork):
         x = torch.cat([state_batch, action_batch], dim=-1)
         return self.forward(x, z=z, persistent=persistent).view(-1)
 
+    def get_ensemble_q_values(
+        self,
+        state_batch: Tensor,
+        action_batch: Tensor,
+    ) -> Tensor:
+        r"""Returns the Q-values of all ensemble members, of shape
+        (ensemble_size, ...) where `...` is the batch shape of the inputs."""
+        x = torch.cat([state_batch, action_batch], dim=-1)
+        return self._model.forward_all(x).squeeze(-1)
+
     @property
     def state_dim(self) -> int:
         return self._state_input_dim
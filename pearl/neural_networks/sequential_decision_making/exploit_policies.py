@@ -0,0 +1,155 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+"""
+Exploit policies are frozen, self-contained modules computing the exploit actions of
+a trained policy learner for a batch of histories in a single graph: history
+summarization, the Q-value or actor network, masking of unavailable actions and
+action selection. Unlike `PolicyLearner.act`, they only take and return tensors,
+so that they can be traced with TorchScript or compiled with `torch.compile` for
+serving.
+
+Their input is a batch of histories as stored in replay buffers (observations,
+for the default identity history summarization module), which is summarized with
+the batched `forward` of the history summarization module, as during learning.
+"""
+
+from typing import Optional
+
+import torch
+import torch.nn as nn
+from pearl.neural_networks.sequential_decision_making.actor_networks import (
+    action_scaling,
+    GaussianActorNetwork,
+)
+from pearl.neural_networks.sequential_decision_making.q_value_network import (
+    QValueNetwork,
+)
+
+
+class ExploitPolicy(nn.Module):
+    """
+    Base class of exploit policies. Submodules are frozen in evaluation mode.
+    """
+
+    def __init__(self, history_summarization_module: nn.Module) -> None:
+        super(ExploitPolicy, self).__init__()
+        self.history_summarization_module = history_summarization_module
+
+    def freeze(self) -> "ExploitPolicy":
+        self.eval()
+        self.requires_grad_(False)
+        return self
+
+
+class QValueExploitPolicy(ExploitPolicy):
+    """
+    Chooses the action with the highest Q-value among a fixed set of discrete
+    actions, all evaluated with one forward pass of the Q-value network.
+    """
+
+    def __init__(
+        self,
+        history_summarization_module: nn.Module,
+        q_network: QValueNetwork,
+        action_representations: torch.Tensor,
+    ) -> None:
+        """
+        Args:
+            history_summarization_module: summarizes histories into states.
+            q_network: the Q-value network.
+            action_representations: representations of all actions, with shape
+                (number_of_actions, action_dim).
+        """
+        super(QValueExploitPolicy, self).__init__(history_summarization_module)
+        self.q_network = q_network
+        self.register_buffer("action_representations", action_representations)
+
+    def forward(
+        self,
+        history: torch.Tensor,
+        unavailable_actions_mask: Optional[torch.Tensor] = None,
+    ) -> torch.Tensor:
+        """
+        Args:
+            history: a batch of histories, with shape (batch_size, ...).
+            unavailable_actions_mask: optional boolean mask of the unavailable actions
+                of every history, with shape (batch_size, number_of_actions).
+        Returns:
+            the indices of the chosen actions, with shape (batch_size).
+        """
+        states = self.history_summarization_module(history)
+        batch_size = states.shape[0]
+        number_of_actions = self.action_representations.shape[0]
+        q_values = self.q_network.get_q_values(
+            states.unsqueeze(1).expand(-1, number_of_actions, -1),
+            self.action_representations.unsqueeze(0).expand(batch_size, -1, -1),
+        ).view(batch_size, number_of_actions)
+        if unavailable_actions_mask is not None:
+            q_values = q_values.masked_fill(unavailable_actions_mask, -float("inf"))
+        return torch.argmax(q_values, dim=1)
+
+
+class ActorExploitPolicy(ExploitPolicy):
+    """
+    Chooses the action of an actor network: the action it outputs for continuous
+    action spaces, or the action with the highest probability among a fixed set of
+    discrete actions. Gaussian actors, which sample their actions, choose the mean
+    action of their policy instead, squashed and scaled to the action space as
+    their samples are.
+    """
+
+    def __init__(
+        self,
+        history_summarization_module: nn.Module,
+        actor: nn.Module,
+        action_representations: Optional[torch.Tensor] = None,
+    ) -> None:
+        """
+        Args:
+            history_summarization_module: summarizes histories into states.
+            actor: the actor network.
+            action_representations: representations of all discrete actions, with
+                shape (number_of_actions, action_dim), or None for continuous actions.
+        """
+        super(ActorExploitPolicy, self).__init__(history_summarization_module)
+        self.actor = actor
+        self.register_buffer("action_representations", action_representations)
+
+    def forward(
+        self,
+        history: torch.Tensor,
+        unavailable_actions_mask: Optional[torch.Tensor] = None,
+    ) -> torch.Tensor:
+        """
+        Args:
+            history: a batch of histories, with shape (batch_size, ...).
+            unavailable_actions_mask: optional boolean mask of the unavailable discrete
+                actions of every history, with shape (batch_size, number_of_actions).
+        Returns:
+            the indices of the chosen actions, with shape (batch_size), for discrete
+            actions, or the actions, with shape (batch_size, action_dim), otherwise.
+        """
+        states = self.history_summarization_module(history)
+        action_representations = self.action_representations
+        if action_representations is None:
+            if isinstance(self.actor, GaussianActorNetwork):
+                mean, _ = self.actor(states)
+                return action_scaling(self.actor._action_space, torch.tanh(mean))
+            return self.actor.sample_action(states)  # pyre-ignore[29]
+        batch_size = states.shape[0]
+        action_probabilities = self.actor.get_policy_distribution(  # pyre-ignore[29]
+            state_batch=states,
+            available_actions=action_representations.unsqueeze(0).expand(
+                batch_size, -1, -1
+            ),
+        ).view(batch_size, -1)
+        if unavailable_actions_mask is not None:
+            action_probabilities = action_probabilities.masked_fill(
+                unavailable_actions_mask, -1.0
+            )
+        return torch.argmax(action_probabilities, dim=1)
@@ -56,6 +56,39 @@ class QValueNetwork(abc.ABC, nn.Module):
         """
         ...
 
+    def get_q_values_for_all_actions(
+        self,
+        state_batch: torch.Tensor,
+        actions: torch.Tensor,
+    ) -> torch.Tensor:
+        """Returns Q(s, a) for every state s and every action a of a set of actions.
+
+        The default implementation pairs every state with every action and calls
+        `get_q_values`. Networks whose state features do not depend on actions
+        override it to compute them once per state rather than once per pair.
+
+        Args:
+            state_batch (torch.Tensor): a batch of states (batch_size, ...)
+            actions (torch.Tensor): actions shared by all states
+                (number_of_actions, action_dim), or one set of actions per state
+                (batch_size, number_of_actions, action_dim)
+        Returns:
+            Q-values of all (state, action) pairs: (batch_size, number_of_actions)
+        """
+        batch_size = state_batch.shape[0]
+        number_of_actions = actions.shape[-2]
+        if actions.dim() == 2:
+            actions = actions.unsqueeze(0).expand(batch_size, -1, -1)
+        states = state_batch.unsqueeze(1).expand(
+            -1, number_of_actions, *state_batch.shape[1:]
+        )
+        if state_batch.dim() != 2:
+            # e.g. image states, which Q-value networks only take with a single
+            # batch dimension
+            states = states.reshape(-1, *state_batch.shape[1:])
+            actions = actions.reshape(-1, actions.shape[-1])
+        return self.get_q_values(states, actions).view(batch_size, number_of_actions)
+
 
 class DistributionalQValueNetwork(abc.ABC, nn.Module):
     """
@@ -107,3 +140,23 @@ class DistributionalQValueNetwork(abc.ABC, nn.Module):
             approximation of distribution of Q-values of (state, action) pairs
         """
         ...
+
+
+def get_q_values_for_all_actions(
+    q_network: nn.Module,
+    state_batch: torch.Tensor,
+    actions: torch.Tensor,
+) -> torch.Tensor:
+    """
+    Calls `QValueNetwork.get_q_values_for_all_actions`, also for networks which only
+    implement `get_q_values` without deriving from `QValueNetwork`
+    (e.g. `CNNQValueNetwork`).
+    """
+    if actions.dim() == 3 and actions.stride(0) == 0:
+        # the same actions for every state, expanded from a single set of actions
+        actions = actions[0]
+    if isinstance(q_network, QValueNetwork):
+        return q_network.get_q_values_for_all_actions(state_batch, actions)
+    return QValueNetwork.get_q_values_for_all_actions(
+        q_network, state_batch, actions  # pyre-ignore[6]
+    )
@@ -5,8 +5,9 @@
 # LICENSE file in the root directory of this source tree.
 #
 
+import copy
 import inspect
-from typing import Callable, Iterable, Tuple, Type
+from typing import Callable, Dict, Iterable, List, Tuple, Type
 
 import torch
 import torch.nn as nn
@@ -78,3 +79,126 @@ class TwinCritic(torch.nn.Module):
         critic_1_values = self._critic_1.get_q_values(state_batch, action_batch)
         critic_2_values = self._critic_2.get_q_values(state_batch, action_batch)
         return critic_1_values, critic_2_values
+
+
+class _QValueFunction(nn.Module):
+    """
+    Exposes `get_q_values` of a Q-value network as `forward`, so that it can be
+    called with `torch.func.functional_call`.
+    """
+
+    def __init__(self, network: QValueNetwork) -> None:
+        super(_QValueFunction, self).__init__()
+        self.network = network
+
+    def forward(
+        self, state_batch: torch.Tensor, action_batch: torch.Tensor
+    ) -> torch.Tensor:
+        return self.network.get_q_values(state_batch, action_batch)
+
+
+class FusedCritic(torch.nn.Module):
+    """
+    A drop-in replacement for `TwinCritic` (or its generalization to any number of
+    critics) which evaluates all critics in a single pass. The parameters of the
+    critics, which share the same architecture, are stacked along a leading
+    dimension of size `num_critics` and the critics are evaluated with `torch.vmap`,
+    so that each layer runs as one batched kernel for all critics.
+    Each critic is initialized differently by a given initialization function.
+    """
+
+    def __init__(
+        self,
+        state_dim: int,
+        action_dim: int,
+        hidden_dims: Iterable[int],
+        init_fn: Callable[[nn.Module], None],
+        network_type: Type[QValueNetwork] = VanillaQValueNetwork,
+        output_dim: int = 1,
+        num_critics: int = 2,
+    ) -> None:
+        super(FusedCritic, self).__init__()
+
+        if inspect.isabstract(network_type):
+            raise ValueError("network_type must not be abstract")
+
+        critics = []
+        for _ in range(num_critics):
+            # pyre-ignore[45]:
+            # Pyre does not know that `network_type` is asserted to be concrete
+            critic: QValueNetwork = network_type(
+                state_dim=state_dim,
+                action_dim=action_dim,
+                hidden_dims=hidden_dims,
+                output_dim=output_dim,
+            )
+            critic.apply(init_fn)
+            critics.append(_QValueFunction(critic))
+        self._num_critics = num_critics
+
+        params, buffers = torch.func.stack_module_state(critics)
+        # parameter names can not contain dots, the original names are kept to call
+        # the critic with its stacked parameters
+        self._param_names: List[Tuple[str, str]] = []
+        for name, value in params.items():
+            attribute = name.replace(".", "_")
+            self.register_parameter(attribute, nn.Parameter(value))
+            self._param_names.append((name, attribute))
+        self._buffer_names: List[Tuple[str, str]] = []
+        for name, value in buffers.items():
+            attribute = name.replace(".", "_")
+            self.register_buffer(attribute, value)
+            self._buffer_names.append((name, attribute))
+
+        # the architecture shared by all critics, which holds no actual weights
+        # (not registered as a submodule, so that it is not moved or saved)
+        self.__dict__["_template"] = copy.deepcopy(critics[0]).to("meta")
+
+    @property
+    def num_critics(self) -> int:
+        return self._num_critics
+
+    def _call_critic(
+        self,
+        params: Dict[str, torch.Tensor],
+        buffers: Dict[str, torch.Tensor],
+        state_batch: torch.Tensor,
+        action_batch: torch.Tensor,
+    ) -> torch.Tensor:
+        return torch.func.functional_call(
+            self._template, (params, buffers), (state_batch, action_batch)
+        )
+
+    def get_all_q_values(
+        self,
+        state_batch: torch.Tensor,
+        action_batch: torch.Tensor,
+    ) -> torch.Tensor:
+        """
+        Args:
+            state_batch (torch.Tensor): a batch of states with shape (batch_size, state_dim)
+            action_batch (torch.Tensor): a batch of actions with shape (batch_size, action_dim)
+        Returns:
+            torch.Tensor: Q-values of (state, action) pairs of every critic, with shape
+            (num_critics, batch_size)
+        """
+        params = {
+            name: getattr(self, attribute) for name, attribute in self._param_names
+        }
+        buffers = {
+            name: getattr(self, attribute) for name, attribute in self._buffer_names
+        }
+        return torch.vmap(self._call_critic, in_dims=(0, 0, None, None))(
+            params, buffers, state_batch, action_batch
+        )
+
+    def get_q_values(
+        self,
+        state_batch: torch.Tensor,
+        action_batch: torch.Tensor,
+    ) -> Tuple[torch.Tensor, ...]:
+        """
+        Same as `TwinCritic.get_q_values`, with one tensor of Q-values of shape
+        (batch_size) per critic.
+        """
+        return tuple(self.get_all_q_values(state_batch, action_batch).unbind(0))
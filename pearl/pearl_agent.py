@@ -6,7 +6,7 @@
 #
 
 import typing
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 import torch
 from pearl.api.action import Action
@@ -143,24 +143,101 @@ class PearlAgent(Agent):
 
         # TODO: The following code is too specific to be at this high-level.
         # This needs to be moved to a better place.
-        if (
-            isinstance(safe_action_space, DiscreteActionSpace)
-            and self.policy_learner.requires_tensors
-        ):
-            assert isinstance(safe_action_space, DiscreteActionSpace)
-            safe_action_space.to(self.device)
+        self._move_action_space_to_device(safe_action_space)
 
         action = self.policy_learner.act(
             subjective_state_to_be_used, safe_action_space, exploit=exploit  # pyre-fixme[6]
         )
 
         if isinstance(safe_action_space, DiscreteActionSpace):
-            self._latest_action = safe_action_space.actions_batch[int(action.item())]
+            self._latest_action = safe_action_space.actions_batch[
+                int(action.item())
+            ].clone()
         else:
             self._latest_action = action
 
         return action
 
+    def act_batch(
+        self,
+        subjective_states: SubjectiveState,
+        available_action_spaces: Union[ActionSpace, Sequence[ActionSpace]],
+        exploit: bool = False,
+    ) -> torch.Tensor:
+        """
+        Chooses actions for a batch of independent subjective states with the
+        current policy, e.g. to serve many users at once. Unlike `act`, this neither
+        reads nor updates the agent's own subjective state and latest action.
+
+        Args:
+            subjective_states: batch of subjective states of shape (batch_size, ...).
+            available_action_spaces: either one action space shared by all states,
+                or a sequence with the action space of each state. States sharing
+                the same action space object are acted on together, with a single
+                batched call to the policy learner.
+            exploit: whether to choose actions without exploration.
+        Returns:
+            action indices of shape (batch_size,) for discrete action spaces, or
+            actions of shape (batch_size, action_dim) otherwise.
+        """
+        assert self.policy_learner.requires_tensors
+        subjective_states = torch.as_tensor(subjective_states).to(self.device)
+        batch_size = subjective_states.shape[0]
+        if isinstance(available_action_spaces, ActionSpace):
+            groups = [(available_action_spaces, None)]
+        else:
+            assert len(available_action_spaces) == batch_size
+            groups = self._group_by_action_space(available_action_spaces)
+
+        actions: Optional[torch.Tensor] = None
+        for action_space, indices in groups:
+            states = (
+                subjective_states if indices is None else subjective_states[indices]
+            )
+            safe_action_space = self.safety_module.filter_action(states, action_space)
+            self._move_action_space_to_device(safe_action_space)
+            group_actions = self.policy_learner.act_batch(
+                states, safe_action_space, exploit=exploit
+            )
+            if indices is None:
+                return group_actions
+            if actions is None:
+                actions = group_actions.new_empty(
+                    (batch_size,) + group_actions.shape[1:]
+                )
+            actions[indices] = group_actions
+        assert actions is not None
+        return actions
+
+    def _group_by_action_space(
+        self, action_spaces: Sequence[ActionSpace]
+    ) -> List[Tuple[ActionSpace, Optional[torch.Tensor]]]:
+        """
+        Groups the indices of a batch by (identical) action space. The indices are
+        None when all states share the same action space.
+        """
+        indices_by_space: Dict[int, Tuple[ActionSpace, List[int]]] = {}
+        for i, action_space in enumerate(action_spaces):
+            indices_by_space.setdefault(id(action_space), (action_space, []))[1].append(
+                i
+            )
+        if len(indices_by_space) == 1:
+            return [(action_spaces[0], None)]
+        return [
+            (action_space, torch.tensor(indices, device=self.device))
+            for action_space, indices in indices_by_space.values()
+        ]
+
+    def _move_action_space_to_device(self, action_space: ActionSpace) -> None:
+        # TODO: The following code is too specific to be at this high-level.
+        # This needs to be moved to a better place.
+        if (
+            isinstance(action_space, DiscreteActionSpace)
+            and self.policy_learner.requires_tensors
+            and action_space.actions[0].device != self.device
+        ):
+            action_space.to(self.device)
+
     def observe(
         self,
         action_result: ActionResult,
@@ -66,6 +66,17 @@ class ContextualBanditBase(PolicyLearner):
     ) -> Action:
         pass
 
+    def act_batch(
+        self,
+        subjective_states: torch.Tensor,
+        available_action_space: ActionSpace,
+        exploit: bool = False,
+    ) -> torch.Tensor:
+        # contextual bandits score a batch of states in a single `act` call
+        return torch.as_tensor(
+            self.act(subjective_states, available_action_space, exploit=exploit)
+        ).view(-1)
+
     @abstractmethod
     def get_scores(
         self,
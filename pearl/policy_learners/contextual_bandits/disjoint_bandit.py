@@ -19,6 +19,7 @@ from pearl.neural_networks.common.utils import ensemble_forward
 from pearl.policy_learners.contextual_bandits.contextual_bandit_base import (
     ContextualBanditBase,
 )
+from pearl.policy_learners.contextual_bandits.linear_bandit import LinearBandit
 from pearl.policy_learners.exploration_modules.common.score_exploration_base import (
     ScoreExplorationBase,
 )
@@ -29,6 +30,10 @@ from pearl.replay_buffers.transition import TransitionBatch
 from pearl.utils.functional_utils.learning.action_utils import (
     concatenate_actions_to_state,
 )
+from pearl.utils.functional_utils.learning.linear_regression import LinearRegression
+from pearl.utils.functional_utils.learning.stacked_linear_regression import (
+    StackedLinearRegression,
+)
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 
 
@@ -38,6 +43,11 @@ class DisjointBanditContainer(ContextualBanditBase):
     Each action has its own bandit model (can be based on UCB or Thompson Sampling).
     Using the Composite design pattern:
     https://refactoring.guru/design-patterns/composite
+
+    With `use_stacked_models=True`, all arms must be `LinearBandit`s. Their linear
+    regressions are then merged into a single `StackedLinearRegression`, so that
+    learning and acting do not loop over arms. The `model` of each arm bandit
+    becomes a view of its slice of the stacked regression.
     """
 
     def __init__(
@@ -48,6 +58,7 @@ class DisjointBanditContainer(ContextualBanditBase):
         training_rounds: int = 100,
         batch_size: int = 128,
         state_features_only: bool = False,
+        use_stacked_models: bool = False,
     ) -> None:
         super(DisjointBanditContainer, self).__init__(
             feature_dim=feature_dim,
@@ -59,6 +70,20 @@ class DisjointBanditContainer(ContextualBanditBase):
         self._arm_bandits: torch.nn.ModuleList = torch.nn.ModuleList(arm_bandits)
         self._n_arms: int = len(arm_bandits)
         self._state_features_only = state_features_only
+        self._stacked_linear_regression: Optional[StackedLinearRegression] = None
+        if use_stacked_models:
+            assert all(
+                isinstance(arm_bandit, LinearBandit)
+                and type(arm_bandit.model) is LinearRegression
+                for arm_bandit in arm_bandits
+            ), "stacked models require LinearBandit arms"
+            self._stacked_linear_regression = (
+                StackedLinearRegression.from_linear_regressions(
+                    [arm_bandit.model for arm_bandit in arm_bandits]
+                )
+            )
+            for i, arm_bandit in enumerate(arm_bandits):
+                arm_bandit.model = self._stacked_linear_regression[i]
 
     @property
     def n_arms(self) -> int:
@@ -119,6 +144,22 @@ class DisjointBanditContainer(ContextualBanditBase):
         """
         self._validate_batch(batch)
 
+        stacked_linear_regression = self._stacked_linear_regression
+        if stacked_linear_regression is not None:
+            arm = batch.action[:, 0]
+            state = batch.state
+            if state.ndim == 3:
+                # shape: (batch_size, num_arms, feature_size)
+                # different features for each arm
+                state = state[torch.arange(state.shape[0], device=state.device), arm]
+            stacked_linear_regression.learn_batch(
+                x=state,
+                y=batch.reward,
+                weight=batch.weight,
+                model_index=arm,
+            )
+            return {}
+
         arm_batches = self._partition_batch_by_arm(batch)
         returns = {}
         for i, (arm_bandit, arm_batch) in enumerate(
@@ -158,6 +199,16 @@ class DisjointBanditContainer(ContextualBanditBase):
         )
         # (batch_size, action_count, feature_size)
 
+        stacked_linear_regression = self._stacked_linear_regression
+        if stacked_linear_regression is not None:
+            return self._exploration_module.act(
+                subjective_state=feature,
+                action_space=available_action_space,
+                values=stacked_linear_regression(feature),
+                representation=stacked_linear_regression,
+                action_availability_mask=action_availability_mask,
+            )
+
         values = ensemble_forward(self.models, feature, use_for_loop=True)
         return self._exploration_module.act(
             subjective_state=feature,
@@ -189,6 +240,15 @@ class DisjointBanditContainer(ContextualBanditBase):
         )
         # (batch_size, action_count, feature_size)
 
+        stacked_linear_regression = self._stacked_linear_regression
+        if stacked_linear_regression is not None:
+            return exploration_module.get_scores(
+                subjective_state=feature,
+                values=stacked_linear_regression(feature),
+                action_space=action_space,
+                representation=stacked_linear_regression,
+            ).squeeze()
+
         return exploration_module.get_scores(
             subjective_state=feature,
             values=ensemble_forward(self.models, feature, use_for_loop=True),
@@ -5,7 +5,7 @@
 # LICENSE file in the root directory of this source tree.
 #
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import torch
 
@@ -24,7 +24,13 @@ from pearl.replay_buffers.transition import TransitionBatch
 from pearl.utils.functional_utils.learning.action_utils import (
     concatenate_actions_to_state,
 )
-from pearl.utils.functional_utils.learning.linear_regression import LinearRegression
+from pearl.utils.functional_utils.learning.linear_regression import (
+    FULL_UPDATE_MODE,
+    LinearRegression,
+)
+from pearl.utils.functional_utils.learning.stacked_linear_regression import (
+    StackedLinearRegression,
+)
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 from torch import nn
 
@@ -34,6 +40,11 @@ class DisjointLinearBandit(ContextualBanditBase):
     LinearBandit for discrete action space with each action has its own linear
     regression.
     DisjointLinearBandit will be deprecated. Use DisjointBanditContainer instead.
+
+    With `use_stacked_models=True`, the linear regressions of all actions are held
+    in a single `StackedLinearRegression`, so learning and acting do not loop over
+    actions. `_linear_regressions[i]` then returns a view of the model of action i.
+    Stacked models always invert A from scratch (`update_mode` must be "full").
     """
 
     def __init__(
@@ -45,6 +56,10 @@ class DisjointLinearBandit(ContextualBanditBase):
         training_rounds: int = 100,
         batch_size: int = 128,
         state_features_only: bool = False,
+        update_mode: str = FULL_UPDATE_MODE,
+        refactorization_interval: int = 100,
+        lazy_update: bool = False,
+        use_stacked_models: bool = False,
     ) -> None:
         super(DisjointLinearBandit, self).__init__(
             feature_dim=feature_dim,
@@ -55,10 +70,33 @@ class DisjointLinearBandit(ContextualBanditBase):
         # Currently our disjoint LinUCB usecase only use LinearRegression
 
         # Keep list attribute since ensemble_forward requires List[nn.Module]
-        self._linear_regressions_list: List[nn.Module] = [
-            LinearRegression(feature_dim=feature_dim, l2_reg_lambda=l2_reg_lambda)
-            for _ in range(action_space.n)
-        ]
+        self._linear_regressions_list: List[nn.Module]
+        self._stacked_linear_regression: Optional[StackedLinearRegression] = None
+        if use_stacked_models:
+            if update_mode != FULL_UPDATE_MODE:
+                raise ValueError(
+                    f"update_mode {update_mode} is not supported by stacked models"
+                )
+            self._stacked_linear_regression = StackedLinearRegression(
+                num_models=action_space.n,
+                feature_dim=feature_dim,
+                l2_reg_lambda=l2_reg_lambda,
+                lazy_update=lazy_update,
+            )
+            self._linear_regressions_list = [
+                self._stacked_linear_regression[i] for i in range(action_space.n)
+            ]
+        else:
+            self._linear_regressions_list = [
+                LinearRegression(
+                    feature_dim=feature_dim,
+                    l2_reg_lambda=l2_reg_lambda,
+                    update_mode=update_mode,
+                    refactorization_interval=refactorization_interval,
+                    lazy_update=lazy_update,
+                )
+                for _ in range(action_space.n)
+            ]
         # create nn.ModuleList so self.to(device) will move modules along
         self._linear_regressions = nn.ModuleList(self._linear_regressions_list)
         self._discrete_action_space = action_space
@@ -70,6 +108,23 @@ class DisjointLinearBandit(ContextualBanditBase):
         batch is action idx instead of action value
         Only discrete action problem will use DisjointLinearBandit
         """
+        stacked_linear_regression = self._stacked_linear_regression
+        if stacked_linear_regression is not None:
+            action_idx = batch.action.view(-1).long()
+            if self._state_features_only:
+                context = batch.state
+            else:
+                # cat state with the action tensor of each row
+                actions = self._discrete_action_space.actions_batch.to(batch.device)
+                context = torch.cat([batch.state, actions[action_idx]], dim=1)
+            stacked_linear_regression.learn_batch(
+                x=context,
+                y=batch.reward,
+                weight=batch.weight,
+                model_index=action_idx,
+            )
+            return {}
+
         for action_idx, linear_regression in enumerate(self._linear_regressions):
             index = torch.nonzero(batch.action == action_idx, as_tuple=True)[0]
             if index.numel() == 0:
@@ -127,6 +182,15 @@ class DisjointLinearBandit(ContextualBanditBase):
         )
         # (batch_size, action_count, feature_size)
 
+        stacked_linear_regression = self._stacked_linear_regression
+        if stacked_linear_regression is not None:
+            return self._exploration_module.act(
+                subjective_state=feature,
+                action_space=action_space,
+                values=stacked_linear_regression(feature),
+                representation=stacked_linear_regression,
+            )
+
         values = ensemble_forward(
             self._linear_regressions_list, feature, use_for_loop=True
         )
@@ -26,7 +26,10 @@ from pearl.replay_buffers.transition import TransitionBatch
 from pearl.utils.functional_utils.learning.action_utils import (
     concatenate_actions_to_state,
 )
-from pearl.utils.functional_utils.learning.linear_regression import LinearRegression
+from pearl.utils.functional_utils.learning.linear_regression import (
+    FULL_UPDATE_MODE,
+    LinearRegression,
+)
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 
 
@@ -42,6 +45,9 @@ class LinearBandit(ContextualBanditBase):
         l2_reg_lambda: float = 1.0,
         training_rounds: int = 100,
         batch_size: int = 128,
+        update_mode: str = FULL_UPDATE_MODE,
+        refactorization_interval: int = 100,
+        lazy_update: bool = False,
     ) -> None:
         super(LinearBandit, self).__init__(
             feature_dim=feature_dim,
@@ -52,7 +58,11 @@ class LinearBandit(ContextualBanditBase):
             exploration_module=exploration_module,
         )
         self.model = LinearRegression(
-            feature_dim=feature_dim, l2_reg_lambda=l2_reg_lambda
+            feature_dim=feature_dim,
+            l2_reg_lambda=l2_reg_lambda,
+            update_mode=update_mode,
+            refactorization_interval=refactorization_interval,
+            lazy_update=lazy_update,
         )
 
     def learn_batch(self, batch: TransitionBatch) -> Dict[str, Any]:
@@ -67,6 +77,9 @@ class LinearBandit(ContextualBanditBase):
             y=batch.reward,
             weight=batch.weight,
         )
+        if self.model.lazy_update:
+            # reporting would refresh the coefficients after every batch
+            return {}
         current_values = self.model(x)
         return {"current_values": current_values.mean().item()}
 
@@ -29,7 +29,10 @@ from pearl.replay_buffers.transition import TransitionBatch
 from pearl.utils.functional_utils.learning.action_utils import (
     concatenate_actions_to_state,
 )
-from pearl.utils.functional_utils.learning.linear_regression import LinearRegression
+from pearl.utils.functional_utils.learning.linear_regression import (
+    FULL_UPDATE_MODE,
+    LinearRegression,
+)
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 
 
@@ -49,6 +52,9 @@ class NeuralLinearBandit(NeuralBandit):
         learning_rate: float = 0.001,
         l2_reg_lambda_linear: float = 1.0,
         state_features_only: bool = False,
+        update_mode: str = FULL_UPDATE_MODE,
+        refactorization_interval: int = 100,
+        lazy_update: bool = False,
         **kwargs: Any,
     ) -> None:
         assert (
@@ -68,6 +74,9 @@ class NeuralLinearBandit(NeuralBandit):
         self._linear_regression = LinearRegression(
             feature_dim=hidden_dims[-1],
             l2_reg_lambda=l2_reg_lambda_linear,
+            update_mode=update_mode,
+            refactorization_interval=refactorization_interval,
+            lazy_update=lazy_update,
         )
         self._linear_regression_dim: int = hidden_dims[-1]
 
@@ -43,6 +43,16 @@ class EGreedyExploration(UniformExplorationBase):
             )
         if not isinstance(action_space, DiscreteActionSpace):
             raise TypeError("action space must be discrete")
+        if exploit_action.numel() > 1:
+            # a batch of exploit actions, explore independently for each of them
+            explore = (
+                torch.rand(exploit_action.shape, device=exploit_action.device)
+                < self.epsilon
+            )
+            random_action = torch.randint(
+                action_space.n, exploit_action.shape, device=exploit_action.device
+            )
+            return torch.where(explore, random_action, exploit_action)
         if random.random() < self.epsilon:
             return torch.randint(action_space.n, (1,))
         return exploit_action
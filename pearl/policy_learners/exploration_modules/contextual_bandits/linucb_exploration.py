@@ -5,7 +5,7 @@
 # LICENSE file in the root directory of this source tree.
 #
 
-from typing import List, Optional
+from typing import List, Optional, Union
 
 import torch
 
@@ -13,6 +13,9 @@ from pearl.api.state import SubjectiveState
 from pearl.policy_learners.exploration_modules.contextual_bandits.ucb_exploration import (
     UCBExploration,
 )
+from pearl.utils.functional_utils.learning.stacked_linear_regression import (
+    StackedLinearRegression,
+)
 from pearl.utils.tensor_like import assert_is_tensor_like
 
 
@@ -53,15 +56,24 @@ class DisjointLinUCBExploration(LinUCBExploration):
     def sigma(
         self,
         subjective_state: SubjectiveState,
-        representation: Optional[List[torch.nn.Module]] = None,
+        representation: Optional[
+            Union[List[torch.nn.Module], StackedLinearRegression]
+        ] = None,
     ) -> torch.Tensor:
         """
         Args:
             subjective_state: this is feature vector in shape, batch_size, action_count, feature
-            representation: unlike LinUCBExploration, here it is a list for different actions
+            representation: unlike LinUCBExploration, here it is a list for different actions,
+                or a `StackedLinearRegression` holding the models of all actions
         """
         assert representation is not None
         subjective_state = assert_is_tensor_like(subjective_state)
+        if isinstance(representation, StackedLinearRegression):
+            # (batch_size, action_count) in one batched computation
+            return super(DisjointLinUCBExploration, self).sigma(
+                subjective_state=subjective_state,
+                representation=representation,
+            )
         sigma = []
         for i, linear_regression in enumerate(representation):
             sigma.append(
@@ -5,7 +5,7 @@
 # LICENSE file in the root directory of this source tree.
 #
 
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 
 import torch
 
@@ -16,7 +16,6 @@ from pearl.policy_learners.exploration_modules.common.score_exploration_base imp
     ScoreExplorationBase,
 )
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
-from torch.distributions.categorical import Categorical
 
 
 class SquareCBExploration(ScoreExplorationBase):
@@ -70,27 +69,53 @@ class SquareCBExploration(ScoreExplorationBase):
         Returns:
             torch.Tensor: output actions index of a batch
         """
+        selected_actions, _ = self.sample_actions(values, action_space.n)
+        return selected_actions.squeeze()
 
-        # Calculate empirical gaps
-        values = values.view(-1, action_space.n)  # (batch_size, action_space.n)
+    def get_action_probabilities(
+        self, values: torch.Tensor, action_count: int
+    ) -> torch.Tensor:
+        """
+        Builds the SquareCB distribution over actions for every row of values.
+        Every non-greedy action gets its (unnormalized) probability and the greedy
+        action gets the remaining probability mass of its row.
+
+        Args:
+            values: shape (batch_size, action_count) or (action_count)
+        Returns:
+            probabilities of shape (batch_size, action_count)
+        """
+        values = values.view(-1, action_count)  # (batch_size, action_count)
         values = self.clamp(values)
-        max_val, max_indices = torch.max(values, dim=1)
-        max_val.repeat(1, action_space.n)
+        # Calculate empirical gaps
+        max_val, max_indices = torch.max(values, dim=1, keepdim=True)
         empirical_gaps = max_val - values
 
-        # Construct probability distribution over actions and sample from it
-        selected_actions = torch.zeros((values.size(dim=0),), dtype=torch.int)
-        prob_policy = self.get_unnormalize_prob(empirical_gaps, max_val, action_space.n)
-        for batch_ind in range(values.size(dim=0)):
-            # Get sum of all the probabilities besides the maximum
-            prob_policy[batch_ind, max_indices[batch_ind]] = 0.0
-            complementary_sum = torch.sum(prob_policy)
-            prob_policy[batch_ind, max_indices[batch_ind]] = 1.0 - complementary_sum
-            # Sample from SquareCB update rule
-            dist_policy = Categorical(prob_policy[batch_ind, :])
-            selected_actions[batch_ind] = dist_policy.sample()
+        prob_policy = self.get_unnormalize_prob(empirical_gaps, max_val, action_count)
+        # Get sum of all the probabilities besides the maximum, for each row
+        prob_policy = prob_policy.scatter(1, max_indices, 0.0)
+        complementary_sum = prob_policy.sum(dim=1, keepdim=True)
+        return prob_policy.scatter(
+            1, max_indices, (1.0 - complementary_sum).clamp(min=0.0)
+        )
 
-        return selected_actions.squeeze()
+    def sample_actions(
+        self, values: torch.Tensor, action_count: int
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Samples one action per row of values from the SquareCB update rule.
+
+        Args:
+            values: shape (batch_size, action_count) or (action_count)
+        Returns:
+            the indices of the sampled actions and their propensities (the
+            probabilities they were sampled with, e.g. for off-policy
+            evaluation), both of shape (batch_size,)
+        """
+        prob_policy = self.get_action_probabilities(values, action_count)
+        selected_actions = torch.multinomial(prob_policy, num_samples=1)
+        propensities = prob_policy.gather(1, selected_actions)
+        return selected_actions.squeeze(1), propensities.squeeze(1)
 
     def clamp(self, values: torch.Tensor) -> torch.Tensor:
         """
@@ -103,11 +128,13 @@ class SquareCBExploration(ScoreExplorationBase):
     def get_unnormalize_prob(
         self,
         empirical_gaps: torch.Tensor,
-        max_val: float,
+        max_val: torch.Tensor,
         action_num: Union[float, int],
     ) -> torch.Tensor:
         """
         Return unnormalized probabilities
+        empirical_gaps: shape (batch_size, action_count)
+        max_val: shape (batch_size, 1)
         """
         return torch.div(1.0, action_num + self._gamma * empirical_gaps)
 
@@ -160,16 +187,21 @@ class FastCBExploration(SquareCBExploration):
     def get_unnormalize_prob(
         self,
         empirical_gaps: torch.Tensor,
-        max_val: float,
+        max_val: torch.Tensor,
         action_num: Union[float, int],
     ) -> torch.Tensor:
         """
         Return unnormalized probabilities
+        empirical_gaps: shape (batch_size, action_count)
+        max_val: shape (batch_size, 1)
         """
-        if max_val <= self.reward_lb:
-            return torch.ones(empirical_gaps.shape) / action_num
         prob_policy = torch.div(
             (max_val - self.reward_lb),
             action_num * (max_val - self.reward_lb) + self._gamma * empirical_gaps,
         )
-        return prob_policy
+        # uniform distribution for rows whose best value is the reward lower bound
+        return torch.where(
+            max_val <= self.reward_lb,
+            torch.full_like(prob_policy, 1.0 / action_num),
+            prob_policy,
+        )
@@ -16,6 +16,9 @@ from pearl.policy_learners.exploration_modules.common.score_exploration_base imp
     ScoreExplorationBase,
 )
 from pearl.utils.functional_utils.learning.linear_regression import LinearRegression
+from pearl.utils.functional_utils.learning.stacked_linear_regression import (
+    StackedLinearRegression,
+)
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 
 
@@ -91,6 +94,12 @@ class ThompsonSamplingExplorationLinearDisjoint(ThompsonSamplingExplorationLinea
         exploit_action: Optional[Action] = None,
     ) -> torch.Tensor:
         assert isinstance(action_space, DiscreteActionSpace)
+        if isinstance(representation, StackedLinearRegression):
+            return self._get_stacked_scores(
+                subjective_state=subjective_state,
+                action_space=action_space,
+                representation=representation,
+            )
         # DisJoint Linear Bandits
         # The representation is a list for different actions.
         scores = []
@@ -108,3 +117,32 @@ class ThompsonSamplingExplorationLinearDisjoint(ThompsonSamplingExplorationLinea
             scores.append(score)
         scores = torch.stack(scores)
         return scores.view(-1, action_space.n)
+
+    def _get_stacked_scores(
+        self,
+        subjective_state: SubjectiveState,
+        action_space: DiscreteActionSpace,
+        representation: StackedLinearRegression,
+    ) -> torch.Tensor:
+        """
+        Samples the parameters of all the models of a `StackedLinearRegression` at
+        once, from one batched Cholesky factorization of their precision matrices.
+        subjective_state is in shape of batch_size, action_count, feature_dim
+        """
+        if self._enable_efficient_sampling:
+            expected_reward = representation(subjective_state)
+            sigma = representation.calculate_sigma(subjective_state)
+            scores = torch.normal(mean=expected_reward, std=sigma)
+        else:
+            coefs = representation.coefs
+            # A = L L^T, so L^-T z ~ N(0, A^-1) for z ~ N(0, I)
+            cholesky = torch.linalg.cholesky(representation.A)
+            noise = torch.linalg.solve_triangular(
+                cholesky.mT, torch.randn_like(coefs).unsqueeze(-1), upper=True
+            ).squeeze(-1)
+            scores = torch.einsum(
+                "...nd,nd->...n",
+                LinearRegression.append_ones(subjective_state),
+                coefs + noise,
+            )
+        return scores.view(-1, action_space.n)
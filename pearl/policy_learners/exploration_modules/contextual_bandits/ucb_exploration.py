@@ -15,6 +15,9 @@ from pearl.api.state import SubjectiveState
 from pearl.policy_learners.exploration_modules.common.score_exploration_base import (
     ScoreExplorationBase,
 )
+from pearl.utils.functional_utils.learning.stacked_linear_regression import (
+    StackedLinearRegression,
+)
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 
 
@@ -98,8 +101,15 @@ class DisjointUCBExploration(UCBExploration):
         """
         Args:
             subjective_state: this is feature vector in shape, batch_size, action_count, feature
-            representation: a list of bandit models, one per action (arm)
+            representation: a list of bandit models, one per action (arm),
+                or a `StackedLinearRegression` holding all of them
         """
+        if isinstance(representation, StackedLinearRegression):
+            # (batch_size, action_count) in one batched computation
+            return super(DisjointUCBExploration, self).sigma(
+                subjective_state=subjective_state,
+                representation=representation,
+            )
         sigma = []
         for i, arm_model in enumerate(representation):
             sigma.append(
@@ -59,6 +59,8 @@ class DeepExploration(ExplorationModule):
         representation: Optional[torch.nn.Module] = None,
     ) -> Action:
         assert isinstance(action_space, DiscreteActionSpace)
+        if subjective_state.ndim == 2:
+            return self._act_batch(subjective_state, action_space)
         states_repeated = torch.repeat_interleave(
             subjective_state.unsqueeze(0), action_space.n, dim=0
         )
@@ -76,6 +78,28 @@ class DeepExploration(ExplorationModule):
 
         return torch.argmax(q_values).view((-1))
 
+    def _act_batch(
+        self, subjective_states: torch.Tensor, action_space: DiscreteActionSpace
+    ) -> torch.Tensor:
+        """
+        Greedy actions of a batch of states (batch_size x state_dim) under the
+        currently sampled Q-network, in a single forward pass.
+        """
+        batch_size = subjective_states.shape[0]
+        states_repeated = subjective_states.unsqueeze(1).expand(-1, action_space.n, -1)
+        # (batch_size x action_space_size x state_dim)
+
+        actions = action_space.actions_batch.to(subjective_states.device)
+        actions = actions.unsqueeze(0).expand(batch_size, -1, -1)
+        # (batch_size x action_space_size x action_dim)
+
+        with torch.no_grad():
+            q_values = self.q_ensemble_network.get_q_values(
+                state_batch=states_repeated, action_batch=actions, persistent=True
+            ).view(batch_size, action_space.n)
+
+        return torch.argmax(q_values, dim=1)
+
     def reset(self) -> None:  # noqa: B027
         # sample a new epistemic index (i.e., a Q-network) at the beginning of a
         # new episode for temporally consistent exploration
@@ -31,7 +31,7 @@ from pearl.policy_learners.exploration_modules.exploration_module import (
     ExplorationModule,
 )
 from pearl.replay_buffers.replay_buffer import ReplayBuffer
-from pearl.replay_buffers.transition import TransitionBatch
+from pearl.replay_buffers.transition import TransitionBatch, TransitionWithIndexBatch
 from pearl.utils.device import is_distribution_enabled
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 
@@ -147,6 +147,53 @@ class PolicyLearner(torch.nn.Module, ABC):
     ) -> Action:
         pass
 
+    def act_batch(
+        self,
+        subjective_states: torch.Tensor,
+        available_action_space: ActionSpace,
+        exploit: bool = False,
+    ) -> torch.Tensor:
+        """
+        Chooses actions for a batch of independent subjective states which share
+        the same available action space.
+        This default implementation calls `act` once per state. Policy learners
+        override it to choose all the actions with a single forward pass.
+
+        Args:
+            subjective_states: batch of subjective states, of shape
+                (batch_size, ...) where `...` is the shape of one subjective state.
+            available_action_space: action space available to all the states.
+            exploit: whether to choose actions without exploration.
+        Returns:
+            action indices of shape (batch_size,) for discrete action spaces, or
+            actions of shape (batch_size, action_dim) otherwise.
+        """
+        actions = [
+            torch.as_tensor(
+                self.act(subjective_state, available_action_space, exploit=exploit)
+            )
+            for subjective_state in subjective_states
+        ]
+        if isinstance(available_action_space, DiscreteActionSpace):
+            return torch.stack([action.view(()) for action in actions])
+        return torch.stack([action.view(-1) for action in actions])
+
+    def get_exploit_policy(
+        self, action_space: Optional[ActionSpace] = None
+    ) -> torch.nn.Module:
+        """
+        Returns a frozen copy of the exploit path of this policy learner, including its
+        history summarization module, as a module mapping a batch of histories to
+        actions (see `ExploitPolicy`), which can be traced or compiled for serving.
+
+        Args:
+            action_space: the (fixed) action space to choose actions from. Defaults to
+                the action space of the policy learner.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support exploit policies"
+        )
+
     def learn(
         self,
         replay_buffer: ReplayBuffer,
@@ -171,6 +218,15 @@ class PolicyLearner(torch.nn.Module, ABC):
             if isinstance(batch, TransitionBatch):
                 batch = self.preprocess_batch(batch)
                 single_report = self.learn_batch(batch)
+                # learners report per-sample TD errors for batches that carry
+                # their buffer positions, which are used to update priorities
+                td_error = single_report.pop("td_error", None)
+                if (
+                    td_error is not None
+                    and isinstance(batch, TransitionWithIndexBatch)
+                    and batch.index is not None
+                ):
+                    replay_buffer.update_priorities(batch.index, td_error)
 
             for k, v in single_report.items():
                 if k in report:
@@ -193,15 +249,31 @@ class PolicyLearner(torch.nn.Module, ABC):
         if batch.next_action is not None:
             batch.next_action = self._action_representation_module(batch.next_action)
         if batch.curr_available_actions is not None:
-            batch.curr_available_actions = self._action_representation_module(
+            batch.curr_available_actions = self._represent_available_actions(
                 batch.curr_available_actions
             )
         if batch.next_available_actions is not None:
-            batch.next_available_actions = self._action_representation_module(
+            batch.next_available_actions = self._represent_available_actions(
                 batch.next_available_actions
             )
         return batch
 
+    def _represent_available_actions(
+        self, available_actions: torch.Tensor
+    ) -> torch.Tensor:
+        """
+        Represents padded available actions
+        (batch_size x max_number_actions x action_dim). Available actions shared by
+        all transitions of a batch as an expanded view (e.g. from a replay buffer
+        storing action indices) are represented once, and expanded again.
+        """
+        if available_actions.dim() == 3 and available_actions.stride(0) == 0:
+            representations = self._action_representation_module(available_actions[:1])
+            return representations.expand(
+                available_actions.shape[0], *representations.shape[1:]
+            )
+        return self._action_representation_module(available_actions)
+
     @abstractmethod
     def learn_batch(self, batch: TransitionBatch) -> Dict[str, Any]:
         """
@@ -5,8 +5,9 @@
 # LICENSE file in the root directory of this source tree.
 #
 
+import copy
 from abc import abstractmethod
-from typing import Any, Dict, Iterable, List, Optional, Type
+from typing import Any, Dict, Iterable, List, Optional, Type, Union
 
 from pearl.action_representation_modules.action_representation_module import (
     ActionRepresentationModule,
@@ -36,6 +37,7 @@ from pearl.api.state import SubjectiveState
 from pearl.history_summarization_modules.history_summarization_module import (
     HistorySummarizationModule,
 )
+from pearl.neural_networks.common.target_network import TargetNetworkUpdater
 from pearl.neural_networks.common.utils import (
     init_weights,
     update_target_network,
@@ -48,12 +50,18 @@ from pearl.neural_networks.common.value_networks import (
 from pearl.neural_networks.sequential_decision_making.actor_networks import (
     VanillaActorNetwork,
 )
-from pearl.neural_networks.sequential_decision_making.twin_critic import TwinCritic
+from pearl.neural_networks.sequential_decision_making.exploit_policies import (
+    ActorExploitPolicy,
+)
+from pearl.neural_networks.sequential_decision_making.twin_critic import (
+    FusedCritic,
+    TwinCritic,
+)
 from pearl.policy_learners.exploration_modules.exploration_module import (
     ExplorationModule,
 )
 from pearl.policy_learners.policy_learner import PolicyLearner
-from pearl.replay_buffers.transition import TransitionBatch
+from pearl.replay_buffers.transition import TransitionBatch, TransitionWithIndexBatch
 from torch import nn, optim
 
 
@@ -82,6 +90,7 @@ class ActorCriticBase(PolicyLearner):
         actor_soft_update_tau: float = 0.005,
         critic_soft_update_tau: float = 0.005,
         use_twin_critic: bool = False,
+        use_fused_critic: bool = False,
         discount_factor: float = 0.99,
         training_rounds: int = 1,
         batch_size: int = 256,
@@ -99,9 +108,11 @@ class ActorCriticBase(PolicyLearner):
             action_space=action_space,
         )
         self._state_dim = state_dim
+        self._action_space = action_space
         self._use_actor_target = use_actor_target
         self._use_critic_target = use_critic_target
         self._use_twin_critic = use_twin_critic
+        self._use_fused_critic = use_fused_critic
         self._use_critic: bool = critic_hidden_dims is not None
 
         self._action_dim: int = (
@@ -143,7 +154,10 @@ class ActorCriticBase(PolicyLearner):
                 else self._action_dim,
                 action_space=action_space,
             )
-            update_target_network(self._actor_target, self._actor, tau=1)
+            self._actor_target_updater = TargetNetworkUpdater(
+                self._actor_target, self._actor, tau=actor_soft_update_tau
+            )
+            self._actor_target_updater.update(tau=1.0)
 
         self._critic_soft_update_tau = critic_soft_update_tau
         if self._use_critic:
@@ -153,6 +167,7 @@ class ActorCriticBase(PolicyLearner):
                 hidden_dims=critic_hidden_dims,
                 use_twin_critic=use_twin_critic,
                 network_type=critic_network_type,
+                use_fused_critic=use_fused_critic,
             )
             self._critic_optimizer: optim.Optimizer = optim.AdamW(
                 [
@@ -170,13 +185,12 @@ class ActorCriticBase(PolicyLearner):
                     hidden_dims=critic_hidden_dims,
                     use_twin_critic=use_twin_critic,
                     network_type=critic_network_type,
+                    use_fused_critic=use_fused_critic,
                 )
-                update_critic_target_network(
-                    self._critic_target,
-                    self._critic,
-                    use_twin_critic,
-                    1,
+                self._critic_target_updater = TargetNetworkUpdater(
+                    self._critic_target, self._critic, tau=critic_soft_update_tau
                 )
+                self._critic_target_updater.update(tau=1.0)
 
         self._discount_factor = discount_factor
 
@@ -224,26 +238,87 @@ class ActorCriticBase(PolicyLearner):
             values=action_probabilities,
         )
 
+    def act_batch(
+        self,
+        subjective_states: torch.Tensor,
+        available_action_space: ActionSpace,
+        exploit: bool = False,
+    ) -> torch.Tensor:
+        # Step 1: compute exploit_action for all states in one forward pass
+        with torch.no_grad():
+            if self.is_action_continuous:
+                exploit_action = self._actor.sample_action(subjective_states)
+                # (batch_size x action_dim)
+                action_probabilities = None
+            else:
+                assert isinstance(available_action_space, DiscreteActionSpace)
+                actions = self.action_representation_module(
+                    available_action_space.actions_batch
+                )
+                action_probabilities = self._actor.get_policy_distribution(
+                    state_batch=subjective_states,
+                    available_actions=actions.unsqueeze(0).expand(
+                        subjective_states.shape[0], -1, -1
+                    ),
+                ).view(subjective_states.shape[0], -1)
+                # (batch_size x action_space_size)
+                exploit_action = torch.argmax(action_probabilities, dim=-1)
+
+        # Step 2: return exploit actions if no exploration,
+        # else pass through the exploration module
+        if exploit:
+            return exploit_action
+
+        return self._exploration_module.act(
+            exploit_action=exploit_action,
+            action_space=available_action_space,
+            subjective_state=subjective_states,
+            values=action_probabilities,
+        )
+
+    def get_exploit_policy(
+        self, action_space: Optional[ActionSpace] = None
+    ) -> torch.nn.Module:
+        action_representations = None
+        if not self.is_action_continuous:
+            action_space = self._action_space if action_space is None else action_space
+            assert isinstance(action_space, DiscreteActionSpace)
+            with torch.no_grad():
+                action_representations = self.action_representation_module(
+                    action_space.actions_batch.to(next(self._actor.parameters()))
+                ).clone()
+        return ActorExploitPolicy(
+            history_summarization_module=copy.deepcopy(
+                self._history_summarization_module
+            ),
+            actor=copy.deepcopy(self._actor),
+            action_representations=action_representations,
+        ).freeze()
+
     def reset(self, action_space: ActionSpace) -> None:
         self._action_space = action_space
 
     def learn_batch(self, batch: TransitionBatch) -> Dict[str, Any]:
-        self._critic_learn_batch(batch)  # update critic
+        critic_report = self._critic_learn_batch(batch)  # update critic
         self._actor_learn_batch(batch)  # update actor
 
         if self._use_critic_target:
-            update_critic_target_network(
-                self._critic_target,
-                self._critic,
-                self._use_twin_critic,
-                self._critic_soft_update_tau,
-            )
+            self._critic_target_updater.update(self._critic_soft_update_tau)
         if self._use_actor_target:
-            update_target_network(
-                self._actor_target,
-                self._actor,
-                self._actor_soft_update_tau,
-            )
+            self._actor_target_updater.update(self._actor_soft_update_tau)
+        return self._td_error_report(critic_report)
+
+    def _reports_td_error(self, batch: TransitionBatch) -> bool:
+        """
+        Whether critic updates on `batch` should report per-sample TD errors,
+        which is the case for batches sampled from a prioritized replay buffer.
+        """
+        return isinstance(batch, TransitionWithIndexBatch)
+
+    def _td_error_report(self, critic_report: Dict[str, Any]) -> Dict[str, Any]:
+        """Forwards the TD errors of a critic update, if any, from `learn_batch`."""
+        if "td_error" in critic_report:
+            return {"td_error": critic_report["td_error"]}
         return {}
 
     @abstractmethod
@@ -261,11 +336,14 @@ def make_critic(
     use_twin_critic: bool,
     network_type: Type[QValueNetwork],
     action_dim: Optional[int] = None,
+    use_fused_critic: bool = False,
 ) -> nn.Module:
     if use_twin_critic:
         assert action_dim is not None
         assert hidden_dims is not None
-        return TwinCritic(
+        # a fused critic evaluates both critics in a single pass
+        twin_critic_type = FusedCritic if use_fused_critic else TwinCritic
+        return twin_critic_type(
             state_dim=state_dim,
             action_dim=action_dim,
             hidden_dims=hidden_dims,
@@ -297,7 +375,9 @@ def make_critic(
 def update_critic_target_network(
     target_network: nn.Module, network: nn.Module, use_twin_critic: bool, tau: float
 ) -> None:
-    if use_twin_critic:
+    if isinstance(network, FusedCritic):
+        update_target_network(target_network, network, tau=tau)
+    elif use_twin_critic:
         update_target_networks(
             target_network._critic_networks_combined,
             network._critic_networks_combined,
@@ -334,8 +414,10 @@ def twin_critic_action_value_update(
     action_batch: torch.Tensor,
     expected_target_batch: torch.Tensor,
     optimizer: torch.optim.Optimizer,
-    critic: TwinCritic,
-) -> Dict[str, torch.Tensor]:
+    critic: Union[TwinCritic, FusedCritic],
+    weight: Optional[torch.Tensor] = None,
+    return_td_error: bool = False,
+) -> Dict[str, Any]:
     """
     Performs an optimization step on the twin critic networks.
 
@@ -345,21 +427,31 @@ def twin_critic_action_value_update(
         expected_target: the batch of target estimates for Bellman equation.
         optimizer: the optimizer to use for the update.
         critic: the critic network to update.
+        weight: optional per-sample weights of the squared errors with shape
+            (batch_size), e.g. importance sampling weights of prioritized replay.
+        return_td_error: whether to also return the per-sample TD errors
+            (averaged over both critics) under the "td_error" key.
     Returns:
-        Dict[str, torch.Tensor]: mean loss and individual critic losses.
+        Dict[str, Any]: mean loss and individual critic losses.
     """
 
-    criterion = torch.nn.MSELoss()
     optimizer.zero_grad()
     q_1, q_2 = critic.get_q_values(state_batch, action_batch)
-    loss = criterion(
-        q_1.reshape_as(expected_target_batch), expected_target_batch.detach()
-    ) + criterion(q_2.reshape_as(expected_target_batch), expected_target_batch.detach())
+    td_error_1 = q_1.reshape_as(expected_target_batch) - expected_target_batch.detach()
+    td_error_2 = q_2.reshape_as(expected_target_batch) - expected_target_batch.detach()
+    if weight is not None:
+        weight = weight.reshape_as(expected_target_batch)
+        loss = (weight * td_error_1.pow(2)).mean() + (weight * td_error_2.pow(2)).mean()
+    else:
+        loss = td_error_1.pow(2).mean() + td_error_2.pow(2).mean()
     loss.backward()
     optimizer.step()
 
-    return {
+    report: Dict[str, Any] = {
         "critic_mean_loss": loss.item(),
         "critic_1_values": q_1.mean().item(),
         "critic_2_values": q_2.mean().item(),
     }
+    if return_td_error:
+        report["td_error"] = (0.5 * (td_error_1.abs() + td_error_2.abs())).detach()
+    return report
@@ -14,7 +14,7 @@ from pearl.action_representation_modules.action_representation_module import (
 )
 
 from pearl.api.action_space import ActionSpace
-from pearl.neural_networks.common.utils import update_target_network
+from pearl.neural_networks.common.target_network import TargetNetworkUpdater
 from pearl.neural_networks.common.value_networks import EnsembleQValueNetwork
 from pearl.policy_learners.exploration_modules.sequential_decision_making.deep_exploration import (
     DeepExploration,
@@ -24,7 +24,6 @@ from pearl.policy_learners.sequential_decision_making.deep_q_learning import (
     DeepQLearning,
 )
 from pearl.replay_buffers.transition import (
-    filter_batch_by_bootstrap_mask,
     TransitionBatch,
     TransitionWithBootstrapMaskBatch,
 )
@@ -71,6 +70,12 @@ class BootstrappedDQN(DeepQLearning):
         self._soft_update_tau = soft_update_tau
         self._Q = q_ensemble_network
         self._Q_target: EnsembleQValueNetwork = deepcopy(self._Q)
+        self._target_network_updater = TargetNetworkUpdater(
+            self._Q_target,
+            self._Q,
+            tau=soft_update_tau,
+            update_every_x_steps=target_update_freq,
+        )
         self._optimizer = optim.AdamW(
             self._Q.parameters(), lr=self._learning_rate, amsgrad=True
         )
@@ -85,35 +90,33 @@ class BootstrappedDQN(DeepQLearning):
                 f"{type(self).__name__} requires a batch of type "
                 f"`TransitionWithBootstrapMaskBatch`, but got {type(batch)}."
             )
-        loss_ensemble = torch.tensor(0.0).to(batch.device)
-        mask = batch.bootstrap_mask
-        for z in range(self.ensemble_size):
-            z = torch.tensor(z).to(batch.device)
-            # if this batch doesn't have any items for the z-th ensemble, move on
-            if mask is None or mask[:, z].sum() == 0:
-                continue
-
-            # filter the batch to only the transitions belonging to ensemble `z`
-            batch_filtered = filter_batch_by_bootstrap_mask(batch=batch, z=z)
-            state_action_values = self._Q.get_q_values(
-                state_batch=batch_filtered.state,
-                action_batch=batch_filtered.action,
-                curr_available_actions_batch=batch_filtered.curr_available_actions,
-                z=z,
+        # all ensemble members are evaluated on the whole batch, and the bootstrap
+        # mask weights the loss of each member instead of filtering its rows
+        state_action_values = self._Q.get_ensemble_q_values(
+            state_batch=batch.state, action_batch=batch.action
+        )  # (ensemble_size x batch_size)
+
+        # compute the Bellman target
+        expected_state_action_values = (
+            self._get_next_state_ensemble_values(
+                batch=batch, batch_size=batch.state.shape[0]
             )
+            * self._discount_factor
+            * (1 - batch.done.float())
+        ) + batch.reward  # (ensemble_size x batch_size), r + gamma * V(s)
 
-            # compute the Bellman target
-            expected_state_action_values = (
-                self._get_next_state_values(
-                    batch=batch_filtered, batch_size=batch_filtered.state.shape[0], z=z
-                )
-                * self._discount_factor
-                * (1 - batch_filtered.done.float())
-            ) + batch_filtered.reward  # (batch_size), r + gamma * V(s)
-
-            criterion = torch.nn.MSELoss()
-            loss = criterion(state_action_values, expected_state_action_values)
-            loss_ensemble += loss
+        mask = batch.bootstrap_mask
+        weight = (
+            torch.ones_like(state_action_values)
+            if mask is None
+            else mask.t().to(state_action_values)
+        )  # (ensemble_size x batch_size)
+        # each member's loss is the mean squared error over its own transitions
+        # (members without any transitions in this batch do not contribute)
+        squared_errors = (state_action_values - expected_state_action_values).pow(2)
+        loss_ensemble = (
+            (weight * squared_errors).sum(dim=1) / weight.sum(dim=1).clamp(min=1)
+        ).sum()
 
         # Optimize the model
         self._optimizer.zero_grad()
@@ -121,8 +124,7 @@ class BootstrappedDQN(DeepQLearning):
         self._optimizer.step()
 
         # Target Network Update
-        if (self._training_steps + 1) % self._target_update_freq == 0:
-            update_target_network(self._Q_target, self._Q, self._soft_update_tau)
+        self._target_network_updater.step()
 
         return {"loss": loss_ensemble.mean().item()}
 
@@ -130,6 +132,40 @@ class BootstrappedDQN(DeepQLearning):
         # Reset the `DeepExploration` module, which will resample the epistemic index.
         self._exploration_module.reset()
 
+    @torch.no_grad()
+    def _get_next_state_ensemble_values(
+        self, batch: TransitionBatch, batch_size: int
+    ) -> torch.Tensor:
+        """
+        Double DQN next state values of all ensemble members, of shape
+        (ensemble_size x batch_size), computed with one forward pass per network.
+        """
+        (
+            next_state,
+            next_available_actions,
+            next_available_actions_mask,
+        ) = self._prepare_next_state_action_batch(batch)
+
+        assert next_available_actions is not None
+
+        # (ensemble_size x batch_size x action_space_size)
+        next_state_action_values = self._Q.get_ensemble_q_values(
+            state_batch=next_state, action_batch=next_available_actions
+        ).view(self.ensemble_size, batch_size, -1)
+        target_next_state_action_values = self._Q_target.get_ensemble_q_values(
+            state_batch=next_state, action_batch=next_available_actions
+        ).view(self.ensemble_size, batch_size, -1)
+
+        # Make sure that unavailable actions' Q values are assigned to -inf
+        if next_available_actions_mask is not None:
+            next_state_action_values = next_state_action_values.masked_fill(
+                next_available_actions_mask.unsqueeze(0), -float("inf")
+            )
+
+        # Get argmax actions indices
+        argmax_actions = next_state_action_values.argmax(dim=2, keepdim=True)
+        return target_next_state_action_values.gather(2, argmax_actions).squeeze(2)
+
     @torch.no_grad()
     def _get_next_state_values(
         self, batch: TransitionBatch, batch_size: int, z: Optional[Tensor] = None
@@ -21,7 +21,10 @@ from pearl.neural_networks.sequential_decision_making.actor_networks import (
 from pearl.neural_networks.sequential_decision_making.q_value_network import (
     QValueNetwork,
 )
-from pearl.neural_networks.sequential_decision_making.twin_critic import TwinCritic
+from pearl.neural_networks.sequential_decision_making.twin_critic import (
+    FusedCritic,
+    TwinCritic,
+)
 from pearl.policy_learners.exploration_modules.common.normal_distribution_exploration import (  # noqa E501
     NormalDistributionExploration,
 )
@@ -58,6 +61,7 @@ class DeepDeterministicPolicyGradient(ActorCriticBase):
         training_rounds: int = 1,
         batch_size: int = 256,
         action_representation_module: Optional[ActionRepresentationModule] = None,
+        use_fused_critic: bool = False,
     ) -> None:
         super(DeepDeterministicPolicyGradient, self).__init__(
             state_dim=state_dim,
@@ -82,6 +86,7 @@ class DeepDeterministicPolicyGradient(ActorCriticBase):
             is_action_continuous=True,
             on_policy=False,
             action_representation_module=action_representation_module,
+            use_fused_critic=use_fused_critic,
         )
 
     def _actor_learn_batch(self, batch: TransitionBatch) -> Dict[str, Any]:
@@ -129,7 +134,9 @@ class DeepDeterministicPolicyGradient(ActorCriticBase):
                 next_q * self._discount_factor * (1 - batch.done.float())
             ) + batch.reward  # shape (batch_size)
 
-        assert isinstance(self._critic, TwinCritic), "DDPG requires TwinCritic critic"
+        assert isinstance(
+            self._critic, (TwinCritic, FusedCritic)
+        ), "DDPG requires TwinCritic critic"
 
         # update twin critics towards bellman target
         loss_critic_update = twin_critic_action_value_update(
@@ -138,6 +145,8 @@ class DeepDeterministicPolicyGradient(ActorCriticBase):
             expected_target_batch=expected_state_action_values,
             optimizer=self._critic_optimizer,
             critic=self._critic,
+            weight=batch.weight,
+            return_td_error=self._reports_td_error(batch),
         )
 
         return loss_critic_update
@@ -12,6 +12,9 @@ from pearl.action_representation_modules.action_representation_module import (
     ActionRepresentationModule,
 )
 from pearl.api.action_space import ActionSpace
+from pearl.neural_networks.sequential_decision_making.q_value_network import (
+    get_q_values_for_all_actions,
+)
 from pearl.policy_learners.exploration_modules.common.epsilon_greedy_exploration import (
     EGreedyExploration,
 )
@@ -57,17 +60,15 @@ class DeepQLearning(DeepTDLearning):
     def _get_next_state_values(
         self, batch: TransitionBatch, batch_size: int
     ) -> torch.Tensor:
-        (
-            next_state,
-            next_available_actions,
-            next_unavailable_actions_mask,
-        ) = self._prepare_next_state_action_batch(batch)
-
+        next_state = batch.next_state
+        assert next_state is not None
+        next_available_actions = batch.next_available_actions
         assert next_available_actions is not None
+        next_unavailable_actions_mask = batch.next_unavailable_actions_mask
 
-        next_state_action_values = self._Q_target.get_q_values(
-            next_state, next_available_actions
-        ).view(batch_size, -1)
+        next_state_action_values = get_q_values_for_all_actions(
+            self._Q_target, next_state, next_available_actions
+        )
         # (batch_size x action_space_size)
 
         # Make sure that unavailable actions' Q values are assigned to -inf
@@ -6,6 +6,7 @@
 #
 
 import copy
+import weakref
 from abc import abstractmethod
 from typing import Any, Dict, List, Optional, Type
 
@@ -20,27 +21,71 @@ from pearl.api.state import SubjectiveState
 from pearl.history_summarization_modules.history_summarization_module import (
     HistorySummarizationModule,
 )
-from pearl.neural_networks.common.utils import update_target_network
+from pearl.neural_networks.common.target_network import TargetNetworkUpdater
 
 from pearl.neural_networks.common.value_networks import (
     DuelingQValueNetwork,
     TwoTowerQValueNetwork,
     VanillaQValueNetwork,
 )
+from pearl.neural_networks.sequential_decision_making.exploit_policies import (
+    QValueExploitPolicy,
+)
 from pearl.neural_networks.sequential_decision_making.q_value_network import (
+    get_q_values_for_all_actions,
     QValueNetwork,
 )
 from pearl.policy_learners.exploration_modules.exploration_module import (
     ExplorationModule,
 )
 from pearl.policy_learners.policy_learner import PolicyLearner
-from pearl.replay_buffers.transition import TransitionBatch
+from pearl.replay_buffers.transition import TransitionBatch, TransitionWithIndexBatch
 
 from pearl.utils.functional_utils.learning.loss_fn_utils import compute_cql_loss
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 from torch import optim
 
 
+class _ActionRepresentationCache:
+    """
+    Caches the representations of the actions batch of an action space (see
+    `DiscreteActionSpace.actions_batch`), for the device and dtype they were
+    computed for. The cache is dropped when its policy learner is copied or pickled.
+    """
+
+    def __init__(self) -> None:
+        self._clear()
+
+    def _clear(self) -> None:
+        self._actions_batch_ref: Optional[weakref.ref] = None
+        self._representations: Optional[torch.Tensor] = None
+
+    def get(
+        self, actions_batch: torch.Tensor, like: torch.Tensor
+    ) -> Optional[torch.Tensor]:
+        representations = self._representations
+        actions_batch_ref = self._actions_batch_ref
+        if (
+            representations is None
+            or actions_batch_ref is None
+            or actions_batch_ref() is not actions_batch
+            or representations.device != like.device
+            or representations.dtype != like.dtype
+        ):
+            return None
+        return representations
+
+    def set(self, actions_batch: torch.Tensor, representations: torch.Tensor) -> None:
+        self._actions_batch_ref = weakref.ref(actions_batch)
+        self._representations = representations
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._clear()
+
+
 # TODO: Only support discrete action space problems for now and assumes Gym action space.
 # Currently available actions is not used. Needs to be updated once we know the input structure
 # of production stack on this param.
@@ -121,9 +166,16 @@ class DeepTDLearning(PolicyLearner):
             self._Q = make_specified_network()
 
         self._Q_target: QValueNetwork = copy.deepcopy(self._Q)
+        self._target_network_updater = TargetNetworkUpdater(
+            self._Q_target,
+            self._Q,
+            tau=soft_update_tau,
+            update_every_x_steps=target_update_freq,
+        )
         self._optimizer: torch.optim.Optimizer = optim.AdamW(
             self._Q.parameters(), lr=learning_rate, amsgrad=True
         )
+        self._action_representations = _ActionRepresentationCache()
 
     @property
     def optimizer(self) -> torch.optim.Optimizer:
@@ -138,6 +190,24 @@ class DeepTDLearning(PolicyLearner):
     def reset(self, action_space: ActionSpace) -> None:
         self._action_space = action_space
 
+    def _get_action_representations(
+        self, action_space: DiscreteActionSpace, like: torch.Tensor
+    ) -> torch.Tensor:
+        """
+        Returns the representations of all actions of an action space, on the device
+        and with the dtype of `like`. Representations computed by a representation
+        module without parameters are cached for the latest action space, so that
+        Q-value networks can in turn cache the features of a fixed set of actions
+        (see `QValueNetwork.get_q_values_for_all_actions`).
+        """
+        actions_batch = action_space.actions_batch
+        representations = self._action_representations.get(actions_batch, like)
+        if representations is None:
+            representations = self._action_representation_module(actions_batch.to(like))
+            if next(self._action_representation_module.parameters(), None) is None:
+                self._action_representations.set(actions_batch, representations)
+        return representations
+
     def act(
         self,
         subjective_state: SubjectiveState,
@@ -148,21 +218,15 @@ class DeepTDLearning(PolicyLearner):
         # Fix the available action space.
         assert isinstance(available_action_space, DiscreteActionSpace)
         with torch.no_grad():
-            states_repeated = torch.repeat_interleave(
-                subjective_state.unsqueeze(0),
-                available_action_space.n,
-                dim=0,
-            )
-            # (action_space_size x state_dim)
-
-            actions = self._action_representation_module(
-                available_action_space.actions_batch.to(states_repeated)
+            actions = self._get_action_representations(
+                available_action_space, subjective_state
             )
             # (action_space_size, action_dim)
 
-            q_values = self._Q.get_q_values(states_repeated, actions)
-            # this does a forward pass since all avaialble
-            # actions are already stacked together
+            q_values = get_q_values_for_all_actions(
+                self._Q, subjective_state.unsqueeze(0), actions
+            ).view(-1)
+            # state features are computed once and shared by all available actions
 
             exploit_action = torch.argmax(q_values).view((-1))
 
@@ -176,6 +240,58 @@ class DeepTDLearning(PolicyLearner):
             q_values,
         )
 
+    def act_batch(
+        self,
+        subjective_states: torch.Tensor,
+        available_action_space: ActionSpace,
+        exploit: bool = False,
+    ) -> torch.Tensor:
+        assert isinstance(available_action_space, DiscreteActionSpace)
+        if subjective_states.ndim != 2:
+            # e.g. image states, which Q-value networks only take with a single
+            # batch dimension
+            return super(DeepTDLearning, self).act_batch(
+                subjective_states, available_action_space, exploit=exploit
+            )
+        with torch.no_grad():
+            actions = self._get_action_representations(
+                available_action_space, subjective_states
+            )
+            # (action_space_size x action_dim)
+
+            q_values = get_q_values_for_all_actions(self._Q, subjective_states, actions)
+            # (batch_size x action_space_size), with one forward pass for all
+            # states and available actions
+
+            exploit_action = torch.argmax(q_values, dim=1)
+
+        if exploit:
+            return exploit_action
+
+        return self._exploration_module.act(
+            subjective_states,
+            available_action_space,
+            exploit_action,
+            q_values,
+        ).view(-1)
+
+    def get_exploit_policy(
+        self, action_space: Optional[ActionSpace] = None
+    ) -> torch.nn.Module:
+        action_space = self._action_space if action_space is None else action_space
+        assert isinstance(action_space, DiscreteActionSpace)
+        with torch.no_grad():
+            action_representations = self._action_representation_module(
+                action_space.actions_batch.to(next(self._Q.parameters()))
+            )
+        return QValueExploitPolicy(
+            history_summarization_module=copy.deepcopy(
+                self._history_summarization_module
+            ),
+            q_network=copy.deepcopy(self._Q),
+            action_representations=action_representations.clone(),
+        ).freeze()
+
     @abstractmethod
     def _get_next_state_values(
         self, batch: TransitionBatch, batch_size: int
@@ -206,8 +322,15 @@ class DeepTDLearning(PolicyLearner):
             * (1 - done_batch.float())
         ) + reward_batch  # (batch_size), r + gamma * V(s)
 
-        criterion = torch.nn.MSELoss()
-        bellman_loss = criterion(state_action_values, expected_state_action_values)
+        if batch.weight is not None:
+            # importance sampling weights, e.g. from a prioritized replay buffer
+            bellman_loss = (
+                batch.weight
+                * (state_action_values - expected_state_action_values).pow(2)
+            ).mean()
+        else:
+            criterion = torch.nn.MSELoss()
+            bellman_loss = criterion(state_action_values, expected_state_action_values)
         if self._is_conservative:
             cql_loss = compute_cql_loss(self._Q, batch, batch_size)
             loss = self._conservative_alpha * cql_loss + bellman_loss
@@ -220,11 +343,10 @@ class DeepTDLearning(PolicyLearner):
         self._optimizer.step()
 
         # Target Network Update
-        if (self._training_steps + 1) % self._target_update_freq == 0:
-            update_target_network(self._Q_target, self._Q, self._soft_update_tau)
-
-        return {
-            "loss": torch.abs(state_action_values - expected_state_action_values)
-            .mean()
-            .item()
-        }
+        self._target_network_updater.step()
+
+        td_error = (state_action_values - expected_state_action_values).detach()
+        report: Dict[str, Any] = {"loss": torch.abs(td_error).mean().item()}
+        if isinstance(batch, TransitionWithIndexBatch):
+            report["td_error"] = td_error
+        return report
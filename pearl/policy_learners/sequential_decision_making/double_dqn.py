@@ -6,11 +6,13 @@
 #
 
 import torch
+from pearl.neural_networks.sequential_decision_making.q_value_network import (
+    get_q_values_for_all_actions,
+)
 from pearl.policy_learners.sequential_decision_making.deep_q_learning import (
     DeepQLearning,
 )
 from pearl.replay_buffers.transition import TransitionBatch
-from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 
 
 class DoubleDQN(DeepQLearning):
@@ -37,19 +39,8 @@ class DoubleDQN(DeepQLearning):
             batch.next_unavailable_actions_mask
         )  # (batch_size x action_space_size)
 
-        assert isinstance(self._action_space, DiscreteActionSpace)
-        number_of_actions = self._action_space.n
-
-        next_state_batch_repeated = torch.repeat_interleave(
-            next_state_batch.unsqueeze(1),
-            number_of_actions,
-            dim=1,
-        )  # (batch_size x action_space_size x state_dim)
-
-        next_state_action_values = self._Q.get_q_values(
-            next_state_batch_repeated, next_available_actions_batch
-        ).view(
-            (batch_size, -1)
+        next_state_action_values = get_q_values_for_all_actions(
+            self._Q, next_state_batch, next_available_actions_batch
         )  # (batch_size x action_space_size)
         # Make sure that unavailable actions' Q values are assigned to -inf
         next_state_action_values[next_unavailable_actions_mask_batch] = -float("inf")
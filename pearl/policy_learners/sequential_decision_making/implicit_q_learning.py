@@ -16,7 +16,6 @@ from pearl.api.action_space import ActionSpace
 from pearl.history_summarization_modules.history_summarization_module import (
     HistorySummarizationModule,
 )
-from pearl.neural_networks.common.utils import update_target_networks
 
 from pearl.neural_networks.common.value_networks import (
     QValueNetwork,
@@ -30,7 +29,10 @@ from pearl.neural_networks.sequential_decision_making.actor_networks import (
     VanillaActorNetwork,
     VanillaContinuousActorNetwork,
 )
-from pearl.neural_networks.sequential_decision_making.twin_critic import TwinCritic
+from pearl.neural_networks.sequential_decision_making.twin_critic import (
+    FusedCritic,
+    TwinCritic,
+)
 from pearl.policy_learners.exploration_modules.common.no_exploration import (
     NoExploration,
 )
@@ -91,6 +93,7 @@ class ImplicitQLearning(ActorCriticBase):
         temperature_advantage_weighted_regression: float = 0.5,
         advantage_clamp: float = 100.0,
         action_representation_module: Optional[ActionRepresentationModule] = None,
+        use_fused_critic: bool = False,
     ) -> None:
         super(ImplicitQLearning, self).__init__(
             state_dim=state_dim,
@@ -114,6 +117,7 @@ class ImplicitQLearning(ActorCriticBase):
             is_action_continuous=action_space.is_continuous,  # inferred from the action space
             on_policy=False,
             action_representation_module=action_representation_module,
+            use_fused_critic=use_fused_critic,
         )
 
         self._expectile = expectile
@@ -157,13 +161,11 @@ class ImplicitQLearning(ActorCriticBase):
 
         value_loss = self._value_learn_batch(batch)  # update value network
         critic_loss = self._critic_learn_batch(batch)  # update critic networks
+        td_error_report = self._td_error_report(critic_loss)
+        critic_loss.pop("td_error", None)
 
         # update critic and target Twin networks;
-        update_target_networks(
-            self._critic_target._critic_networks_combined,
-            self._critic._critic_networks_combined,
-            self._critic_soft_update_tau,
-        )
+        self._critic_target_updater.update(self._critic_soft_update_tau)
 
         actor_loss = self._actor_learn_batch(batch)  # update actor network
 
@@ -171,6 +173,7 @@ class ImplicitQLearning(ActorCriticBase):
             "value_loss": value_loss,
             "actor_loss": actor_loss,
             "critic_loss": critic_loss,
+            **td_error_report,
         }
 
     def _value_learn_batch(self, batch: TransitionBatch) -> Dict[str, Any]:
@@ -266,7 +269,7 @@ class ImplicitQLearning(ActorCriticBase):
             ) + batch.reward  # shape: (batch_size)
 
         assert isinstance(
-            self._critic, TwinCritic
+            self._critic, (TwinCritic, FusedCritic)
         ), "Critic in ImplicitQLearning should be TwinCritic"
 
         # update twin critics towards target
@@ -276,6 +279,8 @@ class ImplicitQLearning(ActorCriticBase):
             expected_target_batch=target,
             optimizer=self._critic_optimizer,
             critic=self._critic,
+            weight=batch.weight,
+            return_td_error=self._reports_td_error(batch),
         )
         return loss_critic_update
 
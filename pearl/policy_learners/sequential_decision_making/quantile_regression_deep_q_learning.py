@@ -91,14 +91,13 @@ class QuantileRegressionDeepQLearning(QuantileRegressionDeepTDLearning):
 
         assert next_state_batch is not None
         assert isinstance(self._action_space, DiscreteActionSpace)
-        next_state_batch_repeated = torch.repeat_interleave(
-            next_state_batch.unsqueeze(1),
-            self._action_space.n,  # pyre-ignore[16]
-            dim=1,
+        next_state_batch_repeated = next_state_batch.unsqueeze(1).expand(
+            -1, self._action_space.n, -1  # pyre-ignore[16]
         )  # shape: (batch_size x action_space_size x state_dim)
 
         """
-        Step 1: get quantiles for all possible actions in the batch
+        Step 1: get quantiles for all possible actions in the batch, in a single
+        forward pass
             - output shape: (batch_size x action_space_size x num_quantiles)
         """
         assert next_available_actions_batch is not None
@@ -108,10 +107,23 @@ class QuantileRegressionDeepQLearning(QuantileRegressionDeepTDLearning):
 
         # get q values from a q value distribution under a risk metric
         # instead of using the 'get_q_values' method of the QuantileQValueNetwork,
-        # we invoke a method from the risk sensitive safety module
-        next_state_action_values = self.safety_module.get_q_values_under_risk_metric(
-            next_state_batch_repeated, next_available_actions_batch, self._Q_target
-        ).view(
+        # we invoke a method from the risk sensitive safety module, reusing the
+        # quantiles computed above when the safety module supports it
+        try:
+            next_state_action_values = (
+                self.safety_module.get_q_values_from_distribution(
+                    next_state_action_quantiles, self._Q_target
+                )
+            )
+        except NotImplementedError:
+            next_state_action_values = (
+                self.safety_module.get_q_values_under_risk_metric(
+                    next_state_batch_repeated,
+                    next_available_actions_batch,
+                    self._Q_target,
+                )
+            )
+        next_state_action_values = next_state_action_values.view(
             batch_size, -1
         )  # shape: (batch_size, action_space_size)
 
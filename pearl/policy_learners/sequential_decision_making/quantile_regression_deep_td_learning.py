@@ -21,7 +21,7 @@ from pearl.api.state import SubjectiveState
 from pearl.history_summarization_modules.history_summarization_module import (
     HistorySummarizationModule,
 )
-from pearl.neural_networks.common.utils import update_target_network
+from pearl.neural_networks.common.target_network import TargetNetworkUpdater
 from pearl.neural_networks.common.value_networks import QuantileQValueNetwork
 from pearl.policy_learners.exploration_modules.exploration_module import (
     ExplorationModule,
@@ -32,7 +32,7 @@ from pearl.safety_modules.risk_sensitive_safety_modules import (  # noqa
     RiskNeutralSafetyModule,  # noqa
 )
 from pearl.utils.functional_utils.learning.loss_fn_utils import (
-    compute_elementwise_huber_loss,
+    compute_quantile_huber_loss,
 )
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 from torch import optim
@@ -107,6 +107,12 @@ class QuantileRegressionDeepTDLearning(DistributionalPolicyLearner):
             self._Q: QuantileQValueNetwork = make_specified_network()
 
         self._Q_target: QuantileQValueNetwork = copy.deepcopy(self._Q)
+        self._target_network_updater = TargetNetworkUpdater(
+            self._Q_target,
+            self._Q,
+            tau=soft_update_tau,
+            update_every_x_steps=target_update_freq,
+        )
         self._optimizer = optim.AdamW(
             self._Q.parameters(), lr=learning_rate, amsgrad=True
         )
@@ -218,34 +224,20 @@ class QuantileRegressionDeepTDLearning(DistributionalPolicyLearner):
             )
 
         """
-        Step 3: pairwise distributional quantile loss:
+        Step 3: quantile huber loss, from the pairwise distributional quantile errors
         T theta_j(s',a*) - theta_i(s,a) for i,j in (1, .. , N)
-            - output shape: (batch_size, N, N)
-        """
-        pairwise_quantile_loss = quantile_next_state_greedy_action_values.unsqueeze(
-            2
-        ) - quantile_state_action_values.unsqueeze(1)
-
-        # elementwise huber loss smoothes the quantile loss, since it is non-smooth at 0
-        huber_loss = compute_elementwise_huber_loss(pairwise_quantile_loss)
-
-        with torch.no_grad():
-            asymmetric_weight = torch.abs(
-                self._Q.quantile_midpoints - (pairwise_quantile_loss < 0).float()
-            )
-
-        """
-        # Step 4: compute asymmetric huber loss (also known as the quantile huber loss)
-            - output shape: (batch_size, N, N)
-        """
-        quantile_huber_loss = asymmetric_weight * huber_loss
-
-        """
-        Step 5: compute loss to optimize: given pairwise quantile huber loss,
-            - sum(dim=1) approximates the (sum_{i=1}^N [ .. ]) term in Equation (1),
-            - mean() takes average over the other quantile dimension (E_j [ .. ]) and over batch
+            - the pairwise errors have shape (batch_size, N, N), and are computed over
+              chunks of the batch to bound memory with a large number of quantiles
+            - the huber loss smoothes the quantile loss, since it is non-smooth at 0
+            - the asymmetric weights |tau^*_i - 1{error < 0}| make it a quantile loss
+            - the loss sums over j, which approximates the (sum_{i=1}^N [ .. ]) term
+              in Equation (1), and averages over i (E_j [ .. ]) and over the batch
         """
-        quantile_bellman_loss = quantile_huber_loss.sum(dim=1).mean()
+        quantile_bellman_loss = compute_quantile_huber_loss(
+            predicted_quantiles=quantile_state_action_values,
+            target_quantiles=quantile_next_state_greedy_action_values,
+            quantile_midpoints=self._Q.quantile_midpoints,
+        )
 
         # optimize model (parameters of quantile q network)
         self._optimizer.zero_grad()
@@ -253,8 +245,7 @@ class QuantileRegressionDeepTDLearning(DistributionalPolicyLearner):
         self._optimizer.step()
 
         # target network update
-        if (self._training_steps + 1) % self._target_update_freq == 0:
-            update_target_network(self._Q_target, self._Q, self._soft_update_tau)
+        self._target_network_updater.step()
 
         return {
             "loss": torch.abs(
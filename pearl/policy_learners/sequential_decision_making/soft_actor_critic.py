@@ -22,7 +22,10 @@ from pearl.neural_networks.sequential_decision_making.actor_networks import (
 from pearl.neural_networks.sequential_decision_making.q_value_network import (
     QValueNetwork,
 )
-from pearl.neural_networks.sequential_decision_making.twin_critic import TwinCritic
+from pearl.neural_networks.sequential_decision_making.twin_critic import (
+    FusedCritic,
+    TwinCritic,
+)
 from pearl.policy_learners.exploration_modules.common.propensity_exploration import (
     PropensityExploration,
 )
@@ -64,6 +67,7 @@ class SoftActorCritic(ActorCriticBase):
         batch_size: int = 128,
         entropy_coef: float = 0.2,
         action_representation_module: Optional[ActionRepresentationModule] = None,
+        use_fused_critic: bool = False,
     ) -> None:
         super(SoftActorCritic, self).__init__(
             state_dim=state_dim,
@@ -88,6 +92,7 @@ class SoftActorCritic(ActorCriticBase):
             is_action_continuous=False,
             on_policy=False,
             action_representation_module=action_representation_module,
+            use_fused_critic=use_fused_critic,
         )
 
         # This is needed to avoid actor softmax overflow issue.
@@ -116,13 +121,15 @@ class SoftActorCritic(ActorCriticBase):
             * (1 - done_batch.float())
         ) + reward_batch  # (batch_size), r + gamma * V(s)
 
-        assert isinstance(self._critic, TwinCritic)
+        assert isinstance(self._critic, (TwinCritic, FusedCritic))
         loss_critic_update = twin_critic_action_value_update(
             state_batch=batch.state,
             action_batch=batch.action,
             expected_target_batch=expected_state_action_values,
             optimizer=self._critic_optimizer,
             critic=self._critic,
+            weight=batch.weight,
+            return_td_error=self._reports_td_error(batch),
         )
 
         return loss_critic_update
@@ -58,6 +58,7 @@ class ContinuousSoftActorCritic(ActorCriticBase):
         entropy_coef: float = 0.2,
         entropy_autotune: bool = True,
         action_representation_module: Optional[ActionRepresentationModule] = None,
+        use_fused_critic: bool = False,
     ) -> None:
         super(ContinuousSoftActorCritic, self).__init__(
             state_dim=state_dim,
@@ -82,6 +83,7 @@ class ContinuousSoftActorCritic(ActorCriticBase):
             is_action_continuous=True,
             on_policy=False,
             action_representation_module=action_representation_module,
+            use_fused_critic=use_fused_critic,
         )
 
         self._entropy_autotune = entropy_autotune
@@ -147,6 +149,8 @@ class ContinuousSoftActorCritic(ActorCriticBase):
             optimizer=self._critic_optimizer,
             # pyre-fixme
             critic=self._critic,
+            weight=batch.weight,
+            return_td_error=self._reports_td_error(batch),
         )
 
         return loss_critic_update
@@ -12,7 +12,7 @@ from pearl.action_representation_modules.action_representation_module import (
     ActionRepresentationModule,
 )
 from pearl.api.action_space import ActionSpace
-from pearl.neural_networks.common.utils import update_target_network
+from pearl.neural_networks.common.target_network import TargetNetworkUpdater
 from pearl.neural_networks.common.value_networks import VanillaQValueNetwork
 from pearl.neural_networks.sequential_decision_making.actor_networks import (
     ActorNetwork,
@@ -21,14 +21,16 @@ from pearl.neural_networks.sequential_decision_making.actor_networks import (
 from pearl.neural_networks.sequential_decision_making.q_value_network import (
     QValueNetwork,
 )
-from pearl.neural_networks.sequential_decision_making.twin_critic import TwinCritic
+from pearl.neural_networks.sequential_decision_making.twin_critic import (
+    FusedCritic,
+    TwinCritic,
+)
 from pearl.policy_learners.exploration_modules.exploration_module import (
     ExplorationModule,
 )
 from pearl.policy_learners.sequential_decision_making.actor_critic_base import (
     make_critic,
     twin_critic_action_value_update,
-    update_critic_target_network,
 )
 from pearl.policy_learners.sequential_decision_making.ddpg import (
     DeepDeterministicPolicyGradient,
@@ -65,6 +67,7 @@ class TD3(DeepDeterministicPolicyGradient):
         actor_update_noise: float = 0.2,
         actor_update_noise_clip: float = 0.5,
         action_representation_module: Optional[ActionRepresentationModule] = None,
+        use_fused_critic: bool = False,
     ) -> None:
         assert isinstance(action_space, BoxActionSpace)
         super(TD3, self).__init__(
@@ -83,6 +86,7 @@ class TD3(DeepDeterministicPolicyGradient):
             training_rounds=training_rounds,
             batch_size=batch_size,
             action_representation_module=action_representation_module,
+            use_fused_critic=use_fused_critic,
         )
         self._action_space: BoxActionSpace = action_space
         self._actor_update_freq = actor_update_freq
@@ -92,7 +96,7 @@ class TD3(DeepDeterministicPolicyGradient):
 
     def learn_batch(self, batch: TransitionBatch) -> Dict[str, Any]:
 
-        self._critic_learn_batch(batch)  # critic update
+        critic_report = self._critic_learn_batch(batch)  # critic update
         self._critic_update_count += 1
 
         # delayed actor update
@@ -101,18 +105,11 @@ class TD3(DeepDeterministicPolicyGradient):
             self._actor_learn_batch(batch)
 
             # update targets of critics using soft updates
-            update_critic_target_network(
-                self._critic_target,
-                self._critic,
-                self._use_twin_critic,
-                self._critic_soft_update_tau,
-            )
+            self._critic_target_updater.update(self._critic_soft_update_tau)
             # update target of actor network using soft updates
-            update_target_network(
-                self._actor_target, self._actor, self._actor_soft_update_tau
-            )
+            self._actor_target_updater.update(self._actor_soft_update_tau)
 
-        return {}
+        return self._td_error_report(critic_report)
 
     def _critic_learn_batch(self, batch: TransitionBatch) -> Dict[str, Any]:
 
@@ -159,13 +156,15 @@ class TD3(DeepDeterministicPolicyGradient):
             ) + batch.reward  # (batch_size)
 
         # update twin critics towards bellman target
-        assert isinstance(self._critic, TwinCritic)
+        assert isinstance(self._critic, (TwinCritic, FusedCritic))
         loss_critic_update = twin_critic_action_value_update(
             state_batch=batch.state,
             action_batch=batch.action,
             expected_target_batch=expected_state_action_values,
             optimizer=self._critic_optimizer,
             critic=self._critic,
+            weight=batch.weight,
+            return_td_error=self._reports_td_error(batch),
         )
         return loss_critic_update
 
@@ -198,6 +197,7 @@ class RCTD3(TD3):
         actor_update_noise_clip: float = 0.5,
         lambda_constraint: float = 1.0,
         cost_discount_factor: float = 0.5,
+        use_fused_critic: bool = False,
     ) -> None:
         super(RCTD3, self).__init__(
             state_dim=state_dim,
@@ -217,6 +217,7 @@ class RCTD3(TD3):
             actor_update_freq=actor_update_freq,
             actor_update_noise=actor_update_noise,
             actor_update_noise_clip=actor_update_noise_clip,
+            use_fused_critic=use_fused_critic,
         )
         self.lambda_constraint = lambda_constraint
         self.cost_discount_factor = cost_discount_factor
@@ -228,6 +229,7 @@ class RCTD3(TD3):
             hidden_dims=critic_hidden_dims,
             use_twin_critic=self._use_twin_critic,
             network_type=critic_network_type,
+            use_fused_critic=self._use_fused_critic,
         )
         self._cost_critic_optimizer = optim.AdamW(
             [
@@ -244,18 +246,17 @@ class RCTD3(TD3):
             hidden_dims=critic_hidden_dims,
             use_twin_critic=self._use_twin_critic,
             network_type=critic_network_type,
+            use_fused_critic=self._use_fused_critic,
         )
-        update_critic_target_network(
-            self.target_of_cost_critic,
-            self.cost_critic,
-            self._use_twin_critic,
-            1,
+        self._cost_critic_target_updater = TargetNetworkUpdater(
+            self.target_of_cost_critic, self.cost_critic, tau=critic_soft_update_tau
         )
+        self._cost_critic_target_updater.update(tau=1.0)
 
     def learn_batch(self, batch: TransitionBatch) -> Dict[str, Any]:
 
         # update critics
-        self._critic_learn_batch(batch)
+        critic_report = self._critic_learn_batch(batch)
         self._critic_update_count += 1
 
         # update lambda to the current value of safety module
@@ -267,27 +268,15 @@ class RCTD3(TD3):
             self._actor_learn_batch(batch)
 
             # update targets of twin critics using soft updates
-            update_critic_target_network(
-                self._critic_target,
-                self._critic,
-                self._use_twin_critic,
-                self._critic_soft_update_tau,
-            )
+            self._critic_target_updater.update(self._critic_soft_update_tau)
 
             # update targets of cost twin critics using soft updates
-            update_critic_target_network(
-                self.target_of_cost_critic,
-                self.cost_critic,
-                self._use_twin_critic,
-                self._critic_soft_update_tau,
-            )
+            self._cost_critic_target_updater.update(self._critic_soft_update_tau)
 
             # update target of actor network using soft updates
-            update_target_network(
-                self._actor_target, self._actor, self._actor_soft_update_tau
-            )
+            self._actor_target_updater.update(self._actor_soft_update_tau)
 
-        return {}
+        return self._td_error_report(critic_report)
 
     def _actor_learn_batch(self, batch: TransitionBatch) -> Dict[str, Any]:
 
@@ -407,5 +396,7 @@ class RCTD3(TD3):
             optimizer=critic_optimizer,
             # pyre-fixme
             critic=critic,
+            weight=batch.weight,
+            return_td_error=self._reports_td_error(batch),
         )
         return loss_critic_update
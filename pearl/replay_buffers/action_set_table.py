@@ -0,0 +1,246 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import weakref
+from typing import Dict, List, Optional, Set, Tuple
+
+import torch
+
+
+class ActionSetTable:
+    """
+    An interning table of padded available action sets.
+
+    Each distinct pair of padded available actions (max_number_actions x action_dim)
+    and unavailable actions mask (max_number_actions) is stored once, and
+    transitions refer to it by a small integer id. This keeps replay buffer memory
+    independent of the size of the action sets when only a few of them occur.
+
+    Action sets are identified by content. Tensors which were already interned are
+    additionally recognized by identity, which avoids hashing their content again
+    when the same (cached) tensor is pushed repeatedly.
+
+    Every id returned by `intern` holds a reference to its action set, which is
+    dropped with `release` (e.g. when a replay buffer overwrites the transition
+    referring to it). Action sets without references are removed and their ids are
+    reused, so that the table only holds the action sets still referred to, even
+    when action sets keep changing (e.g. with `DynamicActionSpaceWrapper`).
+    """
+
+    def __init__(self, device: Optional[torch.device] = None) -> None:
+        self._device: torch.device = (
+            device if device is not None else torch.device("cpu")
+        )
+        self._ids_by_content: Dict[bytes, int] = {}
+        # tensors hash by identity but compare elementwise, so they are keyed by
+        # `id`; a weak reference guards against ids reused after collection, and
+        # the version of the tensor against in place modifications
+        self._ids_by_tensor: Dict[int, Tuple[weakref.ref, int, int]] = {}
+        # the keys of `_ids_by_tensor` referring to every id
+        self._tensor_keys: List[Set[int]] = []
+        self._actions_list: List[torch.Tensor] = []
+        self._masks_list: List[torch.Tensor] = []
+        # the number of references to every id, and the ids which can be reused
+        self._reference_counts: List[int] = []
+        self._free_ids: List[int] = []
+        self._content_keys: List[Optional[bytes]] = []
+        # stacked tables, rebuilt lazily when new action sets are added
+        self._actions: Optional[torch.Tensor] = None
+        self._masks: Optional[torch.Tensor] = None
+
+    @property
+    def device(self) -> torch.device:
+        return self._device
+
+    def to(self, device: torch.device) -> "ActionSetTable":
+        self._device = device
+        self._actions_list = [actions.to(device) for actions in self._actions_list]
+        self._masks_list = [mask.to(device) for mask in self._masks_list]
+        self._actions = None
+        self._masks = None
+        return self
+
+    def __len__(self) -> int:
+        """The number of action sets with references."""
+        return len(self._actions_list) - len(self._free_ids)
+
+    def _content_key(self, actions: torch.Tensor, mask: torch.Tensor) -> bytes:
+        return (
+            actions.detach().cpu().contiguous().numpy().tobytes()
+            + mask.detach().cpu().contiguous().numpy().tobytes()
+        )
+
+    def _intern_one(self, actions: torch.Tensor, mask: torch.Tensor) -> int:
+        key = self._content_key(actions, mask)
+        set_id = self._ids_by_content.get(key)
+        if set_id is None:
+            actions = actions.to(self._device)
+            mask = mask.to(self._device)
+            if len(self._free_ids) > 0:
+                set_id = self._free_ids.pop()
+                self._actions_list[set_id] = actions
+                self._masks_list[set_id] = mask
+                self._content_keys[set_id] = key
+            else:
+                set_id = len(self._actions_list)
+                self._actions_list.append(actions)
+                self._masks_list.append(mask)
+                self._reference_counts.append(0)
+                self._content_keys.append(key)
+                self._tensor_keys.append(set())
+            self._ids_by_content[key] = set_id
+            self._actions = None
+            self._masks = None
+        return set_id
+
+    def _get_id_by_tensor(self, x: torch.Tensor) -> Optional[int]:
+        entry = self._ids_by_tensor.get(id(x))
+        if entry is None or entry[0]() is not x or entry[2] != x._version:
+            return None
+        return entry[1]
+
+    def _set_id_by_tensor(self, x: torch.Tensor, set_id: int) -> None:
+        key = id(x)
+        self._forget_tensor(key)
+        self._ids_by_tensor[key] = (
+            weakref.ref(x, lambda _: self._forget_tensor(key)),
+            set_id,
+            x._version,
+        )
+        self._tensor_keys[set_id].add(key)
+
+    def _forget_tensor(self, key: int) -> None:
+        entry = self._ids_by_tensor.pop(key, None)
+        if entry is not None:
+            self._tensor_keys[entry[1]].discard(key)
+
+    def intern(
+        self, actions: torch.Tensor, unavailable_actions_mask: torch.Tensor
+    ) -> torch.Tensor:
+        """
+        Args:
+            actions: padded available actions of shape
+                (batch_size x max_number_actions x action_dim).
+            unavailable_actions_mask: masks of shape
+                (batch_size x max_number_actions).
+
+        Returns:
+            The ids of the action sets, of shape (batch_size,) and dtype int32. Each
+            of them holds a reference to its action set (see `release`).
+        """
+        batch_size = actions.shape[0]
+        if batch_size == 1:
+            set_id = self._get_id_by_tensor(actions)
+            if (
+                set_id is None
+                or self._get_id_by_tensor(unavailable_actions_mask) != set_id
+            ):
+                set_id = self._intern_one(actions[0], unavailable_actions_mask[0])
+                self._set_id_by_tensor(actions, set_id)
+                self._set_id_by_tensor(unavailable_actions_mask, set_id)
+            self._reference_counts[set_id] += 1
+            return torch.tensor([set_id], dtype=torch.int32)
+
+        # only hash the distinct rows of a batch
+        flat = torch.cat(
+            [
+                actions.reshape(batch_size, -1).float(),
+                unavailable_actions_mask.reshape(batch_size, -1).float(),
+            ],
+            dim=1,
+        )
+        _, first_rows, inverse = _unique_rows(flat)
+        unique_ids = torch.tensor(
+            [
+                self._intern_one(actions[row], unavailable_actions_mask[row])
+                for row in first_rows.tolist()
+            ],
+            dtype=torch.int32,
+        )
+        ids = unique_ids[inverse.cpu()]
+        self._add_references(ids, 1)
+        return ids
+
+    def release(self, ids: torch.Tensor) -> None:
+        """
+        Drops one reference to the action set of every id in `ids` (with
+        repetitions), removing the action sets left without references.
+        """
+        for set_id in self._add_references(ids, -1):
+            self._reference_counts[set_id] = 0
+            key = self._content_keys[set_id]
+            assert key is not None
+            del self._ids_by_content[key]
+            self._content_keys[set_id] = None
+            for key in self._tensor_keys[set_id]:
+                del self._ids_by_tensor[key]
+            self._tensor_keys[set_id] = set()
+            self._free_ids.append(set_id)
+
+    def _add_references(self, ids: torch.Tensor, delta: int) -> List[int]:
+        """
+        Adds `delta` references per occurrence of every id, and returns the ids
+        left without references.
+        """
+        unique_ids, counts = torch.unique(ids.cpu().long(), return_counts=True)
+        unreferenced = []
+        for set_id, count in zip(unique_ids.tolist(), counts.tolist()):
+            self._reference_counts[set_id] += delta * count
+            assert self._reference_counts[set_id] >= 0
+            if self._reference_counts[set_id] == 0:
+                unreferenced.append(set_id)
+        return unreferenced
+
+    def lookup(self, ids: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Returns the padded available actions and unavailable actions masks of the
+        action sets with the given ids, of shapes
+        (batch_size x max_number_actions x action_dim) and
+        (batch_size x max_number_actions).
+        """
+        actions, masks = self.stacked()
+        ids = ids.to(device=self._device, dtype=torch.long)
+        return actions[ids], masks[ids]
+
+    def stacked(self) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Returns all interned action sets, indexed by id: the padded available
+        actions and unavailable actions masks, of shapes
+        (number_of_action_sets x max_number_actions x action_dim) and
+        (number_of_action_sets x max_number_actions).
+        """
+        if self._actions is None or self._masks is None:
+            self._actions = torch.stack(self._actions_list)
+            self._masks = torch.stack(self._masks_list)
+        return self._actions, self._masks
+
+    def clear(self) -> None:
+        self._ids_by_content = {}
+        self._ids_by_tensor = {}
+        self._actions_list = []
+        self._masks_list = []
+        self._reference_counts = []
+        self._free_ids = []
+        self._content_keys = []
+        self._tensor_keys = []
+        self._actions = None
+        self._masks = None
+
+
+def _unique_rows(
+    x: torch.Tensor,
+) -> Tuple[torch.Tensor, torch.Tensor, torch.Tensor]:
+    """
+    Returns the unique rows of a 2D tensor, the index of the first occurrence of
+    each of them, and the index of the unique row of every row of `x`.
+    """
+    unique, inverse = torch.unique(x, dim=0, return_inverse=True)
+    positions = torch.arange(x.shape[0], device=x.device)
+    first_rows = torch.full(
+        (unique.shape[0],), x.shape[0], dtype=torch.long, device=x.device
+    ).scatter_reduce(0, inverse, positions, reduce="amin")
+    return unique, first_rows, inverse
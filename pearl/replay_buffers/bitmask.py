@@ -0,0 +1,38 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import torch
+
+
+def pack_bits(mask: torch.Tensor) -> torch.Tensor:
+    """
+    Packs the last dimension of a boolean tensor into bytes, 8 elements per byte
+    (the first element in the least significant bit).
+
+    Args:
+        mask: a boolean tensor of shape (..., length).
+
+    Returns:
+        a uint8 tensor of shape (..., ceil(length / 8)).
+    """
+    length = mask.shape[-1]
+    padding = -length % 8
+    if padding > 0:
+        mask = torch.nn.functional.pad(mask, (0, padding))
+    bits = mask.reshape(*mask.shape[:-1], -1, 8).to(torch.uint8)
+    weights = 2 ** torch.arange(8, dtype=torch.uint8, device=mask.device)
+    return (bits * weights).sum(dim=-1, dtype=torch.uint8)
+
+
+def unpack_bits(packed: torch.Tensor, length: int) -> torch.Tensor:
+    """
+    Inverse of `pack_bits`: unpacks the last dimension of a uint8 tensor of shape
+    (..., ceil(length / 8)) into a boolean tensor of shape (..., length).
+    """
+    weights = 2 ** torch.arange(8, dtype=torch.uint8, device=packed.device)
+    bits = packed.unsqueeze(-1).bitwise_and(weights).ne(0)
+    return bits.reshape(*packed.shape[:-1], -1)[..., :length]
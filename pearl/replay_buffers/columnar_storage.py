@@ -0,0 +1,253 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import copy
+import math
+import random
+from dataclasses import dataclass
+from typing import Dict, Iterable, Mapping, Optional, Tuple, Union
+
+import torch
+from pearl.replay_buffers.storage_codecs import as_storage_codec, StorageCodec
+
+
+@dataclass(frozen=True)
+class ColumnMemory:
+    """The memory used by a column of a `ColumnarStorage`, for all its rows."""
+
+    stored_dtype: torch.dtype
+    dtype: torch.dtype
+    # bytes of the stored column, and of the column if it was stored as written
+    bytes: int
+    decoded_bytes: int
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.decoded_bytes / self.bytes if self.bytes > 0 else 1.0
+
+
+class ColumnarStorage:
+    """
+    A fixed capacity ring buffer that keeps one preallocated tensor per field
+    (state, action, reward, ...), instead of one `Transition` object per step.
+
+    Columns are allocated lazily on the first write, using the shape (minus the
+    leading batch dimension) and dtype of the values written for each field.
+    Fields that are `None` on the first write are not stored, and every later
+    write must provide exactly the same set of fields.
+
+    Writes copy in place at the ring cursor, overwriting the oldest rows once the
+    storage is full. Sampling draws indices uniformly with replacement and gathers
+    every column with a single indexing operation (see `sample_indices` for
+    sampling without replacement).
+
+    Fields may be stored in a more compact form with `codecs`, mapping field names
+    to either a storage dtype (e.g. torch.bfloat16 for float32 states) or a
+    `StorageCodec` (e.g. int8 quantization or packed bits, see `storage_codecs`).
+    Values are encoded when written and decoded back to the shape and dtype they
+    were written with when gathered, so that readers are unaffected.
+    `memory_report` gives the memory used by every column.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        device: Optional[torch.device] = None,
+        codecs: Optional[Mapping[str, Union[torch.dtype, StorageCodec]]] = None,
+    ) -> None:
+        if capacity <= 0:
+            raise ValueError(f"Capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        self._device: torch.device = (
+            device if device is not None else torch.device("cpu")
+        )
+        self._codec_specs: Dict[str, StorageCodec] = {
+            name: as_storage_codec(codec)
+            for name, codec in (codecs if codecs is not None else {}).items()
+        }
+        self.clear()
+
+    @property
+    def device(self) -> torch.device:
+        return self._device
+
+    def to(self, device: torch.device) -> "ColumnarStorage":
+        self._device = device
+        for name, column in self._columns.items():
+            self._columns[name] = column.to(device)
+        return self
+
+    @property
+    def columns(self) -> Dict[str, torch.Tensor]:
+        """
+        The preallocated tensors, one per stored field, each of shape
+        (capacity x ...). Only the first `len(self)` rows are meaningful
+        until the storage is full.
+        """
+        return self._columns
+
+    @property
+    def cursor(self) -> int:
+        """The row that will be written next."""
+        return self._cursor
+
+    def _allocate(self, fields: Mapping[str, Optional[torch.Tensor]]) -> None:
+        provided = {name for name, value in fields.items() if value is not None}
+        unknown = set(self._codecs.keys()) - provided
+        if len(unknown) > 0:
+            raise ValueError(
+                f"Codecs are given for fields {sorted(unknown)} which are not stored, "
+                f"stored fields are {sorted(provided)}"
+            )
+        for name, value in fields.items():
+            if value is None:
+                continue
+            self._row_formats[name] = (value.shape[1:], value.dtype)
+            stored = self._encode(name, value[:1])
+            self._columns[name] = torch.zeros(
+                (self.capacity,) + tuple(stored.shape[1:]),
+                dtype=stored.dtype,
+                device=self._device,
+            )
+
+    def _encode(self, name: str, value: torch.Tensor) -> torch.Tensor:
+        codec = self._codecs.get(name)
+        return value if codec is None else codec.encode(value)
+
+    def _decode(self, name: str, stored: torch.Tensor) -> torch.Tensor:
+        codec = self._codecs.get(name)
+        return stored if codec is None else codec.decode(stored)
+
+    def append(self, fields: Mapping[str, Optional[torch.Tensor]]) -> torch.Tensor:
+        """
+        Writes `n` rows. Every value must be a tensor with a leading dimension of
+        size `n` (a single transition is written with `n = 1`).
+
+        Returns:
+            The indices of the rows that were written, of shape (n,).
+        """
+        if len(self._columns) == 0:
+            self._allocate(fields)
+
+        provided = {name for name, value in fields.items() if value is not None}
+        if provided != set(self._columns.keys()):
+            raise ValueError(
+                "Columnar storage requires every write to provide the same fields. "
+                f"Stored fields are {sorted(self._columns.keys())}, "
+                f"got {sorted(provided)}"
+            )
+
+        n = None
+        for name in self._columns:
+            value = fields[name]
+            assert value is not None
+            if n is None:
+                n = value.shape[0]
+            elif value.shape[0] != n:
+                raise ValueError(
+                    f"All fields must have the same number of rows, field {name} "
+                    f"has {value.shape[0]} rows instead of {n}"
+                )
+            row_shape = self._row_formats[name][0]
+            if value.shape[1:] != row_shape:
+                raise ValueError(
+                    f"Field {name} has row shape {tuple(value.shape[1:])}, "
+                    f"expected {tuple(row_shape)}"
+                )
+        assert n is not None
+
+        # only the last `capacity` rows survive a write larger than the storage
+        offset = max(n - self.capacity, 0)
+        start = (self._cursor + offset) % self.capacity
+        indices = self._write_indices(n)
+        for name, column in self._columns.items():
+            value = fields[name]
+            assert value is not None
+            value = self._encode(name, value[offset:]).to(
+                device=self._device, dtype=column.dtype
+            )
+            if start + n - offset <= self.capacity:
+                column[start : start + n - offset] = value
+            else:
+                column[indices.to(self._device)] = value
+
+        self._cursor = (self._cursor + n) % self.capacity
+        self._size = min(self._size + n, self.capacity)
+        return indices
+
+    def _write_indices(self, n: int) -> torch.Tensor:
+        """The indices of the rows that writing `n` rows will write."""
+        offset = max(n - self.capacity, 0)
+        start = (self._cursor + offset) % self.capacity
+        return torch.arange(start, start + n - offset) % self.capacity
+
+    def overwritten_indices(self, n: int) -> torch.Tensor:
+        """The indices of the stored rows that writing `n` rows will overwrite."""
+        indices = self._write_indices(n)
+        return indices[indices < self._size]
+
+    def sample_indices(self, batch_size: int, replacement: bool = True) -> torch.Tensor:
+        """
+        Draws `batch_size` row indices uniformly at random, with replacement unless
+        `replacement` is False.
+        """
+        if batch_size > len(self):
+            raise ValueError(
+                f"Can't get a batch of size {batch_size} from a replay buffer with "
+                f"only {len(self)} elements"
+            )
+        if not replacement:
+            # unlike a permutation of all rows, this only costs O(batch_size)
+            return torch.tensor(
+                random.sample(range(len(self)), batch_size), device=self._device
+            )
+        return torch.randint(len(self), (batch_size,), device=self._device)
+
+    def gather(
+        self, indices: torch.Tensor, names: Optional[Iterable[str]] = None
+    ) -> Dict[str, torch.Tensor]:
+        """Returns the rows at `indices` for every stored field, or for `names`."""
+        indices = indices.to(self._device)
+        if names is None:
+            names = self._columns.keys()
+        return {
+            name: self._decode(name, self._columns[name][indices]) for name in names
+        }
+
+    def sample(
+        self, batch_size: int, replacement: bool = True
+    ) -> Dict[str, torch.Tensor]:
+        return self.gather(self.sample_indices(batch_size, replacement))
+
+    def memory_report(self) -> Dict[str, ColumnMemory]:
+        """Returns the memory used by every stored field, see `ColumnMemory`."""
+        report = {}
+        for name, column in self._columns.items():
+            row_shape, dtype = self._row_formats[name]
+            decoded_element_size = torch.empty((), dtype=dtype).element_size()
+            report[name] = ColumnMemory(
+                stored_dtype=column.dtype,
+                dtype=dtype,
+                bytes=column.numel() * column.element_size(),
+                decoded_bytes=self.capacity
+                * math.prod(row_shape)
+                * decoded_element_size,
+            )
+        return report
+
+    def clear(self) -> None:
+        self._columns: Dict[str, torch.Tensor] = {}
+        # the row shape and dtype of every field, as written
+        self._row_formats: Dict[str, Tuple[torch.Size, torch.dtype]] = {}
+        # codecs record the format of the values they encode, so every allocation
+        # starts from fresh ones
+        self._codecs: Dict[str, StorageCodec] = copy.deepcopy(self._codec_specs)
+        self._cursor = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
@@ -29,12 +29,13 @@ class DiscreteContextualBanditReplayBuffer(TensorBasedReplayBuffer):
     - done is not needed, as for contextual bandit, it is always True
     """
 
-    def __init__(self, capacity: int) -> None:
+    def __init__(self, capacity: int, use_columnar_storage: bool = False) -> None:
         super(DiscreteContextualBanditReplayBuffer, self).__init__(
             capacity=capacity,
             has_next_state=False,
             has_next_action=False,
             has_next_available_actions=False,
+            use_columnar_storage=use_columnar_storage,
         )
 
     def push(
@@ -52,6 +53,17 @@ class DiscreteContextualBanditReplayBuffer(TensorBasedReplayBuffer):
         # signature of push is the same as others, in order to match codes in PearlAgent
         # TODO add curr_available_actions and curr_available_actions_mask if needed in the future
         action = assert_is_tensor_like(action)
+        if self._storage is not None:
+            # actions are stacked (not concatenated) when sampled,
+            # so they get a leading batch dimension here
+            self._append_to_storage(
+                {
+                    "state": self._process_single_state(state),
+                    "action": torch.as_tensor(action, device=self.device).unsqueeze(0),
+                    "reward": self._process_single_reward(reward),
+                }
+            )
+            return
         self.memory.append(
             Transition(
                 state=self._process_single_state(state),
@@ -60,7 +72,28 @@ class DiscreteContextualBanditReplayBuffer(TensorBasedReplayBuffer):
             ).to(self.device)
         )
 
+    def push_batch(self, batch: TransitionBatch) -> None:
+        batch_size = len(batch)
+        state = batch.state.to(self.device)
+        action = batch.action.to(self.device)
+        reward = batch.reward.to(self.device)
+        if self._storage is not None:
+            self._append_to_storage(
+                {"state": state, "action": action, "reward": reward}
+            )
+            return
+        for i in range(batch_size):
+            self.memory.append(
+                Transition(
+                    state=state[i : i + 1],
+                    action=action[i],
+                    reward=reward[i : i + 1],
+                )
+            )
+
     def sample(self, batch_size: int) -> TransitionBatch:
+        if self._storage is not None:
+            return self._sample_from_storage(batch_size)
         samples = random.sample(self.memory, batch_size)
         return TransitionBatch(
             state=torch.cat([x.state for x in samples]),
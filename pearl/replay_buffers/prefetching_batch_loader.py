@@ -0,0 +1,157 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Deque, Dict, Optional
+
+import torch
+from pearl.replay_buffers.replay_buffer import ReplayBuffer
+from pearl.replay_buffers.sharded_transition_dataset import ShardedTransitionDataset
+from pearl.replay_buffers.transition import TransitionBatch
+
+
+class PrefetchingBatchLoader:
+    """
+    An iterator over batches sampled from a replay buffer, which keeps
+    `prefetch_batches` batches in flight on a pool of `num_workers` threads, so that
+    sampling (and, for sharded datasets, reading from disk) overlaps with learning.
+
+    Batches sampled on CPU are optionally moved to page-locked memory by the
+    workers, and copied to `device` asynchronously when they are consumed.
+
+    Batches are consumed in the order they were requested. For a
+    `ShardedTransitionDataset`, sampled indices are also drawn in that order, on
+    the consuming thread, so that the sequence of batches only depends on the torch
+    seed and not on the number of workers. Other replay buffers are sampled with
+    `sample` on the worker threads.
+
+    `stats` reports the throughput of the loader and the time spent waiting for
+    batches (stall time): a large stall fraction means that learning is bound by
+    sampling rather than by compute.
+    """
+
+    def __init__(
+        self,
+        replay_buffer: ReplayBuffer,
+        batch_size: int,
+        device: Optional[torch.device] = None,
+        num_workers: int = 1,
+        prefetch_batches: int = 4,
+        pin_memory: Optional[bool] = None,
+    ) -> None:
+        """
+        Args:
+            replay_buffer: the replay buffer to sample batches from.
+            batch_size: the size of sampled batches.
+            device: the device batches are moved to. Defaults to the device of the
+                replay buffer.
+            num_workers: number of sampling threads.
+            prefetch_batches: number of batches requested ahead of consumption,
+                which bounds the memory used by the loader.
+            pin_memory: whether to move sampled batches to page-locked memory.
+                Defaults to True when `device` is a GPU.
+        """
+        if num_workers <= 0:
+            raise ValueError(f"num_workers must be positive, got {num_workers}")
+        if prefetch_batches <= 0:
+            raise ValueError(
+                f"prefetch_batches must be positive, got {prefetch_batches}"
+            )
+        self.replay_buffer = replay_buffer
+        self.batch_size = batch_size
+        self.device: torch.device = (
+            device if device is not None else replay_buffer.device
+        )
+        self.prefetch_batches = prefetch_batches
+        self._pin_memory: bool = (
+            pin_memory
+            if pin_memory is not None
+            else self.device.type == "cuda" and torch.cuda.is_available()
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=num_workers, thread_name_prefix="pearl_prefetch"
+        )
+        self._futures: Deque["Future[TransitionBatch]"] = deque()
+        self._start_time: Optional[float] = None
+        self._stall_time = 0.0
+        self._number_of_batches = 0
+        for _ in range(prefetch_batches):
+            self._request_batch()
+
+    def _request_batch(self) -> None:
+        replay_buffer = self.replay_buffer
+        if isinstance(replay_buffer, ShardedTransitionDataset):
+            indices = replay_buffer.sample_indices(self.batch_size)
+            self._futures.append(self._executor.submit(self._gather, indices))
+        else:
+            self._futures.append(self._executor.submit(self._sample))
+
+    def _gather(self, indices: torch.Tensor) -> TransitionBatch:
+        replay_buffer = self.replay_buffer
+        assert isinstance(replay_buffer, ShardedTransitionDataset)
+        batch = replay_buffer.batch_from_columns(
+            replay_buffer.gather_columns(indices), device=torch.device("cpu")
+        )
+        return batch.pin_memory() if self._pin_memory else batch
+
+    def _sample(self) -> TransitionBatch:
+        batch = self.replay_buffer.sample(self.batch_size)
+        assert isinstance(batch, TransitionBatch)
+        return batch.pin_memory() if self._pin_memory else batch
+
+    def __iter__(self) -> "PrefetchingBatchLoader":
+        return self
+
+    def __next__(self) -> TransitionBatch:
+        if len(self._futures) == 0:
+            raise StopIteration
+        if self._start_time is None:
+            self._start_time = time.perf_counter()
+        # request the next batch before waiting, to keep the workers busy
+        future = self._futures.popleft()
+        self._request_batch()
+        start = time.perf_counter()
+        batch = future.result()
+        self._stall_time += time.perf_counter() - start
+        self._number_of_batches += 1
+        return batch.to(self.device, non_blocking=self._pin_memory)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns:
+            Dict[str, float]: the number of consumed batches, the number of batches
+                consumed per second since the first one was requested, and the total
+                and relative time spent waiting for batches to be sampled.
+        """
+        elapsed = (
+            time.perf_counter() - self._start_time
+            if self._start_time is not None
+            else 0.0
+        )
+        return {
+            "batches": float(self._number_of_batches),
+            "batches_per_second": (
+                self._number_of_batches / elapsed if elapsed > 0 else 0.0
+            ),
+            "stall_seconds": self._stall_time,
+            "stall_fraction": self._stall_time / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def close(self) -> None:
+        """Stops the workers. Batches which were not consumed are discarded."""
+        for future in self._futures:
+            future.cancel()
+        self._futures.clear()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self) -> "PrefetchingBatchLoader":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
@@ -13,6 +13,7 @@ from pearl.api.action import Action
 from pearl.api.action_space import ActionSpace
 from pearl.api.reward import Reward
 from pearl.api.state import SubjectiveState
+from pearl.replay_buffers.transition import TransitionBatch
 
 
 class ReplayBuffer(ABC):
@@ -47,10 +48,24 @@ class ReplayBuffer(ABC):
         """Saves a transition."""
         pass
 
+    def push_batch(self, batch: TransitionBatch) -> None:
+        """
+        Saves a batch of transitions given as already stacked tensors, where the
+        first dimension of every field is the batch dimension.
+        """
+        raise NotImplementedError(f"{self} does not support pushing batches")
+
     @abstractmethod
     def sample(self, batch_size: int) -> object:
         pass
 
+    def update_priorities(self, indices: torch.Tensor, td_errors: torch.Tensor) -> None:
+        """
+        Updates the priorities of sampled transitions (at the `index` of their batch)
+        from their TD errors. Replay buffers without priorities ignore them.
+        """
+        pass
+
     @abstractmethod
     def clear(self) -> None:
         """Empties replay buffer"""
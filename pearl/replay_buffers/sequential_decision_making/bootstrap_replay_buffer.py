@@ -17,6 +17,7 @@ from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buff
     FIFOOffPolicyReplayBuffer,
 )
 from pearl.replay_buffers.transition import (
+    TransitionBatch,
     TransitionWithBootstrapMask,
     TransitionWithBootstrapMaskBatch,
 )
@@ -42,6 +43,8 @@ class BootstrapReplayBuffer(FIFOOffPolicyReplayBuffer):
         has_next_action: Whether each piece of experience includes the next action.
         has_next_available:actions: Whether each piece of experience includes the
             next available actions.
+        use_columnar_storage: Whether to store transitions (and their bootstrap masks)
+            in preallocated tensors instead of a deque of `Transition` objects.
     """
 
     def __init__(
@@ -49,8 +52,9 @@ class BootstrapReplayBuffer(FIFOOffPolicyReplayBuffer):
         capacity: int,
         p: float,
         ensemble_size: int,
+        use_columnar_storage: bool = False,
     ) -> None:
-        super().__init__(capacity=capacity)
+        super().__init__(capacity=capacity, use_columnar_storage=use_columnar_storage)
         self.p = p
         self.ensemble_size = ensemble_size
 
@@ -82,7 +86,7 @@ class BootstrapReplayBuffer(FIFOOffPolicyReplayBuffer):
         ) = self._create_action_tensor_and_mask(
             max_number_actions, next_available_actions
         )
-        self.memory.append(
+        self._store_transition(
             TransitionWithBootstrapMask(
                 state=self._process_single_state(state),
                 action=self._process_single_action(action),
@@ -98,12 +102,23 @@ class BootstrapReplayBuffer(FIFOOffPolicyReplayBuffer):
             )
         )
 
+    def push_batch(self, batch: TransitionBatch) -> None:
+        columns = self._columns_from_batch(batch)
+        # sample an independent bootstrap mask from Bernoulli(p) for each row
+        probs = torch.full((len(batch), self.ensemble_size), self.p, device=self.device)
+        columns["bootstrap_mask"] = torch.bernoulli(probs)
+        self._store_batch(columns, transition_class=TransitionWithBootstrapMask)
+
     def sample(self, batch_size: int) -> TransitionWithBootstrapMaskBatch:
         if batch_size > len(self):
             raise ValueError(
                 f"Can't get a batch of size {batch_size} from a "
                 f"replay buffer with only {len(self)} elements"
             )
+        if self.uses_columnar_storage:
+            return self._sample_from_storage(
+                batch_size, batch_class=TransitionWithBootstrapMaskBatch
+            )
         samples = random.sample(self.memory, batch_size)
         transition_batch = self._create_transition_batch(
             transitions=samples,
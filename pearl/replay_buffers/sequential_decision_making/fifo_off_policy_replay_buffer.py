@@ -5,23 +5,37 @@
 # LICENSE file in the root directory of this source tree.
 #
 
-from typing import Optional
+from typing import Mapping, Optional, Union
 
+import torch
 from pearl.api.action import Action
 from pearl.api.action_space import ActionSpace
 from pearl.api.reward import Reward
 from pearl.api.state import SubjectiveState
+from pearl.replay_buffers.storage_codecs import StorageCodec
 from pearl.replay_buffers.tensor_based_replay_buffer import TensorBasedReplayBuffer
 from pearl.replay_buffers.transition import Transition
 
 
 class FIFOOffPolicyReplayBuffer(TensorBasedReplayBuffer):
-    def __init__(self, capacity: int, has_cost_available: bool = False) -> None:
+    def __init__(
+        self,
+        capacity: int,
+        has_cost_available: bool = False,
+        use_columnar_storage: bool = False,
+        store_action_indices: bool = False,
+        storage_dtypes: Optional[Mapping[str, Union[torch.dtype, StorageCodec]]] = None,
+        sample_with_replacement: bool = True,
+    ) -> None:
         super(FIFOOffPolicyReplayBuffer, self).__init__(
             capacity=capacity,
             has_next_state=True,
             has_next_action=False,
             has_cost_available=has_cost_available,
+            use_columnar_storage=use_columnar_storage,
+            store_action_indices=store_action_indices,
+            storage_dtypes=storage_dtypes,
+            sample_with_replacement=sample_with_replacement,
         )
 
     # TODO: add helper to convert subjective state into tensors
@@ -51,7 +65,7 @@ class FIFOOffPolicyReplayBuffer(TensorBasedReplayBuffer):
         ) = self._create_action_tensor_and_mask(
             max_number_actions, next_available_actions
         )
-        self.memory.append(
+        self._store_transition(
             Transition(
                 state=self._process_single_state(state),
                 action=self._process_single_action(action),
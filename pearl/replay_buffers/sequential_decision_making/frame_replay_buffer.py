@@ -0,0 +1,245 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+from typing import Dict, Optional, Type
+
+import torch
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (  # noqa E501
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.replay_buffers.transition import TB, TransitionBatch
+
+_STATE_FRAME_FIELDS = [("state", "state_frame"), ("next_state", "next_state_frame")]
+
+
+class FrameReplayBuffer(FIFOOffPolicyReplayBuffer):
+    """
+    A FIFO off-policy replay buffer for image states made of a stack of the latest
+    `frame_stack` frames of an environment (e.g. Atari with frame stacking), which
+    stores every frame once, as uint8.
+
+    States are tensors of shape (frame_stack * C x H x W): the frames of a state
+    are its `frame_stack` consecutive slices of C channels along the first
+    dimension, the latest frame last. Their values must be integers in [0, 255].
+
+    Frames are written into a ring of `frame_capacity` frames, and every
+    transition (kept in columnar storage) only records the position of the latest
+    frame of its state and of its next state. A transition whose state is the next
+    state of the previous transition, and whose next state shifts that state by one
+    frame, only adds its new frame to the ring. Otherwise (e.g. at the start of an
+    episode), the missing frames of the state and next state are written in full.
+    States and next states are reconstructed when sampling by gathering frames at
+    consecutive positions, and are converted to float on the device of the replay
+    buffer.
+
+    Since frames are overwritten independently of transitions, the replay buffer
+    only holds the most recent transitions whose frames are all still in the ring,
+    which are at most `capacity`.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        frame_stack: int,
+        frame_capacity: Optional[int] = None,
+        has_cost_available: bool = False,
+        store_action_indices: bool = False,
+    ) -> None:
+        """
+        Args:
+            capacity: the maximum number of transitions.
+            frame_stack: the number of frames of a state.
+            frame_capacity: the number of frames of the ring, by default
+                `capacity + capacity // 4 + 2 * frame_stack`, which keeps all
+                transitions unless episodes are shorter than about
+                `4 * frame_stack` steps.
+            has_cost_available: whether transitions include a cost.
+            store_action_indices: see `TensorBasedReplayBuffer`.
+        """
+        super(FrameReplayBuffer, self).__init__(
+            capacity=capacity,
+            has_cost_available=has_cost_available,
+            use_columnar_storage=True,
+            store_action_indices=store_action_indices,
+        )
+        if frame_stack <= 0:
+            raise ValueError(f"frame_stack must be positive, got {frame_stack}")
+        if frame_capacity is None:
+            frame_capacity = capacity + capacity // 4 + 2 * frame_stack
+        if frame_capacity < 2 * frame_stack:
+            raise ValueError(
+                f"frame_capacity must be at least {2 * frame_stack}, "
+                f"got {frame_capacity}"
+            )
+        self.frame_stack = frame_stack
+        self.frame_capacity = frame_capacity
+        self._clear_frames()
+
+    def _clear_frames(self) -> None:
+        # (frame_capacity x C x H x W), allocated on the first write
+        self._frames: Optional[torch.Tensor] = None
+        self._state_shape: Optional[torch.Size] = None
+        # frame positions increase monotonically, the ring slot of position p is
+        # p % frame_capacity
+        self._number_of_frames = 0
+        self._number_of_transitions = 0
+        # the newest transitions whose frames are all in the ring
+        self._number_of_valid_transitions = 0
+        # the frames and position of the latest frame of the latest next state
+        self._latest_next_state_frames: Optional[torch.Tensor] = None
+        self._latest_next_state_frame = -1
+        self._latest_done = True
+
+    @FIFOOffPolicyReplayBuffer.device.setter
+    def device(self, value: torch.device) -> None:
+        FIFOOffPolicyReplayBuffer.device.fset(self, value)
+        if self._frames is not None:
+            self._frames = self._frames.to(value)
+        if self._latest_next_state_frames is not None:
+            self._latest_next_state_frames = self._latest_next_state_frames.to(value)
+
+    def _to_frames(self, state: torch.Tensor) -> torch.Tensor:
+        """Splits a state into its frames, as uint8: (frame_stack x C x H x W)."""
+        if self._state_shape is None:
+            if state.shape[0] % self.frame_stack != 0:
+                raise ValueError(
+                    f"States of shape {tuple(state.shape)} can not be split into "
+                    f"{self.frame_stack} frames"
+                )
+            self._state_shape = state.shape
+        elif state.shape != self._state_shape:
+            raise ValueError(
+                f"Expected states of shape {tuple(self._state_shape)}, "
+                f"got {tuple(state.shape)}"
+            )
+        frames = state.to(torch.uint8)
+        if state.dtype != torch.uint8 and not torch.equal(
+            frames.to(state.dtype), state
+        ):
+            raise ValueError("States must have integer values in [0, 255]")
+        return frames.view(self.frame_stack, -1, *state.shape[1:])
+
+    def _write_frames(self, frames: torch.Tensor) -> int:
+        """Writes frames into the ring and returns the position of the last one."""
+        if self._frames is None:
+            self._frames = torch.zeros(
+                (self.frame_capacity,) + tuple(frames.shape[1:]),
+                dtype=torch.uint8,
+                device=self.device,
+            )
+        slots = (
+            torch.arange(self._number_of_frames, self._number_of_frames + len(frames))
+            % self.frame_capacity
+        )
+        self._frames[slots.to(self.device)] = frames.to(self.device)
+        self._number_of_frames += len(frames)
+        return self._number_of_frames - 1
+
+    def _append_to_storage(
+        self, columns: Dict[str, Optional[torch.Tensor]]
+    ) -> torch.Tensor:
+        columns = dict(columns)
+        states = columns.pop("state")
+        next_states = columns.pop("next_state")
+        done = columns["done"]
+        assert states is not None and next_states is not None and done is not None
+
+        state_frame_list = []
+        next_state_frame_list = []
+        for state, next_state, row_done in zip(states, next_states, done.tolist()):
+            state_frames = self._to_frames(state)
+            next_state_frames = self._to_frames(next_state)
+            latest_next_state_frames = self._latest_next_state_frames
+            if (
+                not self._latest_done
+                and latest_next_state_frames is not None
+                and torch.equal(state_frames, latest_next_state_frames)
+            ):
+                state_frame = self._latest_next_state_frame
+            else:
+                state_frame = self._write_frames(state_frames)
+            if state_frame == self._number_of_frames - 1 and torch.equal(
+                next_state_frames[:-1], state_frames[1:]
+            ):
+                next_state_frame = self._write_frames(next_state_frames[-1:])
+            else:
+                next_state_frame = self._write_frames(next_state_frames)
+            state_frame_list.append(state_frame)
+            next_state_frame_list.append(next_state_frame)
+            self._latest_next_state_frames = next_state_frames
+            self._latest_next_state_frame = next_state_frame
+            self._latest_done = bool(row_done)
+
+        columns["state_frame"] = torch.tensor(state_frame_list, dtype=torch.long)
+        columns["next_state_frame"] = torch.tensor(
+            next_state_frame_list, dtype=torch.long
+        )
+        indices = super(FrameReplayBuffer, self)._append_to_storage(columns)
+
+        self._number_of_transitions += len(state_frame_list)
+        self._number_of_valid_transitions = min(
+            self._number_of_valid_transitions + len(state_frame_list), self.capacity
+        )
+        self._invalidate_overwritten_transitions()
+        return indices
+
+    def _invalidate_overwritten_transitions(self) -> None:
+        """
+        Drops the oldest transitions whose first frame was overwritten. Since frames
+        are written in the order of transitions, these are always the oldest ones.
+        """
+        storage = self._storage
+        assert storage is not None
+        state_frames = storage.columns["state_frame"]
+        oldest_frame = self._number_of_frames - self.frame_capacity
+        while self._number_of_valid_transitions > 0:
+            oldest = (
+                self._number_of_transitions - self._number_of_valid_transitions
+            ) % self.capacity
+            if int(state_frames[oldest]) - self.frame_stack + 1 >= oldest_frame:
+                break
+            self._number_of_valid_transitions -= 1
+
+    def _sample_from_storage(
+        self, batch_size: int, batch_class: Type[TB] = TransitionBatch
+    ) -> TB:
+        storage = self._storage
+        assert storage is not None
+        # uniformly among the valid transitions, which are the newest ones
+        offsets = torch.randint(self._number_of_valid_transitions, (batch_size,))
+        indices = (
+            self._number_of_transitions - self._number_of_valid_transitions + offsets
+        ) % self.capacity
+        return self._batch_from_columns(storage.gather(indices), batch_class).to(
+            self.device
+        )
+
+    def _batch_from_columns(
+        self, columns: Dict[str, torch.Tensor], batch_class: Type[TB]
+    ) -> TB:
+        columns = dict(columns)
+        frames = self._frames
+        state_shape = self._state_shape
+        assert frames is not None and state_shape is not None
+        # positions of the frames of every state, oldest first
+        offsets = torch.arange(1 - self.frame_stack, 1, device=frames.device)
+        for state_field, frame_field in _STATE_FRAME_FIELDS:
+            latest_frames = columns.pop(frame_field).to(frames.device)
+            slots = (latest_frames.unsqueeze(1) + offsets) % self.frame_capacity
+            columns[state_field] = (
+                frames[slots]
+                .view(len(latest_frames), *state_shape)
+                .to(torch.get_default_dtype())
+            )
+        return super(FrameReplayBuffer, self)._batch_from_columns(columns, batch_class)
+
+    def __len__(self) -> int:
+        return self._number_of_valid_transitions
+
+    def clear(self) -> None:
+        super(FrameReplayBuffer, self).clear()
+        self._clear_frames()
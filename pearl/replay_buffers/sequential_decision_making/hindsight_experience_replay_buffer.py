@@ -15,6 +15,7 @@ from pearl.api.state import SubjectiveState
 from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (
     FIFOOffPolicyReplayBuffer,
 )
+from pearl.replay_buffers.transition import TransitionBatch
 from pearl.utils.tensor_like import assert_is_tensor_like
 
 
@@ -133,3 +134,8 @@ class HindsightExperienceReplayBuffer(FIFOOffPolicyReplayBuffer):
                     cost,
                 )
             self._trajectory = []
+
+    def push_batch(self, batch: TransitionBatch) -> None:
+        # goals are relabeled from complete trajectories, which requires pushing
+        # transitions one at a time through `push`
+        raise NotImplementedError(f"{self} does not support pushing batches")
@@ -12,7 +12,7 @@ from pearl.api.action_space import ActionSpace
 from pearl.api.reward import Reward
 from pearl.api.state import SubjectiveState
 from pearl.replay_buffers.tensor_based_replay_buffer import TensorBasedReplayBuffer
-from pearl.replay_buffers.transition import Transition
+from pearl.replay_buffers.transition import Transition, TransitionBatch
 
 
 class OnPolicyEpisodicReplayBuffer(TensorBasedReplayBuffer):
@@ -78,3 +78,10 @@ class OnPolicyEpisodicReplayBuffer(TensorBasedReplayBuffer):
                 discounted_return = self._discounted_factor * cum_reward
 
             self.state_action_cache = []
+
+    def push_batch(self, batch: TransitionBatch) -> None:
+        # returns can't be computed from a batch of transitions of unknown
+        # episodes, so they must be provided
+        if batch.cum_reward is None:
+            raise ValueError(f"{self} requires cum_reward in pushed batches")
+        super(OnPolicyEpisodicReplayBuffer, self).push_batch(batch)
@@ -0,0 +1,208 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+from typing import Dict, Optional
+
+import torch
+
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (  # noqa E501
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.replay_buffers.transition import TransitionWithIndexBatch
+
+
+class SumTree:
+    """
+    An array based binary sum-tree over `capacity` non-negative priorities.
+
+    Node `i` has children `2i` and `2i + 1`, the root is node 1 and leaves start
+    at `self._num_leaves` (the smallest power of two not smaller than `capacity`).
+    Both updates and prefix-sum searches walk the tree one level at a time for a
+    whole batch of indices, i.e. O(log N) tensor operations per call.
+    """
+
+    def __init__(self, capacity: int, device: Optional[torch.device] = None) -> None:
+        self.capacity = capacity
+        self._depth: int = max(capacity - 1, 1).bit_length()
+        self._num_leaves: int = 2**self._depth
+        # float64 keeps prefix sums accurate for large buffers
+        self._tree: torch.Tensor = torch.zeros(
+            2 * self._num_leaves, dtype=torch.float64, device=device
+        )
+
+    @property
+    def device(self) -> torch.device:
+        return self._tree.device
+
+    def to(self, device: torch.device) -> "SumTree":
+        self._tree = self._tree.to(device)
+        return self
+
+    @property
+    def total(self) -> torch.Tensor:
+        return self._tree[1]
+
+    def __getitem__(self, indices: torch.Tensor) -> torch.Tensor:
+        return self._tree[indices.to(self.device) + self._num_leaves]
+
+    def update(self, indices: torch.Tensor, priorities: torch.Tensor) -> None:
+        """
+        Sets the priorities at `indices`. If an index appears several times, the
+        last priority given for it is used.
+        """
+        indices = indices.to(self.device).long()
+        priorities = priorities.to(device=self.device, dtype=self._tree.dtype)
+        # keep the last occurrence of every index, scatter with duplicates
+        # has no guaranteed order
+        order = torch.arange(indices.shape[0], device=self.device)
+        last = torch.full((self.capacity,), -1, device=self.device).scatter_reduce(
+            0, indices, order, reduce="amax", include_self=False
+        )
+        keep = last[indices] == order
+        nodes = indices[keep] + self._num_leaves
+        self._tree[nodes] = priorities[keep]
+        for _ in range(self._depth):
+            nodes = torch.unique(nodes // 2)
+            self._tree[nodes] = self._tree[2 * nodes] + self._tree[2 * nodes + 1]
+
+    def find(self, prefix_sums: torch.Tensor) -> torch.Tensor:
+        """
+        For every value `u` in `prefix_sums`, returns the smallest index `i` such
+        that the sum of priorities up to and including `i` is larger than `u`.
+        """
+        prefix_sums = prefix_sums.to(device=self.device, dtype=self._tree.dtype)
+        nodes = torch.ones_like(prefix_sums, dtype=torch.long)
+        for _ in range(self._depth):
+            left = 2 * nodes
+            left_sums = self._tree[left]
+            go_right = prefix_sums >= left_sums
+            prefix_sums = torch.where(go_right, prefix_sums - left_sums, prefix_sums)
+            nodes = torch.where(go_right, left + 1, left)
+        # rounding errors may push a search past the last stored priority
+        return (nodes - self._num_leaves).clamp(max=self.capacity - 1)
+
+    def clear(self) -> None:
+        self._tree.zero_()
+
+
+class PrioritizedReplayBuffer(FIFOOffPolicyReplayBuffer):
+    r"""
+    Prioritized experience replay, as described in [1] (proportional variant).
+
+    Transition `i` is sampled with probability `P(i) = p_i^alpha / sum_k p_k^alpha`,
+    where the priority `p_i` is the absolute TD error of its latest update plus
+    `epsilon`. New transitions get the largest priority seen so far. Sampling is
+    stratified: the total priority mass is split into `batch_size` equal segments
+    and one transition is drawn from each.
+
+    Sampled batches are `TransitionWithIndexBatch`es whose `weight` field holds the
+    importance sampling weights `(N * P(i))^(-beta)`, normalized by their maximum
+    within the batch, and whose `index` field is used to report TD errors back
+    through `update_priorities`. `beta` is annealed towards 1 by `beta_increment`
+    after every sample.
+
+    Transitions are always kept in columnar storage, since priorities are tied to
+    fixed storage positions.
+
+    [1] Tom Schaul, John Quan, Ioannis Antonoglou and David Silver, Prioritized
+        Experience Replay. ICLR 2016. https://arxiv.org/abs/1511.05952.
+
+    Args:
+        capacity: Size of the replay buffer.
+        alpha: How much prioritization is used (0 corresponds to uniform sampling).
+        beta: Initial exponent of the importance sampling correction.
+        beta_increment: Amount added to beta after each sample, up to 1.
+        epsilon: Small constant added to priorities so that no transition is
+            left with zero probability.
+        has_cost_available: Whether transitions include a cost.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        alpha: float = 0.6,
+        beta: float = 0.4,
+        beta_increment: float = 0.0,
+        epsilon: float = 1e-6,
+        has_cost_available: bool = False,
+    ) -> None:
+        super(PrioritizedReplayBuffer, self).__init__(
+            capacity=capacity,
+            has_cost_available=has_cost_available,
+            use_columnar_storage=True,
+        )
+        self._alpha = alpha
+        self._beta = beta
+        self._beta_increment = beta_increment
+        self._epsilon = epsilon
+        self._max_priority = 1.0
+        self._sum_tree = SumTree(capacity, device=self.device)
+
+    @property
+    def beta(self) -> float:
+        return self._beta
+
+    @FIFOOffPolicyReplayBuffer.device.setter
+    def device(self, value: torch.device) -> None:
+        FIFOOffPolicyReplayBuffer.device.fset(self, value)
+        self._sum_tree.to(value)
+
+    def _append_to_storage(
+        self, columns: Dict[str, Optional[torch.Tensor]]
+    ) -> torch.Tensor:
+        indices = super(PrioritizedReplayBuffer, self)._append_to_storage(columns)
+        self._sum_tree.update(
+            indices,
+            torch.full(
+                indices.shape, self._max_priority**self._alpha, dtype=torch.float64
+            ),
+        )
+        return indices
+
+    def sample(self, batch_size: int) -> TransitionWithIndexBatch:
+        if batch_size > len(self):
+            raise ValueError(
+                f"Can't get a batch of size {batch_size} from a replay buffer with"
+                f"only {len(self)} elements"
+            )
+        storage = self._storage
+        assert storage is not None
+
+        # stratified sampling, one draw per segment of the total priority mass
+        total = self._sum_tree.total
+        segment = total / batch_size
+        prefix_sums = (
+            torch.arange(batch_size, device=self._sum_tree.device)
+            + torch.rand(batch_size, device=self._sum_tree.device, dtype=total.dtype)
+        ) * segment
+        indices = self._sum_tree.find(prefix_sums).clamp(max=len(self) - 1)
+
+        probabilities = self._sum_tree[indices] / total
+        weights = (len(self) * probabilities) ** (-self._beta)
+        weights = weights / weights.max()
+        self._beta = min(1.0, self._beta + self._beta_increment)
+
+        batch = self._batch_from_columns(
+            storage.gather(indices), TransitionWithIndexBatch
+        )
+        batch.weight = weights.float()
+        batch.index = indices
+        return batch.to(self.device)
+
+    def update_priorities(self, indices: torch.Tensor, td_errors: torch.Tensor) -> None:
+        """
+        Sets the priorities of the transitions at `indices` (as returned in the
+        `index` field of sampled batches) from their new TD errors, in one call.
+        """
+        priorities = td_errors.detach().abs().flatten().double() + self._epsilon
+        self._max_priority = max(self._max_priority, priorities.max().item())
+        self._sum_tree.update(indices, priorities**self._alpha)
+
+    def clear(self) -> None:
+        super(PrioritizedReplayBuffer, self).clear()
+        self._sum_tree.clear()
+        self._max_priority = 1.0
@@ -0,0 +1,394 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+"""
+A columnar, chunked on-disk format for offline transition datasets.
+
+A dataset is a directory holding one subdirectory per shard, with one `.npy` file
+per field (state, action, reward, ...) in every shard, and a `manifest.json`
+listing the shards, their number of rows and the fields they store:
+
+    dataset/
+        manifest.json
+        shard_00000/state.npy
+        shard_00000/action.npy
+        shard_00000/action_sets.npz
+        ...
+
+As in the columnar storage of `TensorBasedReplayBuffer`, padded available actions
+and their masks are interned: shards only store the id of the current and next
+action sets of every transition, and every distinct action set is saved once, in
+the `action_sets.npz` of the first shard referring to it. Ids are assigned in
+order, so the action sets of a dataset are those of its shards, concatenated.
+
+`ShardedTransitionWriter` writes datasets incrementally, one shard at a time, and
+`ShardedTransitionDataset` memory-maps the shards and samples batches by reading
+only the sampled rows from disk.
+"""
+
+import dataclasses
+import json
+import os
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import torch
+from pearl.api.action import Action
+from pearl.api.action_space import ActionSpace
+from pearl.api.reward import Reward
+from pearl.api.state import SubjectiveState
+from pearl.replay_buffers.action_set_table import ActionSetTable
+from pearl.replay_buffers.replay_buffer import ReplayBuffer
+from pearl.replay_buffers.tensor_based_replay_buffer import (
+    _INTERNED_ACTION_SET_FIELDS,
+)
+from pearl.replay_buffers.transition import Transition, TransitionBatch
+from pearl.utils.device import get_default_device
+
+MANIFEST_FILE_NAME = "manifest.json"
+# in shard directories
+ACTION_SETS_FILE_NAME = "action_sets.npz"
+FORMAT_VERSION = 1
+
+
+def is_sharded_transition_dataset(path: str) -> bool:
+    """Whether `path` is a directory written by `ShardedTransitionWriter`."""
+    return os.path.isfile(os.path.join(path, MANIFEST_FILE_NAME))
+
+
+class ShardedTransitionWriter:
+    """
+    Writes batches of transitions into a sharded dataset. Rows are buffered in
+    memory until `shard_size` of them are available, then written as a new shard,
+    so that memory usage is bounded by the size of a shard. The manifest is
+    rewritten after every shard, hence a dataset is readable while it is written.
+
+    `close` (or leaving the writer as a context manager) writes the remaining rows
+    as a last, possibly smaller, shard.
+    """
+
+    def __init__(self, path: str, shard_size: int = 100000) -> None:
+        if shard_size <= 0:
+            raise ValueError(f"Shard size must be positive, got {shard_size}")
+        if is_sharded_transition_dataset(path):
+            raise ValueError(f"A sharded transition dataset already exists in {path}")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.shard_size = shard_size
+        self._action_set_table = ActionSetTable()
+        self._fields: Optional[Dict[str, Dict[str, Any]]] = None
+        self._shard_sizes: List[int] = []
+        # the number of action sets saved with every shard
+        self._action_set_counts: List[int] = []
+        self._pending: List[Dict[str, np.ndarray]] = []
+        self._number_of_pending_rows = 0
+
+    def __len__(self) -> int:
+        return sum(self._shard_sizes) + self._number_of_pending_rows
+
+    def __enter__(self) -> "ShardedTransitionWriter":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def write(self, batch: TransitionBatch) -> None:
+        """
+        Appends the transitions of `batch`. Every batch must provide the same fields
+        as the first one, with the same shapes (but the leading batch dimension).
+        """
+        columns = self._columns_from_batch(batch)
+        if self._fields is None:
+            self._fields = {
+                name: {"dtype": column.dtype.str, "shape": list(column.shape[1:])}
+                for name, column in columns.items()
+            }
+        elif set(columns.keys()) != set(self._fields.keys()):
+            raise ValueError(
+                "Sharded transition datasets require every batch to provide the same "
+                f"fields. Stored fields are {sorted(self._fields.keys())}, "
+                f"got {sorted(columns.keys())}"
+            )
+        for name, column in columns.items():
+            if list(column.shape[1:]) != self._fields[name]["shape"]:
+                raise ValueError(
+                    f"Field {name} has row shape {tuple(column.shape[1:])}, "
+                    f"expected {tuple(self._fields[name]['shape'])}"
+                )
+
+        self._pending.append(columns)
+        self._number_of_pending_rows += len(batch)
+        if self._number_of_pending_rows >= self.shard_size:
+            self._write_full_shards()
+
+    def _columns_from_batch(self, batch: TransitionBatch) -> Dict[str, np.ndarray]:
+        columns: Dict[str, Optional[torch.Tensor]] = {
+            f.name: getattr(batch, f.name) for f in dataclasses.fields(Transition)
+        }
+        done = columns["done"]
+        assert done is not None
+        if done.dim() == 0:
+            # `TransitionBatch.done` defaults to a single True, used by bandits
+            columns["done"] = done.expand(len(batch))
+        for actions_field, mask_field, id_field in _INTERNED_ACTION_SET_FIELDS:
+            actions = columns.pop(actions_field)
+            mask = columns.pop(mask_field)
+            if actions is not None and mask is not None:
+                columns[id_field] = self._action_set_table.intern(actions, mask)
+        return {
+            name: value.detach().cpu().numpy()
+            for name, value in columns.items()
+            if value is not None
+        }
+
+    def _write_full_shards(self) -> None:
+        columns = self._concatenate_pending()
+        number_of_rows = self._number_of_pending_rows
+        start = 0
+        while number_of_rows - start >= self.shard_size:
+            self._write_shard(
+                {
+                    name: column[start : start + self.shard_size]
+                    for name, column in columns.items()
+                }
+            )
+            start += self.shard_size
+        if start < number_of_rows:
+            self._pending = [{name: column[start:] for name, column in columns.items()}]
+        else:
+            self._pending = []
+        self._number_of_pending_rows = number_of_rows - start
+
+    def _concatenate_pending(self) -> Dict[str, np.ndarray]:
+        assert self._fields is not None
+        return {
+            name: np.concatenate([columns[name] for columns in self._pending])
+            for name in self._fields
+        }
+
+    def _write_shard(self, columns: Dict[str, np.ndarray]) -> None:
+        shard_path = os.path.join(self.path, _shard_name(len(self._shard_sizes)))
+        os.makedirs(shard_path, exist_ok=True)
+        for name, column in columns.items():
+            np.save(os.path.join(shard_path, name + ".npy"), column)
+        # only the action sets interned since the previous shard are saved; the
+        # table is never released from, so they are the ones with the largest ids
+        number_of_saved_action_sets = sum(self._action_set_counts)
+        number_of_action_sets = len(self._action_set_table)
+        if number_of_action_sets > number_of_saved_action_sets:
+            actions, masks = self._action_set_table.stacked()
+            np.savez(
+                os.path.join(shard_path, ACTION_SETS_FILE_NAME),
+                actions=actions[number_of_saved_action_sets:].numpy(),
+                masks=masks[number_of_saved_action_sets:].numpy(),
+            )
+        self._action_set_counts.append(
+            number_of_action_sets - number_of_saved_action_sets
+        )
+        self._shard_sizes.append(len(next(iter(columns.values()))))
+        self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        manifest = {
+            "version": FORMAT_VERSION,
+            "fields": self._fields,
+            "shard_sizes": self._shard_sizes,
+            "action_set_counts": self._action_set_counts,
+        }
+        manifest_path = os.path.join(self.path, MANIFEST_FILE_NAME)
+        # readers never see a partially written manifest
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump(manifest, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    def flush(self) -> None:
+        """Writes all buffered rows as a new shard."""
+        if self._number_of_pending_rows == 0:
+            return
+        self._write_shard(self._concatenate_pending())
+        self._pending = []
+        self._number_of_pending_rows = 0
+
+    def close(self) -> None:
+        self.flush()
+        if self._fields is None:
+            # an empty dataset is still a valid dataset
+            self._write_manifest()
+
+
+class ShardedTransitionDataset(ReplayBuffer):
+    """
+    A read-only replay buffer over a sharded transition dataset, for offline
+    learning. Shards are memory-mapped, so opening a dataset does not read it and
+    sampling a batch only reads the sampled rows, which are gathered shard by shard
+    into preallocated arrays and converted to tensors without copies.
+
+    Batches are sampled uniformly without replacement, as offline data loaded in
+    memory (see `get_offline_data_in_buffer`), and only depend on the global torch
+    random number generator.
+    """
+
+    def __init__(self, path: str, device: Optional[torch.device] = None) -> None:
+        super(ShardedTransitionDataset, self).__init__()
+        if not is_sharded_transition_dataset(path):
+            raise ValueError(f"{path} is not a sharded transition dataset")
+        self.path = path
+        self._device: torch.device = (
+            device if device is not None else get_default_device()
+        )
+        with open(os.path.join(path, MANIFEST_FILE_NAME), "r") as f:
+            manifest = json.load(f)
+        if manifest["version"] != FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported sharded transition dataset version {manifest['version']}"
+            )
+        fields = manifest["fields"] or {}
+        self._field_names: List[str] = list(fields.keys())
+        self._row_shapes: Dict[str, Tuple[int, ...]] = {
+            name: tuple(field["shape"]) for name, field in fields.items()
+        }
+        self._dtypes: Dict[str, np.dtype] = {
+            name: np.dtype(field["dtype"]) for name, field in fields.items()
+        }
+        self._shards: List[Dict[str, np.ndarray]] = [
+            {
+                name: np.load(
+                    os.path.join(path, _shard_name(i), name + ".npy"), mmap_mode="r"
+                )
+                for name in self._field_names
+            }
+            for i in range(len(manifest["shard_sizes"]))
+        ]
+        # global index of the first row of every shard
+        self._shard_offsets: np.ndarray = np.cumsum([0] + manifest["shard_sizes"])
+
+        action_sets = [
+            np.load(os.path.join(path, _shard_name(i), ACTION_SETS_FILE_NAME))
+            for i, count in enumerate(manifest["action_set_counts"])
+            if count > 0
+        ]
+        self._action_sets: Tuple[torch.Tensor, torch.Tensor] = (
+            (
+                torch.from_numpy(np.concatenate([a["actions"] for a in action_sets])),
+                torch.from_numpy(np.concatenate([a["masks"] for a in action_sets])),
+            )
+            if len(action_sets) > 0
+            else (torch.zeros((0,)), torch.zeros((0,), dtype=torch.bool))
+        )
+
+    @property
+    def device(self) -> torch.device:
+        return self._device
+
+    @device.setter
+    def device(self, new_device: torch.device) -> None:
+        self._device = new_device
+
+    @property
+    def field_names(self) -> List[str]:
+        """The stored fields; interned action sets are stored as action set ids."""
+        return self._field_names
+
+    @property
+    def number_of_shards(self) -> int:
+        return len(self._shards)
+
+    def shard(self, shard_index: int) -> Dict[str, np.ndarray]:
+        """The memory-mapped columns of a shard, keyed by field name."""
+        return self._shards[shard_index]
+
+    def __len__(self) -> int:
+        return int(self._shard_offsets[-1])
+
+    def push(
+        self,
+        state: SubjectiveState,
+        action: Action,
+        reward: Reward,
+        next_state: SubjectiveState,
+        curr_available_actions: ActionSpace,
+        next_available_actions: ActionSpace,
+        done: bool,
+        max_number_actions: Optional[int],
+        cost: Optional[float] = None,
+    ) -> None:
+        raise NotImplementedError(
+            f"{self} is read-only, use ShardedTransitionWriter to write datasets"
+        )
+
+    def clear(self) -> None:
+        raise NotImplementedError(f"{self} is read-only")
+
+    def sample_indices(self, batch_size: int) -> torch.Tensor:
+        """Draws `batch_size` distinct row indices uniformly at random."""
+        if batch_size > len(self):
+            raise ValueError(
+                f"Can't get a batch of size {batch_size} from a replay buffer with "
+                f"only {len(self)} elements"
+            )
+        # unlike a permutation of all rows, this only costs O(batch_size), and it is
+        # seeded from the torch generator so that batches only depend on its seed
+        generator = random.Random(int(torch.randint(2**62, ()).item()))
+        return torch.tensor(generator.sample(range(len(self)), batch_size))
+
+    def gather_columns(self, indices: torch.Tensor) -> Dict[str, torch.Tensor]:
+        """
+        Reads the rows at the given global `indices` of every stored field into CPU
+        tensors. Within a shard, rows are read in increasing order of index.
+        """
+        indices_array = indices.cpu().numpy().astype(np.int64)
+        batch_size = len(indices_array)
+        columns = {
+            name: np.empty((batch_size,) + self._row_shapes[name], self._dtypes[name])
+            for name in self._field_names
+        }
+        order = np.argsort(indices_array, kind="stable")
+        sorted_indices = indices_array[order]
+        shard_indices = (
+            np.searchsorted(self._shard_offsets, sorted_indices, side="right") - 1
+        )
+        # boundaries of the runs of sorted indices falling into the same shard
+        boundaries = np.flatnonzero(np.diff(shard_indices)) + 1
+        for run in np.split(np.arange(batch_size), boundaries):
+            if len(run) == 0:
+                continue
+            shard_index = shard_indices[run[0]]
+            rows = sorted_indices[run] - self._shard_offsets[shard_index]
+            positions = order[run]
+            for name, column in self._shards[shard_index].items():
+                columns[name][positions] = column[rows]
+        return {name: torch.from_numpy(column) for name, column in columns.items()}
+
+    def batch_from_columns(
+        self,
+        columns: Dict[str, torch.Tensor],
+        device: Optional[torch.device] = None,
+    ) -> TransitionBatch:
+        """
+        Assembles columns returned by `gather_columns` into a `TransitionBatch` on
+        `device` (the device of the dataset by default), looking up interned
+        action sets.
+        """
+        columns = dict(columns)
+        actions, masks = self._action_sets
+        for actions_field, mask_field, id_field in _INTERNED_ACTION_SET_FIELDS:
+            if id_field in columns:
+                ids = columns.pop(id_field).long()
+                columns[actions_field], columns[mask_field] = actions[ids], masks[ids]
+        return TransitionBatch(**columns).to(
+            device if device is not None else self.device
+        )
+
+    def sample(self, batch_size: int) -> TransitionBatch:
+        return self.batch_from_columns(
+            self.gather_columns(self.sample_indices(batch_size))
+        )
+
+
+def _shard_name(shard_index: int) -> str:
+    return f"shard_{shard_index:05d}"
@@ -0,0 +1,124 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+"""
+Codecs for the fields of a `ColumnarStorage`, which store values in a more
+compact form (reduced precision, quantized or bit-packed) and restore them to
+their original dtype when they are read.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Optional, Union
+
+import torch
+from pearl.replay_buffers.bitmask import pack_bits, unpack_bits
+
+
+class StorageCodec(ABC):
+    """
+    Encodes the values written to a field of a `ColumnarStorage` and decodes the
+    values read from it. Values are batches of rows: codecs must preserve the
+    leading (batch) dimension.
+
+    A codec instance is bound to a single field, whose dtype it may record on the
+    first write.
+    """
+
+    @abstractmethod
+    def encode(self, value: torch.Tensor) -> torch.Tensor:
+        pass
+
+    @abstractmethod
+    def decode(self, stored: torch.Tensor) -> torch.Tensor:
+        pass
+
+
+class CastCodec(StorageCodec):
+    """
+    Stores values with another dtype (e.g. torch.bfloat16 or torch.float16 for
+    float32 states), and casts them back to their original dtype when read.
+    """
+
+    def __init__(self, dtype: torch.dtype) -> None:
+        self.dtype = dtype
+        self._original_dtype: Optional[torch.dtype] = None
+
+    def encode(self, value: torch.Tensor) -> torch.Tensor:
+        if self._original_dtype is None:
+            self._original_dtype = value.dtype
+        return value.to(self.dtype)
+
+    def decode(self, stored: torch.Tensor) -> torch.Tensor:
+        assert self._original_dtype is not None
+        return stored.to(self._original_dtype)
+
+
+class Int8QuantizationCodec(StorageCodec):
+    """
+    Stores floating point values as int8, quantized uniformly in [low, high] with
+    256 levels. `low` and `high` are scalars or tensors broadcastable to the shape
+    of rows (e.g. one value per feature of states). Values outside of [low, high]
+    are clipped, and read values are within (high - low) / 510 of written ones.
+    """
+
+    def __init__(
+        self,
+        low: Union[float, torch.Tensor],
+        high: Union[float, torch.Tensor],
+    ) -> None:
+        self.low: torch.Tensor = torch.as_tensor(low, dtype=torch.float32)
+        self.high: torch.Tensor = torch.as_tensor(high, dtype=torch.float32)
+        if torch.any(self.high <= self.low):
+            raise ValueError("Quantization requires high > low")
+        self.scale: torch.Tensor = (self.high - self.low) / 255
+        self._original_dtype: Optional[torch.dtype] = None
+
+    def encode(self, value: torch.Tensor) -> torch.Tensor:
+        if self._original_dtype is None:
+            self._original_dtype = value.dtype
+        low = self.low.to(value.device)
+        scale = self.scale.to(value.device)
+        levels = torch.round((value.float() - low) / scale).clamp(0, 255)
+        return (levels - 128).to(torch.int8)
+
+    def decode(self, stored: torch.Tensor) -> torch.Tensor:
+        assert self._original_dtype is not None
+        low = self.low.to(stored.device)
+        scale = self.scale.to(stored.device)
+        return ((stored.float() + 128) * scale + low).to(self._original_dtype)
+
+
+class PackedBitsCodec(StorageCodec):
+    """
+    Stores boolean values (e.g. masks) with 8 values per byte, packing the last
+    dimension of rows.
+    """
+
+    def __init__(self) -> None:
+        self._length: Optional[int] = None
+
+    def encode(self, value: torch.Tensor) -> torch.Tensor:
+        if value.dtype != torch.bool:
+            raise ValueError(f"Only boolean values can be packed, got {value.dtype}")
+        if value.dim() < 2:
+            raise ValueError(
+                "Only rows of boolean vectors (e.g. masks) can be packed, got rows "
+                "of a single value"
+            )
+        self._length = value.shape[-1]
+        return pack_bits(value)
+
+    def decode(self, stored: torch.Tensor) -> torch.Tensor:
+        assert self._length is not None
+        return unpack_bits(stored, self._length)
+
+
+def as_storage_codec(codec: Union[torch.dtype, StorageCodec]) -> StorageCodec:
+    """Returns a codec, given either a codec or a storage dtype (see `CastCodec`)."""
+    if isinstance(codec, torch.dtype):
+        return CastCodec(codec)
+    return codec
@@ -5,10 +5,12 @@
 # LICENSE file in the root directory of this source tree.
 #
 
+import dataclasses
 import random
+import weakref
 
 from collections import deque
-from typing import Deque, List, Optional, Tuple, Union
+from typing import Deque, Dict, List, Mapping, Optional, Tuple, Type, TypeVar, Union
 
 import torch
 
@@ -16,13 +18,83 @@ from pearl.api.action import Action
 from pearl.api.action_space import ActionSpace
 from pearl.api.reward import Reward
 from pearl.api.state import SubjectiveState
+from pearl.replay_buffers.action_set_table import ActionSetTable
+from pearl.replay_buffers.bitmask import pack_bits, unpack_bits
+from pearl.replay_buffers.columnar_storage import ColumnarStorage, ColumnMemory
 from pearl.replay_buffers.replay_buffer import ReplayBuffer
+from pearl.replay_buffers.storage_codecs import StorageCodec
 from pearl.replay_buffers.transition import Transition, TransitionBatch
 from pearl.utils.device import get_default_device
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 
+TB = TypeVar("TB", bound=TransitionBatch)
+
+# (available actions field, unavailable actions mask field, id field)
+_INTERNED_ACTION_SET_FIELDS = [
+    (
+        "curr_available_actions",
+        "curr_unavailable_actions_mask",
+        "curr_available_actions_id",
+    ),
+    (
+        "next_available_actions",
+        "next_unavailable_actions_mask",
+        "next_available_actions_id",
+    ),
+]
+
+# (available actions field, unavailable actions mask field, bitmask field)
+_ACTION_BITMASK_FIELDS = [
+    (
+        "curr_available_actions",
+        "curr_unavailable_actions_mask",
+        "curr_available_actions_bitmask",
+    ),
+    (
+        "next_available_actions",
+        "next_unavailable_actions_mask",
+        "next_available_actions_bitmask",
+    ),
+]
+
 
 class TensorBasedReplayBuffer(ReplayBuffer):
+    """
+    Base class of replay buffers which store transitions as tensors.
+
+    By default, transitions are kept in a `deque` of `Transition` objects which are
+    concatenated when sampled. With `use_columnar_storage=True`, transitions are
+    instead written into a `ColumnarStorage`, which preallocates one tensor of size
+    `capacity` per field and samples uniformly by gathering rows, with replacement
+    unless `sample_with_replacement=False` (the deque always samples distinct
+    transitions).
+    Subclasses opt into this by storing transitions with `_store_transition` and
+    sampling with `_sample_from_storage`.
+
+    In columnar storage, padded available actions and their masks are interned in an
+    `ActionSetTable`: each transition only stores the id of its current and next
+    action sets, which are gathered back from the table when sampling.
+
+    With `store_action_indices=True` (which requires columnar storage and discrete
+    actions given by their index), actions are stored as int32 indices and available
+    action sets as packed bitmasks of the indices of available actions. Sampled
+    batches are expanded on the device of the replay buffer: available actions are
+    all `max_number_actions` action indices in order (slot i holds action i), as a
+    view shared by every transition, and the bitmasks are unpacked into unavailable
+    actions masks. Action representations are then computed by the policy learner
+    once for the whole batch (see `PolicyLearner.preprocess_batch`).
+
+    `storage_dtypes` (which requires columnar storage) sets how fields are stored,
+    by field name, e.g. `{"state": torch.bfloat16, "next_state": torch.bfloat16}` or
+    `Int8QuantizationCodec`s for states with known bounds. Fields are stored as
+    written by default, and sampled batches always hold the dtypes fields were
+    pushed with. Fields are named as in `Transition`, except for interned action
+    sets (`curr_available_actions_id`, `next_available_actions_id`) and, with
+    `store_action_indices=True`, the bitmasks of available actions
+    (`curr_available_actions_bitmask`, `next_available_actions_bitmask`), which are
+    packed already. See `memory_report` for the memory used by every field.
+    """
+
     def __init__(
         self,
         capacity: int,
@@ -30,8 +102,16 @@ class TensorBasedReplayBuffer(ReplayBuffer):
         has_next_action: bool = True,
         has_next_available_actions: bool = True,
         has_cost_available: bool = False,
+        use_columnar_storage: bool = False,
+        store_action_indices: bool = False,
+        storage_dtypes: Optional[Mapping[str, Union[torch.dtype, StorageCodec]]] = None,
+        sample_with_replacement: bool = True,
     ) -> None:
         super(TensorBasedReplayBuffer, self).__init__()
+        if store_action_indices and not use_columnar_storage:
+            raise ValueError("store_action_indices requires use_columnar_storage")
+        if storage_dtypes is not None and not use_columnar_storage:
+            raise ValueError("storage_dtypes requires use_columnar_storage")
         self.capacity = capacity
         # TODO: we want a unifying transition type
         self.memory: Deque[Union[Transition, TransitionBatch]] = deque(
@@ -42,6 +122,27 @@ class TensorBasedReplayBuffer(ReplayBuffer):
         self._has_next_available_actions = has_next_available_actions
         self.has_cost_available = has_cost_available
         self._device: torch.device = get_default_device()
+        self._storage: Optional[ColumnarStorage] = None
+        self._action_set_table: Optional[ActionSetTable] = None
+        if use_columnar_storage:
+            self._storage = ColumnarStorage(
+                capacity=capacity, device=self._device, codecs=storage_dtypes
+            )
+            self._action_set_table = ActionSetTable(device=self._device)
+        self._store_action_indices = store_action_indices
+        self._sample_with_replacement = sample_with_replacement
+        # the number of actions of the available action sets stored as bitmasks
+        self._max_number_actions: Optional[int] = None
+        # bitmasks of padded available actions pushed one at a time, keyed by the
+        # id of the (cached) padded actions tensor, see `_create_action_tensor_and_mask`
+        self._bitmasks_by_tensor: Dict[
+            int, Tuple[weakref.ref, weakref.ref, torch.Tensor]
+        ] = {}
+        # padded available actions and masks, keyed by action space object,
+        # together with the max_number_actions and device they were built for
+        self._action_tensor_and_mask_cache: weakref.WeakKeyDictionary[
+            ActionSpace, Tuple[int, torch.device, torch.Tensor, torch.Tensor]
+        ] = weakref.WeakKeyDictionary()
 
     @property
     def device(self) -> torch.device:
@@ -50,6 +151,288 @@ class TensorBasedReplayBuffer(ReplayBuffer):
     @device.setter
     def device(self, value: torch.device) -> None:
         self._device = value
+        if self._storage is not None:
+            self._storage.to(value)
+        if self._action_set_table is not None:
+            self._action_set_table.to(value)
+
+    @property
+    def uses_columnar_storage(self) -> bool:
+        return self._storage is not None
+
+    def memory_report(self) -> Dict[str, ColumnMemory]:
+        """
+        Returns the memory used by every field of the columnar storage, stored and
+        as written (see `storage_dtypes`).
+        """
+        storage = self._storage
+        if storage is None:
+            raise ValueError("Memory reports require use_columnar_storage")
+        return storage.memory_report()
+
+    def _store_transition(self, transition: Transition) -> None:
+        """
+        Stores a single transition whose tensors have a leading batch dimension of 1,
+        either in the deque or, if enabled, in the columnar storage.
+        """
+        if self._storage is None:
+            self.memory.append(transition)
+            return
+        self._append_to_storage(
+            {
+                f.name: getattr(transition, f.name)
+                for f in dataclasses.fields(transition)
+            }
+        )
+
+    def _append_to_storage(
+        self, columns: Dict[str, Optional[torch.Tensor]]
+    ) -> torch.Tensor:
+        """
+        Writes rows into the columnar storage and returns the indices they were
+        written at. Subclasses can override this to track per-row metadata.
+
+        The references of overwritten rows (and of rows of writes larger than the
+        storage, which are not stored) to interned action sets are released.
+        """
+        storage = self._storage
+        assert storage is not None
+        columns = self._intern_action_sets(columns)
+        table = self._action_set_table
+        id_fields = [
+            id_field
+            for _, _, id_field in _INTERNED_ACTION_SET_FIELDS
+            if columns.get(id_field) is not None
+        ]
+        if self._store_action_indices or table is None or len(id_fields) == 0:
+            return storage.append(columns)
+
+        n = len(columns[id_fields[0]])  # pyre-ignore[6]
+        overwritten = (
+            storage.gather(storage.overwritten_indices(n), names=id_fields)
+            if len(storage) > 0
+            else {}
+        )
+        indices = storage.append(columns)
+        for id_field in id_fields:
+            ids = columns[id_field]
+            assert ids is not None
+            table.release(ids[: max(n - storage.capacity, 0)])
+            if id_field in overwritten:
+                table.release(overwritten[id_field])
+        return indices
+
+    def _intern_action_sets(
+        self, columns: Dict[str, Optional[torch.Tensor]]
+    ) -> Dict[str, Optional[torch.Tensor]]:
+        """
+        Replaces padded available actions and masks by their action set ids, or by
+        bitmasks when storing action indices.
+        """
+        if self._store_action_indices:
+            return self._encode_action_indices(columns)
+        table = self._action_set_table
+        if table is None:
+            return columns
+        columns = dict(columns)
+        for actions_field, mask_field, id_field in _INTERNED_ACTION_SET_FIELDS:
+            actions = columns.pop(actions_field, None)
+            mask = columns.pop(mask_field, None)
+            if actions is None or mask is None:
+                columns[actions_field] = actions
+                columns[mask_field] = mask
+                continue
+            columns[id_field] = table.intern(actions, mask)
+        return columns
+
+    def _encode_action_indices(
+        self, columns: Dict[str, Optional[torch.Tensor]]
+    ) -> Dict[str, Optional[torch.Tensor]]:
+        """
+        Replaces actions by int32 indices, and padded available actions and masks by
+        packed bitmasks of the indices of available actions.
+        """
+        columns = dict(columns)
+        for field in ("action", "next_action"):
+            action = columns.get(field)
+            if action is not None:
+                columns[field] = action.to(torch.int32)
+        for actions_field, mask_field, bitmask_field in _ACTION_BITMASK_FIELDS:
+            actions = columns.pop(actions_field, None)
+            mask = columns.pop(mask_field, None)
+            if actions is None or mask is None:
+                columns[actions_field] = actions
+                columns[mask_field] = mask
+                continue
+            columns[bitmask_field] = self._get_available_actions_bitmask(actions, mask)
+        return columns
+
+    def _get_available_actions_bitmask(
+        self, actions: torch.Tensor, unavailable_actions_mask: torch.Tensor
+    ) -> torch.Tensor:
+        """
+        Returns the packed bitmasks (batch_size x ceil(max_number_actions / 8)) of the
+        indices of the available actions of padded available actions
+        (batch_size x max_number_actions x 1) and their masks.
+        """
+        if actions.shape[-1] != 1:
+            raise ValueError(
+                "store_action_indices requires actions given by their index, got "
+                f"actions of dimension {actions.shape[-1]}"
+            )
+        max_number_actions = actions.shape[1]
+        if self._max_number_actions is None:
+            self._max_number_actions = max_number_actions
+        elif self._max_number_actions != max_number_actions:
+            raise ValueError(
+                f"Expected available actions padded to {self._max_number_actions} "
+                f"actions, got {max_number_actions}"
+            )
+
+        key = id(actions)
+        if actions.shape[0] == 1:
+            cached = self._bitmasks_by_tensor.get(key)
+            if (
+                cached is not None
+                and cached[0]() is actions
+                and cached[1]() is unavailable_actions_mask
+            ):
+                return cached[2]
+
+        # padded slots repeat action 0, so availabilities are accumulated rather
+        # than scattered, which would let a padded slot overwrite action 0
+        available = torch.zeros(
+            unavailable_actions_mask.shape, dtype=torch.int32, device=actions.device
+        ).scatter_add_(
+            1,
+            actions[..., 0].long(),
+            torch.logical_not(unavailable_actions_mask).to(torch.int32),
+        )
+        bitmask = pack_bits(available > 0)
+
+        if actions.shape[0] == 1:
+            self._bitmasks_by_tensor[key] = (
+                weakref.ref(actions, lambda _: self._bitmasks_by_tensor.pop(key, None)),
+                weakref.ref(unavailable_actions_mask),
+                bitmask,
+            )
+        return bitmask
+
+    def _decode_action_indices(
+        self, columns: Dict[str, torch.Tensor]
+    ) -> Dict[str, torch.Tensor]:
+        """
+        Inverse of `_encode_action_indices`, up to the order of available actions:
+        slot i of the available actions of every transition holds action i.
+        """
+        columns = dict(columns)
+        for field in ("action", "next_action"):
+            if field in columns:
+                columns[field] = columns[field].long()
+        for actions_field, mask_field, bitmask_field in _ACTION_BITMASK_FIELDS:
+            if bitmask_field not in columns:
+                continue
+            max_number_actions = self._max_number_actions
+            assert max_number_actions is not None
+            available = unpack_bits(columns.pop(bitmask_field), max_number_actions)
+            columns[actions_field] = (
+                torch.arange(
+                    max_number_actions, dtype=torch.float32, device=available.device
+                )
+                .view(1, max_number_actions, 1)
+                .expand(available.shape[0], -1, -1)
+            )
+            columns[mask_field] = torch.logical_not(available)
+        return columns
+
+    def push_batch(self, batch: TransitionBatch) -> None:
+        """
+        Stores a batch of transitions given as stacked tensors. For discrete action
+        spaces, available actions must already be padded to
+        (batch_size x max_number_actions x action_dim) and come with their
+        unavailable actions masks, as produced by `_create_action_tensor_and_mask`.
+
+        With columnar storage the whole batch is written with one copy per field;
+        otherwise one `Transition` (holding views of the batch) is kept per row.
+        """
+        self._store_batch(self._columns_from_batch(batch))
+
+    def _columns_from_batch(
+        self, batch: TransitionBatch
+    ) -> Dict[str, Optional[torch.Tensor]]:
+        """
+        Returns the fields of `batch` that a `Transition` can hold, on the device of
+        the replay buffer.
+        """
+        batch_size = len(batch)
+        columns: Dict[str, Optional[torch.Tensor]] = {}
+        for f in dataclasses.fields(Transition):
+            value = getattr(batch, f.name)
+            columns[f.name] = (
+                None if value is None else torch.as_tensor(value, device=self.device)
+            )
+
+        done = columns["done"]
+        assert done is not None
+        if done.dim() == 0:
+            # `TransitionBatch.done` defaults to a single True, used by bandits
+            columns["done"] = done.expand(batch_size)
+        if self._has_next_state and columns["next_state"] is None:
+            raise ValueError(f"{self} requires next_state in pushed batches")
+        if self._has_next_action and columns["next_action"] is None:
+            raise ValueError(f"{self} requires next_action in pushed batches")
+        if self.has_cost_available and columns["cost"] is None:
+            raise ValueError(f"{self} requires cost in pushed batches")
+        return columns
+
+    def _store_batch(
+        self,
+        columns: Dict[str, Optional[torch.Tensor]],
+        transition_class: Type[Transition] = Transition,
+    ) -> None:
+        if self._storage is not None:
+            self._append_to_storage(columns)
+            return
+        batch_size = len(next(v for v in columns.values() if v is not None))
+        for i in range(batch_size):
+            self.memory.append(
+                transition_class(
+                    **{
+                        name: None if value is None else value[i : i + 1]
+                        for name, value in columns.items()
+                    }
+                )
+            )
+
+    def _sample_from_storage(
+        self, batch_size: int, batch_class: Type[TB] = TransitionBatch
+    ) -> TB:
+        """
+        Samples `batch_size` rows from the columnar storage and assembles them into
+        a `batch_class` (`TransitionBatch` or one of its subclasses).
+        """
+        storage = self._storage
+        assert storage is not None
+        columns = storage.sample(batch_size, self._sample_with_replacement)
+        return self._batch_from_columns(columns, batch_class).to(self.device)
+
+    def _batch_from_columns(
+        self, columns: Dict[str, torch.Tensor], batch_class: Type[TB]
+    ) -> TB:
+        table = self._action_set_table
+        if self._store_action_indices:
+            columns = self._decode_action_indices(columns)
+        elif table is not None:
+            columns = dict(columns)
+            for actions_field, mask_field, id_field in _INTERNED_ACTION_SET_FIELDS:
+                if id_field in columns:
+                    columns[actions_field], columns[mask_field] = table.lookup(
+                        columns.pop(id_field)
+                    )
+        batch_fields = {f.name for f in dataclasses.fields(batch_class)}
+        return batch_class(
+            **{name: value for name, value in columns.items() if name in batch_fields}
+        )
 
     def _process_single_state(self, state: SubjectiveState) -> torch.Tensor:
         if isinstance(state, torch.Tensor):
@@ -102,6 +485,10 @@ class TensorBasedReplayBuffer(ReplayBuffer):
         [0, 0, 0, 0, 0],
     ]
     unavailable_actions_mask = [0, 0, 1, 1, 1]
+
+    The result is cached per action space object (and max_number_actions), so
+    transitions pushed with the same space share the same tensors, which are
+    therefore never modified in place.
     """
 
     def _create_action_tensor_and_mask(
@@ -112,6 +499,14 @@ class TensorBasedReplayBuffer(ReplayBuffer):
 
         assert isinstance(available_action_space, DiscreteActionSpace)
 
+        cached = self._action_tensor_and_mask_cache.get(available_action_space)
+        if (
+            cached is not None
+            and cached[0] == max_number_actions
+            and cached[1] == self._device
+        ):
+            return (cached[2], cached[3])
+
         available_actions_tensor_with_padding = torch.zeros(
             (1, max_number_actions, available_action_space.action_dim),
             device=self._device,
@@ -128,6 +523,12 @@ class TensorBasedReplayBuffer(ReplayBuffer):
         unavailable_actions_mask[0, available_action_space.n :] = 1
         unavailable_actions_mask = unavailable_actions_mask.bool()
 
+        self._action_tensor_and_mask_cache[available_action_space] = (
+            max_number_actions,
+            self._device,
+            available_actions_tensor_with_padding,
+            unavailable_actions_mask,
+        )
         return (available_actions_tensor_with_padding, unavailable_actions_mask)
 
     def sample(self, batch_size: int) -> TransitionBatch:
@@ -152,6 +553,8 @@ class TensorBasedReplayBuffer(ReplayBuffer):
                 f"Can't get a batch of size {batch_size} from a replay buffer with"
                 f"only {len(self)} elements"
             )
+        if self._storage is not None:
+            return self._sample_from_storage(batch_size)
         samples = random.sample(self.memory, batch_size)
         return self._create_transition_batch(
             transitions=samples,
@@ -163,10 +566,16 @@ class TensorBasedReplayBuffer(ReplayBuffer):
         )
 
     def __len__(self) -> int:
+        if self._storage is not None:
+            return len(self._storage)
         return len(self.memory)
 
     def clear(self) -> None:
         self.memory = deque([], maxlen=self.capacity)
+        if self._storage is not None:
+            self._storage.clear()
+        if self._action_set_table is not None:
+            self._action_set_table.clear()
 
     def _create_transition_batch(
         self,
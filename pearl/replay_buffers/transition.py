@@ -75,18 +75,32 @@ class TransitionBatch:
     time_diff: Optional[torch.Tensor] = None
     cost: Optional[torch.Tensor] = None
 
-    def to(self: TB, device: torch.device) -> TB:
+    def to(self: TB, device: torch.device, non_blocking: bool = False) -> TB:
         # iterate over all fields
         for f in dataclasses.fields(self.__class__):
             if getattr(self, f.name) is not None:
                 item = getattr(self, f.name)
-                item = torch.as_tensor(item, device=device)
+                if isinstance(item, torch.Tensor):
+                    item = item.to(device, non_blocking=non_blocking)
+                else:
+                    item = torch.as_tensor(item, device=device)
                 super().__setattr__(
                     f.name,
                     item,
                 )
         return self
 
+    def pin_memory(self: TB) -> TB:
+        """
+        Moves the fields of a batch on CPU to page-locked memory, so that they can be
+        copied to a GPU asynchronously with `to(device, non_blocking=True)`.
+        """
+        for f in dataclasses.fields(self.__class__):
+            item = getattr(self, f.name)
+            if isinstance(item, torch.Tensor) and item.device.type == "cpu":
+                super().__setattr__(f.name, item.pin_memory())
+        return self
+
     @property
     def device(self) -> torch.device:
         """
@@ -108,6 +122,17 @@ class TransitionWithBootstrapMaskBatch(TransitionBatch):
     bootstrap_mask: Optional[torch.Tensor] = None
 
 
+@dataclass(frozen=False)
+class TransitionWithIndexBatch(TransitionBatch):
+    """
+    A batch which remembers the replay buffer positions its transitions were
+    sampled from, so that per-transition statistics (e.g. TD errors for
+    prioritized replay) can be reported back to the buffer.
+    """
+
+    index: Optional[torch.Tensor] = None
+
+
 def filter_batch_by_bootstrap_mask(
     batch: TransitionWithBootstrapMaskBatch, z: Tensor
 ) -> TransitionBatch:
@@ -5,7 +5,6 @@
 # LICENSE file in the root directory of this source tree.
 #
 
-from abc import abstractmethod
 from typing import Optional
 
 import torch
@@ -41,14 +40,40 @@ class RiskSensitiveSafetyModule(SafetyModule):
         pass
 
     # risk sentitive safe rl methods use this to compute q values from a q value distribution.
-    @abstractmethod
+    # Subclasses implement either this method, or `get_q_values_from_distribution`
+    # (which is then also used by this method).
     def get_q_values_under_risk_metric(
         self,
         state_batch: Tensor,
         action_batch: Tensor,
         q_value_distribution_network: DistributionalQValueNetwork,
     ) -> torch.Tensor:
-        pass
+        q_value_distribution = q_value_distribution_network.get_q_value_distribution(
+            state_batch, action_batch
+        )
+        return self.get_q_values_from_distribution(
+            q_value_distribution, q_value_distribution_network
+        )
+
+    def get_q_values_from_distribution(
+        self,
+        q_value_distribution: Tensor,
+        q_value_distribution_network: DistributionalQValueNetwork,
+    ) -> torch.Tensor:
+        """
+        Computes q values from q value distributions already computed by
+        `q_value_distribution_network`, to reuse them without another forward pass.
+        Safety modules which only implement `get_q_values_under_risk_metric` raise
+        NotImplementedError, and callers then fall back to that method.
+        Args:
+            q_value_distribution: q value distributions with shape (..., num_quantiles)
+            q_value_distribution_network: the network which computed them
+        Returns:
+            q values under the risk metric, with shape (...)
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not compute q values from distributions"
+        )
 
 
 class RiskNeutralSafetyModule(RiskSensitiveSafetyModule):
@@ -62,27 +87,20 @@ class RiskNeutralSafetyModule(RiskSensitiveSafetyModule):
     def __str__(self) -> str:
         return f"Safety module type {self.__class__.__name__}"
 
-    def get_q_values_under_risk_metric(
+    def get_q_values_from_distribution(
         self,
-        state_batch: Tensor,
-        action_batch: Tensor,
+        q_value_distribution: Tensor,
         q_value_distribution_network: DistributionalQValueNetwork,
     ) -> torch.Tensor:
-
-        """Returns Q(s, a), given s and a
+        """Returns Q(s, a), given the distribution of Z(s, a)
         Args:
-            state_batch: a batch of state tensors (batch_size, state_dim)
-            action_batch: a batch of action tensors (batch_size, action_dim)
+            q_value_distribution: quantiles of Z(s, a) with shape (..., num_quantiles)
             q_value_distribution_network: a distributional q value network that
                                           approximates the return distribution
         Returns:
-            Q-values of (state, action) pairs: (batch_size) under a risk neutral measure,
+            Q-values of (state, action) pairs: (...) under a risk neutral measure,
             that is, Q(s, a) = E[Z(s, a)]
         """
-        q_value_distribution = q_value_distribution_network.get_q_value_distribution(
-            state_batch, action_batch
-        )
-
         return q_value_distribution.mean(dim=-1)
 
 
@@ -103,16 +121,11 @@ class QuantileNetworkMeanVarianceSafetyModule(RiskSensitiveSafetyModule):
     def __str__(self) -> str:
         return f"Safety module type {self.__class__.__name__}"
 
-    def get_q_values_under_risk_metric(
+    def get_q_values_from_distribution(
         self,
-        state_batch: Tensor,
-        action_batch: Tensor,
+        q_value_distribution: Tensor,
         q_value_distribution_network: DistributionalQValueNetwork,
     ) -> torch.Tensor:
-        q_value_distribution = q_value_distribution_network.get_q_value_distribution(
-            state_batch,
-            action_batch,
-        )
         """
         variance computation:
             - sum_{i=0}^{N-1} (tau_{i+1} - tau_{i}) * (q_value_distribution_{tau_i} - mean_value)^2
@@ -123,5 +136,5 @@ class QuantileNetworkMeanVarianceSafetyModule(RiskSensitiveSafetyModule):
         variance = (
             quantile_differences * torch.square(q_value_distribution - mean_value)
         ).sum(dim=-1, keepdim=True)
-        variance_adjusted_mean = (mean_value - (self._beta * variance)).view(-1)
+        variance_adjusted_mean = (mean_value - (self._beta * variance)).squeeze(-1)
         return variance_adjusted_mean
@@ -0,0 +1,145 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+
+import torch
+from pearl.action_representation_modules.one_hot_action_representation_module import (
+    OneHotActionTensorRepresentationModule,
+)
+from pearl.pearl_agent import PearlAgent
+from pearl.policy_learners.contextual_bandits.linear_bandit import LinearBandit
+from pearl.policy_learners.exploration_modules.common.epsilon_greedy_exploration import (
+    EGreedyExploration,
+)
+from pearl.policy_learners.exploration_modules.common.propensity_exploration import (
+    PropensityExploration,
+)
+from pearl.policy_learners.exploration_modules.contextual_bandits.ucb_exploration import (
+    UCBExploration,
+)
+from pearl.policy_learners.sequential_decision_making.deep_q_learning import (
+    DeepQLearning,
+)
+from pearl.policy_learners.sequential_decision_making.ppo import (
+    ProximalPolicyOptimization,
+)
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+class TestActBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.batch_size = 16
+        self.state_dim = 5
+        self.action_count = 4
+        self.action_space = DiscreteActionSpace(
+            actions=list(torch.arange(self.action_count).view(-1, 1))
+        )
+        self.states = torch.randn(self.batch_size, self.state_dim)
+
+    def _make_dqn(self, epsilon: float = 0.0) -> DeepQLearning:
+        return DeepQLearning(
+            state_dim=self.state_dim,
+            action_space=self.action_space,
+            hidden_dims=[8],
+            exploration_module=EGreedyExploration(epsilon),
+            action_representation_module=OneHotActionTensorRepresentationModule(
+                max_number_actions=self.action_count
+            ),
+        )
+
+    def test_dqn_matches_act(self) -> None:
+        policy_learner = self._make_dqn()
+        for exploit in (True, False):
+            actions = policy_learner.act_batch(
+                self.states, self.action_space, exploit=exploit
+            )
+            self.assertEqual(actions.shape, (self.batch_size,))
+            expected = torch.cat(
+                [
+                    policy_learner.act(state, self.action_space, exploit=True)
+                    for state in self.states
+                ]
+            )
+            self.assertTrue(torch.equal(actions, expected))
+
+    def test_epsilon_greedy_explores_per_state(self) -> None:
+        policy_learner = self._make_dqn(epsilon=1.0)
+        states = torch.zeros(1000, self.state_dim)
+        actions = policy_learner.act_batch(states, self.action_space)
+        self.assertEqual(actions.shape, (1000,))
+        # every state draws its own random action
+        self.assertEqual(len(torch.unique(actions)), self.action_count)
+
+    def test_ppo_matches_act(self) -> None:
+        policy_learner = ProximalPolicyOptimization(
+            state_dim=self.state_dim,
+            action_space=self.action_space,
+            actor_hidden_dims=[8],
+            critic_hidden_dims=[8],
+            exploration_module=PropensityExploration(),
+            action_representation_module=OneHotActionTensorRepresentationModule(
+                max_number_actions=self.action_count
+            ),
+        )
+        actions = policy_learner.act_batch(self.states, self.action_space, exploit=True)
+        expected = torch.stack(
+            [
+                policy_learner.act(state, self.action_space, exploit=True)
+                for state in self.states
+            ]
+        )
+        self.assertTrue(torch.equal(actions, expected))
+        actions = policy_learner.act_batch(self.states, self.action_space)
+        self.assertEqual(actions.shape, (self.batch_size,))
+        self.assertTrue(torch.all((actions >= 0) & (actions < self.action_count)))
+
+    def test_linear_bandit(self) -> None:
+        action_space = DiscreteActionSpace(
+            actions=list(torch.randn(self.action_count, 2))
+        )
+        policy_learner = LinearBandit(
+            feature_dim=self.state_dim + 2,
+            exploration_module=UCBExploration(alpha=1.0),
+        )
+        actions = policy_learner.act_batch(self.states, action_space)
+        self.assertEqual(actions.shape, (self.batch_size,))
+        expected = torch.stack(
+            [
+                policy_learner.act(state.unsqueeze(0), action_space).view(())
+                for state in self.states
+            ]
+        )
+        self.assertTrue(torch.equal(actions, expected))
+
+    def test_agent_with_action_space_per_state(self) -> None:
+        agent = PearlAgent(
+            policy_learner=self._make_dqn(),
+            replay_buffer=FIFOOffPolicyReplayBuffer(10),
+        )
+        small_action_space = DiscreteActionSpace(
+            actions=list(torch.arange(2).view(-1, 1))
+        )
+        action_spaces = [
+            self.action_space if i % 2 == 0 else small_action_space
+            for i in range(self.batch_size)
+        ]
+        actions = agent.act_batch(self.states, action_spaces, exploit=True)
+        self.assertEqual(actions.shape, (self.batch_size,))
+        for i, (state, action_space) in enumerate(zip(self.states, action_spaces)):
+            expected = agent.policy_learner.act(state, action_space, exploit=True)
+            self.assertEqual(actions[i].item(), expected.item())
+
+        # a single shared action space
+        actions = agent.act_batch(self.states, self.action_space, exploit=True)
+        expected = agent.policy_learner.act_batch(
+            self.states, self.action_space, exploit=True
+        )
+        self.assertTrue(torch.equal(actions, expected))
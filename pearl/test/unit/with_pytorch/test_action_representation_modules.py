@@ -0,0 +1,51 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+
+import torch
+import torch.nn.functional as F
+from pearl.action_representation_modules.binary_action_representation_module import (
+    BinaryActionTensorRepresentationModule,
+)
+from pearl.action_representation_modules.one_hot_action_representation_module import (
+    OneHotActionTensorRepresentationModule,
+)
+
+
+class TestActionRepresentationModules(unittest.TestCase):
+    def setUp(self) -> None:
+        self.max_number_actions = 8
+        # padded available actions of a batch
+        self.actions = torch.randint(self.max_number_actions, (5, 3, 1))
+
+    def test_one_hot(self) -> None:
+        module = OneHotActionTensorRepresentationModule(self.max_number_actions)
+        expected = F.one_hot(self.actions, num_classes=self.max_number_actions).squeeze(
+            dim=-2
+        )
+        self.assertTrue(torch.equal(module(self.actions), expected))
+        self.assertTrue(torch.equal(module(self.actions.float()), expected))
+        # out-of-range indices are rejected by the encoding itself
+        with self.assertRaises(RuntimeError):
+            module(torch.tensor([[-1]]))
+        with self.assertRaises(RuntimeError):
+            module(torch.tensor([[self.max_number_actions]]))
+
+    def test_binary(self) -> None:
+        module = BinaryActionTensorRepresentationModule(bits_num=3)
+        self.assertEqual(module.max_number_actions, self.max_number_actions)
+        expected = module.binary(self.actions)
+        self.assertTrue(torch.equal(module(self.actions), expected))
+        self.assertEqual(module(self.actions).dtype, torch.float32)
+
+        # large action spaces are represented without a table of all actions
+        module = BinaryActionTensorRepresentationModule(bits_num=40)
+        action = torch.tensor([[2**39 + 5]])
+        expected = torch.zeros(1, 1, 40)
+        expected[0, 0, [0, 2, 39]] = 1.0
+        self.assertTrue(torch.equal(module(action), expected))
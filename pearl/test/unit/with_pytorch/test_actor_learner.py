@@ -0,0 +1,95 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+from functools import partial
+
+import torch
+import torch.multiprocessing as mp
+from pearl.action_representation_modules.one_hot_action_representation_module import (
+    OneHotActionTensorRepresentationModule,
+)
+from pearl.pearl_agent import PearlAgent
+from pearl.policy_learners.sequential_decision_making.deep_q_learning import (
+    DeepQLearning,
+)
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.utils.functional_utils.train_and_eval.actor_learner import (
+    _episode_seed,
+    actor_learner_training,
+    SharedWeights,
+)
+from pearl.utils.instantiations.environments.gym_environment import GymEnvironment
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+class TestActorLearner(unittest.TestCase):
+    def _make_policy_learner(self) -> DeepQLearning:
+        return DeepQLearning(
+            state_dim=4,
+            action_space=DiscreteActionSpace(actions=list(torch.arange(2).view(-1, 1))),
+            hidden_dims=[16],
+            training_rounds=1,
+            batch_size=32,
+            action_representation_module=OneHotActionTensorRepresentationModule(
+                max_number_actions=2
+            ),
+        )
+
+    def test_shared_weights(self) -> None:
+        learner = self._make_policy_learner()
+        actor = self._make_policy_learner()
+        shared_weights = SharedWeights(learner, mp.get_context("spawn"))
+        version = shared_weights.refresh(actor, -1)
+        for name, value in actor.state_dict().items():
+            self.assertTrue(torch.equal(value, learner.state_dict()[name]))
+
+        with torch.no_grad():
+            for parameter in learner.parameters():
+                parameter.add_(1.0)
+        # unpublished changes are not visible to actors
+        self.assertEqual(shared_weights.refresh(actor, version), version)
+        self.assertFalse(
+            all(
+                torch.equal(value, learner.state_dict()[name])
+                for name, value in actor.state_dict().items()
+            )
+        )
+        shared_weights.publish(learner)
+        self.assertEqual(shared_weights.refresh(actor, version), version + 1)
+        for name, value in actor.state_dict().items():
+            self.assertTrue(torch.equal(value, learner.state_dict()[name]))
+
+    def test_episode_seeds_do_not_collide(self) -> None:
+        number_of_actors = 4
+        seeds = [
+            _episode_seed(7, actor_index, number_of_actors, episode)
+            for actor_index in range(number_of_actors)
+            for episode in range(50)
+        ]
+        self.assertEqual(len(set(seeds)), len(seeds))
+        self.assertIsNone(_episode_seed(None, 1, number_of_actors, 3))
+
+    def test_actor_learner_training(self) -> None:
+        agent = PearlAgent(
+            policy_learner=self._make_policy_learner(),
+            replay_buffer=FIFOOffPolicyReplayBuffer(10000),
+        )
+        info = actor_learner_training(
+            agent,
+            env_fn=partial(GymEnvironment, "CartPole-v1"),
+            number_of_steps=500,
+            number_of_actors=2,
+            seed=0,
+        )
+        self.assertGreaterEqual(len(agent.replay_buffer), 500)
+        self.assertGreater(info["learn_calls"], 0)
+        self.assertGreater(len(info["return"]), 0)
+        batch = agent.replay_buffer.sample(32)
+        self.assertEqual(batch.state.shape, (32, 4))
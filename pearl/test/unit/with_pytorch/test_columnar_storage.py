@@ -0,0 +1,324 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import dataclasses
+import unittest
+
+import torch
+
+from pearl.replay_buffers.action_set_table import ActionSetTable
+from pearl.replay_buffers.columnar_storage import ColumnarStorage
+from pearl.replay_buffers.contextual_bandits.discrete_contextual_bandit_replay_buffer import (  # noqa E501
+    DiscreteContextualBanditReplayBuffer,
+)
+from pearl.replay_buffers.sequential_decision_making.bootstrap_replay_buffer import (
+    BootstrapReplayBuffer,
+)
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (  # noqa E501
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.replay_buffers.transition import (
+    TransitionBatch,
+    TransitionWithBootstrapMaskBatch,
+)
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+class TestColumnarStorage(unittest.TestCase):
+    def setUp(self) -> None:
+        self.state_dim = 4
+        self.action_count = 3
+        self.action_space = DiscreteActionSpace(
+            actions=[torch.tensor([i]) for i in range(self.action_count)]
+        )
+
+    def test_ring_buffer_overwrites_oldest_rows(self) -> None:
+        storage = ColumnarStorage(capacity=3)
+        for i in range(5):
+            indices = storage.append(
+                {"reward": torch.tensor([float(i)]), "unused": None}
+            )
+            self.assertEqual(indices.tolist(), [i % 3])
+        self.assertEqual(len(storage), 3)
+        self.assertEqual(storage.cursor, 2)
+        # rows 0 and 1 were overwritten by the 4th and 5th writes
+        self.assertEqual(storage.columns["reward"].tolist(), [3.0, 4.0, 2.0])
+        self.assertNotIn("unused", storage.columns)
+
+        # a multi-row write wraps around the end of the storage
+        indices = storage.append({"reward": torch.tensor([5.0, 6.0])})
+        self.assertEqual(indices.tolist(), [2, 0])
+        self.assertEqual(storage.columns["reward"].tolist(), [6.0, 4.0, 5.0])
+
+    def test_inconsistent_fields_are_rejected(self) -> None:
+        storage = ColumnarStorage(capacity=3)
+        storage.append({"state": torch.zeros(1, 2), "cost": None})
+        with self.assertRaises(ValueError):
+            storage.append({"state": torch.zeros(1, 2), "cost": torch.zeros(1)})
+        with self.assertRaises(ValueError):
+            storage.append({"state": torch.zeros(1, 3)})
+
+    def test_fifo_off_policy_buffer(self) -> None:
+        capacity = 10
+        replay_buffer = FIFOOffPolicyReplayBuffer(capacity, use_columnar_storage=True)
+        for i in range(capacity + 5):
+            replay_buffer.push(
+                state=torch.full((self.state_dim,), float(i)),
+                action=torch.tensor([i % self.action_count]),
+                reward=float(i),
+                next_state=torch.full((self.state_dim,), float(i + 1)),
+                curr_available_actions=self.action_space,
+                next_available_actions=self.action_space,
+                done=i % 2 == 0,
+                max_number_actions=self.action_count,
+            )
+        self.assertEqual(len(replay_buffer), capacity)
+
+        batch = replay_buffer.sample(8)
+        self.assertEqual(batch.state.shape, (8, self.state_dim))
+        self.assertEqual(batch.action.shape, (8, 1))
+        self.assertEqual(batch.reward.shape, (8,))
+        self.assertEqual(batch.done.shape, (8,))
+        assert (next_state := batch.next_state) is not None
+        assert (curr_available_actions := batch.curr_available_actions) is not None
+        assert (mask := batch.curr_unavailable_actions_mask) is not None
+        self.assertEqual(curr_available_actions.shape, (8, self.action_count, 1))
+        self.assertEqual(mask.dtype, torch.bool)
+        self.assertIsNone(batch.next_action)
+        self.assertIsNone(batch.cost)
+        # only the most recent transitions are kept, and rows stay aligned
+        self.assertTrue(torch.all(batch.reward >= 5))
+        self.assertTrue(torch.equal(batch.state[:, 0], batch.reward))
+        self.assertTrue(torch.equal(next_state[:, 0], batch.reward + 1))
+        self.assertTrue(
+            torch.equal(batch.action[:, 0], batch.reward.long() % self.action_count)
+        )
+        self.assertTrue(torch.equal(batch.done, batch.reward.long() % 2 == 0))
+
+        replay_buffer.clear()
+        self.assertEqual(len(replay_buffer), 0)
+        with self.assertRaises(ValueError):
+            replay_buffer.sample(1)
+
+    def test_bootstrap_buffer(self) -> None:
+        ensemble_size = 5
+        replay_buffer = BootstrapReplayBuffer(
+            capacity=10, p=0.5, ensemble_size=ensemble_size, use_columnar_storage=True
+        )
+        for i in range(8):
+            replay_buffer.push(
+                state=torch.full((self.state_dim,), float(i)),
+                action=torch.tensor([0]),
+                reward=float(i),
+                next_state=torch.full((self.state_dim,), float(i + 1)),
+                curr_available_actions=self.action_space,
+                next_available_actions=self.action_space,
+                done=False,
+                max_number_actions=self.action_count,
+            )
+        batch = replay_buffer.sample(8)
+        self.assertIsInstance(batch, TransitionWithBootstrapMaskBatch)
+        assert (bootstrap_mask := batch.bootstrap_mask) is not None
+        self.assertEqual(bootstrap_mask.shape, (8, ensemble_size))
+
+    def test_contextual_bandit_buffer(self) -> None:
+        action_dim = 2
+        replay_buffer = DiscreteContextualBanditReplayBuffer(
+            capacity=10, use_columnar_storage=True
+        )
+        for i in range(6):
+            replay_buffer.push(
+                state=torch.full((self.state_dim,), float(i)),
+                action=torch.full((action_dim,), float(i)),
+                reward=float(i),
+                next_state=None,
+                curr_available_actions=self.action_space,
+                next_available_actions=self.action_space,
+                done=True,
+            )
+        batch = replay_buffer.sample(6)
+        self.assertEqual(batch.state.shape, (6, self.state_dim))
+        self.assertEqual(batch.action.shape, (6, action_dim))
+        self.assertTrue(torch.equal(batch.action[:, 0], batch.reward))
+
+    def test_action_sets_are_interned(self) -> None:
+        max_number_actions = 4
+        action_dim = 2
+        # two distinct action sets, the second one is recreated on every push
+        spaces = [
+            DiscreteActionSpace(actions=list(torch.randn(3, action_dim))),
+            DiscreteActionSpace(actions=list(torch.ones(2, action_dim))),
+        ]
+        replay_buffer = FIFOOffPolicyReplayBuffer(20, use_columnar_storage=True)
+        for i in range(10):
+            curr_space = spaces[0]
+            next_space = (
+                spaces[1]
+                if i % 2 == 0
+                else DiscreteActionSpace(actions=list(torch.ones(2, action_dim)))
+            )
+            replay_buffer.push(
+                state=torch.full((self.state_dim,), float(i % 2)),
+                action=torch.zeros(action_dim),
+                reward=float(i % 2),
+                next_state=torch.zeros(self.state_dim),
+                curr_available_actions=curr_space,
+                next_available_actions=next_space,
+                done=False,
+                max_number_actions=max_number_actions,
+            )
+        assert (table := replay_buffer._action_set_table) is not None
+        self.assertEqual(len(table), 2)
+        assert (storage := replay_buffer._storage) is not None
+        self.assertNotIn("curr_available_actions", storage.columns)
+        self.assertEqual(
+            storage.columns["curr_available_actions_id"].dtype, torch.int32
+        )
+
+        # pushing a batch only adds the action sets not seen before
+        batch = replay_buffer.sample(10)
+        assert (next_available_actions := batch.next_available_actions) is not None
+        next_available_actions[::2] = 0.0
+        replay_buffer.push_batch(batch)
+        self.assertEqual(len(table), 3)
+
+        batch = replay_buffer.sample(10)
+        assert (curr_available_actions := batch.curr_available_actions) is not None
+        assert (curr_mask := batch.curr_unavailable_actions_mask) is not None
+        assert (next_mask := batch.next_unavailable_actions_mask) is not None
+        self.assertEqual(
+            curr_available_actions.shape, (10, max_number_actions, action_dim)
+        )
+        self.assertTrue(
+            torch.equal(
+                curr_available_actions[:, :3],
+                spaces[0].actions_batch.expand(10, -1, -1),
+            )
+        )
+        self.assertTrue(torch.all(curr_available_actions[:, 3] == 0))
+        self.assertEqual(curr_mask.tolist(), [[False, False, False, True]] * 10)
+        self.assertEqual(next_mask.tolist(), [[False, False, True, True]] * 10)
+
+    def test_overwritten_action_sets_are_released(self) -> None:
+        capacity = 5
+        max_number_actions = 4
+        replay_buffer = FIFOOffPolicyReplayBuffer(capacity, use_columnar_storage=True)
+        for i in range(50):
+            # every transition has a new action set, as with dynamic action spaces
+            replay_buffer.push(
+                state=torch.full((self.state_dim,), float(i)),
+                action=torch.tensor([0]),
+                reward=float(i),
+                next_state=torch.zeros(self.state_dim),
+                curr_available_actions=DiscreteActionSpace(
+                    actions=[torch.tensor([float(i)]), torch.tensor([1.0])]
+                ),
+                next_available_actions=DiscreteActionSpace(
+                    actions=[torch.tensor([float(-i)])]
+                ),
+                done=False,
+                max_number_actions=max_number_actions,
+            )
+            assert (table := replay_buffer._action_set_table) is not None
+            self.assertLessEqual(len(table), 2 * capacity)
+            # new action sets are interned before overwritten ones are released
+            self.assertLessEqual(len(table._actions_list), 2 * capacity + 2)
+
+        batch = replay_buffer.sample(capacity)
+        assert (curr_available_actions := batch.curr_available_actions) is not None
+        assert (next_available_actions := batch.next_available_actions) is not None
+        self.assertTrue(torch.all(batch.reward >= 45))
+        self.assertTrue(torch.equal(curr_available_actions[:, 0, 0], batch.reward))
+        self.assertTrue(torch.equal(next_available_actions[:, 0, 0], -batch.reward))
+
+        # a batch larger than the storage only keeps the action sets of its last rows
+        fields = {f.name: getattr(batch, f.name) for f in dataclasses.fields(batch)}
+        replay_buffer.push_batch(
+            TransitionBatch(
+                **{
+                    name: None if value is None else torch.cat([value] * 3)
+                    for name, value in fields.items()
+                }
+            )
+        )
+        self.assertLessEqual(len(table), 2 * capacity)
+        replay_buffer.clear()
+        self.assertEqual(len(table), 0)
+
+    def test_action_sets_modified_in_place_are_interned_again(self) -> None:
+        table = ActionSetTable()
+        actions = torch.zeros(1, 3, 2)
+        mask = torch.tensor([[False, False, True]])
+        first_id = table.intern(actions, mask)
+        self.assertTrue(torch.equal(table.intern(actions, mask), first_id))
+        # the same tensor, pushed again after an in place modification
+        actions[0, 0] = 1.0
+        second_id = table.intern(actions, mask)
+        self.assertFalse(torch.equal(second_id, first_id))
+        self.assertTrue(torch.equal(table.lookup(second_id)[0], actions))
+
+        # released action sets are not found by tensor anymore
+        table.release(torch.cat([first_id, first_id, second_id]))
+        self.assertEqual(len(table), 0)
+        self.assertEqual(len(table._ids_by_tensor), 0)
+
+    def test_action_indices_are_stored(self) -> None:
+        max_number_actions = 10
+        # available action sets of any order, and padded with action 0
+        spaces = [
+            DiscreteActionSpace(actions=[torch.tensor([i]) for i in (7, 2, 5)]),
+            DiscreteActionSpace(actions=[torch.tensor([i]) for i in (1, 9)]),
+        ]
+        replay_buffer = FIFOOffPolicyReplayBuffer(
+            20, use_columnar_storage=True, store_action_indices=True
+        )
+        for i in range(10):
+            replay_buffer.push(
+                state=torch.full((self.state_dim,), float(i)),
+                action=spaces[i % 2].actions_batch[0],
+                reward=float(i),
+                next_state=torch.zeros(self.state_dim),
+                curr_available_actions=spaces[i % 2],
+                next_available_actions=spaces[1 - i % 2],
+                done=False,
+                max_number_actions=max_number_actions,
+            )
+        assert (storage := replay_buffer._storage) is not None
+        self.assertNotIn("curr_available_actions", storage.columns)
+        self.assertEqual(storage.columns["action"].dtype, torch.int32)
+        bitmask = storage.columns["curr_available_actions_bitmask"]
+        self.assertEqual((bitmask.dtype, bitmask.shape), (torch.uint8, (20, 2)))
+
+        batch = replay_buffer.sample(8)
+        assert (curr_available_actions := batch.curr_available_actions) is not None
+        assert (curr_mask := batch.curr_unavailable_actions_mask) is not None
+        assert (next_mask := batch.next_unavailable_actions_mask) is not None
+        # all action indices, in order, shared by all transitions
+        self.assertEqual(curr_available_actions.shape, (8, max_number_actions, 1))
+        self.assertEqual(curr_available_actions.stride(0), 0)
+        self.assertEqual(
+            curr_available_actions[0, :, 0].tolist(), list(range(max_number_actions))
+        )
+        self.assertEqual(batch.action.dtype, torch.long)
+        for row in range(8):
+            i = int(batch.reward[row].item())
+            self.assertEqual(batch.action[row].item(), [7, 1][i % 2])
+            self.assertEqual(
+                torch.nonzero(~curr_mask[row]).view(-1).tolist(),
+                [[2, 5, 7], [1, 9]][i % 2],
+            )
+            self.assertEqual(
+                torch.nonzero(~next_mask[row]).view(-1).tolist(),
+                [[1, 9], [2, 5, 7]][i % 2],
+            )
+
+        # sampled batches can be pushed back
+        replay_buffer.push_batch(batch)
+        self.assertEqual(len(replay_buffer), 18)
+
+        with self.assertRaises(ValueError):
+            FIFOOffPolicyReplayBuffer(20, store_action_indices=True)
@@ -0,0 +1,140 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import io
+import unittest
+
+import torch
+from pearl.action_representation_modules.one_hot_action_representation_module import (
+    OneHotActionTensorRepresentationModule,
+)
+from pearl.neural_networks.sequential_decision_making.actor_networks import (
+    action_scaling,
+)
+from pearl.policy_learners.exploration_modules.common.propensity_exploration import (
+    PropensityExploration,
+)
+from pearl.policy_learners.sequential_decision_making.deep_q_learning import (
+    DeepQLearning,
+)
+from pearl.policy_learners.sequential_decision_making.ppo import (
+    ProximalPolicyOptimization,
+)
+from pearl.policy_learners.sequential_decision_making.soft_actor_critic_continuous import (  # noqa E501
+    ContinuousSoftActorCritic,
+)
+from pearl.policy_learners.sequential_decision_making.td3 import TD3
+from pearl.utils.functional_utils.inference.compiled_policy import (
+    compile_exploit_policy,
+    measure_latency,
+)
+from pearl.utils.instantiations.spaces.box_action import BoxActionSpace
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+class TestCompiledPolicy(unittest.TestCase):
+    def setUp(self) -> None:
+        self.state_dim = 5
+        self.action_count = 4
+        self.action_space = DiscreteActionSpace(
+            actions=list(torch.arange(self.action_count).view(-1, 1))
+        )
+        self.states = torch.randn(16, self.state_dim)
+
+    def _make_dqn(self) -> DeepQLearning:
+        return DeepQLearning(
+            state_dim=self.state_dim,
+            action_space=self.action_space,
+            hidden_dims=[8],
+            action_representation_module=OneHotActionTensorRepresentationModule(
+                max_number_actions=self.action_count
+            ),
+        )
+
+    def test_dqn_torchscript(self) -> None:
+        policy_learner = self._make_dqn()
+        compiled_policy = compile_exploit_policy(policy_learner, self.states[:1])
+        expected = policy_learner.act_batch(self.states, self.action_space, True)
+        # batch sizes other than the one traced with
+        self.assertTrue(torch.equal(compiled_policy(self.states), expected))
+
+        # the exploit policy is frozen
+        with torch.no_grad():
+            for p in policy_learner._Q.parameters():
+                p.add_(1.0)
+        self.assertTrue(torch.equal(compiled_policy(self.states), expected))
+
+        # serving without the policy learner
+        buffer = io.BytesIO()
+        torch.jit.save(compiled_policy, buffer)
+        buffer.seek(0)
+        loaded_policy = torch.jit.load(buffer)
+        self.assertTrue(torch.equal(loaded_policy(self.states), expected))
+
+    def test_dqn_masked_actions(self) -> None:
+        policy_learner = self._make_dqn()
+        mask = torch.zeros(self.states.shape[0], self.action_count, dtype=torch.bool)
+        mask[:, : self.action_count - 1] = True
+        compiled_policy = compile_exploit_policy(
+            policy_learner,
+            self.states[:1],
+            example_unavailable_actions_mask=mask[:1],
+        )
+        actions = compiled_policy(self.states, mask)
+        self.assertTrue(torch.all(actions == self.action_count - 1))
+
+    def test_discrete_actor(self) -> None:
+        policy_learner = ProximalPolicyOptimization(
+            state_dim=self.state_dim,
+            action_space=self.action_space,
+            actor_hidden_dims=[8],
+            critic_hidden_dims=[8],
+            exploration_module=PropensityExploration(),
+            action_representation_module=OneHotActionTensorRepresentationModule(
+                max_number_actions=self.action_count
+            ),
+        )
+        exploit_policy = policy_learner.get_exploit_policy()
+        expected = policy_learner.act_batch(self.states, self.action_space, True)
+        self.assertTrue(torch.equal(exploit_policy(self.states), expected))
+        compiled_policy = compile_exploit_policy(policy_learner, self.states[:1])
+        self.assertTrue(torch.equal(compiled_policy(self.states), expected))
+
+    def test_continuous_actor(self) -> None:
+        policy_learner = TD3(
+            state_dim=self.state_dim,
+            action_space=BoxActionSpace(low=-torch.ones(2), high=torch.ones(2)),
+            actor_hidden_dims=[8],
+            critic_hidden_dims=[8],
+        )
+        compiled_policy = compile_exploit_policy(policy_learner, self.states[:1])
+        expected = policy_learner.act_batch(
+            self.states, policy_learner._action_space, True
+        )
+        self.assertTrue(torch.allclose(compiled_policy(self.states), expected))
+
+    def test_gaussian_actor(self) -> None:
+        action_space = BoxActionSpace(low=torch.zeros(2), high=2 * torch.ones(2))
+        policy_learner = ContinuousSoftActorCritic(
+            state_dim=self.state_dim,
+            action_space=action_space,
+            actor_hidden_dims=[8],
+            critic_hidden_dims=[8],
+        )
+        # the exploit action is the mean action, not a sample
+        mean, _ = policy_learner._actor(self.states)
+        expected = action_scaling(action_space, torch.tanh(mean))
+        compiled_policy = compile_exploit_policy(policy_learner, self.states[:1])
+        self.assertTrue(torch.allclose(compiled_policy(self.states), expected))
+        self.assertTrue(
+            torch.equal(compiled_policy(self.states), compiled_policy(self.states))
+        )
+
+    def test_measure_latency(self) -> None:
+        latency = measure_latency(lambda: None, number_of_runs=10, warmup_runs=1)
+        self.assertLessEqual(latency["p50_us"], latency["p99_us"])
+        self.assertIn("mean_us", latency)
@@ -103,3 +103,38 @@ class TestDeepTDLearning(unittest.TestCase):
             batch=sarsa.preprocess_batch(self.batch), batch_size=self.batch_size
         )
         self.assertEqual(sa_value.shape, (self.batch_size,))
+
+    def test_dqn_with_action_indices(self) -> None:
+        # a replay buffer storing action indices leads to the same next state values
+        replay_buffers = [
+            FIFOOffPolicyReplayBuffer(
+                self.batch_size,
+                use_columnar_storage=True,
+                store_action_indices=store_action_indices,
+            )
+            for store_action_indices in (False, True)
+        ]
+        for replay_buffer in replay_buffers:
+            replay_buffer.push_batch(copy.deepcopy(self.batch))
+        dqn = DeepQLearning(
+            state_dim=self.state_dim,
+            action_space=self.action_space,
+            hidden_dims=[3],
+            training_rounds=1,
+            action_representation_module=self.action_representation_module,
+        )
+        values = []
+        for replay_buffer in replay_buffers:
+            torch.manual_seed(0)
+            batch = dqn.preprocess_batch(replay_buffer.sample(self.batch_size))
+            values.append(dqn._get_next_state_values(batch, self.batch_size))
+        self.assertTrue(torch.allclose(values[0], values[1]))
+
+        # available actions are represented once for the whole batch
+        assert (next_available_actions := batch.next_available_actions) is not None
+        self.assertEqual(
+            next_available_actions.shape,
+            (self.batch_size, self.action_count, self.action_count),
+        )
+        self.assertEqual(next_available_actions.stride(0), 0)
+        dqn.learn_batch(batch)
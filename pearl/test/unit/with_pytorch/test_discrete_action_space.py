@@ -18,3 +18,27 @@ class TestDiscreteActionSpace(unittest.TestCase):
         action_space = DiscreteActionSpace(actions=actions)
         for i, action in enumerate(action_space):
             self.assertTrue(torch.equal(actions[i], action))
+
+    def test_actions_batch_is_cached(self) -> None:
+        actions = [torch.randn(4) for _ in range(5)]
+        action_space = DiscreteActionSpace(actions=actions)
+        actions_batch = action_space.actions_batch
+        self.assertTrue(torch.equal(actions_batch, torch.stack(actions)))
+        self.assertIs(action_space.actions_batch, actions_batch)
+        # moving to the device the actions are already on keeps the cache
+        action_space.to(actions_batch.device)
+        self.assertIs(action_space.actions_batch, actions_batch)
+
+    def test_actions_batch_follows_actions(self) -> None:
+        action_space = DiscreteActionSpace(actions=[torch.randn(4) for _ in range(5)])
+        action_space.actions_batch
+        # actions modified in place
+        action_space.actions[1].add_(1.0)
+        self.assertTrue(
+            torch.equal(action_space.actions_batch, torch.stack(action_space.actions))
+        )
+        # replaced actions
+        action_space.actions[2] = torch.zeros(4)
+        self.assertTrue(torch.equal(action_space.actions_batch[2], torch.zeros(4)))
+        action_space.elements = [torch.ones(4)] * 3
+        self.assertTrue(torch.equal(action_space.actions_batch, torch.ones(3, 4)))
@@ -27,6 +27,8 @@ from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpac
 
 
 class TestDisjointLinearBandits(unittest.TestCase):
+    use_stacked_models: bool = False
+
     def setUp(self) -> None:
         action_space = DiscreteActionSpace([torch.tensor([i]) for i in range(3)])
         policy_learner = DisjointLinearBandit(
@@ -35,6 +37,7 @@ class TestDisjointLinearBandits(unittest.TestCase):
             # UCB score == rewards
             exploration_module=DisjointUCBExploration(alpha=0),
             state_features_only=True,
+            use_stacked_models=self.use_stacked_models,
         )
         # y0 = x1  + x2
         # y1 = 2x1 + x2
@@ -166,6 +169,7 @@ class TestDisjointLinearBandits(unittest.TestCase):
             feature_dim=state_dim + action_dim,
             action_space=action_space,
             exploration_module=DisjointUCBExploration(alpha=0.1),
+            use_stacked_models=self.use_stacked_models,
         )
         batch = TransitionBatch(
             state=torch.randn(batch_size, state_dim),
@@ -185,7 +189,87 @@ class TestDisjointLinearBandits(unittest.TestCase):
         self.assertEqual(action.shape, torch.Size([batch_size]))
 
 
+class TestStackedDisjointLinearBandits(TestDisjointLinearBandits):
+    use_stacked_models: bool = True
+
+    def test_ucb_action_vector_after_learning(self) -> None:
+        state_dim = 5
+        action_dim = 3
+        action_count = 3
+        batch_size = 10
+        action_space = DiscreteActionSpace(
+            actions=list(torch.randn(action_count, action_dim))
+        )
+        policy_learner = DisjointLinearBandit(
+            feature_dim=state_dim + action_dim,
+            action_space=action_space,
+            exploration_module=DisjointUCBExploration(alpha=0.1),
+            use_stacked_models=True,
+        )
+        batch = TransitionBatch(
+            state=torch.randn(batch_size, state_dim),
+            action=torch.randint(low=0, high=action_count, size=(batch_size, 1)),
+            reward=torch.randn(batch_size),
+            weight=torch.ones(batch_size),
+        )
+        policy_learner.learn_batch(batch)
+        action = policy_learner.act(
+            subjective_state=batch.state[0], action_space=action_space
+        )
+        self.assertEqual(action.shape, ())
+        action = policy_learner.act(
+            subjective_state=batch.state, action_space=action_space
+        )
+        self.assertEqual(action.shape, torch.Size([batch_size]))
+
+    def test_matches_per_action_models(self) -> None:
+        policy_learner = DisjointLinearBandit(
+            feature_dim=2,
+            action_space=self.action_space,
+            exploration_module=DisjointUCBExploration(alpha=1.0),
+            state_features_only=True,
+        )
+        policy_learner.learn_batch(self.batch)
+        stacked_policy_learner = DisjointLinearBandit(
+            feature_dim=2,
+            action_space=self.action_space,
+            exploration_module=DisjointUCBExploration(alpha=1.0),
+            state_features_only=True,
+            use_stacked_models=True,
+        )
+        stacked_policy_learner.learn_batch(self.batch)
+        for model, stacked_model in zip(
+            policy_learner._linear_regressions,
+            stacked_policy_learner._linear_regressions,
+        ):
+            self.assertTrue(torch.allclose(model.A, stacked_model.A))
+            self.assertTrue(torch.allclose(model.coefs, stacked_model.coefs))
+            self.assertTrue(
+                torch.allclose(
+                    model.calculate_sigma(self.batch.state),
+                    stacked_model.calculate_sigma(self.batch.state),
+                )
+            )
+        exploration_module = policy_learner.exploration_module
+        assert isinstance(exploration_module, DisjointUCBExploration)
+        feature = self.batch.state.unsqueeze(1).repeat(1, self.action_space.n, 1)
+        self.assertTrue(
+            torch.allclose(
+                exploration_module.sigma(
+                    feature,
+                    policy_learner._linear_regressions,  # pyre-ignore[6]
+                ),
+                exploration_module.sigma(
+                    feature,
+                    stacked_policy_learner._stacked_linear_regression,  # pyre-ignore[6]
+                ),
+            )
+        )
+
+
 class TestDisjointBanditContainerLinearBandits(unittest.TestCase):
+    use_stacked_models: bool = False
+
     def setUp(self) -> None:
         num_arms = 3
         action_space = DiscreteActionSpace([torch.tensor([i]) for i in range(num_arms)])
@@ -197,6 +281,7 @@ class TestDisjointBanditContainerLinearBandits(unittest.TestCase):
             ],
             exploration_module=DisjointUCBExploration(alpha=0),
             state_features_only=True,
+            use_stacked_models=self.use_stacked_models,
         )
         # y0 = x1  + x2
         # y1 = 2x1 + x2
@@ -332,6 +417,7 @@ class TestDisjointBanditContainerLinearBandits(unittest.TestCase):
                 for _ in range(action_count)
             ],
             exploration_module=DisjointUCBExploration(alpha=0.1),
+            use_stacked_models=self.use_stacked_models,
         )
         batch = TransitionBatch(
             state=torch.randn(batch_size, state_dim),
@@ -375,3 +461,38 @@ class TestDisjointBanditContainerLinearBandits(unittest.TestCase):
             expected_scores.append(mus + alpha * sigmas)
         expected_scores = torch.stack(expected_scores, dim=1)
         self.assertTrue(torch.allclose(scores, expected_scores, atol=1e-1))
+
+
+class TestStackedDisjointBanditContainerLinearBandits(
+    TestDisjointBanditContainerLinearBandits
+):
+    use_stacked_models: bool = True
+
+    def test_arm_specific_features(self) -> None:
+        num_arms = 3
+        feature_dim = 2
+        policy_learner = DisjointBanditContainer(
+            feature_dim=feature_dim,
+            arm_bandits=[
+                LinearBandit(feature_dim=feature_dim) for _ in range(num_arms)
+            ],
+            exploration_module=DisjointUCBExploration(alpha=0),
+            use_stacked_models=True,
+        )
+        # every arm sees its own features, the reward only depends on the
+        # features of the chosen arm
+        state = torch.randn(60, num_arms, feature_dim)
+        action = torch.arange(60).remainder(num_arms).unsqueeze(-1)
+        chosen_state = state[torch.arange(60), action[:, 0]]
+        batch = TransitionBatch(
+            state=state,
+            action=action,
+            reward=chosen_state.sum(-1),
+            weight=torch.ones(60),
+        )
+        for _ in range(100):
+            policy_learner.learn_batch(batch)
+        for arm, model in enumerate(policy_learner.models):
+            self.assertTrue(
+                torch.allclose(model(state[:, arm]), state[:, arm].sum(-1), atol=1e-1)
+            )
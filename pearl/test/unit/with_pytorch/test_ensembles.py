@@ -9,10 +9,26 @@ import unittest
 
 import numpy.testing as npt
 import torch
-from pearl.neural_networks.common.epistemic_neural_networks import Ensemble
+from pearl.action_representation_modules.one_hot_action_representation_module import (
+    OneHotActionTensorRepresentationModule,
+)
+from pearl.neural_networks.common.epistemic_neural_networks import (
+    Ensemble,
+    EnsembleLinear,
+    FusedEnsemble,
+)
 from pearl.neural_networks.common.utils import ensemble_forward
+from pearl.neural_networks.common.value_networks import EnsembleQValueNetwork
+from pearl.policy_learners.sequential_decision_making.bootstrapped_dqn import (
+    BootstrappedDQN,
+)
+from pearl.replay_buffers.sequential_decision_making.bootstrap_replay_buffer import (
+    BootstrapReplayBuffer,
+)
+from pearl.replay_buffers.transition import filter_batch_by_bootstrap_mask
 
 from pearl.test.utils import create_normal_pdf_training_data
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 from torch import optim
 from torch.utils.data import DataLoader, TensorDataset
 
@@ -91,3 +107,116 @@ class TestEnsembles(unittest.TestCase):
         variance = torch.var(ensemble_forward(self.network.models, x))
 
         self.assertTrue(variance > 1e-6)
+
+
+class TestFusedEnsembles(unittest.TestCase):
+    def setUp(self) -> None:
+        self.ensemble_size = 5
+        self.input_dim = 4
+        self.network = FusedEnsemble(
+            input_dim=self.input_dim,
+            hidden_dims=[16, 16],
+            output_dim=1,
+            ensemble_size=self.ensemble_size,
+        )
+
+    def test_ensemble_linear_matches_linear(self) -> None:
+        layer = EnsembleLinear(self.ensemble_size, self.input_dim, 3)
+        x = torch.randn(7, self.input_dim)
+        output = layer(x)
+        self.assertEqual(output.shape, (self.ensemble_size, 7, 3))
+        for member in range(self.ensemble_size):
+            linear = torch.nn.Linear(self.input_dim, 3)
+            with torch.no_grad():
+                linear.weight.copy_(layer.weight[member].t())
+                linear.bias.copy_(layer.bias[member, 0])
+            npt.assert_allclose(
+                output[member].detach().numpy(),
+                linear(x).detach().numpy(),
+                atol=1e-6,
+            )
+            npt.assert_allclose(
+                layer(x, member=member).detach().numpy(),
+                output[member].detach().numpy(),
+                atol=1e-6,
+            )
+
+    def test_forward_all_matches_members(self) -> None:
+        x = torch.randn(3, 6, self.input_dim)
+        all_values = self.network.forward_all(x)
+        self.assertEqual(all_values.shape, (self.ensemble_size, 3, 6, 1))
+        for z in range(self.ensemble_size):
+            npt.assert_allclose(
+                self.network(x, z=torch.tensor(z)).detach().numpy(),
+                all_values[z].detach().numpy(),
+                atol=1e-6,
+            )
+
+    def test_prior_is_not_trained(self) -> None:
+        trainable = {
+            name for name, p in self.network.named_parameters() if p.requires_grad
+        }
+        self.assertTrue(all(name.startswith("base_net") for name in trainable))
+
+    def test_bootstrapped_dqn_masks_as_loss_weights(self) -> None:
+        for fused in (False, True):
+            self._check_bootstrapped_dqn_loss(fused)
+
+    def _check_bootstrapped_dqn_loss(self, fused: bool) -> None:
+        state_dim, action_count, batch_size = 3, 2, 16
+        action_space = DiscreteActionSpace(
+            actions=list(torch.arange(action_count).view(-1, 1))
+        )
+        policy_learner = BootstrappedDQN(
+            action_space=action_space,
+            q_ensemble_network=EnsembleQValueNetwork(
+                state_dim=state_dim,
+                action_dim=action_count,
+                hidden_dims=[8],
+                output_dim=1,
+                ensemble_size=self.ensemble_size,
+                fused=fused,
+            ),
+            action_representation_module=OneHotActionTensorRepresentationModule(
+                max_number_actions=action_count
+            ),
+        )
+        replay_buffer = BootstrapReplayBuffer(
+            capacity=batch_size, p=0.5, ensemble_size=self.ensemble_size
+        )
+        for _ in range(batch_size):
+            replay_buffer.push(
+                state=torch.randn(state_dim),
+                action=action_space.sample(),
+                reward=torch.rand(1).item(),
+                next_state=torch.randn(state_dim),
+                curr_available_actions=action_space,
+                next_available_actions=action_space,
+                done=False,
+                max_number_actions=action_count,
+            )
+        batch = policy_learner.preprocess_batch(replay_buffer.sample(batch_size))
+
+        # reference: one loss per member, computed on its filtered batch
+        expected_loss = 0.0
+        for z in range(self.ensemble_size):
+            z = torch.tensor(z)
+            assert (mask := batch.bootstrap_mask) is not None
+            if mask[:, z].sum() == 0:
+                continue
+            filtered = filter_batch_by_bootstrap_mask(batch=batch, z=z)
+            q_values = policy_learner._Q.get_q_values(
+                filtered.state, filtered.action, z=z
+            )
+            targets = (
+                policy_learner._get_next_state_values(
+                    filtered, filtered.state.shape[0], z=z
+                )
+                * policy_learner._discount_factor
+                * (1 - filtered.done.float())
+                + filtered.reward
+            )
+            expected_loss += torch.nn.functional.mse_loss(q_values, targets).item()
+
+        report = policy_learner.learn_batch(batch)
+        self.assertAlmostEqual(report["loss"], expected_loss, places=4)
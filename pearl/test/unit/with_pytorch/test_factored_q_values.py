@@ -0,0 +1,166 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import copy
+import unittest
+
+import torch
+from pearl.action_representation_modules.one_hot_action_representation_module import (
+    OneHotActionTensorRepresentationModule,
+)
+from pearl.neural_networks.common.target_network import TargetNetworkUpdater
+from pearl.neural_networks.common.value_networks import (
+    DuelingQValueNetwork,
+    TwoTowerQValueNetwork,
+    VanillaQValueNetwork,
+)
+from pearl.neural_networks.sequential_decision_making.q_value_network import (
+    QValueNetwork,
+)
+from pearl.policy_learners.sequential_decision_making.deep_q_learning import (
+    DeepQLearning,
+)
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+class TestFactoredQValues(unittest.TestCase):
+    def setUp(self) -> None:
+        self.batch_size = 5
+        self.state_dim = 6
+        self.action_dim = 4
+        self.number_of_actions = 3
+        self.states = torch.randn(self.batch_size, self.state_dim)
+        self.actions = torch.randn(self.number_of_actions, self.action_dim)
+        self.networks = {
+            "vanilla": VanillaQValueNetwork(
+                state_dim=self.state_dim,
+                action_dim=self.action_dim,
+                hidden_dims=[8, 8],
+                output_dim=1,
+            ),
+            "dueling": DuelingQValueNetwork(
+                state_dim=self.state_dim,
+                action_dim=self.action_dim,
+                hidden_dims=[8, 8],
+                output_dim=1,
+            ),
+            "two_tower": TwoTowerQValueNetwork(
+                state_dim=self.state_dim,
+                action_dim=self.action_dim,
+                hidden_dims=[8, 8],
+                state_output_dim=5,
+                action_output_dim=3,
+                state_hidden_dims=[8],
+                action_hidden_dims=[8],
+                output_dim=1,
+            ),
+        }
+
+    def _get_q_values_of_pairs(
+        self, network: QValueNetwork, actions: torch.Tensor
+    ) -> torch.Tensor:
+        if actions.dim() == 2:
+            actions = actions.unsqueeze(0).expand(self.batch_size, -1, -1)
+        states = self.states.unsqueeze(1).expand(-1, self.number_of_actions, -1)
+        return network.get_q_values(states, actions).view(self.batch_size, -1)
+
+    def test_matches_q_values_of_pairs(self) -> None:
+        per_state_actions = torch.randn(
+            self.batch_size, self.number_of_actions, self.action_dim
+        )
+        for name, network in self.networks.items():
+            for actions in (self.actions, per_state_actions):
+                for grad_enabled in (True, False):
+                    with torch.set_grad_enabled(grad_enabled):
+                        q_values = network.get_q_values_for_all_actions(
+                            self.states, actions
+                        )
+                        expected = self._get_q_values_of_pairs(network, actions)
+                    self.assertEqual(
+                        q_values.shape, (self.batch_size, self.number_of_actions)
+                    )
+                    self.assertTrue(torch.allclose(q_values, expected, atol=1e-6), name)
+
+    def test_action_features_are_cached(self) -> None:
+        for name in ("dueling", "two_tower"):
+            network = self.networks[name]
+            calls = []
+            network.register_forward_hook(lambda *args: calls.append(None))
+            cache = network._action_feature_cache
+
+            with torch.no_grad():
+                network.get_q_values_for_all_actions(self.states, self.actions)
+            features = cache._features
+            self.assertIsNotNone(features)
+            with torch.no_grad():
+                network.get_q_values_for_all_actions(self.states[:2], self.actions)
+            self.assertIs(cache._features, features, name)
+            # the factored path does not go through forward
+            self.assertEqual(len(calls), 0)
+
+            # an optimizer step invalidates the cached features
+            optimizer = torch.optim.SGD(network.parameters(), lr=0.1)
+            network.get_q_values_for_all_actions(
+                self.states, self.actions
+            ).sum().backward()
+            optimizer.step()
+            with torch.no_grad():
+                q_values = network.get_q_values_for_all_actions(
+                    self.states, self.actions
+                )
+                expected = self._get_q_values_of_pairs(network, self.actions)
+            self.assertIsNot(cache._features, features, name)
+            self.assertTrue(torch.allclose(q_values, expected, atol=1e-6), name)
+
+    def test_target_network_update_invalidates_cache(self) -> None:
+        network = self.networks["two_tower"]
+        target_network = copy.deepcopy(network)
+        updater = TargetNetworkUpdater(target_network, network, tau=0.5)
+        with torch.no_grad():
+            for p in network.parameters():
+                p.add_(1.0)
+            target_network.get_q_values_for_all_actions(self.states, self.actions)
+            updater.update()
+            q_values = target_network.get_q_values_for_all_actions(
+                self.states, self.actions
+            )
+            expected = self._get_q_values_of_pairs(target_network, self.actions)
+        self.assertTrue(torch.allclose(q_values, expected, atol=1e-6))
+
+    def test_dqn_act(self) -> None:
+        action_space = DiscreteActionSpace(
+            actions=list(torch.arange(self.number_of_actions).view(-1, 1))
+        )
+        policy_learner = DeepQLearning(
+            state_dim=self.state_dim,
+            action_space=action_space,
+            hidden_dims=[8, 8],
+            network_type=TwoTowerQValueNetwork,
+            state_output_dim=5,
+            action_output_dim=3,
+            state_hidden_dims=[8],
+            action_hidden_dims=[8],
+            action_representation_module=OneHotActionTensorRepresentationModule(
+                max_number_actions=self.number_of_actions
+            ),
+        )
+        actions = torch.eye(self.number_of_actions)
+        with torch.no_grad():
+            expected = self._get_q_values_of_pairs(policy_learner._Q, actions).argmax(
+                dim=1
+            )
+        self.assertTrue(
+            torch.equal(
+                policy_learner.act_batch(self.states, action_space, exploit=True),
+                expected,
+            )
+        )
+        for state, action in zip(self.states, expected):
+            self.assertEqual(
+                policy_learner.act(state, action_space, exploit=True).item(),
+                action.item(),
+            )
@@ -9,6 +9,9 @@ import unittest
 
 import torch
 
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (  # noqa E501
+    FIFOOffPolicyReplayBuffer,
+)
 from pearl.replay_buffers.sequential_decision_making.fifo_on_policy_replay_buffer import (
     FIFOOnPolicyReplayBuffer,
 )
@@ -109,3 +112,41 @@ class TestFifoBuffer(unittest.TestCase):
         # expect one sample returned
         batch = replay_buffer.sample(1)
         self.assertTrue(batch.done[0])
+
+    def test_available_actions_are_shared_across_pushes(self) -> None:
+        """
+        This test is to ensure padded available actions and masks are computed once
+        per action space and shared by the transitions pushed with it
+        """
+        replay_buffer = FIFOOffPolicyReplayBuffer(self.batch_size * 4)
+        for i in range(self.batch_size):
+            replay_buffer.push(
+                self.states[i],
+                self.actions[i],
+                self.rewards[i],
+                self.next_states[i],
+                self.curr_available_actions,
+                self.next_available_actions,
+                False,
+                self.action_space.n,
+            )
+        first, last = replay_buffer.memory[0], replay_buffer.memory[-1]
+        self.assertIs(first.curr_available_actions, last.curr_available_actions)
+        self.assertIs(
+            first.curr_unavailable_actions_mask, last.curr_unavailable_actions_mask
+        )
+        self.assertIs(first.curr_available_actions, first.next_available_actions)
+
+        # a different max_number_actions needs a different padding
+        (
+            available_actions,
+            unavailable_actions_mask,
+        ) = replay_buffer._create_action_tensor_and_mask(
+            self.action_space.n + 2, self.action_space
+        )
+        assert available_actions is not None
+        assert unavailable_actions_mask is not None
+        self.assertEqual(available_actions.shape, (1, self.action_space.n + 2, 1))
+        self.assertEqual(
+            unavailable_actions_mask.tolist(), [[False, False, False, True, True]]
+        )
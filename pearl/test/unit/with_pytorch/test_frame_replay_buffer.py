@@ -0,0 +1,110 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+from typing import List
+
+import torch
+from pearl.replay_buffers.sequential_decision_making.frame_replay_buffer import (
+    FrameReplayBuffer,
+)
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+class TestFrameReplayBuffer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.frame_stack = 4
+        self.frame_shape = (2, 5, 5)
+        self.action_space = DiscreteActionSpace(
+            actions=[torch.tensor([i]) for i in range(3)]
+        )
+        # the states and next states of all pushed transitions, by reward
+        self.states: List[torch.Tensor] = []
+        self.next_states: List[torch.Tensor] = []
+
+    def _random_frame(self) -> torch.Tensor:
+        return torch.randint(256, self.frame_shape).float()
+
+    def _push_episode(self, replay_buffer: FrameReplayBuffer, length: int) -> None:
+        # episodes start with a stack of the reset frame, as frame stacking
+        # wrappers do
+        state = torch.cat([self._random_frame()] * self.frame_stack)
+        for step in range(length):
+            next_state = torch.cat([state[self.frame_shape[0] :], self._random_frame()])
+            self.states.append(state)
+            self.next_states.append(next_state)
+            replay_buffer.push(
+                state=state,
+                action=self.action_space.sample(),
+                reward=float(len(self.states) - 1),
+                next_state=next_state,
+                curr_available_actions=self.action_space,
+                next_available_actions=self.action_space,
+                done=step == length - 1,
+                max_number_actions=self.action_space.n,
+            )
+            state = next_state
+
+    def _check_batch(self, replay_buffer: FrameReplayBuffer) -> None:
+        batch_size = len(replay_buffer)
+        batch = replay_buffer.sample(batch_size)
+        self.assertEqual(batch.state.dtype, torch.float32)
+        for row in range(batch_size):
+            i = int(batch.reward[row].item())
+            self.assertTrue(torch.equal(batch.state[row], self.states[i]))
+            assert (next_state := batch.next_state) is not None
+            self.assertTrue(torch.equal(next_state[row], self.next_states[i]))
+
+    def test_frames_are_stored_once(self) -> None:
+        replay_buffer = FrameReplayBuffer(100, frame_stack=self.frame_stack)
+        for length in (10, 1, 7):
+            self._push_episode(replay_buffer, length)
+        self.assertEqual(len(replay_buffer), 18)
+        # the frames of the first state of each episode and one frame per step
+        self.assertEqual(replay_buffer._number_of_frames, 3 * self.frame_stack + 18)
+        assert (frames := replay_buffer._frames) is not None
+        self.assertEqual(frames.dtype, torch.uint8)
+        assert (storage := replay_buffer._storage) is not None
+        self.assertNotIn("state", storage.columns)
+        self._check_batch(replay_buffer)
+
+    def test_overwritten_frames(self) -> None:
+        replay_buffer = FrameReplayBuffer(
+            20, frame_stack=self.frame_stack, frame_capacity=16
+        )
+        for _ in range(4):
+            self._push_episode(replay_buffer, 6)
+        # the latest episode, and the transitions of the previous one whose frames
+        # are still in the ring
+        self.assertEqual(len(replay_buffer), 6 + 2)
+        self._check_batch(replay_buffer)
+
+        replay_buffer = FrameReplayBuffer(8, frame_stack=self.frame_stack)
+        self._push_episode(replay_buffer, 30)
+        self.assertEqual(len(replay_buffer), 8)
+        self._check_batch(replay_buffer)
+
+    def test_push_batch_and_invalid_states(self) -> None:
+        replay_buffer = FrameReplayBuffer(100, frame_stack=self.frame_stack)
+        self._push_episode(replay_buffer, 5)
+        batch = replay_buffer.sample(5)
+        other = FrameReplayBuffer(100, frame_stack=self.frame_stack)
+        other.push_batch(batch)
+        self.assertEqual(len(other), 5)
+        self._check_batch(other)
+
+        with self.assertRaises(ValueError):
+            replay_buffer.push(
+                state=torch.full((self.frame_stack * 2, 5, 5), 0.5),
+                action=self.action_space.sample(),
+                reward=0.0,
+                next_state=torch.zeros(self.frame_stack * 2, 5, 5),
+                curr_available_actions=self.action_space,
+                next_available_actions=self.action_space,
+                done=False,
+                max_number_actions=self.action_space.n,
+            )
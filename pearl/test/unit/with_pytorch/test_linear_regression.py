@@ -10,6 +10,9 @@ import unittest
 import torch
 
 from pearl.utils.functional_utils.learning.linear_regression import LinearRegression
+from pearl.utils.functional_utils.learning.stacked_linear_regression import (
+    StackedLinearRegression,
+)
 
 
 class TestLinearRegression(unittest.TestCase):
@@ -35,6 +38,23 @@ class TestLinearRegression(unittest.TestCase):
         # make sure it's traceable
         _ = torch.fx.symbolic_trace(LinearRegression.append_ones)
 
+    def test_stacked_linear_regression_matches_per_model_regressions(self) -> None:
+        num_models, feature_dim, batch_size = 4, 3, 50
+        x = torch.randn(batch_size, feature_dim)
+        y = torch.randn(batch_size)
+        weight = torch.rand(batch_size)
+        # rows of models in any order, and a model without rows
+        model_index = torch.randint(num_models - 1, (batch_size,))
+        stacked = StackedLinearRegression(num_models, feature_dim)
+        stacked.learn_batch(x, y, weight, model_index)
+        for i in range(num_models):
+            model = LinearRegression(feature_dim=feature_dim)
+            rows = model_index == i
+            if rows.any():
+                model.learn_batch(x[rows], y[rows], weight[rows])
+            self.assertTrue(torch.allclose(stacked.A[i], model.A, atol=1e-5))
+            self.assertTrue(torch.allclose(stacked.coefs[i], model.coefs, atol=1e-4))
+
     def test_linear_regression_random(self) -> None:
         feature_dim: int = 15
         batch_size: int = feature_dim * 4
@@ -67,3 +87,79 @@ class TestLinearRegression(unittest.TestCase):
         states["_b"] = torch.ones((feature_dim + 1,))
         model.load_state_dict(states)
         self.assertEqual(model._b[3], 1)
+
+    def test_woodbury_update_matches_full_inverse(self) -> None:
+        feature_dim = 8
+        full = LinearRegression(feature_dim=feature_dim)
+        woodbury = LinearRegression(
+            feature_dim=feature_dim,
+            update_mode="woodbury",
+            refactorization_interval=4,
+        )
+        for batch_size in [3, 1, 1, 2, 4, 1, 20, 1, 1]:
+            x = torch.randn(batch_size, feature_dim)
+            y = x.sum(-1)
+            weight = torch.rand(batch_size)
+            full.learn_batch(x=x, y=y, weight=weight)
+            woodbury.learn_batch(x=x, y=y, weight=weight)
+            self.assertTrue(
+                torch.allclose(full._inv_A, woodbury._inv_A, atol=1e-5, rtol=1e-4)
+            )
+            self.assertTrue(
+                torch.allclose(full.coefs, woodbury.coefs, atol=1e-4, rtol=1e-4)
+            )
+            # a full refactorization happens at least every 4 updates
+            updates = woodbury._updates_since_refactorization
+            assert updates is not None
+            self.assertLessEqual(updates, 4)
+
+        # a batch too large for an incremental update resets the counter
+        x = torch.randn(20, feature_dim)
+        woodbury.learn_batch(x=x, y=x.sum(-1), weight=None)
+        self.assertEqual(woodbury._updates_since_refactorization, 0)
+
+        # the first update after loading a state dict inverts A from scratch
+        woodbury.load_state_dict(full.state_dict())
+        self.assertIsNone(woodbury._updates_since_refactorization)
+
+        with self.assertRaises(ValueError):
+            LinearRegression(feature_dim=feature_dim, update_mode="unknown")
+
+    def test_lazy_update(self) -> None:
+        feature_dim = 10
+        for update_mode in ["full", "woodbury"]:
+            eager = LinearRegression(feature_dim=feature_dim, update_mode=update_mode)
+            lazy = LinearRegression(
+                feature_dim=feature_dim, update_mode=update_mode, lazy_update=True
+            )
+            for batch_size in [12, 1, 2, 1]:
+                x = torch.randn(batch_size, feature_dim)
+                y = x.sum(-1)
+                eager.learn_batch(x=x, y=y, weight=None)
+                lazy.learn_batch(x=x, y=y, weight=None)
+                self.assertTrue(lazy._coefs_outdated)
+                if batch_size == 12:
+                    # reading sets a base inverse for incremental updates
+                    self.assertTrue(torch.allclose(eager.coefs, lazy.coefs))
+            self.assertEqual(lazy._updates_since_refactorization, 0)
+
+            x = torch.randn(3, feature_dim)
+            self.assertTrue(torch.allclose(eager(x), lazy(x), atol=1e-4))
+            self.assertFalse(lazy._coefs_outdated)
+            # the three pending batches were applied as a single update
+            self.assertEqual(
+                lazy._updates_since_refactorization,
+                1 if update_mode == "woodbury" else 0,
+            )
+            self.assertTrue(
+                torch.allclose(
+                    eager.calculate_sigma(x), lazy.calculate_sigma(x), atol=1e-4
+                )
+            )
+
+            # state dicts always hold up to date coefficients
+            lazy.learn_batch(x=x, y=x.sum(-1), weight=None)
+            eager.learn_batch(x=x, y=x.sum(-1), weight=None)
+            states = lazy.state_dict()
+            self.assertFalse(lazy._coefs_outdated)
+            self.assertTrue(torch.allclose(states["_coefs"], eager.coefs, atol=1e-4))
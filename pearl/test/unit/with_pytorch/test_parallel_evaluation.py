@@ -0,0 +1,160 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+
+import torch
+
+from pearl.action_representation_modules.identity_action_representation_module import (  # noqa E501
+    IdentityActionRepresentationModule,
+)
+from pearl.action_representation_modules.one_hot_action_representation_module import (
+    OneHotActionTensorRepresentationModule,
+)
+from pearl.api.environment import Environment
+from pearl.history_summarization_modules.lstm_history_summarization_module import (
+    LSTMHistorySummarizationModule,
+)
+from pearl.pearl_agent import PearlAgent
+from pearl.policy_learners.sequential_decision_making.deep_q_learning import (
+    DeepQLearning,
+)
+from pearl.utils.functional_utils.train_and_eval.offline_learning_and_evaluation import (
+    offline_evaluation,
+)
+from pearl.utils.functional_utils.train_and_eval.parallel_evaluation import (
+    parallel_evaluation,
+)
+from pearl.utils.instantiations.environments.contextual_bandit_linear_synthetic_environment import (  # noqa E501
+    ContextualBanditLinearSyntheticEnvironment,
+)
+from pearl.utils.instantiations.environments.gym_environment import GymEnvironment
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+def make_env() -> Environment:
+    return GymEnvironment("CartPole-v1")
+
+
+class TestParallelEvaluation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.env = make_env()
+        assert isinstance(self.env.action_space, DiscreteActionSpace)
+        self.agent = PearlAgent(
+            policy_learner=DeepQLearning(
+                state_dim=self.env.observation_space.shape[0],
+                action_space=self.env.action_space,
+                hidden_dims=[16],
+                action_representation_module=OneHotActionTensorRepresentationModule(
+                    max_number_actions=self.env.action_space.n
+                ),
+            ),
+        )
+        self.number_of_episodes = 7
+        self.seed = 3
+
+    def test_independent_of_number_of_workers(self) -> None:
+        expected = offline_evaluation(
+            self.agent, self.env, self.number_of_episodes, seed=self.seed
+        )
+        for num_workers in (1, 3, 10):
+            info = parallel_evaluation(
+                self.agent,
+                [make_env] * num_workers,
+                self.number_of_episodes,
+                seed=self.seed,
+            )
+            self.assertEqual(info["return"], expected)
+            # CartPole rewards every step with 1
+            self.assertEqual(info["length"], [int(g) for g in expected])
+
+        self.assertEqual(
+            offline_evaluation(
+                self.agent,
+                self.env,
+                self.number_of_episodes,
+                seed=self.seed,
+                num_workers=2,
+            ),
+            expected,
+        )
+
+    def test_asynchronous(self) -> None:
+        sync_info = parallel_evaluation(
+            self.agent, [make_env] * 2, self.number_of_episodes, seed=self.seed
+        )
+        async_info = parallel_evaluation(
+            self.agent,
+            [make_env] * 2,
+            self.number_of_episodes,
+            seed=self.seed,
+            asynchronous=True,
+            start_method="fork",
+        )
+        self.assertEqual(async_info, sync_info)
+
+    def test_history_summarization_falls_back_to_serial_evaluation(self) -> None:
+        observation_dim = self.env.observation_space.shape[0]
+        # histories hold one-hot representations of actions
+        action_count = int(self.env.action_space.n)
+        agent = PearlAgent(
+            policy_learner=DeepQLearning(
+                state_dim=8,
+                action_space=self.env.action_space,
+                hidden_dims=[16],
+                action_representation_module=OneHotActionTensorRepresentationModule(
+                    max_number_actions=action_count
+                ),
+            ),
+            history_summarization_module=LSTMHistorySummarizationModule(
+                observation_dim=observation_dim,
+                action_dim=action_count,
+                hidden_dim=8,
+                state_dim=8,
+            ),
+        )
+        expected = offline_evaluation(
+            agent, self.env, self.number_of_episodes, seed=self.seed
+        )
+        self.assertEqual(
+            offline_evaluation(
+                agent,
+                self.env,
+                self.number_of_episodes,
+                seed=self.seed,
+                num_workers=2,
+            ),
+            expected,
+        )
+
+    def test_environments_are_stepped_with_action_indices(self) -> None:
+        # action values which are not their indices
+        action_space = DiscreteActionSpace(
+            actions=[torch.tensor([10.0 * i + 5.0]) for i in range(3)]
+        )
+        env = ContextualBanditLinearSyntheticEnvironment(
+            action_space=action_space, observation_dim=2
+        )
+        agent = PearlAgent(
+            policy_learner=DeepQLearning(
+                state_dim=2,
+                action_space=action_space,
+                hidden_dims=[16],
+                action_representation_module=IdentityActionRepresentationModule(
+                    max_number_actions=3, representation_dim=1
+                ),
+            ),
+        )
+        # observations are drawn from the global random number generator, in the
+        # order of episodes
+        torch.manual_seed(0)
+        expected = offline_evaluation(agent, env, self.number_of_episodes)
+        torch.manual_seed(0)
+        returns = offline_evaluation(agent, env, self.number_of_episodes, num_workers=2)
+        self.assertEqual(len(returns), self.number_of_episodes)
+        for g, expected_g in zip(returns, expected):
+            self.assertAlmostEqual(float(g), float(expected_g), places=5)
@@ -0,0 +1,82 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import tempfile
+import unittest
+from typing import List
+
+import torch
+from pearl.replay_buffers.prefetching_batch_loader import PrefetchingBatchLoader
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.replay_buffers.sharded_transition_dataset import (
+    ShardedTransitionDataset,
+    ShardedTransitionWriter,
+)
+from pearl.replay_buffers.transition import TransitionBatch
+
+
+class TestPrefetchingBatchLoader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.number_of_transitions = 50
+        self.batch_size = 8
+        # rewards identify the transitions
+        self.batch = TransitionBatch(
+            state=torch.randn(self.number_of_transitions, 3),
+            action=torch.randn(self.number_of_transitions, 2),
+            reward=torch.arange(self.number_of_transitions).float(),
+            next_state=torch.randn(self.number_of_transitions, 3),
+            done=torch.zeros(self.number_of_transitions, dtype=torch.bool),
+        )
+
+    def _check_batch(self, batch: TransitionBatch) -> None:
+        self.assertEqual(len(batch), self.batch_size)
+        rows = batch.reward.long()
+        self.assertTrue(torch.equal(batch.state, self.batch.state[rows]))
+        self.assertTrue(torch.equal(batch.action, self.batch.action[rows]))
+
+    def test_replay_buffer(self) -> None:
+        replay_buffer = FIFOOffPolicyReplayBuffer(
+            self.number_of_transitions, use_columnar_storage=True
+        )
+        replay_buffer.push_batch(self.batch)
+        with PrefetchingBatchLoader(
+            replay_buffer, self.batch_size, num_workers=2, prefetch_batches=3
+        ) as loader:
+            for _ in range(10):
+                self._check_batch(next(loader))
+            stats = loader.stats()
+        self.assertEqual(stats["batches"], 10)
+        self.assertGreater(stats["batches_per_second"], 0)
+        self.assertGreaterEqual(stats["stall_fraction"], 0)
+
+    def test_sharded_dataset_is_deterministic(self) -> None:
+        with tempfile.TemporaryDirectory() as path:
+            with ShardedTransitionWriter(path, shard_size=16) as writer:
+                writer.write(self.batch)
+            dataset = ShardedTransitionDataset(path, device=torch.device("cpu"))
+
+            rewards: List[List[torch.Tensor]] = []
+            for num_workers in (1, 4):
+                torch.manual_seed(0)
+                with PrefetchingBatchLoader(
+                    dataset, self.batch_size, num_workers=num_workers
+                ) as loader:
+                    batches = [next(loader) for _ in range(10)]
+                for batch in batches:
+                    self._check_batch(batch)
+                rewards.append([batch.reward for batch in batches])
+
+            for first, second in zip(*rewards):
+                self.assertTrue(torch.equal(first, second))
+            # the same batches as sampling without prefetching
+            torch.manual_seed(0)
+            for reward in rewards[0]:
+                self.assertTrue(
+                    torch.equal(dataset.sample(self.batch_size).reward, reward)
+                )
@@ -0,0 +1,175 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+
+import torch
+from pearl.action_representation_modules.one_hot_action_representation_module import (
+    OneHotActionTensorRepresentationModule,
+)
+from pearl.policy_learners.sequential_decision_making.deep_q_learning import (
+    DeepQLearning,
+)
+from pearl.policy_learners.sequential_decision_making.implicit_q_learning import (
+    ImplicitQLearning,
+)
+from pearl.policy_learners.sequential_decision_making.td3 import TD3
+from pearl.replay_buffers.sequential_decision_making.prioritized_replay_buffer import (  # noqa E501
+    PrioritizedReplayBuffer,
+    SumTree,
+)
+from pearl.replay_buffers.transition import TransitionWithIndexBatch
+from pearl.utils.instantiations.spaces.box_action import BoxActionSpace
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+class TestPrioritizedReplayBuffer(unittest.TestCase):
+    def setUp(self) -> None:
+        self.state_dim = 4
+        self.action_count = 3
+        self.action_space = DiscreteActionSpace(
+            actions=list(torch.arange(self.action_count).view(-1, 1))
+        )
+
+    def _fill(self, replay_buffer: PrioritizedReplayBuffer, n: int) -> None:
+        for i in range(n):
+            replay_buffer.push(
+                state=torch.full((self.state_dim,), float(i)),
+                action=self.action_space.sample(),
+                reward=float(i),
+                next_state=torch.randn(self.state_dim),
+                curr_available_actions=self.action_space,
+                next_available_actions=self.action_space,
+                done=False,
+                max_number_actions=self.action_space.n,
+            )
+
+    def test_sum_tree(self) -> None:
+        sum_tree = SumTree(capacity=5)
+        sum_tree.update(torch.arange(5), torch.tensor([1.0, 0.0, 2.0, 3.0, 4.0]))
+        self.assertEqual(sum_tree.total.item(), 10.0)
+        # prefix sums [0, 1) -> 0, [1, 3) -> 2, [3, 6) -> 3, [6, 10) -> 4
+        found = sum_tree.find(torch.tensor([0.0, 0.5, 1.0, 2.9, 3.0, 6.5, 9.99]))
+        self.assertEqual(found.tolist(), [0, 0, 2, 2, 3, 4, 4])
+        # the last priority given for a repeated index wins
+        sum_tree.update(torch.tensor([3, 1, 3]), torch.tensor([5.0, 1.0, 0.5]))
+        self.assertEqual(sum_tree.total.item(), 8.5)
+        self.assertEqual(sum_tree[torch.tensor([1, 3])].tolist(), [1.0, 0.5])
+
+    def test_sample_follows_priorities(self) -> None:
+        capacity = 8
+        replay_buffer = PrioritizedReplayBuffer(capacity, alpha=1.0, beta=1.0)
+        self._fill(replay_buffer, capacity)
+
+        batch = replay_buffer.sample(capacity)
+        self.assertIsInstance(batch, TransitionWithIndexBatch)
+        assert (index := batch.index) is not None
+        assert (weight := batch.weight) is not None
+        # new transitions share the same priority, so sampling is uniform
+        self.assertTrue(torch.allclose(weight, torch.ones(capacity)))
+        self.assertTrue(torch.equal(batch.state[:, 0], index.float()))
+
+        # only transition 5 keeps a non negligible priority
+        td_errors = torch.zeros(capacity)
+        td_errors[5] = 10.0
+        replay_buffer.update_priorities(torch.arange(capacity), td_errors)
+        batch = replay_buffer.sample(capacity)
+        assert (index := batch.index) is not None
+        self.assertTrue(torch.all(index == 5))
+        self.assertTrue(torch.all(batch.reward == 5.0))
+
+        # new transitions get the maximum priority seen so far
+        self._fill(replay_buffer, 1)
+        self.assertAlmostEqual(
+            replay_buffer._sum_tree[torch.tensor([0])].item(), 10.0, places=4
+        )
+
+    def test_importance_sampling_weights(self) -> None:
+        replay_buffer = PrioritizedReplayBuffer(4, alpha=1.0, beta=0.5)
+        self._fill(replay_buffer, 4)
+        replay_buffer.update_priorities(
+            torch.arange(4), torch.tensor([1.0, 1.0, 1.0, 3.0])
+        )
+        batch = replay_buffer.sample(4)
+        assert (index := batch.index) is not None
+        assert (weight := batch.weight) is not None
+        # P = [1, 1, 1, 3] / 6, w = (4 * P)^-0.5 normalized by its maximum
+        probabilities = torch.tensor([1.0, 1.0, 1.0, 3.0])[index] / 6
+        expected = (4 * probabilities) ** -0.5
+        self.assertTrue(torch.allclose(weight, expected / expected.max(), atol=1e-4))
+
+    def test_dqn_updates_priorities(self) -> None:
+        batch_size = 16
+        replay_buffer = PrioritizedReplayBuffer(batch_size)
+        self._fill(replay_buffer, batch_size)
+        policy_learner = DeepQLearning(
+            state_dim=self.state_dim,
+            action_space=self.action_space,
+            hidden_dims=[8],
+            training_rounds=2,
+            batch_size=batch_size,
+            action_representation_module=OneHotActionTensorRepresentationModule(
+                max_number_actions=self.action_count
+            ),
+        )
+        report = policy_learner.learn(replay_buffer)
+        self.assertNotIn("td_error", report)
+        self.assertEqual(len(report["loss"]), 2)
+        # priorities are no longer all equal to the initial maximum priority
+        priorities = replay_buffer._sum_tree[torch.arange(batch_size)]
+        self.assertFalse(torch.allclose(priorities, priorities[0].expand(batch_size)))
+
+    def test_iql_updates_priorities(self) -> None:
+        batch_size = 16
+        replay_buffer = PrioritizedReplayBuffer(batch_size)
+        self._fill(replay_buffer, batch_size)
+        policy_learner = ImplicitQLearning(
+            state_dim=self.state_dim,
+            action_space=self.action_space,
+            actor_hidden_dims=[8],
+            critic_hidden_dims=[8],
+            value_critic_hidden_dims=[8],
+            training_rounds=1,
+            batch_size=batch_size,
+            action_representation_module=OneHotActionTensorRepresentationModule(
+                max_number_actions=self.action_count
+            ),
+        )
+        report = policy_learner.learn(replay_buffer)
+        self.assertNotIn("td_error", report)
+        self.assertNotIn("td_error", report["critic_loss"][0])
+        priorities = replay_buffer._sum_tree[torch.arange(batch_size)]
+        self.assertFalse(torch.allclose(priorities, priorities[0].expand(batch_size)))
+
+    def test_td3_updates_priorities(self) -> None:
+        batch_size = 16
+        action_space = BoxActionSpace(
+            low=torch.tensor([-1.0]), high=torch.tensor([1.0])
+        )
+        replay_buffer = PrioritizedReplayBuffer(batch_size)
+        replay_buffer.is_action_continuous = True
+        for _ in range(batch_size):
+            replay_buffer.push(
+                state=torch.randn(self.state_dim),
+                action=torch.rand(1) * 2 - 1,
+                reward=1.0,
+                next_state=torch.randn(self.state_dim),
+                curr_available_actions=action_space,
+                next_available_actions=action_space,
+                done=False,
+                max_number_actions=None,
+            )
+        policy_learner = TD3(
+            state_dim=self.state_dim,
+            action_space=action_space,
+            actor_hidden_dims=[8],
+            critic_hidden_dims=[8],
+            batch_size=batch_size,
+        )
+        policy_learner.learn(replay_buffer)
+        priorities = replay_buffer._sum_tree[torch.arange(batch_size)]
+        self.assertFalse(torch.allclose(priorities, priorities[0].expand(batch_size)))
@@ -0,0 +1,175 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+
+import torch
+
+from pearl.replay_buffers.contextual_bandits.discrete_contextual_bandit_replay_buffer import (  # noqa E501
+    DiscreteContextualBanditReplayBuffer,
+)
+from pearl.replay_buffers.sequential_decision_making.bootstrap_replay_buffer import (
+    BootstrapReplayBuffer,
+)
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (  # noqa E501
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.replay_buffers.transition import TransitionBatch
+from pearl.utils.functional_utils.train_and_eval.offline_learning_and_evaluation import (  # noqa E501
+    raw_transitions_to_batch,
+)
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+class TestPushBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.batch_size = 6
+        self.state_dim = 4
+        self.action_count = 3
+        action_space = DiscreteActionSpace(
+            actions=[torch.tensor([i]) for i in range(self.action_count)]
+        )
+        replay_buffer = FIFOOffPolicyReplayBuffer(self.batch_size)
+        (
+            available_actions,
+            unavailable_actions_mask,
+        ) = replay_buffer._create_action_tensor_and_mask(
+            self.action_count, action_space
+        )
+        assert available_actions is not None
+        assert unavailable_actions_mask is not None
+        rewards = torch.arange(self.batch_size, dtype=torch.float32)
+        self.batch = TransitionBatch(
+            state=rewards.unsqueeze(-1).repeat(1, self.state_dim),
+            action=(rewards.long() % self.action_count).unsqueeze(-1),
+            reward=rewards,
+            next_state=(rewards + 1).unsqueeze(-1).repeat(1, self.state_dim),
+            curr_available_actions=available_actions.expand(self.batch_size, -1, -1),
+            curr_unavailable_actions_mask=unavailable_actions_mask.expand(
+                self.batch_size, -1
+            ),
+            next_available_actions=available_actions.expand(self.batch_size, -1, -1),
+            next_unavailable_actions_mask=unavailable_actions_mask.expand(
+                self.batch_size, -1
+            ),
+            done=rewards.long() % 2 == 0,
+        )
+
+    def _assert_rows_aligned(self, batch: TransitionBatch) -> None:
+        assert (next_state := batch.next_state) is not None
+        assert (curr_available_actions := batch.curr_available_actions) is not None
+        self.assertEqual(
+            curr_available_actions.shape, (len(batch), self.action_count, 1)
+        )
+        self.assertTrue(torch.equal(batch.state[:, 0], batch.reward))
+        self.assertTrue(torch.equal(next_state[:, 0], batch.reward + 1))
+        self.assertTrue(
+            torch.equal(batch.action[:, 0], batch.reward.long() % self.action_count)
+        )
+        self.assertTrue(torch.equal(batch.done, batch.reward.long() % 2 == 0))
+
+    def test_fifo_off_policy_push_batch(self) -> None:
+        for use_columnar_storage in [False, True]:
+            replay_buffer = FIFOOffPolicyReplayBuffer(
+                capacity=self.batch_size - 2,
+                use_columnar_storage=use_columnar_storage,
+            )
+            replay_buffer.push_batch(self.batch)
+            # only the last `capacity` transitions are kept
+            self.assertEqual(len(replay_buffer), self.batch_size - 2)
+            batch = replay_buffer.sample(self.batch_size - 2)
+            self.assertTrue(torch.all(batch.reward >= 2))
+            self._assert_rows_aligned(batch)
+
+    def test_sample_without_replacement(self) -> None:
+        replay_buffer = FIFOOffPolicyReplayBuffer(
+            capacity=self.batch_size,
+            use_columnar_storage=True,
+            sample_with_replacement=False,
+        )
+        replay_buffer.push_batch(self.batch)
+        for _ in range(10):
+            batch = replay_buffer.sample(self.batch_size)
+            self.assertEqual(len(set(batch.reward.tolist())), self.batch_size)
+            self._assert_rows_aligned(batch)
+
+    def test_raw_transitions_to_batch(self) -> None:
+        def raw_transitions():
+            # every transition has its own action space objects, which are freed
+            # (and whose ids may be reused) once the next transition is created
+            for i in range(self.batch_size):
+                number_of_actions = 1 + i % self.action_count
+                yield {
+                    "observation": torch.full((self.state_dim,), float(i)),
+                    "action": torch.tensor([0]),
+                    "reward": float(i),
+                    "next_observation": torch.full((self.state_dim,), float(i + 1)),
+                    "curr_available_actions": DiscreteActionSpace(
+                        actions=[torch.tensor([a]) for a in range(number_of_actions)]
+                    ),
+                    "next_available_actions": DiscreteActionSpace(
+                        actions=[torch.tensor([0])]
+                    ),
+                    "max_number_actions": self.action_count,
+                    "done": False,
+                }
+
+        batch = raw_transitions_to_batch(
+            raw_transitions(), FIFOOffPolicyReplayBuffer(self.batch_size)
+        )
+        assert (curr_mask := batch.curr_unavailable_actions_mask) is not None
+        assert (next_mask := batch.next_unavailable_actions_mask) is not None
+        self.assertTrue(
+            torch.equal(
+                (~curr_mask).sum(dim=1),
+                1 + torch.arange(self.batch_size) % self.action_count,
+            )
+        )
+        self.assertTrue(torch.all((~next_mask).sum(dim=1) == 1))
+        self.assertTrue(torch.equal(batch.state[:, 0], batch.reward))
+
+    def test_push_batch_requires_next_state(self) -> None:
+        replay_buffer = FIFOOffPolicyReplayBuffer(self.batch_size)
+        with self.assertRaises(ValueError):
+            replay_buffer.push_batch(
+                TransitionBatch(
+                    state=self.batch.state,
+                    action=self.batch.action,
+                    reward=self.batch.reward,
+                )
+            )
+
+    def test_bootstrap_push_batch(self) -> None:
+        ensemble_size = 3
+        for use_columnar_storage in [False, True]:
+            replay_buffer = BootstrapReplayBuffer(
+                capacity=self.batch_size,
+                p=0.5,
+                ensemble_size=ensemble_size,
+                use_columnar_storage=use_columnar_storage,
+            )
+            replay_buffer.push_batch(self.batch)
+            batch = replay_buffer.sample(self.batch_size)
+            assert (bootstrap_mask := batch.bootstrap_mask) is not None
+            self.assertEqual(bootstrap_mask.shape, (self.batch_size, ensemble_size))
+            self._assert_rows_aligned(batch)
+
+    def test_contextual_bandit_push_batch(self) -> None:
+        for use_columnar_storage in [False, True]:
+            replay_buffer = DiscreteContextualBanditReplayBuffer(
+                capacity=self.batch_size, use_columnar_storage=use_columnar_storage
+            )
+            replay_buffer.push_batch(
+                TransitionBatch(
+                    state=self.batch.state,
+                    action=self.batch.action,
+                    reward=self.batch.reward,
+                )
+            )
+            batch = replay_buffer.sample(self.batch_size)
+            self.assertEqual(batch.action.shape, (self.batch_size, 1))
+            self.assertTrue(torch.equal(batch.state[:, 0], batch.reward))
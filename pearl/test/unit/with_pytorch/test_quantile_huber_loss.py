@@ -0,0 +1,159 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+
+import torch
+from pearl.action_representation_modules.one_hot_action_representation_module import (
+    OneHotActionTensorRepresentationModule,
+)
+from pearl.neural_networks.sequential_decision_making.q_value_network import (
+    DistributionalQValueNetwork,
+)
+from pearl.policy_learners.sequential_decision_making.quantile_regression_deep_q_learning import (
+    QuantileRegressionDeepQLearning,
+)
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.safety_modules.risk_sensitive_safety_modules import (
+    QuantileNetworkMeanVarianceSafetyModule,
+    RiskNeutralSafetyModule,
+    RiskSensitiveSafetyModule,
+)
+from pearl.utils.functional_utils.learning.loss_fn_utils import (
+    compute_elementwise_huber_loss,
+    compute_quantile_huber_loss,
+)
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+def reference_quantile_huber_loss(
+    predicted_quantiles: torch.Tensor,
+    target_quantiles: torch.Tensor,
+    quantile_midpoints: torch.Tensor,
+) -> torch.Tensor:
+    pairwise_quantile_loss = target_quantiles.unsqueeze(
+        2
+    ) - predicted_quantiles.unsqueeze(1)
+    huber_loss = compute_elementwise_huber_loss(pairwise_quantile_loss)
+    with torch.no_grad():
+        asymmetric_weight = torch.abs(
+            quantile_midpoints - (pairwise_quantile_loss < 0).float()
+        )
+    return (asymmetric_weight * huber_loss).sum(dim=1).mean()
+
+
+class RiskMetricOnlySafetyModule(RiskSensitiveSafetyModule):
+    """
+    A risk neutral safety module only implementing `get_q_values_under_risk_metric`.
+    """
+
+    def get_q_values_under_risk_metric(
+        self,
+        state_batch: torch.Tensor,
+        action_batch: torch.Tensor,
+        q_value_distribution_network: DistributionalQValueNetwork,
+    ) -> torch.Tensor:
+        return q_value_distribution_network.get_q_value_distribution(
+            state_batch, action_batch
+        ).mean(dim=-1)
+
+
+class TestQuantileHuberLoss(unittest.TestCase):
+    def setUp(self) -> None:
+        self.batch_size = 13
+        self.num_quantiles = 7
+        quantiles = torch.linspace(0, 1, self.num_quantiles + 1)
+        self.quantile_midpoints = (quantiles[1:] + quantiles[:-1]) / 2
+        # errors both within and beyond the huber threshold
+        self.target_quantiles = 3 * torch.randn(self.batch_size, self.num_quantiles)
+
+    def test_matches_reference(self) -> None:
+        predicted_quantiles = torch.randn(
+            self.batch_size, self.num_quantiles, requires_grad=True
+        )
+        expected = reference_quantile_huber_loss(
+            predicted_quantiles, self.target_quantiles, self.quantile_midpoints
+        )
+        (expected_grad,) = torch.autograd.grad(expected, predicted_quantiles)
+        for chunk_size in (None, 1, 4, self.batch_size, 100):
+            loss = compute_quantile_huber_loss(
+                predicted_quantiles,
+                self.target_quantiles,
+                self.quantile_midpoints,
+                chunk_size=chunk_size,
+            )
+            (grad,) = torch.autograd.grad(2 * loss, predicted_quantiles)
+            self.assertTrue(torch.allclose(loss, expected, atol=1e-6))
+            self.assertTrue(torch.allclose(grad, 2 * expected_grad, atol=1e-6))
+
+    def test_without_gradients(self) -> None:
+        predicted_quantiles = torch.randn(self.batch_size, self.num_quantiles)
+        loss = compute_quantile_huber_loss(
+            predicted_quantiles, self.target_quantiles, self.quantile_midpoints
+        )
+        self.assertFalse(loss.requires_grad)
+        expected = reference_quantile_huber_loss(
+            predicted_quantiles, self.target_quantiles, self.quantile_midpoints
+        )
+        self.assertTrue(torch.allclose(loss, expected, atol=1e-6))
+
+
+class TestQuantileRegressionDeepQLearning(unittest.TestCase):
+    def test_next_state_quantiles_single_forward_pass(self) -> None:
+        state_dim, action_count, batch_size = 4, 3, 16
+        action_space = DiscreteActionSpace(
+            actions=list(torch.arange(action_count).view(-1, 1))
+        )
+        policy_learner = QuantileRegressionDeepQLearning(
+            state_dim=state_dim,
+            action_space=action_space,
+            hidden_dims=[8],
+            num_quantiles=20,
+            batch_size=batch_size,
+            action_representation_module=OneHotActionTensorRepresentationModule(
+                max_number_actions=action_count
+            ),
+        )
+        replay_buffer = FIFOOffPolicyReplayBuffer(batch_size)
+        for _ in range(batch_size):
+            replay_buffer.push(
+                state=torch.randn(state_dim),
+                action=torch.randint(action_count, (1,)),
+                reward=torch.randn(()).item(),
+                next_state=torch.randn(state_dim),
+                curr_available_actions=action_space,
+                next_available_actions=action_space,
+                done=False,
+                max_number_actions=action_count,
+            )
+        batch = policy_learner.preprocess_batch(replay_buffer.sample(batch_size))
+
+        for safety_module in (
+            RiskNeutralSafetyModule(),
+            QuantileNetworkMeanVarianceSafetyModule(0.2),
+            RiskMetricOnlySafetyModule(),
+        ):
+            policy_learner.safety_module = safety_module
+            quantiles = policy_learner._get_next_state_quantiles(batch, batch_size)
+            self.assertEqual(quantiles.shape, (batch_size, 20))
+
+            # reference: quantiles of the greedy action under the risk metric
+            assert batch.next_state is not None
+            assert batch.next_available_actions is not None
+            next_states = batch.next_state.unsqueeze(1).expand(-1, action_count, -1)
+            q_values = safety_module.get_q_values_under_risk_metric(
+                next_states, batch.next_available_actions, policy_learner._Q_target
+            ).view(batch_size, action_count)
+            all_quantiles = policy_learner._Q_target.get_q_value_distribution(
+                next_states, batch.next_available_actions
+            )
+            expected = all_quantiles[torch.arange(batch_size), q_values.argmax(-1)]
+            self.assertTrue(torch.allclose(quantiles, expected))
+
+            self.assertIn("loss", policy_learner.learn_batch(batch))
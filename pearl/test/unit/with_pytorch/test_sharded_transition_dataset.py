@@ -0,0 +1,208 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import os
+import tempfile
+import unittest
+from typing import Dict
+
+import numpy as np
+import torch
+from pearl.action_representation_modules.one_hot_action_representation_module import (
+    OneHotActionTensorRepresentationModule,
+)
+from pearl.pearl_agent import PearlAgent
+from pearl.policy_learners.exploration_modules.common.epsilon_greedy_exploration import (
+    EGreedyExploration,
+)
+from pearl.policy_learners.sequential_decision_making.deep_q_learning import (
+    DeepQLearning,
+)
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.replay_buffers.sharded_transition_dataset import (
+    ShardedTransitionDataset,
+    ShardedTransitionWriter,
+)
+from pearl.replay_buffers.transition import TransitionBatch
+from pearl.utils.functional_utils.experimentation.create_offline_data import (
+    create_offline_data,
+    get_data_collection_agent_returns,
+)
+from pearl.utils.functional_utils.train_and_eval.offline_learning_and_evaluation import (
+    get_offline_data_in_buffer,
+    offline_learning,
+)
+from pearl.utils.instantiations.environments.gym_environment import GymEnvironment
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+def _fields(batch: TransitionBatch) -> Dict[str, torch.Tensor]:
+    return {name: value for name, value in batch.__dict__.items() if value is not None}
+
+
+class TestShardedTransitionDataset(unittest.TestCase):
+    def setUp(self) -> None:
+        self.state_dim = 3
+        self.action_count = 4
+        self.number_of_transitions = 23
+        replay_buffer = FIFOOffPolicyReplayBuffer(1)
+        action_spaces = [
+            DiscreteActionSpace(actions=list(torch.arange(n).view(-1, 1)))
+            for n in (2, self.action_count)
+        ]
+        # two distinct action sets, to be interned
+        actions_and_masks = [
+            replay_buffer._create_action_tensor_and_mask(self.action_count, space)
+            for space in action_spaces
+        ]
+        action_set_ids = torch.arange(self.number_of_transitions) % 2
+        self.batch = TransitionBatch(
+            state=torch.randn(self.number_of_transitions, self.state_dim),
+            action=torch.randint(2, (self.number_of_transitions, 1)),
+            reward=torch.arange(self.number_of_transitions).float(),
+            next_state=torch.randn(self.number_of_transitions, self.state_dim),
+            curr_available_actions=torch.cat(
+                [actions_and_masks[i][0] for i in action_set_ids]
+            ),
+            curr_unavailable_actions_mask=torch.cat(
+                [actions_and_masks[i][1] for i in action_set_ids]
+            ),
+            next_available_actions=torch.cat(
+                [actions_and_masks[i][0] for i in 1 - action_set_ids]
+            ),
+            next_unavailable_actions_mask=torch.cat(
+                [actions_and_masks[i][1] for i in 1 - action_set_ids]
+            ),
+            done=torch.arange(self.number_of_transitions) % 5 == 4,
+        )
+
+    def _write(self, path: str, shard_size: int) -> None:
+        with ShardedTransitionWriter(path, shard_size=shard_size) as writer:
+            # batches straddling shard boundaries
+            for start in range(0, self.number_of_transitions, 7):
+                writer.write(
+                    TransitionBatch(
+                        **{
+                            name: value[start : start + 7]
+                            for name, value in _fields(self.batch).items()
+                        }
+                    )
+                )
+
+    def test_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as path:
+            self._write(path, shard_size=5)
+            dataset = ShardedTransitionDataset(path, device=torch.device("cpu"))
+            self.assertEqual(len(dataset), self.number_of_transitions)
+            self.assertEqual(dataset.number_of_shards, 5)
+            self.assertFalse(dataset.is_action_continuous)
+            self.assertIsInstance(dataset.shard(0)["state"], np.memmap)
+            # both action sets are interned with the first batch, and only saved
+            # with the first shard
+            self.assertTrue(
+                os.path.isfile(os.path.join(path, "shard_00000", "action_sets.npz"))
+            )
+            for i in range(1, dataset.number_of_shards):
+                self.assertFalse(
+                    os.path.isfile(
+                        os.path.join(path, f"shard_{i:05d}", "action_sets.npz")
+                    )
+                )
+
+            # indices in any order, with repetitions and across shards
+            indices = torch.tensor([22, 0, 7, 7, 13, 4, 5, 21])
+            batch = dataset.batch_from_columns(dataset.gather_columns(indices))
+            for name, value in _fields(self.batch).items():
+                expected = value[indices]
+                self.assertTrue(torch.equal(getattr(batch, name), expected), name)
+
+            # rows are sampled without replacement
+            indices = dataset.sample_indices(self.number_of_transitions)
+            self.assertEqual(
+                sorted(indices.tolist()), list(range(self.number_of_transitions))
+            )
+
+            sampled = dataset.sample(16)
+            self.assertEqual(len(sampled), 16)
+            # rewards identify the transitions
+            rows = sampled.reward.long()
+            self.assertTrue(torch.equal(sampled.state, self.batch.state[rows]))
+
+            with self.assertRaises(NotImplementedError):
+                dataset.clear()
+
+    def test_writer_rejects_inconsistent_fields(self) -> None:
+        with tempfile.TemporaryDirectory() as path:
+            writer = ShardedTransitionWriter(path, shard_size=5)
+            writer.write(self.batch)
+            with self.assertRaises(ValueError):
+                writer.write(
+                    TransitionBatch(
+                        state=self.batch.state,
+                        action=self.batch.action,
+                        reward=self.batch.reward,
+                        done=self.batch.done,
+                    )
+                )
+            writer.close()
+            with self.assertRaises(ValueError):
+                ShardedTransitionWriter(path)
+
+    def test_create_offline_data_and_learn(self) -> None:
+        env = GymEnvironment("CartPole-v1")
+        assert isinstance(env.action_space, DiscreteActionSpace)
+        action_representation_module = OneHotActionTensorRepresentationModule(
+            max_number_actions=env.action_space.n
+        )
+        agent = PearlAgent(
+            policy_learner=DeepQLearning(
+                state_dim=env.observation_space.shape[0],
+                action_space=env.action_space,
+                hidden_dims=[16],
+                exploration_module=EGreedyExploration(0.5),
+                training_rounds=1,
+                action_representation_module=action_representation_module,
+            ),
+            replay_buffer=FIFOOffPolicyReplayBuffer(1000),
+        )
+        with tempfile.TemporaryDirectory() as save_path:
+            create_offline_data(
+                agent=agent,
+                env=env,
+                save_path=save_path,
+                file_name="/dataset",
+                max_len_offline_data=100,
+                learn=False,
+                evaluation_episodes=1,
+                shard_size=32,
+            )
+            data_path = os.path.join(save_path, "dataset")
+            data_buffer = get_offline_data_in_buffer(
+                is_action_continuous=False, data_path=data_path
+            )
+            assert isinstance(data_buffer, ShardedTransitionDataset)
+            self.assertEqual(len(data_buffer), 100)
+            self.assertEqual(data_buffer.number_of_shards, 4)
+            returns = get_data_collection_agent_returns(data_path)
+            self.assertGreater(len(returns), 0)
+
+            offline_agent = PearlAgent(
+                policy_learner=DeepQLearning(
+                    state_dim=env.observation_space.shape[0],
+                    action_space=env.action_space,
+                    hidden_dims=[16],
+                    training_rounds=1,
+                    is_conservative=True,
+                    batch_size=8,
+                    action_representation_module=action_representation_module,
+                ),
+            )
+            offline_learning(
+                offline_agent, data_buffer, training_epochs=2, num_prefetch_workers=2
+            )
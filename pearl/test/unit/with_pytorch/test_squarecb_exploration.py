@@ -0,0 +1,82 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+
+import torch
+from pearl.policy_learners.exploration_modules.contextual_bandits.squarecb_exploration import (  # noqa E501
+    FastCBExploration,
+    SquareCBExploration,
+)
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+class TestSquareCBExploration(unittest.TestCase):
+    def setUp(self) -> None:
+        self.action_count = 3
+        self.action_space = DiscreteActionSpace(
+            [torch.tensor([i]) for i in range(self.action_count)]
+        )
+        self.values = torch.tensor([[1.0, 0.5, 0.0], [0.0, 0.0, 2.0]])
+
+    def test_squarecb_probabilities(self) -> None:
+        gamma = 2.0
+        exploration_module = SquareCBExploration(gamma=gamma)
+        probabilities = exploration_module.get_action_probabilities(
+            self.values, self.action_count
+        )
+        # p(a) = 1 / (A + gamma * gap(a)) for non-greedy actions,
+        # computed independently for every row
+        expected = torch.tensor(
+            [
+                [0.0, 1 / (3 + 2 * 0.5), 1 / (3 + 2 * 1.0)],
+                [1 / (3 + 2 * 2.0), 1 / (3 + 2 * 2.0), 0.0],
+            ]
+        )
+        expected[0, 0] = 1 - expected[0].sum()
+        expected[1, 2] = 1 - expected[1].sum()
+        self.assertTrue(torch.allclose(probabilities, expected))
+        self.assertTrue(torch.allclose(probabilities.sum(-1), torch.ones(2)))
+
+    def test_fastcb_probabilities(self) -> None:
+        exploration_module = FastCBExploration(gamma=10.0)
+        # the second row has a best value at the reward lower bound
+        values = torch.tensor([[1.0, 0.5, 0.0], [0.0, -1.0, 0.0]])
+        probabilities = exploration_module.get_action_probabilities(
+            values, self.action_count
+        )
+        self.assertTrue(torch.allclose(probabilities.sum(-1), torch.ones(2)))
+        self.assertTrue(torch.allclose(probabilities[1], torch.full((3,), 1 / 3)))
+        self.assertGreater(probabilities[0, 0].item(), probabilities[0, 1].item())
+
+    def test_act_and_propensities(self) -> None:
+        exploration_module = SquareCBExploration(gamma=2.0)
+        values = self.values.repeat(1000, 1)
+        actions, propensities = exploration_module.sample_actions(
+            values, self.action_count
+        )
+        self.assertEqual(actions.shape, (2000,))
+        probabilities = exploration_module.get_action_probabilities(
+            values, self.action_count
+        )
+        self.assertTrue(
+            torch.equal(
+                propensities, probabilities.gather(1, actions.unsqueeze(1))[:, 0]
+            )
+        )
+        # sampled frequencies follow the probabilities of each row
+        frequencies = torch.nn.functional.one_hot(actions[::2], self.action_count)
+        self.assertTrue(
+            torch.allclose(frequencies.float().mean(0), probabilities[0], atol=0.06)
+        )
+
+        action = exploration_module.act(
+            subjective_state=torch.zeros(2),
+            action_space=self.action_space,
+            values=self.values[0],
+        )
+        self.assertEqual(action.shape, ())
@@ -0,0 +1,125 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+
+import torch
+from pearl.policy_learners.sequential_decision_making.deep_q_learning import (
+    DeepQLearning,
+)
+from pearl.replay_buffers.columnar_storage import ColumnarStorage
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (  # noqa E501
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.replay_buffers.storage_codecs import (
+    Int8QuantizationCodec,
+    PackedBitsCodec,
+)
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+class TestStorageCodecs(unittest.TestCase):
+    def setUp(self) -> None:
+        self.capacity = 16
+        self.state_dim = 6
+        self.states = torch.rand(self.capacity, self.state_dim) * 4 - 2
+        self.masks = torch.rand(self.capacity, 11) > 0.5
+
+    def test_reduced_precision(self) -> None:
+        storage = ColumnarStorage(
+            self.capacity, codecs={"state": torch.bfloat16, "mask": PackedBitsCodec()}
+        )
+        storage.append({"state": self.states, "mask": self.masks})
+        self.assertEqual(storage.columns["state"].dtype, torch.bfloat16)
+        self.assertEqual(storage.columns["mask"].shape, (self.capacity, 2))
+
+        columns = storage.gather(torch.arange(self.capacity))
+        self.assertEqual(columns["state"].dtype, torch.float32)
+        self.assertTrue(
+            torch.allclose(columns["state"], self.states, rtol=1e-2, atol=0.0)
+        )
+        self.assertTrue(torch.equal(columns["mask"], self.masks))
+
+        report = storage.memory_report()
+        self.assertEqual(report["state"].stored_dtype, torch.bfloat16)
+        self.assertEqual(report["state"].dtype, torch.float32)
+        self.assertEqual(report["state"].bytes, self.capacity * self.state_dim * 2)
+        self.assertEqual(report["state"].compression_ratio, 2.0)
+        self.assertEqual(report["mask"].compression_ratio, 5.5)
+
+    def test_int8_quantization(self) -> None:
+        # per feature bounds
+        low = torch.full((self.state_dim,), -2.0)
+        high = torch.linspace(2.0, 4.0, self.state_dim)
+        storage = ColumnarStorage(
+            self.capacity, codecs={"state": Int8QuantizationCodec(low, high)}
+        )
+        storage.append({"state": self.states})
+        self.assertEqual(storage.columns["state"].dtype, torch.int8)
+        states = storage.gather(torch.arange(self.capacity))["state"]
+        self.assertEqual(states.dtype, torch.float32)
+        error = (states - self.states).abs()
+        self.assertTrue(torch.all(error <= (high - low) / 510 + 1e-6))
+        self.assertEqual(storage.memory_report()["state"].compression_ratio, 4.0)
+
+        # values out of bounds are clipped
+        storage.append({"state": torch.full((1, self.state_dim), 10.0)})
+        clipped = storage.gather(torch.tensor([0]))["state"][0]
+        self.assertTrue(torch.allclose(clipped, high))
+
+    def test_invalid_codecs(self) -> None:
+        storage = ColumnarStorage(self.capacity, codecs={"next_state": torch.float16})
+        with self.assertRaises(ValueError):
+            storage.append({"state": self.states})
+        storage = ColumnarStorage(self.capacity, codecs={"state": PackedBitsCodec()})
+        with self.assertRaises(ValueError):
+            storage.append({"state": self.states})
+        with self.assertRaises(ValueError):
+            FIFOOffPolicyReplayBuffer(
+                self.capacity, storage_dtypes={"state": torch.float16}
+            )
+
+    def test_dqn_learns_from_compact_replay_buffer(self) -> None:
+        action_space = DiscreteActionSpace(actions=list(torch.arange(3).view(-1, 1)))
+        replay_buffer = FIFOOffPolicyReplayBuffer(
+            self.capacity,
+            use_columnar_storage=True,
+            store_action_indices=True,
+            storage_dtypes={
+                "state": torch.float16,
+                "next_state": torch.float16,
+                "action": torch.uint8,
+                "reward": torch.bfloat16,
+            },
+        )
+        for state, next_state in zip(self.states, self.states.roll(1, 0)):
+            replay_buffer.push(
+                state=state,
+                action=action_space.sample(),
+                reward=1.0,
+                next_state=next_state,
+                curr_available_actions=action_space,
+                next_available_actions=action_space,
+                done=False,
+                max_number_actions=action_space.n,
+            )
+        report = replay_buffer.memory_report()
+        self.assertEqual(report["state"].stored_dtype, torch.float16)
+        self.assertEqual(report["action"].stored_dtype, torch.uint8)
+        self.assertEqual(report["action"].dtype, torch.int32)
+
+        batch = replay_buffer.sample(self.capacity)
+        self.assertEqual(batch.state.dtype, torch.float32)
+        self.assertEqual(batch.reward.dtype, torch.float32)
+        self.assertEqual(batch.action.dtype, torch.long)
+        dqn = DeepQLearning(
+            state_dim=self.state_dim,
+            action_space=action_space,
+            hidden_dims=[4],
+            training_rounds=1,
+        )
+        dqn.learn_batch(dqn.preprocess_batch(batch))
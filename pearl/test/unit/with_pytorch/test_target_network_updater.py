@@ -0,0 +1,186 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import copy
+import unittest
+from typing import List
+
+import torch
+import torch.nn as nn
+from pearl.neural_networks.common.target_network import TargetNetworkUpdater
+from pearl.neural_networks.common.utils import (
+    init_weights,
+    mlp_block,
+    update_target_network,
+)
+from pearl.neural_networks.sequential_decision_making.twin_critic import (
+    FusedCritic,
+    TwinCritic,
+)
+from pearl.policy_learners.sequential_decision_making.actor_critic_base import (
+    update_critic_target_network,
+)
+from pearl.policy_learners.sequential_decision_making.deep_q_learning import (
+    DeepQLearning,
+)
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (  # noqa E501
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+class TestTargetNetworkUpdater(unittest.TestCase):
+    def setUp(self) -> None:
+        self.source = mlp_block(input_dim=4, hidden_dims=[8, 8], output_dim=2)
+        self.target = copy.deepcopy(self.source)
+        with torch.no_grad():
+            for p in self.target.parameters():
+                p.normal_()
+
+    def _expected(self, tau: float) -> List[torch.Tensor]:
+        return [
+            (1 - tau) * t.detach().clone() + tau * s.detach().clone()
+            for t, s in zip(self.target.parameters(), self.source.parameters())
+        ]
+
+    def _assert_parameters_close(self, expected: List[torch.Tensor]) -> None:
+        for e, t in zip(expected, self.target.parameters()):
+            self.assertTrue(torch.allclose(e, t))
+
+    def test_soft_and_hard_updates(self) -> None:
+        updater = TargetNetworkUpdater(self.target, self.source, tau=0.1)
+        expected = self._expected(0.1)
+        updater.update()
+        self._assert_parameters_close(expected)
+
+        updater.update(tau=1.0)
+        self._assert_parameters_close(list(self.source.parameters()))
+
+    def test_update_every_x_steps(self) -> None:
+        updater = TargetNetworkUpdater(
+            self.target, self.source, tau=1.0, update_every_x_steps=3
+        )
+        before = [p.detach().clone() for p in self.target.parameters()]
+        self.assertFalse(updater.step())
+        self.assertFalse(updater.step())
+        self._assert_parameters_close(before)
+        self.assertTrue(updater.step())
+        self._assert_parameters_close(list(self.source.parameters()))
+
+    def test_source_network_still_trains(self) -> None:
+        updater = TargetNetworkUpdater(self.target, self.source, tau=0.5)
+        optimizer = torch.optim.AdamW(self.source.parameters(), lr=0.1)
+        updater.update()
+        source_before = [p.detach().clone() for p in self.source.parameters()]
+        loss = self.source(torch.randn(16, 4)).pow(2).mean()
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+        for before, after in zip(source_before, self.source.parameters()):
+            self.assertFalse(torch.equal(before, after))
+
+        # the update sees the optimizer step on the flat parameters
+        expected = self._expected(0.5)
+        updater.update()
+        self._assert_parameters_close(expected)
+
+    def test_parameters_replaced(self) -> None:
+        updater = TargetNetworkUpdater(self.target, self.source, tau=0.5)
+        updater.update()
+
+        # e.g. what moving networks to a device does
+        for p in list(self.target.parameters()) + list(self.source.parameters()):
+            p.data = p.data.clone()
+        expected = self._expected(0.5)
+        updater.update()
+        self._assert_parameters_close(expected)
+
+        # copies update their own networks
+        networks = nn.ModuleList([self.target, self.source])
+        networks_copy, updater_copy = copy.deepcopy((networks, updater))
+        target_before = [p.detach().clone() for p in self.target.parameters()]
+        updater_copy.update(tau=1.0)
+        for p, q in zip(networks_copy[0].parameters(), networks_copy[1].parameters()):
+            self.assertTrue(torch.equal(p, q))
+        self._assert_parameters_close(target_before)
+
+    def test_shared_parameters_are_skipped(self) -> None:
+        shared = nn.Linear(4, 4)
+        source = nn.Sequential(shared, nn.Linear(4, 2))
+        target = nn.Sequential(shared, nn.Linear(4, 2))
+        shared_before = shared.weight.detach().clone()
+        TargetNetworkUpdater(target, source, tau=0.5).update()
+        self.assertTrue(torch.equal(shared.weight, shared_before))
+
+    def test_dqn_target_update_frequency(self) -> None:
+        action_space = DiscreteActionSpace(actions=list(torch.arange(2).view(-1, 1)))
+        replay_buffer = FIFOOffPolicyReplayBuffer(8)
+        for _ in range(8):
+            replay_buffer.push(
+                state=torch.randn(4),
+                action=action_space.sample(),
+                reward=1.0,
+                next_state=torch.randn(4),
+                curr_available_actions=action_space,
+                next_available_actions=action_space,
+                done=False,
+                max_number_actions=action_space.n,
+            )
+        dqn = DeepQLearning(
+            state_dim=4,
+            action_space=action_space,
+            hidden_dims=[8],
+            training_rounds=1,
+            batch_size=8,
+            soft_update_tau=1.0,
+            target_update_freq=3,
+        )
+        updates = []
+        for _ in range(6):
+            dqn.learn(replay_buffer)
+            updates.append(
+                all(
+                    torch.equal(t, s)
+                    for t, s in zip(dqn._Q_target.parameters(), dqn._Q.parameters())
+                )
+            )
+        self.assertEqual(updates, [False, False, True, False, False, True])
+
+    def test_update_critic_target_network(self) -> None:
+        for critic in (
+            TwinCritic(
+                state_dim=3, action_dim=1, hidden_dims=[4], init_fn=init_weights
+            ),
+            FusedCritic(
+                state_dim=3, action_dim=1, hidden_dims=[4], init_fn=init_weights
+            ),
+        ):
+            target = copy.deepcopy(critic)
+            with torch.no_grad():
+                for p in target.parameters():
+                    p.zero_()
+            update_critic_target_network(target, critic, True, 0.5)
+            for t, s in zip(target.parameters(), critic.parameters()):
+                self.assertTrue(torch.allclose(t, 0.5 * s))
+
+    def test_update_target_network_keeps_parameter_storage(self) -> None:
+        expected = self._expected(0.3)
+        pointers = [
+            p.data_ptr()
+            for p in list(self.target.parameters()) + list(self.source.parameters())
+        ]
+        update_target_network(self.target, self.source, 0.3)
+        for p, e in zip(self.target.parameters(), expected):
+            self.assertTrue(torch.allclose(p, e))
+        # a one-shot update does not move parameters into new storage
+        self.assertEqual(
+            [
+                p.data_ptr()
+                for p in list(self.target.parameters()) + list(self.source.parameters())
+            ],
+            pointers,
+        )
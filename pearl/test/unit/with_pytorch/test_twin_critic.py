@@ -5,13 +5,19 @@
 # LICENSE file in the root directory of this source tree.
 #
 
+import copy
 import unittest
 
 import torch
 from pearl.neural_networks.common.utils import init_weights
-from pearl.neural_networks.sequential_decision_making.twin_critic import TwinCritic
+from pearl.neural_networks.common.value_networks import VanillaQValueNetwork
+from pearl.neural_networks.sequential_decision_making.twin_critic import (
+    FusedCritic,
+    TwinCritic,
+)
 from pearl.policy_learners.sequential_decision_making.actor_critic_base import (
     twin_critic_action_value_update,
+    update_critic_target_network,
 )
 
 
@@ -39,3 +45,79 @@ class TestTwinCritic(unittest.TestCase):
             critic=twin_critics,
         )
         twin_critics.get_q_values(state_batch, action_batch)
+
+    def test_fused_critic(self) -> None:
+        fused_critic = FusedCritic(
+            state_dim=self.state_dim,
+            action_dim=self.action_dim,
+            hidden_dims=[10, 10],
+            init_fn=init_weights,
+            num_critics=3,
+        )
+        state_batch = torch.randn(self.batch_size, self.state_dim)
+        action_batch = torch.randn(self.batch_size, self.action_dim)
+        q_values = fused_critic.get_all_q_values(state_batch, action_batch)
+        self.assertEqual(q_values.shape, (3, self.batch_size))
+
+        # the critics are initialized independently
+        self.assertFalse(torch.allclose(q_values[0], q_values[1]))
+
+        # every critic is evaluated with its own slice of the stacked parameters
+        for i in range(3):
+            critic = VanillaQValueNetwork(
+                state_dim=self.state_dim,
+                action_dim=self.action_dim,
+                hidden_dims=[10, 10],
+                output_dim=1,
+            )
+            critic.load_state_dict(
+                {
+                    name.split(".", 1)[1]: getattr(fused_critic, attribute).data[i]
+                    for name, attribute in fused_critic._param_names
+                }
+            )
+            self.assertTrue(
+                torch.allclose(
+                    critic.get_q_values(state_batch, action_batch),
+                    q_values[i],
+                    atol=1e-6,
+                )
+            )
+
+        # all critics are trained
+        fused_critic = FusedCritic(
+            state_dim=self.state_dim,
+            action_dim=self.action_dim,
+            hidden_dims=[10, 10],
+            init_fn=init_weights,
+        )
+        parameters = [p.detach().clone() for p in fused_critic.parameters()]
+        twin_critic_action_value_update(
+            state_batch=state_batch,
+            action_batch=action_batch,
+            expected_target_batch=torch.randn(self.batch_size),
+            optimizer=torch.optim.AdamW(fused_critic.parameters(), lr=1e-3),
+            critic=fused_critic,
+        )
+        for before, after in zip(parameters, fused_critic.parameters()):
+            for i in range(2):
+                self.assertFalse(torch.equal(before[i], after[i]))
+
+    def test_fused_target_network_update(self) -> None:
+        critic = FusedCritic(
+            state_dim=self.state_dim,
+            action_dim=self.action_dim,
+            hidden_dims=[10, 10],
+            init_fn=init_weights,
+        )
+        target_critic = copy.deepcopy(critic)
+        with torch.no_grad():
+            for p in critic.parameters():
+                p.add_(1.0)
+        expected = [
+            0.9 * t + 0.1 * s
+            for t, s in zip(target_critic.parameters(), critic.parameters())
+        ]
+        update_critic_target_network(target_critic, critic, True, 0.1)
+        for e, t in zip(expected, target_critic.parameters()):
+            self.assertTrue(torch.allclose(e, t))
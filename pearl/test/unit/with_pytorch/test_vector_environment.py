@@ -0,0 +1,170 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+import unittest
+from functools import partial
+from typing import Optional, Tuple
+
+import numpy as np
+import torch
+from pearl.action_representation_modules.identity_action_representation_module import (  # noqa E501
+    IdentityActionRepresentationModule,
+)
+from pearl.action_representation_modules.one_hot_action_representation_module import (
+    OneHotActionTensorRepresentationModule,
+)
+from pearl.api.action import Action
+from pearl.api.action_result import ActionResult
+from pearl.api.action_space import ActionSpace
+from pearl.api.environment import Environment
+from pearl.api.observation import Observation
+from pearl.pearl_agent import PearlAgent
+from pearl.policy_learners.sequential_decision_making.deep_q_learning import (
+    DeepQLearning,
+)
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.utils.functional_utils.train_and_eval.online_learning import (
+    vector_online_learning,
+)
+from pearl.utils.instantiations.environments.gym_environment import GymEnvironment
+from pearl.utils.instantiations.environments.vector_environment import (
+    GymVectorEnvironment,
+    SubprocVectorEnvironment,
+    SyncVectorEnvironment,
+)
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+
+class ActionValueEnvironment(Environment):
+    """
+    Rewards the value of the chosen action, with actions whose values are not
+    their indices. Episodes last 3 steps.
+    """
+
+    def __init__(self) -> None:
+        self._action_space = DiscreteActionSpace(
+            actions=[torch.tensor([10.0]), torch.tensor([-3.0]), torch.tensor([7.0])]
+        )
+        self._steps = 0
+
+    @property
+    def action_space(self) -> ActionSpace:
+        return self._action_space
+
+    def reset(self, seed: Optional[int] = None) -> Tuple[Observation, ActionSpace]:
+        self._steps = 0
+        return torch.zeros(2), self._action_space
+
+    def step(self, action: Action) -> ActionResult:
+        # like every Pearl environment, it is stepped with the action index
+        value = self._action_space.actions[int(action.item())]
+        self._steps += 1
+        return ActionResult(
+            observation=torch.full((2,), float(self._steps)),
+            reward=float(value.item()),
+            terminated=self._steps == 3,
+            truncated=False,
+        )
+
+
+class TestVectorEnvironment(unittest.TestCase):
+    def setUp(self) -> None:
+        self.num_envs = 3
+        self.env_fns = [partial(GymEnvironment, "CartPole-v1")] * self.num_envs
+
+    def test_sync_vector_environment_auto_reset(self) -> None:
+        env = SyncVectorEnvironment(self.env_fns)
+        observation = env.reset(seed=0)
+        self.assertEqual(observation.shape, (self.num_envs, 4))
+        self.assertEqual(observation.dtype, np.float32)
+        actions = torch.zeros(self.num_envs, dtype=torch.long)
+        # pushing the cart in one direction ends episodes within a few dozen steps
+        for _ in range(100):
+            result = env.step(actions)
+            self.assertEqual(result.reward.shape, (self.num_envs,))
+            if result.done.any():
+                break
+        self.assertTrue(result.done.any())
+        for i in range(self.num_envs):
+            if result.done[i]:
+                # the episode restarted, near the upright position
+                self.assertFalse(
+                    np.allclose(result.observation[i], result.final_observation[i])
+                )
+                self.assertTrue(np.all(np.abs(result.observation[i]) <= 0.05))
+            else:
+                self.assertTrue(
+                    np.array_equal(result.observation[i], result.final_observation[i])
+                )
+        env.close()
+
+    def test_subproc_matches_sync(self) -> None:
+        sync_env = SyncVectorEnvironment(self.env_fns)
+        subproc_env = SubprocVectorEnvironment(self.env_fns)
+        self.assertTrue(
+            np.array_equal(sync_env.reset(seed=1), subproc_env.reset(seed=1))
+        )
+        for _ in range(30):
+            actions = torch.randint(2, (self.num_envs,))
+            sync_result = sync_env.step(actions)
+            subproc_result = subproc_env.step(actions)
+            self.assertTrue(
+                np.array_equal(sync_result.observation, subproc_result.observation)
+            )
+            self.assertTrue(np.array_equal(sync_result.done, subproc_result.done))
+        sync_env.close()
+        subproc_env.close()
+
+    def test_vector_online_learning(self) -> None:
+        env = GymVectorEnvironment("CartPole-v1", num_envs=4)
+        agent = PearlAgent(
+            policy_learner=DeepQLearning(
+                state_dim=4,
+                action_space=env.action_space,
+                hidden_dims=[16],
+                training_rounds=1,
+                batch_size=32,
+                action_representation_module=OneHotActionTensorRepresentationModule(
+                    max_number_actions=2
+                ),
+            ),
+            replay_buffer=FIFOOffPolicyReplayBuffer(1000),
+        )
+        info = vector_online_learning(agent, env, number_of_steps=400, seed=0)
+        env.close()
+        self.assertEqual(len(agent.replay_buffer), 400)
+        self.assertGreater(len(info["return"]), 0)
+        batch = agent.replay_buffer.sample(32)
+        self.assertEqual(batch.state.shape, (32, 4))
+        self.assertEqual(batch.curr_available_actions.shape, (32, 2, 1))
+
+    def test_vector_online_learning_steps_with_action_indices(self) -> None:
+        env = SyncVectorEnvironment([ActionValueEnvironment] * 2)
+        agent = PearlAgent(
+            policy_learner=DeepQLearning(
+                state_dim=2,
+                action_space=env.action_space,
+                hidden_dims=[16],
+                training_rounds=1,
+                batch_size=4,
+                action_representation_module=IdentityActionRepresentationModule(
+                    max_number_actions=3, representation_dim=1
+                ),
+            ),
+            replay_buffer=FIFOOffPolicyReplayBuffer(100),
+        )
+        info = vector_online_learning(agent, env, number_of_steps=12, seed=0)
+        env.close()
+        self.assertEqual(len(info["return"]), 4)
+        # the replay buffer holds the values of the actions
+        batch = agent.replay_buffer.sample(12)
+        self.assertTrue(
+            torch.all(torch.isin(batch.action, torch.tensor([10.0, -3.0, 7.0])))
+        )
+        self.assertTrue(torch.equal(batch.action.view(-1), batch.reward))
@@ -5,15 +5,28 @@
 # LICENSE file in the root directory of this source tree.
 #
 
+import os
 import pickle
 from collections import deque
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
+import numpy as np
 import torch
 from pearl.api.environment import Environment
 from pearl.api.reward import Value
 from pearl.pearl_agent import PearlAgent
-from pearl.utils.functional_utils.train_and_eval.online_learning import run_episode
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.replay_buffers.sharded_transition_dataset import (
+    is_sharded_transition_dataset,
+    ShardedTransitionDataset,
+    ShardedTransitionWriter,
+)
+from pearl.utils.functional_utils.train_and_eval.offline_learning_and_evaluation import (
+    offline_evaluation,
+    raw_transitions_to_batch,
+)
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 
 
@@ -27,6 +40,8 @@ def create_offline_data(
     learn_after_episode: bool = True,
     evaluation_episodes: int = 100,
     seed: Optional[int] = None,
+    shard_size: Optional[int] = None,
+    evaluation_workers: int = 1,
 ) -> List[Value]:
 
     """
@@ -43,6 +58,14 @@ def create_offline_data(
         exploit: set as default to False as we want exploration during data collection.
         learn_after_episode: whether to learn after each episode
         (depends on the policy learner used by agent).
+        shard_size: if given, transitions are streamed to disk after every episode as a
+        sharded transition dataset (see pearl/replay_buffers/sharded_transition_dataset.py)
+        with shards of `shard_size` transitions, instead of being kept in memory and
+        saved in a single .pt file. The dataset is written in the directory
+        save_path + file_name and holds the first `max_len_offline_data` transitions
+        (the .pt file holds the last ones).
+        evaluation_workers: number of copies of the environment evaluating the data
+        collection agent, with batched action selection (see `offline_evaluation`).
     """
 
     # much of this function overlaps with episode return function but i think writing it
@@ -53,7 +76,19 @@ def create_offline_data(
     epi_returns = []
     epi = 0
     raw_transitions_buffer = deque([], maxlen=max_len_offline_data)
-    while len(raw_transitions_buffer) < max_len_offline_data:
+    writer = (
+        ShardedTransitionWriter(save_path + file_name, shard_size)
+        if shard_size is not None
+        else None
+    )
+    # used to pad available actions of streamed transitions
+    padding_replay_buffer = FIFOOffPolicyReplayBuffer(1)
+    episode_transitions: List[Dict[str, Any]] = []
+
+    def number_of_transitions() -> int:
+        return len(raw_transitions_buffer) if writer is None else len(writer)
+
+    while number_of_transitions() < max_len_offline_data:
         g = 0
         observation, action_space = env.reset(seed=seed)
         agent.reset(observation, action_space)
@@ -79,7 +114,10 @@ def create_offline_data(
             }
 
             observation = action_result.observation
-            raw_transitions_buffer.append(transition_tuple)
+            if writer is None:
+                raw_transitions_buffer.append(transition_tuple)
+            elif len(writer) + len(episode_transitions) < max_len_offline_data:
+                episode_transitions.append(transition_tuple)
             if learn and not learn_after_episode:
                 agent.learn()
             done = action_result.done
@@ -87,12 +125,21 @@ def create_offline_data(
         if learn and learn_after_episode:
             agent.learn()
 
+        if writer is not None and len(episode_transitions) > 0:
+            writer.write(
+                raw_transitions_to_batch(episode_transitions, padding_replay_buffer)
+            )
+            episode_transitions = []
+
         epi_returns.append(g)
         print(f"\rEpisode {epi}, return={g}", end="")
         epi += 1
 
-    # save offline transition tuples in a .pt file
-    torch.save(raw_transitions_buffer, save_path + file_name)
+    if writer is None:
+        # save offline transition tuples in a .pt file
+        torch.save(raw_transitions_buffer, save_path + file_name)
+    else:
+        writer.close()
 
     # save training returns of the data collection agent
     with open(
@@ -111,21 +158,14 @@ def create_offline_data(
         "data collection complete; starting evaluation runs for data collection agent"
     )
 
-    evaluation_returns = []
-    for i in range(evaluation_episodes):
-        # data creation and evaluation seed should be different
-        evaluation_seed = seed + i if seed is not None else seed
-        episode_info, _ = run_episode(
-            agent=agent,
-            env=env,
-            learn=False,
-            exploit=True,
-            learn_after_episode=False,
-            seed=evaluation_seed,
-        )
-        g = episode_info["return"]
-        print(f"\repisode {i}, return={g}", end="")
-        evaluation_returns.append(g)
+    # data creation and evaluation seed should be different
+    evaluation_returns = offline_evaluation(
+        offline_agent=agent,
+        env=env,
+        number_of_episodes=evaluation_episodes,
+        seed=seed,
+        num_workers=evaluation_workers,
+    )
 
     with open(
         save_path
@@ -153,7 +193,8 @@ def get_data_collection_agent_returns(
     data. This function is used to compute normalized scores for offline rl benchmarks.
 
     Args:
-        data_path: path to the directory where the offline data is stored.
+        data_path: path to the offline data, either a .pt file or a sharded transition
+            dataset.
         returns_file_path: path to the file containing returns of the data collection agent.
     """
 
@@ -162,6 +203,10 @@ def get_data_collection_agent_returns(
         print(
             f"using offline training data in {data_path} to stitch trajectories and compute returns"
         )
+        if os.path.isdir(data_path) and is_sharded_transition_dataset(data_path):
+            return _get_returns_from_sharded_dataset(
+                ShardedTransitionDataset(data_path)
+            )
         with open(data_path, "rb") as file:
             data = torch.load(file, map_location=torch.device("cpu"))
 
@@ -180,3 +225,25 @@ def get_data_collection_agent_returns(
             data_collection_agent_returns = pickle.load(file)
 
     return data_collection_agent_returns
+
+
+def _get_returns_from_sharded_dataset(
+    dataset: ShardedTransitionDataset,
+) -> List[Value]:
+    """
+    Stitches trajectories from the reward and done columns of a sharded dataset,
+    reading one shard at a time, with the same convention as for .pt files.
+    """
+    data_collection_agent_returns = []
+    g = 0.0
+    for shard_index in range(dataset.number_of_shards):
+        shard = dataset.shard(shard_index)
+        rewards = np.asarray(shard["reward"], dtype=np.float64)
+        dones = np.asarray(shard["done"], dtype=bool)
+        start = 0
+        for end in np.flatnonzero(dones):
+            data_collection_agent_returns.append(g + float(rewards[start:end].sum()))
+            g = 0.0
+            start = end + 1
+        g += float(rewards[start:].sum())
+    return data_collection_agent_returns
@@ -0,0 +1,106 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+"""
+Compiled inference for serving trained policy learners. The exploit policy of a
+policy learner (see `PolicyLearner.get_exploit_policy`) is frozen into a single
+TorchScript graph or compiled with `torch.compile`, bypassing the Python layers
+of `PearlAgent.act` (safety module, device moves, action representation and
+exploration modules).
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import torch
+from pearl.api.action_space import ActionSpace
+from pearl.policy_learners.policy_learner import PolicyLearner
+
+TORCHSCRIPT = "torchscript"
+TORCH_COMPILE = "compile"
+
+
+def compile_exploit_policy(
+    policy_learner: PolicyLearner,
+    example_history: torch.Tensor,
+    action_space: Optional[ActionSpace] = None,
+    backend: str = TORCHSCRIPT,
+    example_unavailable_actions_mask: Optional[torch.Tensor] = None,
+    **compile_kwargs: Any,
+) -> Callable[..., torch.Tensor]:
+    """
+    Freezes the exploit path of a policy learner into a compiled module, which maps
+    a batch of histories (observations, with the default history summarization
+    module) to the exploit actions of the policy learner.
+
+    Args:
+        policy_learner: a trained policy learner supporting `get_exploit_policy`.
+        example_history: an example batch of histories, with shape (batch_size, ...),
+            used to trace or warm up the compiled module.
+        action_space: the fixed action space to choose actions from. Defaults to the
+            action space of the policy learner.
+        backend: "torchscript" to trace and freeze the exploit policy into a
+            TorchScript module, which can be saved with `torch.jit.save` and served
+            without Python, or "compile" to compile it with `torch.compile`.
+        example_unavailable_actions_mask: an example mask of unavailable actions. A
+            TorchScript module only takes masks if traced with one.
+        compile_kwargs: keyword arguments of `torch.compile`.
+    Returns:
+        The compiled exploit policy, called with a batch of histories (and a mask of
+        unavailable actions, if supported).
+    """
+    exploit_policy = policy_learner.get_exploit_policy(action_space)
+    example_inputs = (
+        (example_history,)
+        if example_unavailable_actions_mask is None
+        else (example_history, example_unavailable_actions_mask)
+    )
+    if backend == TORCHSCRIPT:
+        with torch.no_grad():
+            traced_policy = torch.jit.trace(exploit_policy, example_inputs)
+        # inlines the frozen parameters into the graph as constants
+        return torch.jit.freeze(traced_policy)
+    elif backend == TORCH_COMPILE:
+        compiled_policy = torch.compile(exploit_policy, **compile_kwargs)
+        with torch.no_grad():
+            # compiles for the shapes of the example inputs
+            compiled_policy(*example_inputs)
+        return compiled_policy
+    raise ValueError(
+        f"Unknown backend {backend}, expected {TORCHSCRIPT} or {TORCH_COMPILE}"
+    )
+
+
+def measure_latency(
+    fn: Callable[[], Any],
+    number_of_runs: int = 1000,
+    warmup_runs: int = 100,
+) -> Dict[str, float]:
+    """
+    Measures the latency of calls to `fn`.
+
+    Returns:
+        Dict[str, float]: the median (p50), 99th percentile (p99) and mean latencies,
+            in microseconds.
+    """
+    synchronize = torch.cuda.is_available()
+    for _ in range(warmup_runs):
+        fn()
+    latencies = np.empty(number_of_runs)
+    for i in range(number_of_runs):
+        start = time.perf_counter()
+        fn()
+        if synchronize:
+            torch.cuda.synchronize()
+        latencies[i] = time.perf_counter() - start
+    latencies *= 1e6
+    return {
+        "p50_us": float(np.percentile(latencies, 50)),
+        "p99_us": float(np.percentile(latencies, 99)),
+        "mean_us": float(latencies.mean()),
+    }
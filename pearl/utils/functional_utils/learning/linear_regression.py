@@ -18,7 +18,7 @@ fbcode/reagent/models/linear_regression.py
 """
 
 import logging
-from typing import Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import torch
 from pearl.utils.device import is_distribution_enabled
@@ -27,14 +27,46 @@ from torch import nn
 
 logger: logging.Logger = logging.getLogger(__name__)
 
+FULL_UPDATE_MODE = "full"
+WOODBURY_UPDATE_MODE = "woodbury"
+UPDATE_MODES: Tuple[str, ...] = (FULL_UPDATE_MODE, WOODBURY_UPDATE_MODE)
+
 
 class LinearRegression(nn.Module):
-    def __init__(self, feature_dim: int, l2_reg_lambda: float = 1.0) -> None:
+    def __init__(
+        self,
+        feature_dim: int,
+        l2_reg_lambda: float = 1.0,
+        update_mode: str = FULL_UPDATE_MODE,
+        refactorization_interval: int = 100,
+        lazy_update: bool = False,
+    ) -> None:
         """
         feature_dim: number of features
         l2_reg_lambda: L2 regularization parameter
+        update_mode: how the inverse of A is kept up to date after each batch.
+            "full" inverts A from scratch, which costs O(d^3).
+            "woodbury" applies a rank-k Woodbury (Sherman-Morrison for k=1) update
+            to the current inverse, which costs O(d^2 * k) for a batch of k rows.
+            Large batches, negative weights and distributed training fall back to
+            a full inversion.
+        refactorization_interval: in "woodbury" mode, number of incremental updates
+            after which A is inverted from scratch to bound numerical drift.
+        lazy_update: if True, `learn_batch` only accumulates A and b, and the inverse
+            of A and the coefficients are refreshed on the next read (`forward`,
+            `calculate_sigma`, `coefs` or `state_dict`). Several batches learned in a
+            row then cost a single inversion (or a single Woodbury update).
         """
         super(LinearRegression, self).__init__()
+        if update_mode not in UPDATE_MODES:
+            raise ValueError(
+                f"update_mode must be one of {UPDATE_MODES}, got {update_mode}"
+            )
+        if refactorization_interval < 1:
+            raise ValueError(
+                "refactorization_interval must be positive, "
+                f"got {refactorization_interval}"
+            )
         self.register_buffer(
             "_A",
             l2_reg_lambda * torch.eye(feature_dim + 1),  # +1 for intercept
@@ -48,6 +80,26 @@ class LinearRegression(nn.Module):
         self.register_buffer("_coefs", torch.zeros(feature_dim + 1))
         self._feature_dim = feature_dim
         self.distribution_enabled: bool = is_distribution_enabled()
+        self._update_mode = update_mode
+        self._refactorization_interval = refactorization_interval
+        # number of incremental updates applied since A was last inverted from
+        # scratch, None when `_inv_A` is not known to be the inverse of `_A`
+        self._updates_since_refactorization: Optional[int] = None
+        self._lazy_update = lazy_update
+        # whether `_inv_A` and `_coefs` lag behind `_A` and `_b`
+        self._coefs_outdated: bool = False
+        # U factors of the updates A <- A + U * U.t not yet applied to `_inv_A`,
+        # None when the next refresh has to invert A from scratch
+        self._pending_rows: Optional[List[torch.Tensor]] = None
+        self._num_pending_rows: int = 0
+
+    @property
+    def update_mode(self) -> str:
+        return self._update_mode
+
+    @property
+    def lazy_update(self) -> bool:
+        return self._lazy_update
 
     @property
     def A(self) -> torch.Tensor:
@@ -55,6 +107,7 @@ class LinearRegression(nn.Module):
 
     @property
     def coefs(self) -> torch.Tensor:
+        self._refresh_coefs()
         return self._coefs
 
     @staticmethod
@@ -149,7 +202,77 @@ class LinearRegression(nn.Module):
         self._b += delta_b.to(self._b.device)
         self._sum_weight += delta_sum_weight.to(self._sum_weight.device)
 
-        self.calculate_coefs()  # update coefs after updating A and b
+        if self._pending_rows is not None and self._can_update_inverse_incrementally(
+            weight
+        ):
+            # A <- A + U * U.t with U = x * sqrt(weight)
+            self._pending_rows.append(x * torch.sqrt(weight))
+            self._num_pending_rows += x.shape[0]
+            # beyond about half the dimension, a full inversion is cheaper
+            if 2 * self._num_pending_rows > self._feature_dim + 1:
+                self._pending_rows = None
+        else:
+            self._pending_rows = None
+        self._coefs_outdated = True
+        if not self._lazy_update:
+            self._refresh_coefs()  # update coefs after updating A and b
+
+    def _can_update_inverse_incrementally(self, weight: torch.Tensor) -> bool:
+        return (
+            self._update_mode == WOODBURY_UPDATE_MODE
+            and not self.distribution_enabled
+            and bool((weight >= 0).all())
+        )
+
+    def _refresh_coefs(self) -> None:
+        """
+        Brings the inverse of A and the coefficients up to date with the batches
+        learned since the last refresh, incrementally when possible.
+        """
+        if not self._coefs_outdated:
+            return
+        rows = self._pending_rows
+        updates = self._updates_since_refactorization
+        if (
+            rows
+            and updates is not None
+            and updates < self._refactorization_interval
+            and self._woodbury_update(torch.cat(rows))
+        ):
+            self._coefs = torch.matmul(self._inv_A, self._b)
+            self._pending_rows = []
+            self._num_pending_rows = 0
+            self._coefs_outdated = False
+        else:
+            self.calculate_coefs()
+
+    def _woodbury_update(self, u: torch.Tensor) -> bool:
+        """
+        Updates `_inv_A` after A <- A + U * U.t, where the rows of `u` are the
+        columns of U, with the Woodbury identity
+        inv(A + U U.t) = inv(A) - inv(A) U inv(I + U.t inv(A) U) U.t inv(A).
+        The (k x k) capacitance matrix is solved through its Cholesky factor.
+        Returns False, leaving `_inv_A` unchanged, if the capacitance matrix is
+        not positive definite (e.g. because of accumulated rounding errors).
+        """
+        inv_A = self._inv_A
+        u = u.to(inv_A.device, inv_A.dtype)
+        inv_A_u = torch.matmul(inv_A, u.t())  # (feature_dim + 1, k)
+        capacitance = torch.eye(
+            u.shape[0], device=inv_A.device, dtype=inv_A.dtype
+        ) + torch.matmul(u, inv_A_u)
+        cholesky, info = torch.linalg.cholesky_ex(capacitance)
+        if info.item() != 0:
+            return False
+        # (k, feature_dim + 1)
+        correction = torch.cholesky_solve(inv_A_u.t(), cholesky)
+        inv_A = inv_A - torch.matmul(inv_A_u, correction)
+        # keep the inverse exactly symmetric
+        self._inv_A = (0.5 * (inv_A + inv_A.t())).contiguous()
+        updates = self._updates_since_refactorization
+        assert updates is not None
+        self._updates_since_refactorization = updates + 1
+        return True
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         """
@@ -157,6 +280,7 @@ class LinearRegression(nn.Module):
         If x is a batch, it will be shape(batch_size, ...)
         return will be shape(batch_size)
         """
+        self._refresh_coefs()
         x = self.append_ones(x)
         return torch.matmul(x, self._coefs.t())
 
@@ -167,11 +291,48 @@ class LinearRegression(nn.Module):
         """
         self._inv_A = self.matrix_inv_fallback_pinv(self._A)
         self._coefs = torch.matmul(self._inv_A, self._b)
+        self._updates_since_refactorization = 0
+        self._pending_rows = []
+        self._num_pending_rows = 0
+        self._coefs_outdated = False
 
     def calculate_sigma(self, x: torch.Tensor) -> torch.Tensor:
+        self._refresh_coefs()
         x = self.append_ones(x)  # append a column of ones for intercept
         sigma = torch.sqrt(self.batch_quadratic_form(x, self._inv_A))
         return sigma
 
+    def _load_from_state_dict(
+        self,
+        state_dict: Dict[str, Any],
+        prefix: str,
+        local_metadata: Dict[str, Any],
+        strict: bool,
+        missing_keys: List[str],
+        unexpected_keys: List[str],
+        error_msgs: List[str],
+    ) -> None:
+        super(LinearRegression, self)._load_from_state_dict(
+            state_dict,
+            prefix,
+            local_metadata,
+            strict,
+            missing_keys,
+            unexpected_keys,
+            error_msgs,
+        )
+        # the loaded inverse is not trusted as a base for incremental updates
+        self._updates_since_refactorization = None
+        self._pending_rows = None
+        self._coefs_outdated = False
+
+    def _save_to_state_dict(
+        self, destination: Dict[str, Any], prefix: str, keep_vars: bool
+    ) -> None:
+        self._refresh_coefs()
+        super(LinearRegression, self)._save_to_state_dict(
+            destination, prefix, keep_vars
+        )
+
     def __str__(self) -> str:
         return f"LinearRegression(A:\n{self._A}\nb:\n{self._b})"
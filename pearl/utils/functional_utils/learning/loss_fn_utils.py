@@ -5,6 +5,8 @@
 # LICENSE file in the root directory of this source tree.
 #
 
+from typing import Any, Optional, Tuple
+
 import torch
 from pearl.neural_networks.sequential_decision_making.q_value_network import (
     QValueNetwork,
@@ -86,3 +88,101 @@ def compute_elementwise_huber_loss(input_errors: Tensor, kappa: float = 1.0) ->
         kappa * (torch.abs(input_errors) - (0.5 * kappa)),
     )
     return huber_loss
+
+
+# maximum number of (batch, target quantile, quantile) elements of the pairwise
+# tensors materialized at once by `compute_quantile_huber_loss`
+QUANTILE_HUBER_LOSS_MAX_CHUNK_ELEMENTS: int = 2**20
+
+
+class _QuantileHuberLoss(torch.autograd.Function):
+    """
+    Quantile huber loss computed over chunks of the batch. The gradient with respect
+    to the predicted quantiles is computed chunk by chunk during the forward pass,
+    so that neither pass stores the (batch_size, N, N) pairwise tensors.
+    """
+
+    @staticmethod
+    # pyre-ignore[14]
+    def forward(
+        ctx: Any,
+        predicted_quantiles: Tensor,
+        target_quantiles: Tensor,
+        quantile_midpoints: Tensor,
+        kappa: float,
+        chunk_size: int,
+    ) -> Tensor:
+        batch_size, num_quantiles = predicted_quantiles.shape
+        scale = 1.0 / (batch_size * num_quantiles)
+        loss = predicted_quantiles.new_zeros(())
+        grad = (
+            torch.empty_like(predicted_quantiles) if ctx.needs_input_grad[0] else None
+        )
+        for start in range(0, batch_size, chunk_size):
+            end = start + chunk_size
+            # T theta_j(s', a*) - theta_i(s, a): shape (chunk_size, N, N)
+            errors = target_quantiles[start:end].unsqueeze(2) - predicted_quantiles[
+                start:end
+            ].unsqueeze(1)
+            # |tau_i - 1{error < 0}|
+            weights = torch.abs(quantile_midpoints - (errors < 0).to(errors.dtype))
+            loss += (weights * compute_elementwise_huber_loss(errors, kappa)).sum()
+            if grad is not None:
+                # d huber(error) / d error = clamp(error, -kappa, kappa)
+                grad[start:end] = -(weights * errors.clamp_(-kappa, kappa)).sum(dim=1)
+        if grad is not None:
+            ctx.save_for_backward(grad.mul_(scale))
+        return loss * scale
+
+    @staticmethod
+    # pyre-ignore[14]
+    def backward(
+        ctx: Any, grad_output: Tensor
+    ) -> Tuple[Optional[Tensor], None, None, None, None]:
+        if not ctx.needs_input_grad[0]:
+            return None, None, None, None, None
+        (grad,) = ctx.saved_tensors
+        return grad_output * grad, None, None, None, None
+
+
+def compute_quantile_huber_loss(
+    predicted_quantiles: Tensor,
+    target_quantiles: Tensor,
+    quantile_midpoints: Tensor,
+    kappa: float = 1.0,
+    chunk_size: Optional[int] = None,
+) -> Tensor:
+    """
+    Computes the quantile huber loss of quantile regression (see the QR DQN paper,
+    https://arxiv.org/pdf/1710.10044.pdf):
+        (1 / batch_size) * sum_b sum_j (1 / N) sum_i rho_{tau_i}(T theta_j - theta_i),
+    where rho_tau(u) = |tau - 1{u < 0}| * huber(u) and tau_i are quantile midpoints.
+
+    The pairwise errors are only materialized for `chunk_size` elements of the
+    batch at a time, which bounds memory by chunk_size * N * N elements rather than
+    batch_size * N * N for each of the errors, huber loss and asymmetric weights.
+    Gradients only flow to the predicted quantiles.
+
+    Args:
+        predicted_quantiles: quantile locations theta_i(s, a), (batch_size, N)
+        target_quantiles: target quantile locations T theta_j(s', a*), (batch_size, N)
+        quantile_midpoints: quantile midpoints tau_i, (N)
+        kappa: threshold of the huber loss.
+        chunk_size: number of batch elements per chunk. By default, chunks have at most
+            QUANTILE_HUBER_LOSS_MAX_CHUNK_ELEMENTS pairwise elements.
+    Returns:
+        The loss, a scalar.
+    """
+    if chunk_size is None:
+        chunk_size = max(
+            1,
+            QUANTILE_HUBER_LOSS_MAX_CHUNK_ELEMENTS
+            // (target_quantiles.shape[-1] * predicted_quantiles.shape[-1]),
+        )
+    return _QuantileHuberLoss.apply(
+        predicted_quantiles,
+        target_quantiles.detach(),
+        quantile_midpoints.detach(),
+        kappa,
+        chunk_size,
+    )
@@ -0,0 +1,337 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+"""
+Stacked Linear Regression
+Holds one ridge regression per model (e.g. per arm of disjoint LinUCB) in stacked
+tensors, so that all models are updated and evaluated with batched operations
+instead of a Python loop over models.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import torch
+from pearl.utils.device import is_distribution_enabled
+from pearl.utils.functional_utils.learning.linear_regression import LinearRegression
+from torch import nn
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class StackedLinearRegression(nn.Module):
+    def __init__(
+        self,
+        num_models: int,
+        feature_dim: int,
+        l2_reg_lambda: float = 1.0,
+        lazy_update: bool = False,
+    ) -> None:
+        """
+        num_models: number of independent linear regressions
+        feature_dim: number of features
+        l2_reg_lambda: L2 regularization parameter
+        lazy_update: if True, `learn_batch` only accumulates A and b, and the
+            inverses and coefficients of the updated models are refreshed on the
+            next read (`forward`, `calculate_sigma`, `coefs` or `state_dict`).
+        """
+        super(StackedLinearRegression, self).__init__()
+        self.register_buffer(
+            "_A",
+            l2_reg_lambda
+            * torch.eye(feature_dim + 1).repeat(num_models, 1, 1),  # +1 for intercept
+        )
+        self.register_buffer("_b", torch.zeros(num_models, feature_dim + 1))
+        self.register_buffer("_sum_weight", torch.zeros(num_models))
+        self.register_buffer(
+            "_inv_A",
+            torch.zeros(num_models, feature_dim + 1, feature_dim + 1),
+        )
+        self.register_buffer("_coefs", torch.zeros(num_models, feature_dim + 1))
+        # models whose inverse and coefs lag behind their A and b
+        self.register_buffer(
+            "_outdated", torch.zeros(num_models, dtype=torch.bool), persistent=False
+        )
+        self._num_models = num_models
+        self._feature_dim = feature_dim
+        self._lazy_update = lazy_update
+        self.distribution_enabled: bool = is_distribution_enabled()
+        self._models: List[StackedLinearRegressionModel] = [
+            StackedLinearRegressionModel(self, i) for i in range(num_models)
+        ]
+
+    @classmethod
+    def from_linear_regressions(
+        cls, models: Sequence[LinearRegression]
+    ) -> "StackedLinearRegression":
+        """
+        Stacks the statistics of existing linear regressions, which must all have
+        the same feature dimension.
+        """
+        feature_dim = models[0]._feature_dim
+        assert all(
+            model._feature_dim == feature_dim for model in models
+        ), "all linear regressions must have the same feature dimension"
+        stacked = cls(
+            num_models=len(models),
+            feature_dim=feature_dim,
+            lazy_update=all(model.lazy_update for model in models),
+        )
+        with torch.no_grad():
+            stacked._A = torch.stack([model.A for model in models]).clone()
+            stacked._b = torch.stack([model._b for model in models]).clone()
+            stacked._sum_weight = torch.cat(
+                [model._sum_weight for model in models]
+            ).clone()
+            stacked._inv_A = torch.stack([model._inv_A for model in models]).clone()
+            stacked._coefs = torch.stack([model.coefs for model in models]).clone()
+            stacked._outdated = stacked._outdated.to(stacked._A.device)
+        return stacked
+
+    @property
+    def num_models(self) -> int:
+        return self._num_models
+
+    @property
+    def lazy_update(self) -> bool:
+        return self._lazy_update
+
+    @property
+    def A(self) -> torch.Tensor:
+        """
+        Shape (num_models, feature_dim + 1, feature_dim + 1)
+        """
+        return self._A
+
+    @property
+    def coefs(self) -> torch.Tensor:
+        """
+        Shape (num_models, feature_dim + 1)
+        """
+        self._refresh_coefs()
+        return self._coefs
+
+    def __getitem__(self, index: int) -> "StackedLinearRegressionModel":
+        """
+        Returns a view behaving like the `LinearRegression` of model `index`.
+        """
+        return self._models[index]
+
+    def __len__(self) -> int:
+        return self._num_models
+
+    def learn_batch(
+        self,
+        x: torch.Tensor,
+        y: torch.Tensor,
+        weight: Optional[torch.Tensor],
+        model_index: torch.Tensor,
+    ) -> None:
+        """
+        A[i] <- A[i] + x*x.t
+        b[i] <- b[i] + r*x
+        for every row, where i is the model index of the row.
+
+        x: shape (batch_size, feature_dim)
+        y, weight, model_index: shape (batch_size,)
+        """
+        batch_size = x.shape[0]
+        if weight is None:
+            weight = torch.ones_like(y)
+        assert x.shape == (
+            batch_size,
+            self._feature_dim,
+        ), f"x has shape {x.shape} != {(batch_size, self._feature_dim)}"
+        assert y.shape == (batch_size,), f"y has shape {y.shape} != {(batch_size,)}"
+        assert weight.shape == (
+            batch_size,
+        ), f"weight has shape {weight.shape} != {(batch_size,)}"
+        assert model_index.shape == (
+            batch_size,
+        ), f"model_index has shape {model_index.shape} != {(batch_size,)}"
+
+        device = self._A.device
+        x = LinearRegression.append_ones(x).to(device)
+        x_weighted = x * weight.to(device).unsqueeze(1)
+        model_index = model_index.to(device=device, dtype=torch.long)
+
+        models, models_A = self._sum_outer_products(x, x_weighted, model_index)
+        rows_b = x_weighted * y.to(device).unsqueeze(1)
+        rows_weight = weight.to(device)
+
+        if self.distribution_enabled:
+            delta_A = torch.zeros_like(self._A).index_add_(0, models, models_A)
+            delta_b = torch.zeros_like(self._b).index_add_(0, model_index, rows_b)
+            delta_sum_weight = torch.zeros_like(self._sum_weight).index_add_(
+                0, model_index, rows_weight
+            )
+            torch.distributed.all_reduce(delta_A)
+            torch.distributed.all_reduce(delta_b)
+            torch.distributed.all_reduce(delta_sum_weight)
+            self._A += delta_A
+            self._b += delta_b
+            self._sum_weight += delta_sum_weight
+            # other workers may have updated any model
+            self._outdated.fill_(True)
+        else:
+            # only the models present in the batch are touched
+            self._A.index_add_(0, models, models_A)
+            self._b.index_add_(0, model_index, rows_b)
+            self._sum_weight.index_add_(0, model_index, rows_weight)
+            self._outdated[model_index] = True
+
+        if not self._lazy_update:
+            self._refresh_coefs()  # update coefs after updating A and b
+
+    @staticmethod
+    def _sum_outer_products(
+        x: torch.Tensor, x_weighted: torch.Tensor, model_index: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Sums the outer products of the rows of `x` and `x_weighted` per model, with
+        one matrix product per model present in the batch, so that memory does not
+        grow with the batch size as with per row outer products.
+
+        Returns the models present in the batch, and the sum of the outer products
+        of the rows of every one of them, of shape
+        (number_of_models_present, feature_dim + 1, feature_dim + 1).
+        """
+        model_index, order = torch.sort(model_index, stable=True)
+        models, counts = torch.unique_consecutive(model_index, return_counts=True)
+        split_sizes = counts.tolist()
+        if len(split_sizes) == 0:
+            return models, x.new_zeros((0, x.shape[1], x.shape[1]))
+        models_A = torch.stack(
+            [
+                x_model.t() @ x_weighted_model
+                for x_model, x_weighted_model in zip(
+                    torch.split(x[order], split_sizes),
+                    torch.split(x_weighted[order], split_sizes),
+                )
+            ]
+        )
+        return models, models_A
+
+    @staticmethod
+    def batch_matrix_inv_fallback_pinv(A: torch.Tensor) -> torch.Tensor:
+        """
+        Batched version of `LinearRegression.matrix_inv_fallback_pinv`.
+        """
+        try:
+            inv_A = torch.linalg.inv(A).contiguous()
+        # pyre-ignore[16]: Module `_C` has no attribute `_LinAlgError`.
+        except torch._C._LinAlgError as e:
+            logger.warning(
+                "Exception raised during A inversion, falling back to pseudo-inverse",
+                e,
+            )
+            A_is_hermitian = torch.allclose(A, A.mT, atol=1e-4, rtol=1e-4)
+            inv_A = torch.linalg.pinv(A, hermitian=A_is_hermitian).contiguous()
+        return inv_A
+
+    def _refresh_coefs(self) -> None:
+        """
+        Recomputes the inverse of A and the coefficients of the outdated models,
+        with a single batched inversion.
+        """
+        models = torch.nonzero(self._outdated, as_tuple=True)[0]
+        if models.numel() == 0:
+            return
+        inv_A = self.batch_matrix_inv_fallback_pinv(self._A[models])
+        self._inv_A[models] = inv_A
+        self._coefs[models] = torch.matmul(
+            inv_A, self._b[models].unsqueeze(-1)
+        ).squeeze(-1)
+        self._outdated[models] = False
+
+    def calculate_coefs(self) -> None:
+        """
+        Calculate coefficients of all models based on current A and b.
+        """
+        self._outdated.fill_(True)
+        self._refresh_coefs()
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """
+        x: shape (..., num_models, feature_dim), the features of every model
+        return will be shape (..., num_models)
+        """
+        self._refresh_coefs()
+        x = LinearRegression.append_ones(x)
+        return torch.einsum("...nd,nd->...n", x, self._coefs)
+
+    def calculate_sigma(self, x: torch.Tensor) -> torch.Tensor:
+        """
+        x: shape (..., num_models, feature_dim), the features of every model
+        return will be shape (..., num_models)
+        """
+        self._refresh_coefs()
+        x = LinearRegression.append_ones(x)  # append a column of ones for intercept
+        return torch.sqrt(torch.einsum("...ni,nij,...nj->...n", x, self._inv_A, x))
+
+    def _save_to_state_dict(
+        self, destination: Dict[str, Any], prefix: str, keep_vars: bool
+    ) -> None:
+        self._refresh_coefs()
+        super(StackedLinearRegression, self)._save_to_state_dict(
+            destination, prefix, keep_vars
+        )
+
+    def __str__(self) -> str:
+        return f"StackedLinearRegression(A:\n{self._A}\nb:\n{self._b})"
+
+
+class StackedLinearRegressionModel(nn.Module):
+    """
+    A view of a single model of a `StackedLinearRegression`, with the interface of
+    `LinearRegression`. It holds no state of its own, so that it can be used
+    wherever a per model `LinearRegression` used to be.
+    """
+
+    def __init__(self, stacked: StackedLinearRegression, index: int) -> None:
+        super(StackedLinearRegressionModel, self).__init__()
+        # not registered as a submodule, the stacked regression is owned elsewhere
+        self.__dict__["_stacked"] = stacked
+        self._index = index
+
+    @property
+    def A(self) -> torch.Tensor:
+        return self._stacked.A[self._index]
+
+    @property
+    def coefs(self) -> torch.Tensor:
+        return self._stacked.coefs[self._index]
+
+    @property
+    def lazy_update(self) -> bool:
+        return self._stacked.lazy_update
+
+    def learn_batch(
+        self, x: torch.Tensor, y: torch.Tensor, weight: Optional[torch.Tensor]
+    ) -> None:
+        self._stacked.learn_batch(
+            x=x,
+            y=y,
+            weight=weight,
+            model_index=torch.full(
+                (x.shape[0],), self._index, dtype=torch.long, device=x.device
+            ),
+        )
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        x = LinearRegression.append_ones(x)
+        return torch.matmul(x, self.coefs)
+
+    def calculate_sigma(self, x: torch.Tensor) -> torch.Tensor:
+        self._stacked._refresh_coefs()
+        x = LinearRegression.append_ones(x)  # append a column of ones for intercept
+        return torch.sqrt(
+            LinearRegression.batch_quadratic_form(x, self._stacked._inv_A[self._index])
+        )
+
+    def __str__(self) -> str:
+        return f"StackedLinearRegressionModel({self._index} of {self._stacked})"
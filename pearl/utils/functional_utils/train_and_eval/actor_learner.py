@@ -0,0 +1,324 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+"""
+Asynchronous actor-learner training for off-policy agents.
+
+Actor processes interact with their own copy of the environment using a copy of the
+policy learner, and stream the transitions they collect to the learner (the calling
+process), which owns the replay buffer and learns continuously. The learner
+periodically publishes its weights into shared memory, from which the actors refresh
+their copy of the policy learner, so that gradient steps never block environment
+interaction.
+"""
+
+import copy
+import dataclasses
+import queue
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import torch
+import torch.multiprocessing as mp
+from pearl.api.environment import Environment
+from pearl.history_summarization_modules.identity_history_summarization_module import (
+    IdentityHistorySummarizationModule,
+)
+from pearl.pearl_agent import PearlAgent
+from pearl.policy_learners.policy_learner import PolicyLearner
+from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (  # noqa E501
+    FIFOOffPolicyReplayBuffer,
+)
+from pearl.replay_buffers.transition import TransitionBatch
+
+
+@dataclass
+class _ActorMessage:
+    """
+    A chunk of experience sent by an actor to the learner. Transitions are sent as
+    numpy arrays rather than tensors, which `torch.multiprocessing` would move to
+    shared memory owned by the actor, and which could not be received anymore once
+    the actor exits.
+    """
+
+    batch: Optional[Dict[str, np.ndarray]]
+    number_of_steps: int
+    episode_returns: List[float] = field(default_factory=list)
+
+    @staticmethod
+    def encode_batch(batch: TransitionBatch) -> Dict[str, np.ndarray]:
+        return {
+            f.name: getattr(batch, f.name).numpy(force=True)
+            for f in dataclasses.fields(batch)
+            if getattr(batch, f.name) is not None
+        }
+
+    def decode_batch(self) -> Optional[TransitionBatch]:
+        if self.batch is None:
+            return None
+        return TransitionBatch(
+            **{name: torch.from_numpy(value) for name, value in self.batch.items()}
+        )
+
+
+class SharedWeights:
+    """
+    A copy of the weights of a policy learner in shared memory, written by the
+    learner and read by the actors. Every write bumps a version number, so that
+    readers only copy weights which changed since their last read.
+    """
+
+    def __init__(self, policy_learner: PolicyLearner, context: Any) -> None:
+        self._state: Dict[str, torch.Tensor] = {
+            name: value.detach().cpu().clone().share_memory_()
+            for name, value in policy_learner.state_dict().items()
+        }
+        self._version: Any = context.Value("i", 0, lock=False)
+        self._lock: Any = context.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version.value
+
+    def publish(self, policy_learner: PolicyLearner) -> None:
+        with self._lock, torch.no_grad():
+            for name, value in policy_learner.state_dict().items():
+                self._state[name].copy_(value)
+            self._version.value += 1
+
+    def refresh(self, policy_learner: PolicyLearner, version: int) -> int:
+        """
+        Loads the shared weights into `policy_learner` if they are newer than
+        `version`, and returns the version of the weights it now holds.
+        """
+        if self._version.value == version:
+            return version
+        with self._lock:
+            policy_learner.load_state_dict(self._state)
+            return self._version.value
+
+
+def actor_learner_training(
+    agent: PearlAgent,
+    env_fn: Callable[[], Environment],
+    number_of_steps: int,
+    number_of_actors: int = 2,
+    send_every_x_steps: int = 32,
+    refresh_every_x_steps: int = 100,
+    publish_every_x_learn_calls: int = 1,
+    learning_starts: Optional[int] = None,
+    queue_size: int = 64,
+    seed: Optional[int] = None,
+    start_method: str = "spawn",
+) -> Dict[str, Any]:
+    """
+    Trains an off-policy agent (e.g. DQN, TD3 or SAC) with actor processes collecting
+    experience in parallel with learning, using `torch.multiprocessing`.
+
+    Every actor runs its own environment with a copy of `agent.policy_learner`, which
+    it refreshes from the learner's shared weights every `refresh_every_x_steps` of its
+    steps, and sends its transitions to the learner every `send_every_x_steps` steps.
+    The learner (the calling process) pushes them into `agent.replay_buffer` and calls
+    `agent.learn()` whenever it is not busy receiving transitions.
+
+    Args:
+        agent (PearlAgent): the agent to train, with an off-policy policy learner and a
+            replay buffer supporting `push_batch`.
+        env_fn (Callable[[], Environment]): creates the environment of an actor. It is
+            called in the actor processes, so it must be picklable.
+        number_of_steps (int): number of environment steps to run, summed over actors.
+        number_of_actors (int, optional): number of actor processes.
+        send_every_x_steps (int, optional): number of transitions actors send at once
+            (an episode end also sends the transitions collected so far).
+        refresh_every_x_steps (int, optional): number of steps between two refreshes of
+            the weights of an actor.
+        publish_every_x_learn_calls (int, optional): number of calls to `agent.learn()`
+            between two publications of the learner's weights.
+        learning_starts (int, optional): minimum number of transitions in the replay
+            buffer before learning. Defaults to the batch size of the policy learner.
+        queue_size (int, optional): maximum number of pending chunks of transitions;
+            actors wait for the learner when it is reached.
+        seed (int, optional): actor i seeds torch with `seed + i`, and resets its
+            environment at episode e with `seed + e * number_of_actors + i`, so that
+            actors never reset their environments with the same seed.
+        start_method (str, optional): multiprocessing start method of the actors.
+
+    Returns:
+        Dict[str, Any]: the returns of the episodes completed by the actors, in the
+            order received, and the number of calls to `agent.learn()`.
+    """
+    assert not agent.policy_learner.on_policy, "actors require off-policy learning"
+    assert isinstance(
+        agent.history_summarization_module, IdentityHistorySummarizationModule
+    ), "actors require states to be observations"
+    if learning_starts is None:
+        learning_starts = agent.policy_learner.batch_size
+
+    context = mp.get_context(start_method)
+    shared_weights = SharedWeights(agent.policy_learner, context)
+    actor_policy_learner = copy.deepcopy(agent.policy_learner).cpu()
+    transition_queue = context.Queue(maxsize=queue_size)
+    stop_event = context.Event()
+    actors = [
+        context.Process(
+            target=_actor_process,
+            args=(
+                seed,
+                i,
+                number_of_actors,
+                env_fn,
+                actor_policy_learner,
+                agent.replay_buffer.has_cost_available,
+                shared_weights,
+                transition_queue,
+                stop_event,
+                send_every_x_steps,
+                refresh_every_x_steps,
+            ),
+            daemon=True,
+        )
+        for i in range(number_of_actors)
+    ]
+    for actor in actors:
+        actor.start()
+
+    info: Dict[str, Any] = {"return": [], "learn_calls": 0}
+    total_steps = 0
+    try:
+        while total_steps < number_of_steps:
+            can_learn = len(agent.replay_buffer) >= learning_starts
+            # wait for experience only while there is nothing to learn from
+            messages = _receive(transition_queue, block=not can_learn)
+            for message in messages:
+                batch = message.decode_batch()
+                if batch is not None:
+                    agent.replay_buffer.push_batch(batch)
+                total_steps += message.number_of_steps
+                info["return"].extend(message.episode_returns)
+            if not can_learn:
+                continue
+            agent.learn()
+            info["learn_calls"] += 1
+            if info["learn_calls"] % publish_every_x_learn_calls == 0:
+                shared_weights.publish(agent.policy_learner)
+    finally:
+        stop_event.set()
+        # actors may be waiting to put transitions into a full queue
+        while any(actor.is_alive() for actor in actors):
+            _receive(transition_queue, block=False)
+            for actor in actors:
+                actor.join(timeout=0.01)
+    return info
+
+
+def _receive(transition_queue: Any, block: bool) -> List[_ActorMessage]:
+    """
+    Returns all pending messages, waiting for at least one if `block` is True.
+    """
+    messages = []
+    try:
+        if block:
+            messages.append(transition_queue.get(timeout=1.0))
+        while True:
+            messages.append(transition_queue.get_nowait())
+    except queue.Empty:
+        pass
+    return messages
+
+
+def _episode_seed(
+    seed: Optional[int], actor_index: int, number_of_actors: int, episode: int
+) -> Optional[int]:
+    """
+    The seed of the environment of an actor at an episode. Seeds of consecutive
+    episodes are `number_of_actors` apart, which interleaves the seeds of all actors.
+    """
+    if seed is None:
+        return None
+    return seed + episode * number_of_actors + actor_index
+
+
+def _actor_process(
+    seed: Optional[int],
+    actor_index: int,
+    number_of_actors: int,
+    env_fn: Callable[[], Environment],
+    policy_learner: PolicyLearner,
+    has_cost_available: bool,
+    shared_weights: SharedWeights,
+    transition_queue: Any,
+    stop_event: Any,
+    send_every_x_steps: int,
+    refresh_every_x_steps: int,
+) -> None:
+    if seed is not None:
+        torch.manual_seed(seed + actor_index)
+    # actors only run inference, which gains nothing from intra-op parallelism
+    torch.set_num_threads(1)
+    env = env_fn()
+    # transitions are collected in a local buffer and sent together
+    replay_buffer = FIFOOffPolicyReplayBuffer(
+        capacity=send_every_x_steps, has_cost_available=has_cost_available
+    )
+    agent = PearlAgent(policy_learner=policy_learner, replay_buffer=replay_buffer)
+    version = shared_weights.refresh(agent.policy_learner, -1)
+
+    def send(episode_returns: List[float]) -> None:
+        transitions = list(replay_buffer.memory)
+        replay_buffer.clear()
+        message = _ActorMessage(
+            batch=(
+                _ActorMessage.encode_batch(
+                    replay_buffer._create_transition_batch(
+                        transitions=transitions,  # pyre-ignore[6]
+                        has_next_state=True,
+                        has_next_action=False,
+                        is_action_continuous=replay_buffer.is_action_continuous,
+                        has_next_available_actions=True,
+                        has_cost_available=has_cost_available,
+                    )
+                )
+                if len(transitions) > 0
+                else None
+            ),
+            number_of_steps=len(transitions),
+            episode_returns=episode_returns,
+        )
+        while not stop_event.is_set():
+            try:
+                transition_queue.put(message, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    steps = 0
+    episode = 0
+    try:
+        while not stop_event.is_set():
+            observation, action_space = env.reset(
+                seed=_episode_seed(seed, actor_index, number_of_actors, episode)
+            )
+            episode += 1
+            agent.reset(observation, action_space)
+            episode_return = 0.0
+            done = False
+            while not done and not stop_event.is_set():
+                action = agent.act(exploit=False)
+                action_result = env.step(action.cpu())
+                agent.observe(action_result)
+                episode_return += float(action_result.reward)
+                done = action_result.done
+                steps += 1
+                if steps % refresh_every_x_steps == 0:
+                    version = shared_weights.refresh(agent.policy_learner, version)
+                if done:
+                    send([episode_return])
+                elif len(replay_buffer) >= send_every_x_steps:
+                    send([])
+    finally:
+        env.close()
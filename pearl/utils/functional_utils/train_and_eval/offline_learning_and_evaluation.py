@@ -5,23 +5,36 @@
 # LICENSE file in the root directory of this source tree.
 #
 
+import copy
 import io
 import os
 
-from typing import List, Optional
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
 
 import requests
 import torch
 
 from pearl.api.environment import Environment
+from pearl.history_summarization_modules.identity_history_summarization_module import (
+    IdentityHistorySummarizationModule,
+)
 from pearl.pearl_agent import PearlAgent
+from pearl.replay_buffers.prefetching_batch_loader import PrefetchingBatchLoader
 from pearl.replay_buffers.replay_buffer import ReplayBuffer
+from pearl.replay_buffers.sharded_transition_dataset import (
+    is_sharded_transition_dataset,
+    ShardedTransitionDataset,
+)
 from pearl.replay_buffers.sequential_decision_making.fifo_off_policy_replay_buffer import (
     FIFOOffPolicyReplayBuffer,
 )
+from pearl.replay_buffers.tensor_based_replay_buffer import TensorBasedReplayBuffer
 from pearl.replay_buffers.transition import TransitionBatch
 from pearl.utils.functional_utils.experimentation.set_seed import set_seed
 from pearl.utils.functional_utils.train_and_eval.online_learning import run_episode
+from pearl.utils.functional_utils.train_and_eval.parallel_evaluation import (
+    parallel_evaluation,
+)
 from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 
 
@@ -46,6 +59,14 @@ def get_offline_data_in_buffer(
     - Also assumes offline data is in a .pt file; reading from a
         csv file can also be added later.
 
+    - Transitions are stacked and stored with a single `push_batch` call into a
+        replay buffer with columnar storage, instead of being pushed one by one.
+        Batches are sampled without replacement.
+
+    - If data_path is a sharded transition dataset (see `create_offline_data` with
+        `shard_size`), it is memory-mapped instead of being loaded, and batches are
+        sampled directly from disk; `size` is then ignored.
+
     Args:
         is_action_continuous: whether the action space is continuous or discrete.
             for continuous actions spaces, we need to set this flag; see 'push' method
@@ -55,8 +76,17 @@ def get_offline_data_in_buffer(
         size: size of the replay buffer
 
     Returns:
-        ReplayBuffer: a FIFOOffPolicyReplayBuffer containing offline data of transition tuples.
+        ReplayBuffer: a FIFOOffPolicyReplayBuffer containing offline data of transition tuples,
+            or a ShardedTransitionDataset.
     """
+    if (
+        url is None
+        and data_path is not None
+        and os.path.isdir(data_path)
+        and is_sharded_transition_dataset(data_path)
+    ):
+        return ShardedTransitionDataset(data_path)
+
     if url is not None:
         offline_transitions_data = requests.get(
             url,
@@ -66,40 +96,126 @@ def get_offline_data_in_buffer(
     else:
         raw_transitions_buffer = torch.load(data_path)  # pyre-ignore
 
-    offline_data_replay_buffer = FIFOOffPolicyReplayBuffer(size)
+    # batches of distinct transitions, as sampled from the deque of transitions
+    offline_data_replay_buffer = FIFOOffPolicyReplayBuffer(
+        size, use_columnar_storage=True, sample_with_replacement=False
+    )
     if is_action_continuous:
         offline_data_replay_buffer._is_action_continuous = True
 
-    for transition in raw_transitions_buffer:
-        if transition["curr_available_actions"].__class__.__name__ == "Discrete":
-            transition["curr_available_actions"] = DiscreteActionSpace(
-                actions=list(
-                    torch.arange(transition["curr_available_actions"].n).view(-1, 1)
+    offline_data_replay_buffer.push_batch(
+        raw_transitions_to_batch(raw_transitions_buffer, offline_data_replay_buffer)
+    )
+
+    return offline_data_replay_buffer
+
+
+def raw_transitions_to_batch(
+    raw_transitions_buffer: Iterable[Dict[str, Any]],
+    replay_buffer: TensorBasedReplayBuffer,
+) -> TransitionBatch:
+    """
+    Stacks raw transition tuples (see `get_offline_data_in_buffer`) into a single
+    `TransitionBatch`. Offline datasets typically share a handful of action spaces
+    across all transitions, so padded available actions and their masks are only
+    computed once per distinct action space, identified by content, and gathered
+    for all transitions at once.
+    """
+    # action space objects seen so far, by id, with their content key; the objects
+    # are kept alive so that ids are not reused for other objects
+    keys_by_id: Dict[int, Tuple[Any, Hashable]] = {}
+    # content key -> index of the action set in `action_sets`
+    indices_by_key: Dict[Hashable, int] = {}
+    action_sets: List[Tuple[Optional[torch.Tensor], Optional[torch.Tensor]]] = []
+
+    def _action_set_index(action_space: Any, max_number_actions: Optional[int]) -> int:
+        entry = keys_by_id.get(id(action_space))
+        if entry is None:
+            entry = (action_space, _action_space_key(action_space))
+            keys_by_id[id(action_space)] = entry
+        key = (entry[1], max_number_actions)
+        index = indices_by_key.get(key)
+        if index is None:
+            if action_space.__class__.__name__ == "Discrete":
+                action_space = DiscreteActionSpace(
+                    actions=list(torch.arange(action_space.n).view(-1, 1))
                 )
-            )
-        if transition["next_available_actions"].__class__.__name__ == "Discrete":
-            transition["next_available_actions"] = DiscreteActionSpace(
-                actions=list(
-                    torch.arange(transition["next_available_actions"].n).view(-1, 1)
+            index = len(action_sets)
+            indices_by_key[key] = index
+            action_sets.append(
+                replay_buffer._create_action_tensor_and_mask(
+                    max_number_actions, action_space
                 )
             )
-        if transition["action_space"].__class__.__name__ == "Discrete":
-            transition["action_space"] = DiscreteActionSpace(
-                actions=list(torch.arange(transition["action_space"].n).view(-1, 1))
-            )
+        return index
+
+    states, actions, rewards, next_states, dones = [], [], [], [], []
+    curr_action_sets, next_action_sets = [], []
+    for transition in raw_transitions_buffer:
+        states.append(torch.as_tensor(transition["observation"]))
+        actions.append(torch.as_tensor(transition["action"]))
+        rewards.append(float(transition["reward"]))
+        next_states.append(torch.as_tensor(transition["next_observation"]))
+        dones.append(bool(transition["done"]))
 
-        offline_data_replay_buffer.push(
-            transition["observation"],
-            transition["action"],
-            transition["reward"],
-            transition["next_observation"],
-            transition["curr_available_actions"],
-            transition["next_available_actions"],
-            transition["done"],
-            transition["action_space"].n,
+        if "action_space" in transition:
+            max_number_actions = transition["action_space"].n
+        else:
+            max_number_actions = transition.get("max_number_actions")
+        curr_action_sets.append(
+            _action_set_index(transition["curr_available_actions"], max_number_actions)
+        )
+        next_action_sets.append(
+            _action_set_index(transition["next_available_actions"], max_number_actions)
         )
 
-    return offline_data_replay_buffer
+    def _gather_if_available(
+        tensors: List[Optional[torch.Tensor]], indices: List[int]
+    ) -> Optional[torch.Tensor]:
+        if any(t is None for t in tensors):
+            return None
+        return torch.cat(tensors)[torch.tensor(indices)]  # pyre-ignore[6]
+
+    available_actions = [action_set[0] for action_set in action_sets]
+    unavailable_actions_masks = [action_set[1] for action_set in action_sets]
+    return TransitionBatch(
+        state=torch.stack(states),
+        action=torch.stack(actions),
+        reward=torch.tensor(rewards),
+        next_state=torch.stack(next_states),
+        curr_available_actions=_gather_if_available(
+            available_actions, curr_action_sets
+        ),
+        curr_unavailable_actions_mask=_gather_if_available(
+            unavailable_actions_masks, curr_action_sets
+        ),
+        next_available_actions=_gather_if_available(
+            available_actions, next_action_sets
+        ),
+        next_unavailable_actions_mask=_gather_if_available(
+            unavailable_actions_masks, next_action_sets
+        ),
+        done=torch.tensor(dones),
+    )
+
+
+def _action_space_key(action_space: Any) -> Hashable:
+    """
+    Identifies an action space of raw transitions by content: gym `Discrete` spaces
+    by their number of actions, and Pearl action spaces by their actions.
+    """
+    if action_space.__class__.__name__ == "Discrete":
+        return ("Discrete", int(action_space.n))
+    if isinstance(action_space, DiscreteActionSpace):
+        actions = action_space.actions_batch.detach().cpu().contiguous()
+        return (
+            "DiscreteActionSpace",
+            tuple(actions.shape),
+            str(actions.dtype),
+            actions.numpy().tobytes(),
+        )
+    # other (e.g. continuous) action spaces have no padded available actions
+    return (action_space.__class__.__name__,)
 
 
 def offline_learning(
@@ -107,6 +223,8 @@ def offline_learning(
     data_buffer: ReplayBuffer,
     training_epochs: int = 1000,
     seed: int = 100,
+    num_prefetch_workers: int = 0,
+    prefetch_batches: int = 4,
 ) -> None:
     """
     Trains the offline agent using transition tuples from offline data (provided in
@@ -117,19 +235,43 @@ def offline_learning(
         offline agent: a conservative learning agent (CQL or IQL).
         data_buffer: a replay buffer to sample a batch of transition data.
         training_epochs: number of training epochs for offline learning.
+        num_prefetch_workers: if positive, batches are sampled ahead of learning by
+            a `PrefetchingBatchLoader` with this many threads, and its throughput is
+            reported along with the training loss.
+        prefetch_batches: number of batches sampled ahead of learning, when
+            prefetching.
     """
     set_seed(seed=seed)
 
     # move replay buffer to device of the offline agent
     data_buffer.device = offline_agent.device
 
+    batch_size = offline_agent.policy_learner.batch_size
+    loader = (
+        PrefetchingBatchLoader(
+            data_buffer,
+            batch_size,
+            device=offline_agent.device,
+            num_workers=num_prefetch_workers,
+            prefetch_batches=prefetch_batches,
+        )
+        if num_prefetch_workers > 0
+        else None
+    )
+
     # training loop
-    for i in range(training_epochs):
-        batch = data_buffer.sample(offline_agent.policy_learner.batch_size)
-        assert isinstance(batch, TransitionBatch)
-        loss = offline_agent.learn_batch(batch=batch)
-        if i % 500 == 0:
-            print("training epoch", i, "training loss", loss)
+    try:
+        for i in range(training_epochs):
+            batch = data_buffer.sample(batch_size) if loader is None else next(loader)
+            assert isinstance(batch, TransitionBatch)
+            loss = offline_agent.learn_batch(batch=batch)
+            if i % 500 == 0:
+                print("training epoch", i, "training loss", loss)
+                if loader is not None:
+                    print("batch loader", loader.stats())
+    finally:
+        if loader is not None:
+            loader.close()
 
 
 def offline_evaluation(
@@ -137,6 +279,7 @@ def offline_evaluation(
     env: Environment,
     number_of_episodes: int = 1000,
     seed: Optional[int] = None,
+    num_workers: int = 1,
 ) -> List[float]:
     """
     Evaluates the performance of an offline trained agent.
@@ -145,9 +288,24 @@ def offline_evaluation(
         agent: the offline trained agent.
         env: the environment to evaluate the agent in
         number_of_episodes: the number of episodes to evaluate for.
+        num_workers: if larger than 1, episodes are run by this many copies of `env`
+            (made with `copy.deepcopy`), with batched action selection (see
+            `parallel_evaluation`). Returns are the same for any number of workers
+            when a seed is given. Agents summarizing histories (e.g. with an LSTM)
+            are always evaluated one episode at a time, since batched action
+            selection requires states to be observations.
     Returns:
         returns_offline_agent: a list of returns for each evaluation episode.
     """
+    if num_workers > 1 and isinstance(
+        offline_agent.history_summarization_module, IdentityHistorySummarizationModule
+    ):
+        return parallel_evaluation(
+            agent=offline_agent,
+            env_fns=[lambda: copy.deepcopy(env)] * num_workers,
+            number_of_episodes=number_of_episodes,
+            seed=seed,
+        )["return"]
 
     # check: during offline evaluation, the agent should not learn or explore.
     learn = False
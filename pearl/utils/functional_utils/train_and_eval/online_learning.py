@@ -11,10 +11,21 @@ from typing import Any, Dict, List, Optional, Tuple
 import matplotlib.pyplot as plt
 import numpy as np
 import torch
+from pearl.api.action_space import ActionSpace
 from pearl.api.environment import Environment
 from pearl.api.reward import Value
+from pearl.history_summarization_modules.identity_history_summarization_module import (
+    IdentityHistorySummarizationModule,
+)
 from pearl.pearl_agent import PearlAgent
+from pearl.replay_buffers.tensor_based_replay_buffer import TensorBasedReplayBuffer
+from pearl.replay_buffers.transition import TransitionBatch
 from pearl.utils.functional_utils.experimentation.plots import fontsize_for
+from pearl.utils.instantiations.environments.vector_environment import (
+    VectorActionResult,
+    VectorEnvironment,
+)
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
 
 MA_WINDOW_SIZE = 10
 
@@ -281,3 +292,146 @@ def run_episode(
         info.update({"return_cost": cum_cost})
 
     return info, episode_steps
+
+
+def vector_online_learning(
+    agent: PearlAgent,
+    env: VectorEnvironment,
+    number_of_steps: int,
+    learn: bool = True,
+    learn_every_x_steps: int = 1,
+    exploit: bool = False,
+    print_every_x_steps: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Performs online learning with a vectorized environment. At every step, the
+    actions of all sub-environments are chosen with a single call to
+    `PearlAgent.act_batch`, and the resulting transitions are pushed into the
+    replay buffer with a single call to `push_batch`.
+
+    Since sub-environments are stepped together, the agent must not summarize
+    histories (its states are the observations) and the action space must be static.
+
+    Args:
+        agent (PearlAgent): the agent.
+        env (VectorEnvironment): the vectorized environment.
+        number_of_steps (int): the number of environment steps to run, summed over
+            all sub-environments.
+        learn (bool, optional): whether to learn. Defaults to True.
+        learn_every_x_steps (int, optional): runs `agent.learn()` once every this many
+            vectorized steps (each of which is `env.num_envs` environment steps).
+        exploit (bool, optional): asks the agent to only exploit. Defaults to False.
+        print_every_x_steps (int, optional): prints progress every this many
+            environment steps.
+        seed (int, optional): seed of the first reset of the sub-environments.
+
+    Returns:
+        Dict[str, Any]: the returns (and costs, if any) of the episodes, in the order
+            in which they ended.
+    """
+    assert isinstance(
+        agent.history_summarization_module, IdentityHistorySummarizationModule
+    ), "vectorized online learning requires states to be observations"
+    assert learn_every_x_steps >= 1
+    action_space = env.action_space
+    agent.policy_learner.reset(action_space)
+    observation = env.reset(seed=seed)
+    episode_return = np.zeros(env.num_envs)
+    episode_cost = np.zeros(env.num_envs)
+    info: Dict[str, List[Any]] = {"return": []}
+    total_steps = 0
+    vector_steps = 0
+    while total_steps < number_of_steps:
+        state = torch.as_tensor(observation, device=agent.device)
+        action_indices = agent.act_batch(state, action_space, exploit=exploit)
+        if isinstance(action_space, DiscreteActionSpace):
+            action = action_space.actions_batch.to(agent.device)[action_indices]
+        else:
+            action = action_indices
+        # as in `run_episode`, environments are stepped with the action indices
+        action_result = env.step(action_indices)
+
+        done = action_result.done
+        episode_return += action_result.reward
+        if action_result.cost is not None:
+            episode_cost += action_result.cost
+        for i in np.nonzero(done)[0]:
+            info["return"].append(episode_return[i])
+            if action_result.cost is not None:
+                info.setdefault("return_cost", []).append(episode_cost[i])
+        episode_return[done] = 0
+        episode_cost[done] = 0
+
+        if learn:
+            agent.replay_buffer.push_batch(
+                _vector_step_to_transition_batch(
+                    agent, state, action, action_space, action_result
+                )
+            )
+        observation = action_result.observation
+
+        old_total_steps = total_steps
+        total_steps += env.num_envs
+        vector_steps += 1
+        if learn and vector_steps % learn_every_x_steps == 0:
+            agent.learn()
+        if (
+            print_every_x_steps is not None
+            and old_total_steps // print_every_x_steps
+            < total_steps // print_every_x_steps
+        ):
+            print(
+                f"step {total_steps}, episodes {len(info['return'])}, agent={agent}, "
+                f"env={env}",
+            )
+            if len(info["return"]) > 0:
+                print(f"return: {latest_moving_average(info['return'])}")
+    return info
+
+
+def _vector_step_to_transition_batch(
+    agent: PearlAgent,
+    state: torch.Tensor,
+    action: torch.Tensor,
+    action_space: ActionSpace,
+    action_result: VectorActionResult,
+) -> TransitionBatch:
+    """
+    Assembles the transitions of one step of a vectorized environment, in the format
+    expected by `ReplayBuffer.push_batch`.
+    """
+    device = state.device
+    batch_size = state.shape[0]
+    available_actions, unavailable_actions_mask = None, None
+    if not agent.policy_learner.is_action_continuous:
+        replay_buffer = agent.replay_buffer
+        assert isinstance(replay_buffer, TensorBasedReplayBuffer)
+        # the action space is static, so the padded available actions (and their
+        # mask) are the same for all rows, and for current and next states
+        (
+            available_actions,
+            unavailable_actions_mask,
+        ) = replay_buffer._create_action_tensor_and_mask(
+            agent.policy_learner.action_representation_module.max_number_actions,
+            action_space,
+        )
+        if available_actions is not None and unavailable_actions_mask is not None:
+            available_actions = available_actions.expand(batch_size, -1, -1)
+            unavailable_actions_mask = unavailable_actions_mask.expand(batch_size, -1)
+    return TransitionBatch(
+        state=state,
+        action=action,
+        reward=torch.as_tensor(action_result.reward, device=device),
+        next_state=torch.as_tensor(action_result.final_observation, device=device),
+        curr_available_actions=available_actions,
+        curr_unavailable_actions_mask=unavailable_actions_mask,
+        next_available_actions=available_actions,
+        next_unavailable_actions_mask=unavailable_actions_mask,
+        done=torch.as_tensor(action_result.done, device=device),
+        cost=(
+            None
+            if action_result.cost is None
+            else torch.as_tensor(action_result.cost, device=device)
+        ),
+    )
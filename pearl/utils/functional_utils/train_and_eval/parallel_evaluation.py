@@ -0,0 +1,252 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+"""
+Evaluation of an agent over many episodes, run by several environment workers
+whose exploit actions are chosen together, with one batched call to the policy per
+step.
+
+Episode i is always reset with seed `seed + i`, whichever worker runs it, and
+results are reported in the order of episodes, so that evaluation results do not
+depend on the number of workers.
+"""
+
+import multiprocessing
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import torch
+from pearl.api.action_result import ActionResult
+from pearl.api.action_space import ActionSpace
+from pearl.api.environment import Environment
+from pearl.api.observation import Observation
+from pearl.history_summarization_modules.identity_history_summarization_module import (
+    IdentityHistorySummarizationModule,
+)
+from pearl.pearl_agent import PearlAgent
+from pearl.safety_modules.identity_safety_module import IdentitySafetyModule
+from pearl.utils.instantiations.environments.vector_environment import (
+    _environment_worker,
+    _stack_observations,
+)
+
+
+class _EpisodeWorker(ABC):
+    """
+    Runs episodes in an environment. Commands are sent and their results received
+    separately, so that workers in other processes run commands in parallel.
+    """
+
+    @property
+    @abstractmethod
+    def action_space(self) -> ActionSpace:
+        pass
+
+    @abstractmethod
+    def send_reset(self, seed: Optional[int]) -> None:
+        """Resets the environment, whose first observation is then received."""
+        pass
+
+    @abstractmethod
+    def send_step(self, action: torch.Tensor) -> None:
+        """Steps the environment, whose action result is then received."""
+        pass
+
+    @abstractmethod
+    def recv(self) -> Any:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+
+class _LocalEpisodeWorker(_EpisodeWorker):
+    """Runs episodes in an environment of the current process."""
+
+    def __init__(self, env_fn: Callable[[], Environment]) -> None:
+        super(_LocalEpisodeWorker, self).__init__()
+        self.env: Environment = env_fn()
+        self._result: Any = None
+
+    @property
+    def action_space(self) -> ActionSpace:
+        return self.env.action_space
+
+    def send_reset(self, seed: Optional[int]) -> None:
+        self._result = self.env.reset(seed=seed)[0]
+
+    def send_step(self, action: torch.Tensor) -> None:
+        self._result = self.env.step(action)
+
+    def recv(self) -> Any:
+        return self._result
+
+    def close(self) -> None:
+        self.env.close()
+
+
+class _ProcessEpisodeWorker(_EpisodeWorker):
+    """Runs episodes in an environment of a worker process."""
+
+    def __init__(
+        self, env_fn: Callable[[], Environment], start_method: Optional[str] = None
+    ) -> None:
+        super(_ProcessEpisodeWorker, self).__init__()
+        context = multiprocessing.get_context(start_method)
+        self._remote, worker_remote = context.Pipe()
+        self._process: multiprocessing.process.BaseProcess = context.Process(
+            target=_environment_worker,
+            args=(worker_remote, self._remote, env_fn),
+            daemon=True,
+        )
+        self._process.start()
+        worker_remote.close()
+
+    @property
+    def action_space(self) -> ActionSpace:
+        self._remote.send(("action_space", None))
+        return self._remote.recv()
+
+    def send_reset(self, seed: Optional[int]) -> None:
+        self._remote.send(("reset", seed))
+
+    def send_step(self, action: torch.Tensor) -> None:
+        self._remote.send(("step_without_reset", action))
+
+    def recv(self) -> Any:
+        return self._remote.recv()
+
+    def close(self) -> None:
+        self._remote.send(("close", None))
+        self._process.join()
+        self._remote.close()
+
+
+def _get_batched_exploit_policy(
+    agent: PearlAgent, action_space: ActionSpace
+) -> Callable[[torch.Tensor], torch.Tensor]:
+    """
+    Returns a function choosing the exploit actions of a batch of states, with a
+    frozen copy of the exploit path of the policy learner if it supports one (see
+    `PolicyLearner.get_exploit_policy`) and no safety module filters actions, and
+    with `PearlAgent.act_batch` otherwise.
+    """
+    if isinstance(agent.safety_module, IdentitySafetyModule):
+        try:
+            exploit_policy = agent.policy_learner.get_exploit_policy(action_space)
+        except NotImplementedError:
+            pass
+        else:
+            return lambda states: exploit_policy(states.to(agent.device))
+    return lambda states: agent.act_batch(states, action_space, exploit=True)
+
+
+def parallel_evaluation(
+    agent: PearlAgent,
+    env_fns: Sequence[Callable[[], Environment]],
+    number_of_episodes: int,
+    seed: Optional[int] = None,
+    asynchronous: bool = False,
+    start_method: Optional[str] = None,
+) -> Dict[str, List[Any]]:
+    """
+    Evaluates the exploit policy of an agent over `number_of_episodes` episodes,
+    run by one worker per environment. Each worker runs one episode at a time and
+    starts the next episode that has not been started yet when its episode ends.
+    At every step, the actions of all running episodes are chosen with a single
+    batched call to the policy.
+
+    Since episodes are stepped together, the agent must not summarize histories
+    (its states are the observations) and the action space of the environments
+    must be static.
+
+    Args:
+        agent: the agent to evaluate, which neither learns nor explores.
+        env_fns: functions creating the environment of each worker.
+        number_of_episodes: the number of episodes to evaluate for.
+        seed: if given, episode i is reset with seed `seed + i`.
+        asynchronous: whether to step the environments of the workers in worker
+            processes, in parallel, instead of sequentially in this process. The
+            environment functions must then be picklable, unless processes are
+            forked.
+        start_method: multiprocessing start method of the worker processes, the
+            platform default if None.
+
+    Returns:
+        Dict[str, List[Any]]: the return ("return") and the number of steps
+            ("length") of every episode, in the order of episodes.
+    """
+    assert isinstance(
+        agent.history_summarization_module, IdentityHistorySummarizationModule
+    ), "parallel evaluation requires states to be observations"
+    number_of_workers = min(len(env_fns), number_of_episodes)
+    workers: List[_EpisodeWorker] = [
+        (
+            _ProcessEpisodeWorker(env_fn, start_method)
+            if asynchronous
+            else _LocalEpisodeWorker(env_fn)
+        )
+        for env_fn in env_fns[:number_of_workers]
+    ]
+    returns: List[Any] = [0.0] * number_of_episodes
+    lengths: List[int] = [0] * number_of_episodes
+    try:
+        if number_of_workers == 0:
+            return {"return": [], "length": []}
+        action_space = workers[0].action_space
+        policy = _get_batched_exploit_policy(agent, action_space)
+
+        # the episode run by every worker, if any, and its latest observation
+        episodes: List[Optional[int]] = [None] * number_of_workers
+        observations: List[Optional[Observation]] = [None] * number_of_workers
+        next_episode = 0
+
+        def start_episodes(worker_indices: Sequence[int]) -> None:
+            nonlocal next_episode
+            started = []
+            for i in worker_indices:
+                if next_episode < number_of_episodes:
+                    episodes[i] = next_episode
+                    workers[i].send_reset(None if seed is None else seed + next_episode)
+                    started.append(i)
+                    next_episode += 1
+                else:
+                    episodes[i] = None
+            for i in started:
+                observations[i] = workers[i].recv()
+
+        start_episodes(range(number_of_workers))
+        while True:
+            running = [i for i in range(number_of_workers) if episodes[i] is not None]
+            if len(running) == 0:
+                break
+            states = torch.as_tensor(
+                _stack_observations([observations[i] for i in running])
+            )
+            # as in `run_episode`, environments are stepped with the indices of
+            # discrete actions
+            with torch.no_grad():
+                actions = policy(states).cpu()
+            for i, action in zip(running, actions):
+                workers[i].send_step(action)
+            ended = []
+            for i in running:
+                action_result: ActionResult = workers[i].recv()
+                episode = episodes[i]
+                assert episode is not None
+                returns[episode] += action_result.reward
+                lengths[episode] += 1
+                observations[i] = action_result.observation
+                if action_result.done:
+                    ended.append(i)
+            start_episodes(ended)
+    finally:
+        for worker in workers:
+            worker.close()
+
+    return {"return": returns, "length": lengths}
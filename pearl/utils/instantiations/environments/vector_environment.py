@@ -0,0 +1,412 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+"""
+Vectorized environments step several copies of an environment at once, so that data
+collection can use batched action selection (`PearlAgent.act_batch`) and run the
+environments themselves in parallel worker processes.
+
+Every vectorized environment automatically resets the sub-environments whose episode
+ended: the observation returned by `step` is then the first observation of the new
+episode, while `final_observation` holds the observation that ended the episode.
+"""
+
+import multiprocessing
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any, Callable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+from pearl.api.action_result import ActionResult
+from pearl.api.action_space import ActionSpace
+from pearl.api.environment import Environment
+from pearl.api.observation import Observation
+from pearl.utils.instantiations.environments.gym_environment import (
+    _get_pearl_space,
+    GYM_TO_PEARL_ACTION_SPACE,
+)
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+try:
+    import gymnasium as gym
+except ModuleNotFoundError:
+    import gym
+
+
+@dataclass
+class VectorActionResult:
+    """
+    The results of one step of all the sub-environments of a `VectorEnvironment`,
+    stacked along the first dimension.
+
+    `observation` is the observation to act on next: for sub-environments whose
+    episode ended, it is the first observation of the new episode. The observation
+    reached by the step itself is in `final_observation`.
+    """
+
+    observation: np.ndarray
+    final_observation: np.ndarray
+    reward: np.ndarray
+    terminated: np.ndarray
+    truncated: np.ndarray
+    cost: Optional[np.ndarray] = None
+
+    @property
+    def done(self) -> np.ndarray:
+        return np.logical_or(self.terminated, self.truncated)
+
+
+class VectorEnvironment(ABC):
+    """
+    An abstract interface for a batch of `num_envs` independent copies of an
+    environment with a shared, static action space, which are stepped together
+    and reset automatically when their episode ends.
+    """
+
+    @property
+    @abstractmethod
+    def num_envs(self) -> int:
+        pass
+
+    @property
+    @abstractmethod
+    def action_space(self) -> ActionSpace:
+        """Returns the action space of every sub-environment."""
+        pass
+
+    @abstractmethod
+    def reset(self, seed: Optional[int] = None) -> np.ndarray:
+        """
+        Resets all sub-environments and returns their stacked initial observations.
+        Sub-environment i is seeded with `seed + i` when a seed is given.
+        """
+        pass
+
+    @abstractmethod
+    def step(self, actions: torch.Tensor) -> VectorActionResult:
+        """
+        Steps every sub-environment with its action, and resets the ones whose
+        episode ended. As with `Environment.step`, the actions of discrete action
+        spaces are their indices in the action space, of shape (num_envs,) (as
+        returned by `PearlAgent.act_batch`), and other actions are given by value,
+        with shape (num_envs, action_dim).
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Closes all sub-environments. Default implementation does nothing.
+        """
+        return None
+
+    def __str__(self) -> str:
+        return f"{type(self).__name__}({self.num_envs})"
+
+
+class GymVectorEnvironment(VectorEnvironment):
+    """
+    A wrapper for `gym.vector.SyncVectorEnv` and `gym.vector.AsyncVectorEnv` to
+    behave like a Pearl `VectorEnvironment`.
+    """
+
+    def __init__(
+        self,
+        env_or_env_name: Union[str, Callable[[], gym.Env]],
+        num_envs: int,
+        asynchronous: bool = False,
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        """Constructs a `GymVectorEnvironment`.
+
+        Args:
+            env_or_env_name: name of a gym.Env, or a function creating a gym.Env.
+            num_envs: number of sub-environments.
+            asynchronous: whether to step the sub-environments in worker processes
+                (`AsyncVectorEnv`) instead of sequentially (`SyncVectorEnv`).
+            args: Arguments passed to `gym.make()` if the first argument is a string.
+            kwargs: Keyword arguments passed to `gym.make()` if the first argument
+                is a string.
+        """
+        if isinstance(env_or_env_name, str):
+            env_name = env_or_env_name
+
+            def env_fn() -> gym.Env:
+                return gym.make(env_name, *args, **kwargs)
+
+        else:
+            env_fn = env_or_env_name
+        vector_env_cls = (
+            gym.vector.AsyncVectorEnv if asynchronous else gym.vector.SyncVectorEnv
+        )
+        vector_env_kwargs = {}
+        if hasattr(gym.vector, "AutoresetMode"):
+            # newer Gym versions reset on the next step by default
+            vector_env_kwargs["autoreset_mode"] = gym.vector.AutoresetMode.SAME_STEP
+        self.env: gym.vector.VectorEnv = vector_env_cls(
+            [env_fn] * num_envs, **vector_env_kwargs
+        )
+        self._num_envs = num_envs
+        self._action_space: ActionSpace = _get_pearl_space(
+            gym_space=self.env.single_action_space,
+            gym_to_pearl_map=GYM_TO_PEARL_ACTION_SPACE,
+        )
+
+    @property
+    def num_envs(self) -> int:
+        return self._num_envs
+
+    @property
+    def action_space(self) -> ActionSpace:
+        return self._action_space
+
+    def reset(self, seed: Optional[int] = None) -> np.ndarray:
+        observation, _ = self.env.reset(seed=seed)
+        return _as_float32(observation)
+
+    def step(self, actions: torch.Tensor) -> VectorActionResult:
+        if isinstance(self._action_space, DiscreteActionSpace):
+            # Gym expects the values of discrete actions, which start at the `start`
+            # of its space
+            actions = self._action_space.actions_batch[
+                actions.cpu().long().view(self._num_envs)
+            ]
+            actions = actions.numpy(force=True).reshape(self._num_envs)
+            actions = actions.astype(np.int64)
+        else:
+            actions = actions.numpy(force=True)
+        observation, reward, terminated, truncated, info = self.env.step(actions)
+        observation = _as_float32(observation)
+        done = np.logical_or(terminated, truncated)
+        final_observation = observation.copy()
+        if done.any():
+            # the key changed across Gym versions
+            key = "final_obs" if "final_obs" in info else "final_observation"
+            for i in np.nonzero(done)[0]:
+                final_observation[i] = info[key][i]
+        cost = info.get("cost")
+        return VectorActionResult(
+            observation=observation,
+            final_observation=final_observation,
+            reward=np.asarray(reward, dtype=np.float32),
+            terminated=np.asarray(terminated, dtype=bool),
+            truncated=np.asarray(truncated, dtype=bool),
+            cost=None if cost is None else np.asarray(cost, dtype=np.float32),
+        )
+
+    def close(self) -> None:
+        self.env.close()
+
+    def __str__(self) -> str:
+        spec = self.env.get_attr("spec")[0]
+        return f"{spec.id}({self._num_envs})" if spec is not None else str(self.env)
+
+
+class _PearlVectorEnvironmentBase(VectorEnvironment):
+    """
+    Base class of vectorized environments made of Pearl `Environment`s. Subclasses
+    only implement how the sub-environments are reset and stepped.
+    """
+
+    def __init__(self, num_envs: int, action_space: ActionSpace) -> None:
+        self._num_envs = num_envs
+        self._action_space = action_space
+
+    @property
+    def num_envs(self) -> int:
+        return self._num_envs
+
+    @property
+    def action_space(self) -> ActionSpace:
+        return self._action_space
+
+    @abstractmethod
+    def _reset_all(self, seed: Optional[int]) -> List[Observation]:
+        pass
+
+    @abstractmethod
+    def _step_all(
+        self, actions: torch.Tensor
+    ) -> List[Tuple[ActionResult, Optional[Observation]]]:
+        """
+        Returns the action result of every sub-environment, together with the
+        first observation of its next episode if its episode ended.
+        """
+        pass
+
+    def reset(self, seed: Optional[int] = None) -> np.ndarray:
+        return _stack_observations(self._reset_all(seed))
+
+    def step(self, actions: torch.Tensor) -> VectorActionResult:
+        results = self._step_all(actions.cpu())
+        final_observations = [result.observation for result, _ in results]
+        observations = [
+            result.observation if reset_observation is None else reset_observation
+            for result, reset_observation in results
+        ]
+        costs = [result.cost for result, _ in results]
+        return VectorActionResult(
+            observation=_stack_observations(observations),
+            final_observation=_stack_observations(final_observations),
+            reward=np.asarray([result.reward for result, _ in results], np.float32),
+            terminated=np.asarray([result.terminated for result, _ in results], bool),
+            truncated=np.asarray([result.truncated for result, _ in results], bool),
+            cost=(
+                None
+                if any(cost is None for cost in costs)
+                else np.asarray(costs, dtype=np.float32)
+            ),
+        )
+
+
+class SyncVectorEnvironment(_PearlVectorEnvironmentBase):
+    """
+    Steps Pearl environments one after another in the current process.
+    Mostly useful for testing, or for environments cheaper than inter-process
+    communication.
+    """
+
+    def __init__(self, env_fns: Sequence[Callable[[], Environment]]) -> None:
+        """
+        Args:
+            env_fns: functions creating each of the sub-environments.
+        """
+        self.envs: List[Environment] = [env_fn() for env_fn in env_fns]
+        super(SyncVectorEnvironment, self).__init__(
+            num_envs=len(self.envs), action_space=self.envs[0].action_space
+        )
+
+    def _reset_all(self, seed: Optional[int]) -> List[Observation]:
+        return [
+            env.reset(seed=None if seed is None else seed + i)[0]
+            for i, env in enumerate(self.envs)
+        ]
+
+    def _step_all(
+        self, actions: torch.Tensor
+    ) -> List[Tuple[ActionResult, Optional[Observation]]]:
+        return [
+            _step_and_auto_reset(env, action) for env, action in zip(self.envs, actions)
+        ]
+
+    def close(self) -> None:
+        for env in self.envs:
+            env.close()
+
+
+class SubprocVectorEnvironment(_PearlVectorEnvironmentBase):
+    """
+    Runs each Pearl environment in its own worker process, and steps them all in
+    parallel.
+    """
+
+    def __init__(
+        self,
+        env_fns: Sequence[Callable[[], Environment]],
+        start_method: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            env_fns: functions creating each of the sub-environments. They are called
+                in the worker processes, and must be picklable unless the processes
+                are forked.
+            start_method: multiprocessing start method of the worker processes
+                (e.g. "fork", "spawn"), the platform default if None.
+        """
+        context = multiprocessing.get_context(start_method)
+        self._remotes: List[Connection] = []
+        self._processes: List[multiprocessing.process.BaseProcess] = []
+        for env_fn in env_fns:
+            remote, worker_remote = context.Pipe()
+            process = context.Process(
+                target=_environment_worker,
+                args=(worker_remote, remote, env_fn),
+                daemon=True,
+            )
+            process.start()
+            worker_remote.close()
+            self._remotes.append(remote)
+            self._processes.append(process)
+        self._closed = False
+        self._remotes[0].send(("action_space", None))
+        super(SubprocVectorEnvironment, self).__init__(
+            num_envs=len(self._remotes), action_space=self._remotes[0].recv()
+        )
+
+    def _reset_all(self, seed: Optional[int]) -> List[Observation]:
+        for i, remote in enumerate(self._remotes):
+            remote.send(("reset", None if seed is None else seed + i))
+        return [remote.recv() for remote in self._remotes]
+
+    def _step_all(
+        self, actions: torch.Tensor
+    ) -> List[Tuple[ActionResult, Optional[Observation]]]:
+        for remote, action in zip(self._remotes, actions):
+            remote.send(("step", action))
+        return [remote.recv() for remote in self._remotes]
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        for remote in self._remotes:
+            remote.send(("close", None))
+        for process in self._processes:
+            process.join()
+        for remote in self._remotes:
+            remote.close()
+        self._closed = True
+
+
+def _environment_worker(
+    remote: Connection,
+    parent_remote: Connection,
+    env_fn: Callable[[], Environment],
+) -> None:
+    parent_remote.close()
+    env = env_fn()
+    try:
+        while True:
+            command, data = remote.recv()
+            if command == "step":
+                remote.send(_step_and_auto_reset(env, data))
+            elif command == "step_without_reset":
+                remote.send(env.step(data))
+            elif command == "reset":
+                remote.send(env.reset(seed=data)[0])
+            elif command == "action_space":
+                remote.send(env.action_space)
+            elif command == "close":
+                break
+            else:
+                raise ValueError(f"Unknown command {command}")
+    finally:
+        env.close()
+        remote.close()
+
+
+def _step_and_auto_reset(
+    env: Environment, action: torch.Tensor
+) -> Tuple[ActionResult, Optional[Observation]]:
+    action_result = env.step(action)
+    if action_result.done:
+        reset_observation, _ = env.reset()
+        return action_result, reset_observation
+    return action_result, None
+
+
+def _as_float32(observation: np.ndarray) -> np.ndarray:
+    if observation.dtype == np.float64:
+        return observation.astype(np.float32)
+    return observation
+
+
+def _stack_observations(observations: Sequence[Observation]) -> np.ndarray:
+    return _as_float32(
+        np.stack([np.asarray(torch.as_tensor(o).cpu()) for o in observations])
+    )
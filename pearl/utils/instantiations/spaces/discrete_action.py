@@ -9,7 +9,7 @@ from __future__ import annotations
 
 import logging
 
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import torch
 from pearl.api.action import Action
@@ -68,6 +68,17 @@ class DiscreteActionSpace(DiscreteSpace, ActionSpace):
             validated_actions.append(action)
         self.elements = validated_actions
 
+    @property
+    def elements(self) -> List[Tensor]:
+        return self._elements
+
+    @elements.setter
+    def elements(self, elements: List[Tensor]) -> None:
+        self._elements = elements
+        self._actions_batch: Optional[Tensor] = None
+        # the actions, and their versions, the cached batch was stacked from
+        self._actions_batch_sources: List[Tuple[Tensor, int]] = []
+
     @property
     def actions(self) -> List[Action]:
         """Returns the list of possible `Action` objects."""
@@ -76,8 +87,25 @@ class DiscreteActionSpace(DiscreteSpace, ActionSpace):
     @property
     def actions_batch(self) -> Tensor:
         """Returns a tensor of shape `(b, d)` with each row corresponding to an
-        `Action` object from this action space."""
-        return torch.stack(self.actions, dim=0)
+        `Action` object from this action space.
+
+        The stacked tensor is cached until actions are replaced or modified in
+        place, and is shared by all callers, so it must not be modified in place."""
+        actions = self.actions
+        sources = self._actions_batch_sources
+        if (
+            self._actions_batch is None
+            or len(sources) != len(actions)
+            or any(
+                source is not action or version != action._version
+                for (source, version), action in zip(sources, actions)
+            )
+        ):
+            self._actions_batch = torch.stack(actions, dim=0)
+            self._actions_batch_sources = [
+                (action, action._version) for action in actions
+            ]
+        return self._actions_batch
 
     @property
     def action_dim(self) -> int:
@@ -0,0 +1,132 @@
+# Copyright (c) Meta Platforms, Inc. and affiliates.
+# All rights reserved.
+#
+# This source code is licensed under the MIT license found in the
+# LICENSE file in the root directory of this source tree.
+#
+
+"""
+Compares the latency of choosing exploit actions with `PearlAgent.act` (eager) to
+the latency of compiled exploit policies (see
+pearl/utils/functional_utils/inference/compiled_policy.py).
+To run the code, enter the pearl directory, then run
+python -m pearl.utils.scripts.benchmark_inference --policy_learner dqn
+"""
+
+import argparse
+import warnings
+from typing import Callable, Dict, List
+
+import torch
+from pearl.action_representation_modules.one_hot_action_representation_module import (
+    OneHotActionTensorRepresentationModule,
+)
+from pearl.pearl_agent import PearlAgent
+from pearl.policy_learners.policy_learner import PolicyLearner
+from pearl.policy_learners.sequential_decision_making.deep_q_learning import (
+    DeepQLearning,
+)
+from pearl.policy_learners.sequential_decision_making.td3 import TD3
+from pearl.utils.functional_utils.inference.compiled_policy import (
+    compile_exploit_policy,
+    measure_latency,
+    TORCH_COMPILE,
+    TORCHSCRIPT,
+)
+from pearl.utils.instantiations.spaces.box_action import BoxActionSpace
+from pearl.utils.instantiations.spaces.discrete_action import DiscreteActionSpace
+
+warnings.filterwarnings("ignore")
+
+
+def make_policy_learner(
+    name: str, state_dim: int, number_of_actions: int, hidden_dims: List[int]
+) -> PolicyLearner:
+    if name == "dqn":
+        return DeepQLearning(
+            state_dim=state_dim,
+            action_space=DiscreteActionSpace(
+                actions=list(torch.arange(number_of_actions).view(-1, 1))
+            ),
+            hidden_dims=hidden_dims,
+            action_representation_module=OneHotActionTensorRepresentationModule(
+                max_number_actions=number_of_actions
+            ),
+        )
+    elif name == "td3":
+        return TD3(
+            state_dim=state_dim,
+            action_space=BoxActionSpace(
+                low=-torch.ones(number_of_actions), high=torch.ones(number_of_actions)
+            ),
+            actor_hidden_dims=hidden_dims,
+            critic_hidden_dims=hidden_dims,
+        )
+    raise ValueError(f"Unknown policy learner {name}")
+
+
+def benchmark(
+    policy_learner_name: str,
+    state_dim: int,
+    number_of_actions: int,
+    hidden_dims: List[int],
+    backends: List[str],
+    number_of_runs: int,
+) -> Dict[str, Dict[str, float]]:
+    policy_learner = make_policy_learner(
+        policy_learner_name, state_dim, number_of_actions, hidden_dims
+    )
+    action_space = policy_learner._action_space
+    agent = PearlAgent(policy_learner=policy_learner)
+    observation = torch.randn(state_dim)
+    agent.reset(observation, action_space)
+
+    candidates: Dict[str, Callable[[], object]] = {
+        "eager": lambda: agent.act(exploit=True)
+    }
+    history = observation.unsqueeze(0)
+    for backend in backends:
+        compiled_policy = compile_exploit_policy(
+            policy_learner, history, action_space, backend=backend
+        )
+        candidates[backend] = lambda compiled_policy=compiled_policy: compiled_policy(
+            history
+        )
+
+    results = {}
+    with torch.no_grad():
+        for name, fn in candidates.items():
+            results[name] = measure_latency(fn, number_of_runs=number_of_runs)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--policy_learner", choices=["dqn", "td3"], default="dqn")
+    parser.add_argument("--state_dim", type=int, default=16)
+    parser.add_argument("--number_of_actions", type=int, default=8)
+    parser.add_argument("--hidden_dims", type=int, nargs="+", default=[256, 256])
+    parser.add_argument(
+        "--backends",
+        nargs="+",
+        choices=[TORCHSCRIPT, TORCH_COMPILE],
+        default=[TORCHSCRIPT, TORCH_COMPILE],
+    )
+    parser.add_argument("--number_of_runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = benchmark(
+        policy_learner_name=args.policy_learner,
+        state_dim=args.state_dim,
+        number_of_actions=args.number_of_actions,
+        hidden_dims=args.hidden_dims,
+        backends=args.backends,
+        number_of_runs=args.number_of_runs,
+    )
+    eager_p50 = results["eager"]["p50_us"]
+    for name, latency in results.items():
+        print(
+            f"{name:>12}: p50 {latency['p50_us']:8.1f} us, "
+            f"p99 {latency['p99_us']:8.1f} us "
+            f"(p50 speedup {eager_p50 / latency['p50_us']:.2f}x)"
+        )